@@ -1,17 +1,18 @@
 import csv
-import json
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
+import sys
 import random
 from pathlib import Path
 
+import numpy as np
+
 # Load environment variables from .env file
 load_dotenv()
 
-# Create results directory if it doesn't exist
-RESULTS_DIR = Path("backtesting/results")
-RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+# Make the project root importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # Debug: Print environment variables
 print("Environment variables:")
@@ -26,8 +27,10 @@ from trading_bot.strategy.main_strategy import MainStrategy
 from trading_bot.risk.manager import RiskManager
 from trading_bot.execution.paper_gateway import PaperExecutionGateway
 from trading_bot.broker.api_wrapper import ShoonyaAPIWrapper
+from backtesting.performance_metrics import executions_to_arrays, pair_round_trips, summarize
+from backtesting.results_store import ResultStore, executions_to_columns
 from loguru import logger
-from typing import Generator, List, Dict
+from typing import Generator, List, Dict, Optional, Sequence
 
 # Symbol mapping for indices
 SYMBOL_MAP = {
@@ -112,49 +115,39 @@ def generate_mock_data(
         
         current_dt += timedelta(minutes=interval_minutes)
 
-def save_results(trades: List[Dict], start_time: str, end_time: str):
+def save_results(trades: List[Dict], start_time: str, end_time: str,
+                 path_price: Optional[Sequence[float]] = None,
+                 path_index: Optional[Sequence[int]] = None,
+                 params: Optional[Dict] = None,
+                 store: Optional[ResultStore] = None) -> str:
     """
-    Save backtest results to files.
+    Save backtest results to the result store.
     
     Args:
         trades (List[Dict]): List of execution events
         start_time (str): Backtest start time
         end_time (str): Backtest end time
+        path_price (Optional[Sequence[float]]): Price of every bar fed to the backtest
+        path_index (Optional[Sequence[int]]): Bar index at which each execution happened
+        params (Optional[Dict]): Parameters the run was made with, for later queries
+        store (Optional[ResultStore]): Store to append to. Defaults to the results directory store.
+        
+    Returns:
+        str: Run id of the saved run
     """
-    # Create timestamp for unique filenames
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # Create timestamp for unique run id; microseconds keep back-to-back sweep runs apart
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
     
-    # Save detailed trade data to CSV
-    csv_path = RESULTS_DIR / f"trades_{timestamp}.csv"
-    with open(csv_path, 'w', newline='') as csvfile:
-        fieldnames = ['timestamp', 'symbol', 'status', 'filled_quantity', 'avg_fill_price', 'broker_order_id']
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        for trade in trades:
-            writer.writerow({
-                'timestamp': trade.timestamp,
-                'symbol': trade.symbol,
-                'status': trade.status,
-                'filled_quantity': trade.filled_quantity,
-                'avg_fill_price': trade.avg_fill_price,
-                'broker_order_id': trade.broker_order_id
-            })
-    
-    # Calculate and save metrics to JSON
-    metrics = calculate_metrics(trades)
+    metrics = calculate_metrics(trades, path_price, path_index)
     metrics.update({
         'start_time': start_time,
         'end_time': end_time,
         'run_timestamp': timestamp
     })
     
-    json_path = RESULTS_DIR / f"metrics_{timestamp}.json"
-    with open(json_path, 'w') as jsonfile:
-        json.dump(metrics, jsonfile, indent=4)
-    
-    logger.info(f"Results saved to:")
-    logger.info(f"  - Trade details: {csv_path}")
-    logger.info(f"  - Metrics summary: {json_path}")
+    store = store or ResultStore()
+    run_id = store.append_run(executions_to_columns(trades), metrics, params=params, run_id=timestamp)
+    logger.info(f"Results saved to {store.db_path} as run {run_id}")
     
     # Print summary to console
     print("\nBacktest Results Summary:")
@@ -162,56 +155,33 @@ def save_results(trades: List[Dict], start_time: str, end_time: str):
     print(f"Total P&L: {metrics['total_pnl']:.2f}")
     print(f"Win rate: {metrics['win_rate']:.2f}%")
     print(f"Average profit per trade: {metrics['avg_profit_per_trade']:.2f}")
+    return run_id
 
-def calculate_metrics(trades: List[Dict]) -> Dict:
+def calculate_metrics(trades: List[Dict],
+                      path_price: Optional[Sequence[float]] = None,
+                      path_index: Optional[Sequence[int]] = None) -> Dict:
     """
     Calculate performance metrics from trades.
     
     Args:
         trades (List[Dict]): List of execution events
+        path_price (Optional[Sequence[float]]): Price path for MAE/MFE
+        path_index (Optional[Sequence[int]]): Bar index of each execution in the path
         
     Returns:
         Dict: Dictionary containing performance metrics
     """
-    if not trades:
-        return {
-            "total_trades": 0,
-            "total_pnl": 0,
-            "win_rate": 0,
-            "avg_profit_per_trade": 0,
-            "max_drawdown": 0
-        }
-    
-    # For now, we'll calculate basic metrics
-    # TODO: Add more sophisticated calculations like drawdown, Sharpe ratio, etc.
-    total_trades = len(trades)
-    
-    # Calculate P&L based on entry and exit pairs
-    pnl = 0
-    winning_trades = 0
-    current_position = 0
-    entry_price = 0
-    
-    for trade in trades:
-        if trade.filled_quantity > 0:  # Entry
-            current_position = trade.filled_quantity
-            entry_price = trade.avg_fill_price
-        elif trade.filled_quantity < 0:  # Exit
-            trade_pnl = (entry_price - trade.avg_fill_price) * abs(trade.filled_quantity)
-            pnl += trade_pnl
-            if trade_pnl > 0:
-                winning_trades += 1
-            current_position = 0
-            entry_price = 0
-    
-    metrics = {
-        "total_trades": total_trades,
-        "total_pnl": pnl,
-        "win_rate": (winning_trades / (total_trades/2)) * 100 if trades else 0,  # Divide by 2 since each trade is entry+exit
-        "avg_profit_per_trade": pnl / (total_trades/2) if trades else 0,
-        # TODO: Add more sophisticated metrics like Sharpe ratio, max drawdown, etc.
-    }
-    
+    columns = executions_to_arrays(trades)
+    round_trips = pair_round_trips(
+        columns['timestamp'], columns['price'], columns['quantity'],
+        columns['is_entry'], columns['direction']
+    )
+    metrics = summarize(
+        round_trips,
+        path_price=np.asarray(path_price) if path_price is not None else None,
+        path_index=np.asarray(path_index) if path_index is not None else None
+    )
+    metrics['total_executions'] = len(trades)
     return metrics
 
 def run_backtest():
@@ -220,6 +190,7 @@ def run_backtest():
     """
     start_time = '2024-07-01 09:15:00'
     end_time = '2024-07-01 15:30:00'
+    params = {'symbol': 'NIFTY', 'interval': '1m', 'data': 'mock'}
     
     event_queue = EventQueue()
     signal_queue = EventQueue()
@@ -231,6 +202,8 @@ def run_backtest():
     execution_gateway = PaperExecutionGateway(order_queue, execution_queue)
 
     trades = []
+    path_price = []
+    path_index = []
 
     for event in generate_mock_data(
         symbol='NIFTY',
@@ -238,6 +211,7 @@ def run_backtest():
         end=end_time,
         interval='1m'
     ):
+        path_price.append(event.price)
         event_queue.put(event)
         execution_gateway.on_market_event(event)
 
@@ -250,10 +224,11 @@ def run_backtest():
         if not execution_queue.empty():
             exec_event = execution_queue.get()
             trades.append(exec_event)
+            path_index.append(len(path_price) - 1)
             logger.info(f"[Backtest] ExecutionEvent: {exec_event}")
 
     # Save and display results
-    save_results(trades, start_time, end_time)
+    save_results(trades, start_time, end_time, path_price, path_index, params=params)
 
 if __name__ == '__main__':
     run_backtest() 
\ No newline at end of file
@@ -0,0 +1,412 @@
+"""
+Vectorized trade analytics for backtest results.
+
+Every function works on NumPy arrays so a sweep with hundreds of thousands of
+trades is summarized in milliseconds. The runner and the dashboard both build
+their metrics from here.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+TRADING_DAYS_PER_YEAR = 252
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+
+def executions_to_arrays(executions: Iterable[Any]) -> Dict[str, np.ndarray]:
+    """
+    Convert ExecutionEvents into columnar arrays.
+
+    An execution is treated as an entry when its info carries ``entry``; anything
+    else closes the most recent entry. The side of the entry sets the direction.
+
+    Args:
+        executions (Iterable[Any]): ExecutionEvent objects in time order.
+
+    Returns:
+        Dict[str, np.ndarray]: timestamp, price, quantity, direction and is_entry columns.
+    """
+    executions = list(executions)
+    infos = [e.info or {} for e in executions]
+    return {
+        'timestamp': np.array([e.timestamp for e in executions], dtype='datetime64[us]'),
+        'price': np.array([e.avg_fill_price or 0.0 for e in executions], dtype=np.float64),
+        'quantity': np.array([abs(e.filled_quantity or 0) for e in executions], dtype=np.float64),
+        'direction': np.array([-1 if i.get('side') in ('SELL', 'SHORT') else 1 for i in infos], dtype=np.int8),
+        'is_entry': np.array([bool(i.get('entry')) for i in infos], dtype=bool),
+    }
+
+
+def pair_round_trips(
+    timestamp: np.ndarray,
+    price: np.ndarray,
+    quantity: np.ndarray,
+    is_entry: np.ndarray,
+    direction: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Pair each entry fill with the first exit fill that follows it.
+
+    Exits with no open entry and repeated exits against the same entry are ignored.
+
+    Args:
+        timestamp (np.ndarray): Fill times (datetime64).
+        price (np.ndarray): Fill prices.
+        quantity (np.ndarray): Absolute fill quantities.
+        is_entry (np.ndarray): True where the fill opens a position.
+        direction (Optional[np.ndarray]): +1 long, -1 short, per fill. Defaults to long.
+
+    Returns:
+        Dict[str, np.ndarray]: Round-trip columns including ``pnl``, ``entry_idx`` and ``exit_idx``.
+    """
+    is_entry = np.asarray(is_entry, dtype=bool)
+    n = is_entry.size
+    if direction is None:
+        direction = np.ones(n, dtype=np.int8)
+    idx = np.arange(n)
+    last_entry = np.maximum.accumulate(np.where(is_entry, idx, -1)) if n else idx
+    exit_mask = ~is_entry & (last_entry >= 0)
+    exit_idx = idx[exit_mask]
+    entry_idx = last_entry[exit_mask]
+    # entry_idx is non-decreasing, so the first exit of each entry is where it changes
+    first = np.flatnonzero(np.diff(entry_idx, prepend=-1) != 0)
+    exit_idx = exit_idx[first]
+    entry_idx = entry_idx[first]
+
+    entry_price = np.asarray(price, dtype=np.float64)[entry_idx]
+    exit_price = np.asarray(price, dtype=np.float64)[exit_idx]
+    qty = np.asarray(quantity, dtype=np.float64)[entry_idx]
+    sign = np.asarray(direction)[entry_idx]
+    return {
+        'entry_idx': entry_idx,
+        'exit_idx': exit_idx,
+        'entry_time': np.asarray(timestamp)[entry_idx],
+        'exit_time': np.asarray(timestamp)[exit_idx],
+        'entry_price': entry_price,
+        'exit_price': exit_price,
+        'quantity': qty,
+        'direction': sign,
+        'pnl': (exit_price - entry_price) * qty * sign,
+    }
+
+
+def drawdown_series(equity: np.ndarray) -> Tuple[np.ndarray, float, int]:
+    """
+    Compute the drawdown of an equity curve.
+
+    Args:
+        equity (np.ndarray): Equity (or cumulative P&L) points.
+
+    Returns:
+        Tuple[np.ndarray, float, int]: Drawdown per point (<= 0), maximum drawdown as a
+        positive amount, and the longest stretch of points spent below a high-water mark.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    if equity.size == 0:
+        return equity, 0.0, 0
+    drawdown = equity - np.maximum.accumulate(equity)
+    underwater = drawdown < 0
+    # Length of each underwater run via the positions where runs start and stop
+    edges = np.diff(np.concatenate(([0], underwater.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    longest = int((stops - starts).max()) if starts.size else 0
+    return drawdown, float(-drawdown.min()), longest
+
+
+def daily_pnl(exit_time: np.ndarray, pnl: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum trade P&L per calendar day of exit.
+
+    Args:
+        exit_time (np.ndarray): Exit times (datetime64).
+        pnl (np.ndarray): P&L per trade.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Days (datetime64[D]) and P&L per day.
+    """
+    days, inverse = np.unique(np.asarray(exit_time).astype('datetime64[D]'), return_inverse=True)
+    return days, np.bincount(inverse.ravel(), weights=pnl, minlength=days.size)
+
+
+def sharpe_ratio(returns: np.ndarray, periods_per_year: int = TRADING_DAYS_PER_YEAR,
+                 risk_free: float = 0.0) -> float:
+    """
+    Annualized Sharpe ratio of periodic returns (or P&L).
+
+    Args:
+        returns (np.ndarray): Periodic returns.
+        periods_per_year (int): Periods per year used to annualize.
+        risk_free (float): Risk-free return per period.
+
+    Returns:
+        float: Sharpe ratio, 0.0 when undefined.
+    """
+    excess = np.asarray(returns, dtype=np.float64) - risk_free
+    if excess.size < 2:
+        return 0.0
+    std = excess.std(ddof=1)
+    return float(excess.mean() / std * np.sqrt(periods_per_year)) if std > 0 else 0.0
+
+
+def sortino_ratio(returns: np.ndarray, periods_per_year: int = TRADING_DAYS_PER_YEAR,
+                  risk_free: float = 0.0) -> float:
+    """
+    Annualized Sortino ratio, penalizing only downside deviation.
+
+    Args:
+        returns (np.ndarray): Periodic returns.
+        periods_per_year (int): Periods per year used to annualize.
+        risk_free (float): Risk-free return per period.
+
+    Returns:
+        float: Sortino ratio, 0.0 when undefined.
+    """
+    excess = np.asarray(returns, dtype=np.float64) - risk_free
+    if excess.size < 2:
+        return 0.0
+    downside = np.sqrt(np.mean(np.minimum(excess, 0.0) ** 2))
+    return float(excess.mean() / downside * np.sqrt(periods_per_year)) if downside > 0 else 0.0
+
+
+def calmar_ratio(returns: np.ndarray, max_drawdown: float,
+                 periods_per_year: int = TRADING_DAYS_PER_YEAR) -> float:
+    """
+    Annualized return divided by maximum drawdown.
+
+    Args:
+        returns (np.ndarray): Periodic returns (same units as the drawdown).
+        max_drawdown (float): Maximum drawdown as a positive amount.
+        periods_per_year (int): Periods per year used to annualize.
+
+    Returns:
+        float: Calmar ratio, 0.0 when there was no drawdown.
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if returns.size == 0 or max_drawdown <= 0:
+        return 0.0
+    return float(returns.mean() * periods_per_year / max_drawdown)
+
+
+def excursions(
+    path_price: np.ndarray,
+    entry_idx: np.ndarray,
+    exit_idx: np.ndarray,
+    entry_price: np.ndarray,
+    direction: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Maximum adverse and favourable excursion of each trade over a price path.
+
+    Args:
+        path_price (np.ndarray): Price path the trades were held over.
+        entry_idx (np.ndarray): Path index at entry, per trade.
+        exit_idx (np.ndarray): Path index at exit (inclusive), per trade.
+        entry_price (np.ndarray): Entry price per trade.
+        direction (np.ndarray): +1 long, -1 short, per trade.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: MAE (<= 0) and MFE (>= 0) in price points.
+    """
+    path_price = np.asarray(path_price, dtype=np.float64)
+    if len(entry_idx) == 0:
+        empty = np.zeros(0)
+        return empty, empty
+    # reduceat over [entry, exit] pairs; the padding keeps exit + 1 a valid index
+    padded = np.append(path_price, path_price[-1])
+    bounds = np.empty(2 * len(entry_idx), dtype=np.intp)
+    bounds[0::2] = entry_idx
+    bounds[1::2] = np.asarray(exit_idx) + 1
+    lows = np.minimum.reduceat(padded, bounds)[0::2]
+    highs = np.maximum.reduceat(padded, bounds)[0::2]
+    long = np.asarray(direction) > 0
+    mae = np.where(long, lows - entry_price, entry_price - highs)
+    mfe = np.where(long, highs - entry_price, entry_price - lows)
+    return np.minimum(mae, 0.0), np.maximum(mfe, 0.0)
+
+
+def pnl_by_hour(times: np.ndarray, pnl: np.ndarray) -> np.ndarray:
+    """
+    Sum P&L by hour of day.
+
+    Args:
+        times (np.ndarray): Trade times (datetime64).
+        pnl (np.ndarray): P&L per trade.
+
+    Returns:
+        np.ndarray: 24 buckets of P&L, index = hour.
+    """
+    hours = np.asarray(times).astype('datetime64[h]').astype(np.int64) % 24
+    return np.bincount(hours, weights=pnl, minlength=24)
+
+
+def pnl_by_weekday(times: np.ndarray, pnl: np.ndarray) -> np.ndarray:
+    """
+    Sum P&L by weekday.
+
+    Args:
+        times (np.ndarray): Trade times (datetime64).
+        pnl (np.ndarray): P&L per trade.
+
+    Returns:
+        np.ndarray: 7 buckets of P&L, index 0 = Monday.
+    """
+    # 1970-01-01 was a Thursday
+    weekdays = (np.asarray(times).astype('datetime64[D]').astype(np.int64) + 3) % 7
+    return np.bincount(weekdays, weights=pnl, minlength=7)
+
+
+def streaks(pnl: np.ndarray) -> Tuple[int, int]:
+    """
+    Longest run of consecutive winning and losing trades.
+
+    Args:
+        pnl (np.ndarray): P&L per trade in time order.
+
+    Returns:
+        Tuple[int, int]: (longest winning streak, longest losing streak).
+    """
+    sign = np.sign(np.asarray(pnl, dtype=np.float64)).astype(np.int8)
+    if sign.size == 0:
+        return 0, 0
+    run_starts = np.flatnonzero(np.concatenate(([True], sign[1:] != sign[:-1])))
+    run_lengths = np.diff(np.append(run_starts, sign.size))
+    run_signs = sign[run_starts]
+    wins = run_lengths[run_signs > 0]
+    losses = run_lengths[run_signs < 0]
+    return (int(wins.max()) if wins.size else 0, int(losses.max()) if losses.size else 0)
+
+
+def expectancy(pnl: np.ndarray) -> Dict[str, float]:
+    """
+    Win rate, average win/loss, profit factor and expectancy per trade.
+
+    Args:
+        pnl (np.ndarray): P&L per trade.
+
+    Returns:
+        Dict[str, float]: Trade quality statistics.
+    """
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if pnl.size == 0:
+        return {'win_rate': 0.0, 'avg_win': 0.0, 'avg_loss': 0.0, 'profit_factor': 0.0, 'expectancy': 0.0}
+    wins = pnl[pnl > 0]
+    losses = pnl[pnl < 0]
+    win_rate = wins.size / pnl.size
+    avg_win = float(wins.mean()) if wins.size else 0.0
+    avg_loss = float(losses.mean()) if losses.size else 0.0
+    gross_loss = -losses.sum()
+    return {
+        'win_rate': win_rate * 100,
+        'avg_win': avg_win,
+        'avg_loss': avg_loss,
+        'profit_factor': float(wins.sum() / gross_loss) if gross_loss > 0 else 0.0,
+        'expectancy': win_rate * avg_win + (1 - win_rate) * avg_loss,
+    }
+
+
+def summarize(
+    round_trips: Dict[str, np.ndarray],
+    path_price: Optional[np.ndarray] = None,
+    path_index: Optional[np.ndarray] = None,
+    periods_per_year: int = TRADING_DAYS_PER_YEAR
+) -> Dict[str, Any]:
+    """
+    Compute the full metric set for a backtest run.
+
+    Ratios are computed on daily P&L. MAE/MFE are only added when the price path
+    the fills were taken from is given.
+
+    Args:
+        round_trips (Dict[str, np.ndarray]): Output of ``pair_round_trips``.
+        path_price (Optional[np.ndarray]): Price path for excursion metrics.
+        path_index (Optional[np.ndarray]): Path index of every fill. Defaults to the
+            fill index itself, i.e. one fill per path point.
+        periods_per_year (int): Periods per year used to annualize ratios.
+
+    Returns:
+        Dict[str, Any]: JSON-serializable metrics.
+    """
+    pnl = np.asarray(round_trips['pnl'], dtype=np.float64)
+    equity = np.concatenate(([0.0], np.cumsum(pnl)))
+    _, max_drawdown, drawdown_trades = drawdown_series(equity)
+    _, per_day = daily_pnl(round_trips['exit_time'], pnl) if pnl.size else (None, np.zeros(0))
+    longest_win, longest_loss = streaks(pnl)
+    quality = expectancy(pnl)
+
+    metrics: Dict[str, Any] = {
+        'total_trades': int(pnl.size),
+        'total_pnl': float(pnl.sum()),
+        'win_rate': quality['win_rate'],
+        'avg_profit_per_trade': float(pnl.mean()) if pnl.size else 0.0,
+        'max_drawdown': max_drawdown,
+        'max_drawdown_trades': drawdown_trades,
+        'sharpe_ratio': sharpe_ratio(per_day, periods_per_year),
+        'sortino_ratio': sortino_ratio(per_day, periods_per_year),
+        'calmar_ratio': calmar_ratio(per_day, max_drawdown, periods_per_year),
+        'avg_win': quality['avg_win'],
+        'avg_loss': quality['avg_loss'],
+        'profit_factor': quality['profit_factor'],
+        'expectancy': quality['expectancy'],
+        'longest_win_streak': longest_win,
+        'longest_loss_streak': longest_loss,
+        'pnl_by_hour': pnl_by_hour(round_trips['exit_time'], pnl).tolist() if pnl.size else [0.0] * 24,
+        'pnl_by_weekday': dict(zip(WEEKDAYS, pnl_by_weekday(round_trips['exit_time'], pnl).tolist()
+                                   if pnl.size else [0.0] * 7)),
+    }
+    if path_price is not None and pnl.size:
+        entry_idx, exit_idx = round_trips['entry_idx'], round_trips['exit_idx']
+        if path_index is not None:
+            entry_idx, exit_idx = path_index[entry_idx], path_index[exit_idx]
+        mae, mfe = excursions(path_price, entry_idx, exit_idx,
+                              round_trips['entry_price'], round_trips['direction'])
+        metrics.update({
+            'avg_mae': float(mae.mean()),
+            'avg_mfe': float(mfe.mean()),
+            'worst_mae': float(mae.min()),
+            'best_mfe': float(mfe.max()),
+        })
+    return metrics
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling for line charts.
+
+    Keeps the first and last point and, per bucket, the point forming the largest
+    triangle with the previously kept point and the next bucket's average, which
+    preserves the visual shape of long equity curves.
+
+    Args:
+        x (np.ndarray): Monotonic x values (numeric).
+        y (np.ndarray): y values.
+        threshold (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Indices of the kept points, ascending.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = x.size
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # Bucket boundaries over the interior points, plus the averages of every bucket up front
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(np.intp) + 1
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0] = a = 0
+    for i in range(threshold - 2):
+        start, stop = edges[i], edges[i + 1]
+        areas = np.abs((x[a] - avg_x[i]) * (y[start:stop] - y[a])
+                       - (x[a] - x[start:stop]) * (avg_y[i] - y[a]))
+        a = start + int(areas.argmax())
+        kept[i + 1] = a
+    kept[-1] = n - 1
+    return kept
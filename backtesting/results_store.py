@@ -0,0 +1,399 @@
+"""
+Indexed store for backtest runs.
+
+A single SQLite file holds a catalog row per run (parameters, headline metrics
+and the full metrics JSON) and the trade table of each run as compressed
+columnar NumPy blobs. Listing runs only touches the catalog, so opening the
+store costs the same whether it holds ten runs or ten thousand.
+"""
+
+import io
+import json
+import sqlite3
+import sys
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_DB_PATH = RESULTS_DIR / "results.db"
+
+# Metrics copied into their own catalog columns so they can be filtered and sorted on an index
+INDEXED_METRICS = ('total_trades', 'total_pnl', 'win_rate', 'max_drawdown', 'sharpe_ratio')
+
+
+def encode_column(values: np.ndarray) -> bytes:
+    """
+    Serialize one column to a compressed ``.npy`` blob.
+
+    Args:
+        values (np.ndarray): Column values (no object dtype).
+
+    Returns:
+        bytes: Compressed blob.
+    """
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(values), allow_pickle=False)
+    return zlib.compress(buffer.getvalue(), 1)
+
+
+def decode_column(blob: bytes) -> np.ndarray:
+    """
+    Restore a column written by ``encode_column``.
+
+    Args:
+        blob (bytes): Compressed blob.
+
+    Returns:
+        np.ndarray: Column values.
+    """
+    return np.load(io.BytesIO(zlib.decompress(blob)), allow_pickle=False)
+
+
+def executions_to_columns(executions: Iterable[Any]) -> Dict[str, np.ndarray]:
+    """
+    Convert ExecutionEvents into the trade columns kept in the store.
+
+    Args:
+        executions (Iterable[Any]): ExecutionEvent objects.
+
+    Returns:
+        Dict[str, np.ndarray]: Column name to values.
+    """
+    executions = list(executions)
+    return {
+        'timestamp': np.array([e.timestamp for e in executions], dtype='datetime64[us]'),
+        'symbol': np.array([e.symbol for e in executions], dtype=str),
+        'status': np.array([e.status for e in executions], dtype=str),
+        'filled_quantity': np.array([e.filled_quantity or 0 for e in executions], dtype=np.int64),
+        'avg_fill_price': np.array([e.avg_fill_price or 0.0 for e in executions], dtype=np.float64),
+        'broker_order_id': np.array([e.broker_order_id or '' for e in executions], dtype=str),
+        'side': np.array([(e.info or {}).get('side', '') for e in executions], dtype=str),
+        'is_entry': np.array([bool((e.info or {}).get('entry')) for e in executions], dtype=bool),
+    }
+
+
+class ResultStore:
+    """
+    SQLite catalog of backtest runs with columnar trade blobs.
+
+    Args:
+        db_path (str): Path to the SQLite file.
+    """
+    def __init__(self, db_path: str = str(DEFAULT_DB_PATH)) -> None:
+        """
+        Open the store and create tables if they do not exist.
+
+        Args:
+            db_path (str): Path to the SQLite file.
+        """
+        self.db_path: str = str(db_path)
+        self._lock: Lock = Lock()
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _get_conn(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open a SQLite connection for one transaction: committed on success, rolled
+        back on error, and closed either way.
+
+        Yields:
+            sqlite3.Connection: SQLite connection object.
+        """
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        """
+        Create the catalog and trade-column tables if they do not exist.
+        """
+        metric_columns = ',\n'.join(f'{name} REAL' for name in INDEXED_METRICS)
+        with self._get_conn() as conn:
+            # WAL lets the dashboard read while a sweep keeps appending
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS runs (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT UNIQUE,
+                    created_at TEXT,
+                    start_time TEXT,
+                    end_time TEXT,
+                    params TEXT,
+                    metrics TEXT,
+                    {metric_columns}
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS run_columns (
+                    run_id TEXT,
+                    name TEXT,
+                    data BLOB,
+                    PRIMARY KEY (run_id, name)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at)')
+            for name in INDEXED_METRICS:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_runs_{name} ON runs ({name})')
+            conn.commit()
+
+    def append_run(
+        self,
+        columns: Dict[str, np.ndarray],
+        metrics: Dict[str, Any],
+        params: Optional[Dict[str, Any]] = None,
+        run_id: Optional[str] = None
+    ) -> str:
+        """
+        Add a run to the store.
+
+        Args:
+            columns (Dict[str, np.ndarray]): Trade columns of the run.
+            metrics (Dict[str, Any]): Metrics of the run. ``start_time``/``end_time`` are
+                copied to the catalog when present.
+            params (Optional[Dict[str, Any]]): Parameters the run was made with.
+            run_id (Optional[str]): Run id. Defaults to a timestamp id.
+
+        Returns:
+            str: The run id.
+        """
+        run_id = run_id or metrics.get('run_timestamp') or datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        blobs = [(run_id, name, encode_column(values)) for name, values in columns.items()]
+        with self._lock, self._get_conn() as conn:
+            conn.execute(f'''
+                INSERT INTO runs (run_id, created_at, start_time, end_time, params, metrics,
+                                  {', '.join(INDEXED_METRICS)})
+                VALUES (?, ?, ?, ?, ?, ?, {', '.join('?' for _ in INDEXED_METRICS)})
+            ''', (
+                run_id, datetime.now().isoformat(), metrics.get('start_time'), metrics.get('end_time'),
+                json.dumps(params or {}, sort_keys=True, default=str), json.dumps(metrics, default=str),
+                *(metrics.get(name) for name in INDEXED_METRICS)
+            ))
+            conn.executemany('INSERT INTO run_columns (run_id, name, data) VALUES (?, ?, ?)', blobs)
+            conn.commit()
+        return run_id
+
+    def list_runs(
+        self,
+        params: Optional[Dict[str, Any]] = None,
+        metric_ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+        order_by: str = 'created_at',
+        descending: bool = True,
+        limit: Optional[int] = None,
+        after_seq: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Query the catalog without loading any trades.
+
+        Args:
+            params (Optional[Dict[str, Any]]): Parameter values the run must have been made with.
+            metric_ranges (Optional[Dict[str, Tuple]]): Metric name to (min, max); either bound may be None.
+            order_by (str): Indexed metric or ``created_at`` to sort on.
+            descending (bool): Sort direction.
+            limit (Optional[int]): Maximum number of runs.
+            after_seq (int): Only return runs appended after this catalog sequence number.
+
+        Returns:
+            List[Dict[str, Any]]: Catalog rows with ``params`` and ``metrics`` decoded.
+        """
+        if order_by not in INDEXED_METRICS + ('created_at', 'seq'):
+            raise ValueError(f"Cannot order runs by {order_by}")
+        clauses = ['seq > ?']
+        args: List[Any] = [after_seq]
+        for key, value in (params or {}).items():
+            clauses.append('json_extract(params, ?) = ?')
+            args.extend([f'$.{key}', value])
+        for name, (low, high) in (metric_ranges or {}).items():
+            column = name if name in INDEXED_METRICS else 'json_extract(metrics, ?)'
+            for bound, op in ((low, '>='), (high, '<=')):
+                if bound is None:
+                    continue
+                if column != name:
+                    args.append(f'$.{name}')
+                clauses.append(f'{column} {op} ?')
+                args.append(bound)
+        sql = (f"SELECT seq, run_id, created_at, start_time, end_time, params, metrics FROM runs "
+               f"WHERE {' AND '.join(clauses)} ORDER BY {order_by} {'DESC' if descending else 'ASC'}")
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        with self._lock, self._get_conn() as conn:
+            rows = conn.execute(sql, args).fetchall()
+        return [
+            {**dict(row), 'params': json.loads(row['params']), 'metrics': json.loads(row['metrics'])}
+            for row in rows
+        ]
+
+    def latest_seq(self) -> int:
+        """
+        Get the catalog sequence number of the newest run.
+
+        Returns:
+            int: Sequence number, 0 for an empty store.
+        """
+        with self._lock, self._get_conn() as conn:
+            row = conn.execute('SELECT MAX(seq) FROM runs').fetchone()
+        return row[0] or 0
+
+    def load_metrics(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Load the metrics of one run.
+
+        Args:
+            run_id (str): Run id.
+
+        Returns:
+            Optional[Dict[str, Any]]: Metrics, or None if the run does not exist.
+        """
+        with self._lock, self._get_conn() as conn:
+            row = conn.execute('SELECT metrics FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        return json.loads(row['metrics']) if row else None
+
+    def load_trades(self, run_id: str, columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+        """
+        Load the trade columns of one run.
+
+        Args:
+            run_id (str): Run id.
+            columns (Optional[List[str]]): Columns to load. Defaults to all.
+
+        Returns:
+            Dict[str, np.ndarray]: Column name to values.
+        """
+        sql = 'SELECT name, data FROM run_columns WHERE run_id = ?'
+        args: List[Any] = [run_id]
+        if columns:
+            sql += f" AND name IN ({', '.join('?' for _ in columns)})"
+            args.extend(columns)
+        with self._lock, self._get_conn() as conn:
+            rows = conn.execute(sql, args).fetchall()
+        return {row['name']: decode_column(row['data']) for row in rows}
+
+    def delete_run(self, run_id: str) -> None:
+        """
+        Remove a run and its trades.
+
+        Args:
+            run_id (str): Run id.
+        """
+        with self._lock, self._get_conn() as conn:
+            conn.execute('DELETE FROM run_columns WHERE run_id = ?', (run_id,))
+            conn.execute('DELETE FROM runs WHERE run_id = ?', (run_id,))
+            conn.commit()
+
+    def import_legacy(self, results_dir: Path = RESULTS_DIR) -> int:
+        """
+        Import ``trades_<ts>.csv``/``metrics_<ts>.json`` pairs written by older runners.
+
+        Runs already in the store are skipped.
+
+        Args:
+            results_dir (Path): Directory holding the legacy files.
+
+        Returns:
+            int: Number of runs imported.
+        """
+        import pandas as pd
+
+        with self._lock, self._get_conn() as conn:
+            known = {row[0] for row in conn.execute('SELECT run_id FROM runs')}
+        imported = 0
+        for metrics_file in sorted(Path(results_dir).glob("metrics_*.json")):
+            run_id = metrics_file.stem[len('metrics_'):]
+            trades_file = metrics_file.with_name(f"trades_{run_id}.csv")
+            if run_id in known or not trades_file.exists():
+                continue
+            with open(metrics_file) as f:
+                metrics = json.load(f)
+            trades = pd.read_csv(trades_file, keep_default_na=False)
+            columns = {
+                'timestamp': pd.to_datetime(trades['timestamp']).to_numpy(dtype='datetime64[us]'),
+                'symbol': trades['symbol'].astype(str).to_numpy(dtype=str),
+                'status': trades['status'].astype(str).to_numpy(dtype=str),
+                'filled_quantity': trades['filled_quantity'].to_numpy(dtype=np.int64),
+                'avg_fill_price': trades['avg_fill_price'].to_numpy(dtype=np.float64),
+                'broker_order_id': trades['broker_order_id'].astype(str).to_numpy(dtype=str),
+            }
+            self.append_run(columns, metrics, run_id=run_id)
+            imported += 1
+        return imported
+
+
+class RunCatalog:
+    """
+    Incrementally refreshed, in-memory copy of the run catalog.
+
+    ``refresh`` is a no-op while the store files are unchanged and otherwise only
+    fetches runs appended since the last refresh, so long-lived viewers never
+    re-read history.
+
+    Args:
+        store (ResultStore): Store to follow.
+    """
+    def __init__(self, store: ResultStore) -> None:
+        """
+        Initialize an empty catalog for a store.
+
+        Args:
+            store (ResultStore): Store to follow.
+        """
+        self.store = store
+        self.runs: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._seq: int = 0
+        self._mtime: Optional[Tuple[float, ...]] = None
+        self._lock: Lock = Lock()
+
+    def _store_mtime(self) -> Tuple[float, ...]:
+        paths = [Path(self.store.db_path), Path(f"{self.store.db_path}-wal")]
+        return tuple(p.stat().st_mtime_ns if p.exists() else 0 for p in paths)
+
+    def refresh(self) -> int:
+        """
+        Pull runs appended since the last refresh.
+
+        Returns:
+            int: Number of new runs.
+        """
+        with self._lock:
+            mtime = self._store_mtime()
+            if mtime == self._mtime:
+                return 0
+            new_runs = self.store.list_runs(order_by='seq', after_seq=self._seq)
+            self._mtime = mtime
+            if not new_runs:
+                return 0
+            # list_runs is newest first, which is also how the catalog is kept
+            self.runs = new_runs + self.runs
+            self._by_id.update((run['run_id'], run) for run in new_runs)
+            self._seq = max(run['seq'] for run in new_runs)
+            return len(new_runs)
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the catalog row of one run.
+
+        Args:
+            run_id (str): Run id.
+
+        Returns:
+            Optional[Dict[str, Any]]: Catalog row, or None if unknown.
+        """
+        return self._by_id.get(run_id)
+
+
+if __name__ == '__main__':
+    # Usage: python backtesting/results_store.py [results_dir]
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else RESULTS_DIR
+    count = ResultStore().import_legacy(source)
+    print(f"Imported {count} legacy runs from {source}")
@@ -0,0 +1,101 @@
+"""
+Cost of keeping IV and Greeks current for an option chain.
+
+Builds a NIFTY chain (CE and PE at every 50-point strike around the spot) with
+market-consistent premiums and times:
+
+  * cold       full chain solved from scratch (first refresh of the day)
+  * spot tick  underlying moved, every row repriced from the last IVs
+  * one strike one premium tick, only that row repriced
+  * scalar     the same full solve one option at a time, for comparison
+
+Run from the repository root:
+    python benchmarks/greeks_benchmark.py --strikes 41 --repeat 200
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+
+from trading_bot.pricing.chain import OptionChain  # noqa: E402
+from trading_bot.pricing.greeks import bs_greeks, bs_price, implied_vol  # noqa: E402
+
+SPOT = 24512.0
+RATE = 0.065
+
+
+def build_chain(strikes: int, now: datetime) -> OptionChain:
+    chain = OptionChain('NIFTY', now + timedelta(days=3), rate=RATE, time_step=3600)
+    atm = round(SPOT / 50) * 50
+    t = chain.years_to_expiry(now)
+    for strike in range(atm - 50 * (strikes // 2), atm + 50 * (strikes // 2) + 1, 50):
+        # A mild smile so rows do not share one volatility
+        sigma = 0.12 + 0.5 * ((strike - SPOT) / SPOT) ** 2 * 100
+        for kind in ('CE', 'PE'):
+            symbol = f"NIFTY{strike}{kind}"
+            chain.add(symbol, strike, kind)
+            chain.on_tick(symbol, float(bs_price(SPOT, strike, t, RATE, sigma, kind == 'CE')))
+    chain.on_tick('NIFTY', SPOT)
+    return chain
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure chain IV/Greeks refresh cost")
+    parser.add_argument('--strikes', type=int, default=41, help="Strikes around the ATM (x2 for CE/PE)")
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    now = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+    chain = build_chain(args.strikes, now)
+    options = len(chain)
+
+    def cold():
+        chain._values['iv'][:] = np.nan
+        chain._dirty[:] = True
+        chain.refresh(now)
+
+    spot = [SPOT]
+
+    def spot_tick():
+        spot[0] += 0.05 if spot[0] < SPOT + 5 else -5
+        chain.on_tick('NIFTY', spot[0])
+        chain.refresh(now)
+
+    premium = [chain.greeks('NIFTY24500CE', now)['premium']]
+
+    def one_strike():
+        premium[0] += 0.05
+        chain.on_tick('NIFTY24500CE', premium[0])
+        chain.refresh(now)
+
+    rows = chain.rows(now=now)
+    t = chain.years_to_expiry(now)
+
+    def scalar():
+        for row in rows:
+            is_call = row['type'] == 'CE'
+            iv = implied_vol(row['premium'], chain.spot, row['strike'], t, RATE, is_call)
+            bs_greeks(chain.spot, row['strike'], t, RATE, iv, is_call)
+
+    print(f"{options} options ({args.strikes} strikes x CE/PE), {args.repeat} repeats")
+    for name, fn, repeat in (('cold', cold, args.repeat), ('spot tick', spot_tick, args.repeat),
+                             ('one strike', one_strike, args.repeat), ('scalar', scalar, max(args.repeat // 20, 3))):
+        us = timed(fn, repeat)
+        print(f"  {name:<11} {us:10.1f} us per refresh  {us / options:8.2f} us per option")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+Cold-start benchmark for the trading bot entry point.
+
+Every run uses a fresh interpreter and reports:
+  * import time of ``trading_bot.__main__``
+  * orchestrator construction (logger, queues, database, components)
+  * ``startup()``: broker login and local state loading run concurrently, then reconciliation
+
+The broker is never contacted. ``--login-delay`` replaces the login with a sleep of
+that many seconds, so you can see how much of the state load it hides. Runs use dummy
+credentials and a scratch copy of the config with a temporary database; the scrip
+master download, the metrics endpoint and the shared-memory snapshot are switched off.
+
+A second section lists the slowest imports from ``python -X importtime``. It also
+flags optional subsystems that should not load at startup.
+
+Run from the repository root:
+    python benchmarks/startup_benchmark.py --runs 5 --login-delay 0.5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+import yaml
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRY_MODULE = 'trading_bot.__main__'
+
+# Imported only when first needed; seeing one of these at startup is a regression
+LAZY_MODULES = ('requests', 'smtplib', 'NorenRestApiPy', 'pyotp', 'multiprocessing.shared_memory')
+
+DUMMY_CREDENTIALS = {
+    'SHOONYA_API_KEY': 'bench', 'SHOONYA_API_SECRET': 'bench', 'SHOONYA_USER_ID': 'bench',
+    'SHOONYA_PASSWORD': 'bench', 'SHOONYA_VENDOR_CODE': 'bench', 'SHOONYA_IMEI': 'bench',
+    'SHOONYA_TOTP_SECRET': 'JBSWY3DPEHPK3PXP'
+}
+
+CHILD = r'''
+import json, os, sys, time
+t0 = time.perf_counter()
+import trading_bot.__main__ as entry
+t1 = time.perf_counter()
+bot = entry.TradingBotOrchestrator()
+t2 = time.perf_counter()
+delay = float(os.environ['BENCH_LOGIN_DELAY'])
+def login():
+    time.sleep(delay)
+    bot.api_wrapper.is_connected = True
+    return True
+bot.api_wrapper.connect = login
+bot.api_wrapper.get_positions = lambda: []
+bot.api_wrapper.get_order_book = lambda: []
+ok = bot.startup()
+t3 = time.perf_counter()
+lazy = [m for m in json.loads(os.environ['BENCH_LAZY_MODULES']) if m in sys.modules]
+bot.graceful_shutdown()
+print("BENCH " + json.dumps({'import': t1 - t0, 'construct': t2 - t1, 'startup': t3 - t2, 'ok': ok, 'lazy_loaded': lazy}))
+'''
+
+
+def _environment(workdir: str, login_delay: float) -> Dict[str, str]:
+    env = dict(os.environ)
+    for key, value in DUMMY_CREDENTIALS.items():
+        env.setdefault(key, value)
+    paths = [os.path.join(REPO_ROOT, 'src'), REPO_ROOT]
+    if env.get('PYTHONPATH'):
+        paths.append(env['PYTHONPATH'])
+    env['PYTHONPATH'] = os.pathsep.join(paths)
+    env['BENCH_LOGIN_DELAY'] = str(login_delay)
+    env['BENCH_LAZY_MODULES'] = json.dumps(LAZY_MODULES)
+    return env
+
+
+def _scratch_config(workdir: str) -> None:
+    """Copy config.yaml with state, logs and network endpoints redirected into workdir"""
+    with open(os.path.join(REPO_ROOT, 'config', 'config.yaml')) as f:
+        config = yaml.safe_load(f)
+    config.setdefault('data', {})['db_path'] = os.path.join(workdir, 'bench.db')
+    config.setdefault('logging', {})['path'] = os.path.join(workdir, 'logs')
+    monitor = config.setdefault('monitor', {})
+    monitor['metrics_enabled'] = False
+    monitor['snapshot_enabled'] = False
+    expiry = config.setdefault('expiry', {})
+    expiry['scrip_master_enabled'] = False  # a download would hit the network and pull in requests
+    expiry['scrip_master_path'] = os.path.join(workdir, 'data', 'NFO_symbols.txt.zip')
+    os.makedirs(os.path.join(workdir, 'config'), exist_ok=True)
+    os.makedirs(os.path.join(workdir, 'data'), exist_ok=True)  # RiskManager's default database path
+    with open(os.path.join(workdir, 'config', 'config.yaml'), 'w') as f:
+        yaml.safe_dump(config, f)
+
+
+def run_startup(workdir: str, login_delay: float) -> Dict[str, float]:
+    """Time one cold start in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD], cwd=workdir, env=_environment(workdir, login_delay),
+        capture_output=True, text=True, timeout=120
+    )
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith('BENCH '):
+            return json.loads(line[len('BENCH '):])
+    raise RuntimeError(f"Benchmark child failed:\n{result.stderr[-2000:]}")
+
+
+def import_profile(workdir: str, top: int) -> Tuple[List[Tuple[int, int, str]], int]:
+    """Slowest imports by cumulative time from -X importtime, and the total in microseconds"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {ENTRY_MODULE}'],
+        cwd=workdir, env=_environment(workdir, 0.0), capture_output=True, text=True, timeout=120
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    total = next((cumulative for _, cumulative, name in rows if name.strip() == ENTRY_MODULE), 0)
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return rows[:top], total
+
+
+def _stats(values: List[float]) -> str:
+    ms = [v * 1000 for v in values]
+    return f"min {min(ms):8.1f} ms   median {statistics.median(ms):8.1f} ms   max {max(ms):8.1f} ms"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure trading bot import and startup time")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh-interpreter runs")
+    parser.add_argument('--login-delay', type=float, default=0.5, help="Simulated broker login time in seconds")
+    parser.add_argument('--top', type=int, default=15, help="Slowest imports to list")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='startup_bench_') as workdir:
+        _scratch_config(workdir)
+        runs = [run_startup(workdir, args.login_delay) for _ in range(args.runs)]
+        profile, total_us = import_profile(workdir, args.top)
+
+    print(f"Cold start over {args.runs} runs (simulated login {args.login_delay * 1000:.0f} ms)")
+    print(f"  import {ENTRY_MODULE:<20} {_stats([r['import'] for r in runs])}")
+    print(f"  construct orchestrator        {_stats([r['construct'] for r in runs])}")
+    print(f"  startup (login || state)      {_stats([r['startup'] for r in runs])}")
+    overhead = [r['startup'] - args.login_delay for r in runs]
+    print(f"  startup beyond the login      {_stats(overhead)}")
+    if not all(r['ok'] for r in runs):
+        print("  WARNING: startup() returned False in some runs")
+
+    lazy_loaded = sorted({m for r in runs for m in r['lazy_loaded']})
+    print(f"\nLazily imported subsystems loaded by startup: {', '.join(lazy_loaded) or 'none'}")
+
+    print(f"\nSlowest imports (-X importtime, {ENTRY_MODULE} total {total_us / 1000:.1f} ms)")
+    print(f"  {'cumulative':>10}  {'self':>8}  module")
+    for self_us, cumulative_us, name in profile:
+        print(f"  {cumulative_us / 1000:8.1f}ms  {self_us / 1000:6.1f}ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Throughput of the strategy host as the number of zone-strategy instances grows.
+
+Instances are spread round-robin over NIFTY, BANKNIFTY, FINNIFTY and MIDCPNIFTY
+with different zone offsets, and fed one interleaved tick stream that starts at
+the zone calculation time. Prices mean-revert around the open, so most ticks
+stay inside the zones and the timings are dominated by dispatch rather than by
+signal generation. Each instance count is run twice:
+
+  * host       ``StrategyHost.process_event`` routes a tick to the instances of its symbol
+  * broadcast  every tick is handed to every instance, which drops other symbols itself
+
+Run from the repository root:
+    python benchmarks/strategy_host_benchmark.py --ticks 50000 --instances 1 4 16 32 64
+"""
+import argparse
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+
+from loguru import logger  # noqa: E402
+
+from trading_bot.event import MarketEvent  # noqa: E402
+from trading_bot.strategy.host import StrategyHost  # noqa: E402
+from trading_bot.strategy.main_strategy import MainStrategy  # noqa: E402
+
+UNDERLYINGS = {'NIFTY': 24500.0, 'BANKNIFTY': 52000.0, 'FINNIFTY': 23500.0, 'MIDCPNIFTY': 12500.0}
+OFFSETS = (2.5, 5.0, 10.0, 20.0)
+
+
+def make_ticks(count: int, seed: int = 7) -> List[MarketEvent]:
+    rng = random.Random(seed)
+    deviation = dict.fromkeys(UNDERLYINGS, 0.0)
+    symbols = list(UNDERLYINGS)
+    start = datetime.now().replace(hour=9, minute=16, second=0, microsecond=0)
+    ticks = []
+    for i in range(count):
+        symbol = symbols[i % len(symbols)]
+        # AR(1) deviation from the open with a standard deviation of about 1.5 points
+        deviation[symbol] = 0.9 * deviation[symbol] + rng.gauss(0.0, 0.65)
+        ticks.append(MarketEvent(symbol=symbol, timestamp=start + timedelta(milliseconds=10 * i),
+                                 price=round(UNDERLYINGS[symbol] + deviation[symbol], 2)))
+    return ticks
+
+
+def make_instances(count: int) -> Tuple[StrategyHost, List[MainStrategy], queue.SimpleQueue]:
+    signals = queue.SimpleQueue()
+    host = StrategyHost()
+    symbols = list(UNDERLYINGS)
+    instances = []
+    for i in range(count):
+        symbol = symbols[i % len(symbols)]
+        offset = OFFSETS[(i // len(symbols)) % len(OFFSETS)]
+        strategy = MainStrategy(None, signals, zone_offset=offset, symbol=symbol, name=f"{symbol.lower()}_{i}")
+        host.add(strategy.name, strategy, [symbol])
+        instances.append(strategy)
+    return host, instances, signals
+
+
+def run_host(count: int, ticks: List[MarketEvent]) -> Tuple[float, int]:
+    host, _, signals = make_instances(count)
+    dispatch = host.process_event
+    started = time.perf_counter()
+    for tick in ticks:
+        dispatch(tick)
+    return time.perf_counter() - started, signals.qsize()
+
+
+def run_broadcast(count: int, ticks: List[MarketEvent]) -> Tuple[float, int]:
+    _, instances, signals = make_instances(count)
+    handlers = [s.process_event for s in instances]
+    started = time.perf_counter()
+    for tick in ticks:
+        for handler in handlers:
+            handler(tick)
+    return time.perf_counter() - started, signals.qsize()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Measure strategy host throughput against instance count")
+    parser.add_argument('--ticks', type=int, default=50000, help="Ticks in the stream")
+    parser.add_argument('--instances', type=int, nargs='+', default=[1, 4, 16, 32, 64])
+    args = parser.parse_args(argv)
+
+    # Signal logging would dominate the timings
+    logger.remove()
+    ticks = make_ticks(args.ticks)
+
+    print(f"{args.ticks} ticks over {len(UNDERLYINGS)} underlyings")
+    print(f"  {'instances':>9}  {'mode':<9}  {'ticks/s':>10}  {'us/tick':>8}  {'signals':>7}")
+    for count in args.instances:
+        for mode, runner in (('host', run_host), ('broadcast', run_broadcast)):
+            elapsed, signals = runner(count, ticks)
+            print(f"  {count:>9}  {mode:<9}  {args.ticks / elapsed:>10,.0f}  "
+                  f"{elapsed / args.ticks * 1e6:>8.2f}  {signals:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,13 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from pathlib import Path
-import json
 from datetime import datetime
 import altair as alt
 import os
+import sys
 
 # Set page config
 st.set_page_config(
@@ -18,93 +19,117 @@ st.set_page_config(
 # Get the absolute path to the project root
 PROJECT_ROOT = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 RESULTS_DIR = PROJECT_ROOT / "backtesting" / "results"
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backtesting.performance_metrics import drawdown_series, lttb, pair_round_trips
+from backtesting.results_store import ResultStore, RunCatalog
+
+# Longest line the browser is asked to draw; longer curves are LTTB-downsampled
+MAX_CHART_POINTS = 5000
 
 # Debug information
 st.sidebar.write("Debug Information:")
 st.sidebar.write(f"Project Root: {PROJECT_ROOT}")
 st.sidebar.write(f"Results Directory: {RESULTS_DIR}")
-st.sidebar.write(f"Results Dir Exists: {RESULTS_DIR.exists()}")
-if RESULTS_DIR.exists():
-    st.sidebar.write("Files in results directory:")
-    for f in RESULTS_DIR.glob("*"):
-        st.sidebar.write(f"- {f.name}")
 
-def load_backtest_results(results_dir: Path = RESULTS_DIR):
-    """Load all backtest results from the results directory."""
-    results = []
-    
-    # Get all metrics files
-    metrics_files = list(results_dir.glob("metrics_*.json"))
-    st.sidebar.write(f"Found {len(metrics_files)} metrics files")
-    
-    for metrics_file in metrics_files:
-        # Get corresponding trades file (with .csv extension)
-        trades_file = results_dir / f"trades_{metrics_file.name[8:-5]}.csv"  # Changed from .json to .csv
-        st.sidebar.write(f"Looking for trades file: {trades_file.name}")
-        st.sidebar.write(f"Trades file exists: {trades_file.exists()}")
-        
-        if not trades_file.exists():
-            continue
-            
-        try:
-            # Load metrics
-            with open(metrics_file) as f:
-                metrics = json.load(f)
-                
-            # Load trades
-            trades = pd.read_csv(trades_file)
-            trades['timestamp'] = pd.to_datetime(trades['timestamp'])
-            
-            results.append({
-                'metrics': metrics,
-                'trades': trades,
-                'run_id': metrics_file.name[8:-5]  # Remove 'metrics_' and '.json'
-            })
-        except Exception as e:
-            st.sidebar.error(f"Error loading files: {str(e)}")
-    
-    return results
+@st.cache_resource
+def open_result_store(results_dir: Path = RESULTS_DIR) -> ResultStore:
+    """Open the result store once per server, importing legacy CSV/JSON runs into an empty one."""
+    store = ResultStore(str(results_dir / "results.db"))
+    if store.latest_seq() == 0:
+        store.import_legacy(results_dir)
+    return store
+
+@st.cache_resource
+def get_run_catalog(_store: ResultStore) -> RunCatalog:
+    """Shared run catalog; refreshed on every rerun but only reads runs added since."""
+    return RunCatalog(_store)
+
+def load_backtest_runs(store: ResultStore):
+    """Load the run catalog (metrics and parameters only, no trades)."""
+    catalog = get_run_catalog(store)
+    catalog.refresh()
+    st.sidebar.write(f"Found {len(catalog.runs)} backtest runs")
+    return catalog
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def load_run_trades(_store: ResultStore, run_id: str) -> pd.DataFrame:
+    """Load the trades of a single run. Runs are immutable, so the run id is the cache key."""
+    trades = pd.DataFrame(_store.load_trades(run_id))
+    trades['timestamp'] = pd.to_datetime(trades['timestamp'])
+    return trades
+
+def run_label(run: dict) -> str:
+    """When a run was saved, from the catalog; the raw run id if the catalog has no usable time."""
+    try:
+        return datetime.fromisoformat(run['created_at']).strftime("%Y-%m-%d %H:%M:%S")
+    except (KeyError, TypeError, ValueError):
+        return run['run_id']
 
 def calculate_cumulative_metrics(trades_df):
-    """Calculate cumulative metrics from trades."""
+    """Calculate cumulative P&L and drawdown from trades."""
     trades_df = trades_df.copy()
-    trades_df['cumulative_trades'] = range(1, len(trades_df) + 1)
-    
-    # Calculate P&L (assuming entry and exit pairs)
-    trades_df['trade_pnl'] = 0
-    for i in range(0, len(trades_df), 2):
-        if i + 1 < len(trades_df):
-            entry_price = trades_df.iloc[i]['avg_fill_price']
-            exit_price = trades_df.iloc[i + 1]['avg_fill_price']
-            pnl = (exit_price - entry_price) * trades_df.iloc[i]['filled_quantity']
-            trades_df.iloc[i:i+2, trades_df.columns.get_loc('trade_pnl')] = pnl
+    n = len(trades_df)
+    trades_df['cumulative_trades'] = np.arange(1, n + 1)
+    
+    # Older runs have no entry flag or side: fills alternate entry/exit and are long
+    if 'is_entry' in trades_df:
+        is_entry = trades_df['is_entry'].to_numpy(dtype=bool)
+    else:
+        is_entry = np.arange(n) % 2 == 0
+    direction = None
+    if 'side' in trades_df:
+        direction = np.where(trades_df['side'].isin(['SELL', 'SHORT']), -1, 1)
+    
+    round_trips = pair_round_trips(
+        trades_df['timestamp'].to_numpy(),
+        trades_df['avg_fill_price'].to_numpy(dtype=np.float64),
+        np.abs(trades_df['filled_quantity'].to_numpy(dtype=np.float64)),
+        is_entry,
+        direction
+    )
     
-    trades_df['cumulative_pnl'] = trades_df['trade_pnl'].cumsum()
+    # Book each round trip's P&L on its exit fill
+    trade_pnl = np.zeros(n)
+    trade_pnl[round_trips['exit_idx']] = round_trips['pnl']
+    trades_df['trade_pnl'] = trade_pnl
+    trades_df['cumulative_pnl'] = np.cumsum(trade_pnl)
+    trades_df['drawdown'] = drawdown_series(trades_df['cumulative_pnl'].to_numpy())[0]
     
     return trades_df
 
+def downsample_for_chart(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    """Reduce a time series to MAX_CHART_POINTS with LTTB, keeping its shape."""
+    if len(df) <= MAX_CHART_POINTS:
+        return df
+    x = df['timestamp'].to_numpy().astype('datetime64[ns]').astype(np.int64)
+    return df.iloc[lttb(x, df[column].to_numpy(), MAX_CHART_POINTS)]
+
 def main():
     st.title("📈 Nifty Options Backtest Results")
     
-    # Load results
-    results = load_backtest_results()
+    # Load run catalog
+    store = open_result_store()
+    catalog = load_backtest_runs(store)
+    runs = catalog.runs
     
-    if not results:
+    if not runs:
         st.warning("No backtest results found. Run a backtest first!")
         return
     
     # Sidebar - Select backtest run
     st.sidebar.header("Select Backtest Run")
+    labels = {r['run_id']: run_label(r) for r in runs}
     selected_run = st.sidebar.selectbox(
         "Choose a backtest run:",
-        options=[r['run_id'] for r in results],
-        format_func=lambda x: datetime.strptime(x, "%Y%m%d_%H%M%S").strftime("%Y-%m-%d %H:%M:%S")
+        options=list(labels),
+        format_func=labels.get
     )
     
-    # Get selected result
-    result = next(r for r in results if r['run_id'] == selected_run)
+    # Load only the selected run's trades
+    result = catalog.get(selected_run)
     metrics = result['metrics']
-    trades = result['trades']
+    trades = load_run_trades(store, selected_run).copy()
     
     # Display summary metrics
     col1, col2, col3, col4 = st.columns(4)
@@ -117,16 +142,29 @@ def main():
     with col4:
         st.metric("Avg Profit/Trade", f"₹{metrics['avg_profit_per_trade']:,.2f}")
     
+    # Risk metrics are only present for runs scored by performance_metrics
+    if 'max_drawdown' in metrics:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Max Drawdown", f"₹{metrics['max_drawdown']:,.2f}")
+        with col2:
+            st.metric("Sharpe", f"{metrics.get('sharpe_ratio', 0.0):.2f}")
+        with col3:
+            st.metric("Profit Factor", f"{metrics.get('profit_factor', 0.0):.2f}")
+        with col4:
+            st.metric("Expectancy", f"₹{metrics.get('expectancy', 0.0):,.2f}")
+    
     # Calculate cumulative metrics
     trades_with_metrics = calculate_cumulative_metrics(trades)
     
     # P&L Chart
     st.subheader("Cumulative P&L")
+    pnl_points = downsample_for_chart(trades_with_metrics, 'cumulative_pnl')
     fig = go.Figure()
     fig.add_trace(go.Scatter(
-        x=trades_with_metrics['timestamp'],
-        y=trades_with_metrics['cumulative_pnl'],
-        mode='lines+markers',
+        x=pnl_points['timestamp'],
+        y=pnl_points['cumulative_pnl'],
+        mode='lines+markers' if len(pnl_points) < 500 else 'lines',
         name='Cumulative P&L'
     ))
     fig.update_layout(
@@ -136,17 +174,36 @@ def main():
     )
     st.plotly_chart(fig, use_container_width=True)
     
+    # Drawdown Chart
+    st.subheader("Drawdown")
+    drawdown_points = downsample_for_chart(trades_with_metrics, 'drawdown')
+    fig_dd = go.Figure()
+    fig_dd.add_trace(go.Scatter(
+        x=drawdown_points['timestamp'],
+        y=drawdown_points['drawdown'],
+        fill='tozeroy',
+        mode='lines',
+        name='Drawdown'
+    ))
+    fig_dd.update_layout(
+        xaxis_title="Time",
+        yaxis_title="Drawdown (₹)",
+        hovermode='x unified'
+    )
+    st.plotly_chart(fig_dd, use_container_width=True)
+    
     # Trade Distribution
     st.subheader("Trade Distribution")
     col1, col2 = st.columns(2)
     
     with col1:
-        # Trade prices histogram
-        fig_hist = px.histogram(
-            trades,
-            x='avg_fill_price',
-            title='Trade Price Distribution',
-            nbins=20
+        # Trade prices histogram, binned here so only 20 bars go to the browser
+        counts, edges = np.histogram(trades['avg_fill_price'].to_numpy(), bins=20)
+        fig_hist = px.bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            labels={'x': 'avg_fill_price', 'y': 'count'},
+            title='Trade Price Distribution'
         )
         st.plotly_chart(fig_hist, use_container_width=True)
     
@@ -165,10 +222,11 @@ def main():
     # Raw trade data
     st.subheader("Trade List")
     st.dataframe(
-        trades.style.format({
-            'avg_fill_price': '₹{:,.2f}',
-            'filled_quantity': '{:,.0f}'
-        }),
+        trades,
+        column_config={
+            'avg_fill_price': st.column_config.NumberColumn(format='₹%.2f'),
+            'filled_quantity': st.column_config.NumberColumn(format='%d')
+        },
         use_container_width=True
     )
     
@@ -176,7 +234,9 @@ def main():
     st.sidebar.subheader("Backtest Parameters")
     st.sidebar.text(f"Start: {metrics['start_time']}")
     st.sidebar.text(f"End: {metrics['end_time']}")
-    st.sidebar.text(f"Run Time: {datetime.strptime(selected_run, '%Y%m%d_%H%M%S').strftime('%Y-%m-%d %H:%M:%S')}")
+    for key, value in result['params'].items():
+        st.sidebar.text(f"{key}: {value}")
+    st.sidebar.text(f"Run Time: {labels[selected_run]}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
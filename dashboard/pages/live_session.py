@@ -0,0 +1,144 @@
+import streamlit as st
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+import os
+import sys
+
+# Set page config
+st.set_page_config(
+    page_title="Nifty Options Live Session",
+    page_icon="🟢",
+    layout="wide"
+)
+
+# Get the absolute path to the project root
+PROJECT_ROOT = Path(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from trading_bot.monitor.snapshot import SnapshotReader, SNAPSHOT_NAME
+
+REFRESH_SECONDS = 1.0
+STALE_AFTER_SECONDS = 5.0
+
+@st.cache_resource
+def get_reader(name: str):
+    """Attach to the live snapshot segment once per server; None if no session is running."""
+    try:
+        return SnapshotReader(name)
+    except FileNotFoundError:
+        return None
+
+def render_snapshot(state: dict):
+    """Render one snapshot of the live session."""
+    age = datetime.now().timestamp() - state['published_at']
+    if age > STALE_AFTER_SECONDS:
+        st.warning(f"Snapshot is {age:.0f}s old - the trading process may have stopped")
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Realized P&L", f"₹{state['daily_pnl']:,.2f}")
+    with col2:
+        st.metric("Unrealized P&L", f"₹{state['unrealized_pnl']:,.2f}")
+    with col3:
+        st.metric("Trades Today", state['trades_today'])
+    with col4:
+        st.metric("Feed", "Connected" if state['feed_connected'] else "Disconnected")
+
+    # Mark-to-market equity and drawdown
+    mtm = state.get('mtm')
+    if state.get('halted'):
+        st.error(f"Trading halted: {state['halted']}")
+    if mtm:
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Equity", f"₹{mtm['equity']:,.2f}")
+        with col2:
+            st.metric("High-Water Mark", f"₹{mtm['high_water']:,.2f}")
+        with col3:
+            st.metric("Drawdown", f"₹{mtm['drawdown']:,.2f}")
+        with col4:
+            st.metric("Max Drawdown", f"₹{mtm['max_drawdown']:,.2f}")
+
+    # Zones and gates
+    st.subheader("Zones")
+    zones = state.get('zones') or {}
+    gates = state.get('gates') or {}
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Upper", f"{zones['upper_zone']:,.2f}" if zones.get('upper_zone') else "-")
+    with col2:
+        st.metric("Middle", f"{zones['middle_zone']:,.2f}" if zones.get('middle_zone') else "-")
+    with col3:
+        st.metric("Lower", f"{zones['lower_zone']:,.2f}" if zones.get('lower_zone') else "-")
+    with col4:
+        st.metric("Gates", " ".join(
+            f"{name.split('_')[0].upper()}:{'open' if is_open else 'closed'}" for name, is_open in gates.items()
+        ) or "-")
+    if len(state.get('strategies') or []) > 1:
+        st.dataframe(pd.DataFrame([
+            {
+                'Instance': s['name'],
+                'Symbol': s['symbol'],
+                'Upper': (s['zones'] or {}).get('upper_zone'),
+                'Middle': (s['zones'] or {}).get('middle_zone'),
+                'Lower': (s['zones'] or {}).get('lower_zone'),
+                'CE gate': s['gates'].get('ce_gate'),
+                'PE gate': s['gates'].get('pe_gate'),
+                'Position': s['position_type'] or '-'
+            }
+            for s in state['strategies']
+        ]), use_container_width=True)
+
+    # Positions
+    st.subheader("Open Positions")
+    if state['positions']:
+        st.dataframe(pd.DataFrame(state['positions']), use_container_width=True)
+    else:
+        st.info("No open positions")
+    if state.get('open_orders'):
+        st.caption("Working orders")
+        st.dataframe(pd.DataFrame(state['open_orders']), use_container_width=True)
+
+    # Plumbing
+    st.subheader("Queues and Latency")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.dataframe(pd.DataFrame([state['queues']]), use_container_width=True)
+    with col2:
+        st.dataframe(pd.DataFrame([state['loop_busy_us']]).rename(
+            columns={'last': 'loop µs (last)', 'max': 'loop µs (max)'}
+        ), use_container_width=True)
+    if state.get('latency'):
+        st.caption("Pipeline latency per hop (µs); `a=>b` rows are end-to-end")
+        st.dataframe(pd.DataFrame.from_dict(state['latency'], orient='index'), use_container_width=True)
+    if state.get('handlers'):
+        st.caption("Handler time" + (" (sampling profiler running)" if state.get('profiling') else ""))
+        st.dataframe(pd.DataFrame.from_dict(state['handlers'], orient='index'), use_container_width=True)
+    if state.get('tick_age_seconds'):
+        st.caption("Seconds since last tick: " + ", ".join(
+            f"{symbol} {age:.1f}" for symbol, age in state['tick_age_seconds'].items()
+        ))
+
+@st.fragment(run_every=REFRESH_SECONDS)
+def live_panel(name: str):
+    """Re-read the snapshot every REFRESH_SECONDS without rerunning the whole page."""
+    reader = get_reader(name)
+    if reader is None:
+        get_reader.clear()
+        st.warning("No live session found. Start the trading bot to see live state.")
+        return
+    state = reader.read()
+    if state is None:
+        st.info("Waiting for the first snapshot...")
+        return
+    render_snapshot(state)
+
+def main():
+    st.title("🟢 Live Trading Session")
+    name = st.sidebar.text_input("Snapshot segment", value=SNAPSHOT_NAME)
+    st.sidebar.caption("Read from shared memory; the trading process does no extra work per view.")
+    live_panel(name)
+
+if __name__ == "__main__":
+    main()
@@ -1,85 +1,109 @@
 # trading_bot/__main__.py
 # Fixed and refactored main entry point
 
+import os
 import threading
 import time
 import signal
 import sys
-from datetime import datetime, time as dt_time
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from loguru import logger
 
 # Core imports
 from trading_bot.utils.logger import setup_logger
+from trading_bot.utils.fastlog import fastlog
 from trading_bot.event_queue import EventQueue
 from trading_bot.event import OrderEvent, MarketEvent, SignalEvent, ExecutionEvent
 from trading_bot.broker.api_wrapper import ShoonyaAPIWrapper
 from trading_bot.broker.data_handler import DataHandler  # Use regular DataHandler for now
-from trading_bot.strategy.main_strategy import MainStrategy
+from trading_bot.broker.reconciliation import Reconciler, ReconciliationReport
+from trading_bot.broker.expiry_calendar import ExpiryCalendar, load_scrip_master, SCRIP_MASTER_URL
+from trading_bot.execution.order_templates import OrderTemplates
+from trading_bot.execution.order_book import OrderBook
+from trading_bot.strategy.host import StrategyHost, build_zone_host
 from trading_bot.risk.manager import RiskManager
+from trading_bot.risk.engine import RiskEngine, MAX_DAILY_LOSS
 from trading_bot.position.manager import PositionManager
+from trading_bot.position.mtm import MarkToMarket, PnLSnapshot
+from trading_bot.position.sl_manager import StopLossManager
 from config.manager import ConfigManager
 from trading_bot.persistence.database import Database
+from trading_bot.persistence.journal import StateJournal
+from trading_bot.monitor.latency import latency
+from trading_bot.monitor.profiler import SamplingProfiler, HandlerStats
+from trading_bot.monitor.metrics import (
+    registry, register_process_metrics, MetricsServer, RateGauge,
+    TICKS, HANDLER_LATENCY, ORDER_ROUND_TRIP, ORDERS, EXECUTIONS
+)
 
-# Optional imports with fallbacks
-try:
-    from trading_bot.alerts.notifier import notifier
-    ALERTS_AVAILABLE = True
-except ImportError:
-    logger.warning("Alerts module not available")
-    ALERTS_AVAILABLE = False
-    notifier = None
+if TYPE_CHECKING:
+    from trading_bot.pricing.chain import OptionChain
 
 LOG_DIR = 'logs'
 DEFAULT_SYMBOLS = ['NIFTY']
+INDEX_TOKENS = {'NIFTY': '26000', 'BANKNIFTY': '26009', 'FINNIFTY': '26037'}  # NSE index tokens for quotes
+
+# Optional subsystems are imported on first use; the alert stack (requests, smtplib)
+# alone is a large share of cold start and most runs never send a remote alert
+_notifier = None
+ALERTS_AVAILABLE = True
+
+def get_notifier():
+    """Import the alert notifier on first use; None if it is unavailable"""
+    global _notifier, ALERTS_AVAILABLE
+    if _notifier is None and ALERTS_AVAILABLE:
+        try:
+            from trading_bot.alerts.notifier import notifier
+            _notifier = notifier
+        except ImportError:
+            logger.warning("Alerts module not available")
+            ALERTS_AVAILABLE = False
+    return _notifier
 
 def send_alert(message: str, priority: str = "INFO"):
     """Safe alert sending with fallback"""
-    if ALERTS_AVAILABLE and notifier:
+    if priority != "CRITICAL":
+        # Only CRITICAL alerts leave the process; the rest are just logged
+        logger.info(f"[{priority}] {message}")
+        return
+    notifier = get_notifier()
+    if notifier:
         try:
-            notifier.alert(
-                message=message,
-                priority=priority,
-                telegram=True if priority == "CRITICAL" else False,
-                email=True if priority == "CRITICAL" else False
-            )
+            notifier.alert(message=message, priority=priority, telegram=True, email=True)
         except Exception as e:
             logger.error(f"Failed to send alert: {e}")
     else:
         logger.warning(f"Alert not sent (no notifier): {message}")
 
-def reconcile_state(api_wrapper: ShoonyaAPIWrapper, db: Database) -> bool:
+def reconcile_state(api_wrapper: ShoonyaAPIWrapper, db: Database,
+                    local_positions: Optional[Dict[str, int]] = None) -> Optional[ReconciliationReport]:
     """
     Reconcile local DB state with broker state on startup.
-    Returns True if reconciliation is successful, False otherwise.
+    Expects a connected api_wrapper; local_positions is the signed net quantity per symbol
+    held in memory (the database's open trades if omitted). Safe differences are repaired
+    in the database, anything else raises a CRITICAL alert.
+    Returns the reconciliation report, or None if reconciliation could not run.
     """
     try:
         logger.info("Starting state reconciliation...")
+        report = Reconciler(api_wrapper, db).run(local_positions=local_positions)
         
-        # Get local state
-        open_trades = db.get_open_trades() if hasattr(db, 'get_open_trades') else []
-        pending_orders = db.get_pending_orders() if hasattr(db, 'get_pending_orders') else []
-        
-        # Get broker state
-        broker_positions = []
-        broker_orders = []
-        
-        try:
-            broker_positions = api_wrapper.get_open_positions() if hasattr(api_wrapper, 'get_open_positions') else []
-            if hasattr(api_wrapper, 'get_order_book'):
-                broker_orders = api_wrapper.get_order_book()
-        except Exception as e:
-            logger.warning(f"Could not fetch broker state: {e}")
+        logger.info(f"State reconciliation completed: {report.summary()}")
+        for repair in report.repaired:
+            logger.info(f"Reconciliation repair: {repair}")
+        for diff in report.unresolved:
+            logger.warning(f"Unresolved reconciliation difference: {diff}")
+        if report.errors:
+            logger.warning(f"Broker state incomplete: {report.errors}")
         
-        # Basic reconciliation logic
-        logger.info(f"Local: {len(open_trades)} trades, {len(pending_orders)} orders")
-        logger.info(f"Broker: {len(broker_positions)} positions, {len(broker_orders)} orders")
-        
-        # TODO: Implement detailed reconciliation logic
-        # For now, just log the differences
-        
-        logger.info("State reconciliation completed successfully")
-        return True
+        if report.unresolved:
+            send_alert(
+                f"Startup reconciliation needs review: {report.summary()}",
+                "CRITICAL"
+            )
+        return report
         
     except Exception as exc:
         logger.critical(f"Startup reconciliation failed: {exc}")
@@ -87,7 +111,7 @@ def reconcile_state(api_wrapper: ShoonyaAPIWrapper, db: Database) -> bool:
             f"Startup reconciliation failed! Manual intervention required.\nError: {exc}",
             "CRITICAL"
         )
-        return False
+        return None
 
 class TradingBotOrchestrator:
     """
@@ -98,6 +122,21 @@ class TradingBotOrchestrator:
     def __init__(self):
         self.running = True
         self.threads = []
+        self.snapshot_publisher = None
+        self._loop_busy_ns = 0
+        self._loop_busy_max_ns = 0
+        self.handler_stats = HandlerStats()
+        self._profiler_toggle_requested = False
+        self.metrics_server = None
+        self._handler_latency = {}
+        self._last_loop_time = time.monotonic()
+        self.health_monitor = None
+        self.state_journal = None
+        self._reconciliation: Optional[ReconciliationReport] = None
+        self._reconciliation_failed = False
+        self._chains: Dict[str, 'OptionChain'] = {}
+        self._pnl: Optional[PnLSnapshot] = None
+        self._kill: Optional[PnLSnapshot] = None
         
         # Initialize configuration first
         try:
@@ -113,6 +152,10 @@ class TradingBotOrchestrator:
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
+        
+        # kill -USR1 <pid> starts/stops the sampling profiler
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, self.profiler_signal_handler)
     
     def get_config(self, key: str, default: Any = None) -> Any:
         """Safe config getter with fallback"""
@@ -123,13 +166,130 @@ class TradingBotOrchestrator:
                 return default
         return default
     
+    def _strategy_instances(self) -> list:
+        """strategy.instances, defaulting to one instance per trading symbol"""
+        return self.get_config('strategy.instances') or [
+            {'symbol': symbol} for symbol in self.get_config('strategy.symbols', DEFAULT_SYMBOLS)
+        ]
+    
+    def _build_calendar(self) -> ExpiryCalendar:
+        """Expiry calendar on the weekday rule and holiday list; startup loads today's scrip master into it"""
+        holidays = []
+        for day in self.get_config('expiry.holidays', []) or []:
+            try:
+                holidays.append(day if isinstance(day, date) else date.fromisoformat(str(day)))
+            except ValueError:
+                logger.warning(f"Ignoring malformed holiday {day!r}")
+        return ExpiryCalendar(
+            holidays,
+            weekdays=self.get_config('expiry.weekdays', {}) or {},
+            weekly=self.get_config('expiry.weekly', ['NIFTY']) or (),
+            strike_steps=self.get_config('strike_selection.strike_step', {}) or {}
+        )
+    
+    def load_scrip_master(self):
+        """Load today's scrip master into the calendar, downloading it first if needed"""
+        if not self.get_config('expiry.scrip_master_enabled', True):
+            return
+        contracts = load_scrip_master(
+            self.get_config('expiry.scrip_master_path', 'data/NFO_symbols.txt.zip'),
+            self.get_config('expiry.scrip_master_url', SCRIP_MASTER_URL),
+            underlyings={spec['symbol'].split('|')[-1] for spec in self._strategy_instances()}
+        )
+        if contracts:
+            self.calendar.load(contracts)
+    
+    def _build_strategy_host(self) -> StrategyHost:
+        """Build one zone strategy per strategy.instances entry (default: one per trading symbol)"""
+        zone_time = datetime.strptime(self.get_config('strategy.zone_calculation_time', '09:16:00'), '%H:%M:%S').time()
+        zone_offset = self.get_config('strategy.zone_offset', 2.5)
+        return build_zone_host(self._strategy_instances(), self.event_queue, self.signal_queue, zone_offset, zone_time,
+                               calendar=self.calendar, order_templates=self.order_templates)
+    
+    def _attach_strike_selectors(self):
+        """Give each zone strategy a live option chain around the current ATM and a delta-targeted strike selector"""
+        if not self.get_config('strike_selection.enabled', False):
+            return
+        # numpy-backed, so only loaded when strike selection is on
+        from trading_bot.pricing.chain import OptionChain
+        from trading_bot.strategy.strike_selector import StrikeSelector
+
+        width = self.get_config('strike_selection.strikes_around_atm', 10)
+        premium_min = self.get_config('strike_selection.premium_min')
+        premium_max = self.get_config('strike_selection.premium_max')
+        band = None
+        if premium_min is not None or premium_max is not None:
+            band = (premium_min or 0.0, premium_max if premium_max is not None else float('inf'))
+        selectors: Dict[str, StrikeSelector] = {}  # one chain per underlying, shared by its instances
+        self._chains: Dict[str, OptionChain] = {}
+        for name, strategy in self.strategy.instances.items():
+            underlying = getattr(strategy, 'symbol', None)
+            if underlying is None:
+                continue
+            try:
+                selector = selectors.get(underlying)
+                self.risk_manager.engine.delta_source = self._option_delta
+                if selector is None:
+                    quote = self.api_wrapper.get_quotes(exchange='NSE', token=INDEX_TOKENS.get(underlying, underlying))
+                    spot = float(quote.get('lp') or 0)
+                    expiry = self.calendar.expiry(underlying)
+                    if not spot or expiry is None:
+                        logger.warning(f"No spot or expiry for {underlying}, {name} trades the ATM option")
+                        continue
+                    listed = self.calendar.strikes(underlying, expiry)
+                    if listed:
+                        strikes = sorted(sorted(listed, key=lambda k: abs(k - spot))[:2 * width + 1])
+                    else:
+                        step = self.calendar.strike_steps.get(underlying, 50)
+                        atm = self.calendar.atm_strike(underlying, spot)
+                        strikes = [atm + i * step for i in range(-width, width + 1)]
+                    chain = OptionChain(
+                        underlying,
+                        datetime.combine(expiry, dt_time(15, 30)),
+                        rate=self.get_config('pricing.risk_free_rate', 0.065),
+                        dividend=self.get_config('pricing.dividend_yield', 0.0),
+                        time_step=self.get_config('pricing.reprice_interval', 60)
+                    )
+                    chain.set_spot(spot)
+                    for strike in strikes:
+                        for option_type in ('CE', 'PE'):
+                            contract = self.calendar.contract(underlying, strike, option_type)
+                            if contract is None:
+                                continue
+                            chain.add(contract.tsym, strike, option_type)
+                            feed = f"NFO|{contract.token or contract.tsym}"
+                            if feed not in self.data_handler.symbols:
+                                self.data_handler.symbols.append(feed)
+                    selector = selectors[underlying] = StrikeSelector(
+                        chain,
+                        target_delta=self.get_config('strike_selection.target_delta', 0.5),
+                        premium_band=band,
+                        max_spread=self.get_config('strike_selection.max_spread'),
+                        update_interval=self.get_config('strike_selection.update_interval', 0.25)
+                    )
+                    logger.info(f"Option chain for {underlying} {expiry}: {len(chain)} options around {spot:.2f}")
+                strategy.strike_selector = selector
+                self.strategy.add_symbols(name, selector.chain.symbols)
+                self._chains[underlying] = selector.chain
+            except Exception as e:
+                logger.error(f"Failed to attach strike selector to {name}: {e}")
+    
+    def _option_delta(self, symbol: str) -> Optional[float]:
+        """Last computed delta of an option in one of the subscribed chains"""
+        for chain in self._chains.values():
+            delta = chain.cached(symbol)
+            if delta is not None:
+                return delta
+        return None
+    
     def setup_components(self):
         """Initialize all trading bot components"""
         try:
             # Setup logging
             setup_logger(
                 log_dir=self.get_config('logging.path', LOG_DIR),
-                log_level=self.get_config('logging.level', 'INFO')
+                log_level=self.get_config('logging.level', 'INFO'),
+                fast_path=self.get_config('logging.fast_path', True)
             )
             logger.info("Logger initialized")
             
@@ -138,6 +298,7 @@ class TradingBotOrchestrator:
             self.signal_queue = EventQueue()
             self.order_queue = EventQueue()
             self.execution_queue = EventQueue()
+            self.risk_queue = EventQueue()  # RiskViolationEvents from the risk engine
             logger.info("Event queues initialized")
             
             # Initialize database and API
@@ -148,17 +309,48 @@ class TradingBotOrchestrator:
             self.api_wrapper = ShoonyaAPIWrapper()
             logger.info("API wrapper initialized")
             
+            # Every order's lifecycle; today's event log is replayed on a restart, and
+            # the orders table it keeps is what the startup reconciliation matches
+            self.order_book = OrderBook(
+                log_path=os.path.join(self.get_config('execution.order_log_dir', 'data/orders'),
+                                      f"orders_{date.today():%Y%m%d}.jsonl"),
+                fsync=self.get_config('data.journal_fsync', False),
+                database=self.database
+            )
+            
             # Initialize position manager
-            self.position_manager = PositionManager(self.database, self.api_wrapper)
+            # Open positions are loaded by load_local_state, alongside the broker login;
+            # outside live mode it sends nothing to the broker
+            mode = self.get_config('mode', 'papertrading')
+            self.position_manager = PositionManager(
+                self.database,
+                self.api_wrapper,
+                load_state=False,
+                order_book=self.order_book,
+                paper=mode != 'live',
+                sl_manager=StopLossManager(
+                    self.api_wrapper,
+                    min_interval=self.get_config('position.sl_modify_interval', 0.5),
+                    min_step=self.get_config('position.sl_modify_step', 1.0),
+                    product_type=self.get_config('execution.product_type', 'M'),
+                    tick_size=self.get_config('execution.tick_size', 0.05)
+                )
+            )
             logger.info("Position manager initialized")
             
-            # Initialize strategy with your config structure
-            self.strategy = MainStrategy(
-                self.event_queue, 
-                self.signal_queue,
-                buffer=self.get_config('strategy.entry_buffer', 0.0)
+            # Expiries and option symbols for the session
+            self.calendar = self._build_calendar()
+            
+            # Entry orders the strategies arm at zone time and the gateway fires on a signal
+            self.order_templates = OrderTemplates(
+                quantity=self.get_config('risk.position_size', 1),
+                product_type=self.get_config('execution.product_type', 'M'),
+                tick_size=self.get_config('execution.tick_size', 0.05)
             )
-            logger.info("Strategy initialized")
+            
+            # One zone strategy per configured instance, all fed from the same data handler
+            self.strategy = self._build_strategy_host()
+            logger.info(f"Strategy initialized: {', '.join(self.strategy.instances)}")
             
             # Initialize risk manager with your config structure
             self.risk_manager = RiskManager(
@@ -166,12 +358,29 @@ class TradingBotOrchestrator:
                 self.order_queue,
                 max_trades_per_day=self.get_config('risk.max_trades_per_day', 4),
                 max_daily_loss=self.get_config('risk.max_daily_loss', 500),
-                position_size=self.get_config('risk.position_size', 1)
+                position_size=self.get_config('risk.position_size', 1),
+                engine=RiskEngine(
+                    max_daily_loss=self.get_config('risk.max_daily_loss', 500),
+                    max_exposure=self.get_config('risk.max_position_value'),
+                    max_delta=self.get_config('risk.max_net_delta'),
+                    max_margin=self.get_config('risk.max_margin'),
+                    short_margin_rate=self.get_config('risk.short_margin_rate', 0.12),
+                    violation_queue=self.risk_queue
+                )
             )
             logger.info("Risk manager initialized")
             
+            # Portfolio equity and drawdown per tick; the risk manager halts entries on a kill
+            self.mtm = MarkToMarket(
+                capital=self.get_config('risk.capital', 0.0),
+                max_drawdown=self.get_config('risk.max_intraday_drawdown'),
+                publish_interval=self.get_config('monitor.pnl_interval', 1.0),
+                on_kill=self._on_drawdown_kill
+            )
+            self.mtm.subscribe(self.risk_manager.on_pnl)
+            self.mtm.subscribe(self._on_pnl)
+            
             # Initialize execution gateway based on mode
-            mode = self.get_config('mode', 'papertrading')
             logger.info(f"Initializing execution gateway in {mode} mode")
             
             if mode == 'papertrading':
@@ -180,7 +389,8 @@ class TradingBotOrchestrator:
                     self.execution_gateway = PaperExecutionGateway(
                         self.order_queue, 
                         self.execution_queue, 
-                        self.api_wrapper
+                        self.api_wrapper,
+                        order_book=self.order_book
                     )
                 except ImportError:
                     logger.warning("Paper gateway not available, using mock")
@@ -191,7 +401,9 @@ class TradingBotOrchestrator:
                     self.execution_gateway = ExecutionGateway(
                         self.order_queue, 
                         self.execution_queue, 
-                        self.api_wrapper
+                        self.api_wrapper,
+                        templates=self.order_templates,
+                        order_book=self.order_book
                     )
                 except ImportError:
                     logger.error("Live execution gateway not available")
@@ -205,18 +417,199 @@ class TradingBotOrchestrator:
                 symbols = self.config_manager.get_trading_symbols()
             else:
                 symbols = self.get_config('strategy.symbols', DEFAULT_SYMBOLS)
+            subscribed = {symbol.split('|')[-1] for symbol in symbols}
+            symbols = list(symbols) + [s for s in self.strategy.symbols() if s not in subscribed]
             
             self.data_handler = DataHandler(
                 self.api_wrapper,
                 self.event_queue,
                 symbols
             )
+            self.data_handler.order_listeners.append(self.order_book.on_order_update)
             logger.info(f"Data handler initialized for symbols: {symbols}")
             
+            # Crash-recovery journal of strategy, position and risk state
+            if self.get_config('data.journal_enabled', True):
+                self.state_journal = StateJournal(
+                    path=self.get_config('data.journal_path', 'data/state.journal'),
+                    interval=self.get_config('data.checkpoint_interval', 1.0),
+                    compact_bytes=self.get_config('data.journal_compact_bytes', 1 << 20),
+                    fsync=self.get_config('data.journal_fsync', False)
+                )
+                self.state_journal.register('strategy', self.strategy)
+                self.state_journal.register('positions', self.position_manager)
+                self.state_journal.register('risk', self.risk_manager)
+                self.state_journal.register('mtm', self.mtm)
+            
+            # Per-hop tick-to-fill latency histograms
+            latency.enabled = self.get_config('monitor.latency_enabled', True)
+            
+            # Sampling profiler, toggled at runtime with SIGUSR1
+            self.profiler = SamplingProfiler(
+                log_dir=self.get_config('logging.path', LOG_DIR),
+                interval=self.get_config('monitor.profiler_interval', 0.005)
+            )
+            
+            # Health checks run on their own thread; started with the data feed
+            if self.get_config('monitor.health_enabled', True):
+                try:
+                    from trading_bot.monitor.health_check import SystemHealthMonitor
+                    self.health_monitor = SystemHealthMonitor(self.get_config('monitor', {}) or {})
+                except ImportError as e:
+                    logger.warning(f"Health monitor not available: {e}")
+            
+            # Prometheus/OpenMetrics endpoint
+            if self.get_config('monitor.metrics_enabled', True):
+                try:
+                    self._register_metrics()
+                    self.metrics_server = MetricsServer(
+                        registry,
+                        host=self.get_config('monitor.metrics_host', '127.0.0.1'),
+                        port=self.get_config('monitor.metrics_port', 9108)
+                    )
+                    self.metrics_server.start()
+                except Exception as e:
+                    logger.warning(f"Metrics endpoint disabled: {e}")
+            
+            # Live state snapshot for the dashboard's live page
+            if self.get_config('monitor.snapshot_enabled', True):
+                try:
+                    from trading_bot.monitor.snapshot import SnapshotPublisher, SNAPSHOT_NAME
+                    self.snapshot_publisher = SnapshotPublisher(
+                        name=self.get_config('monitor.snapshot_name', SNAPSHOT_NAME),
+                        interval=self.get_config('monitor.snapshot_interval', 1.0)
+                    )
+                    logger.info(f"Live snapshot publishing to shared memory: {self.snapshot_publisher.name}")
+                except Exception as e:
+                    logger.warning(f"Live snapshot disabled: {e}")
+            
         except Exception as e:
             logger.error(f"Failed to setup components: {e}")
             raise
     
+    def _register_metrics(self):
+        """Register scrape-time gauges that read component state"""
+        register_process_metrics(registry)
+        queue_depth = registry.gauge('trading_queue_depth', "Events waiting per queue", ['queue'])
+        for name, q in (('event', self.event_queue), ('signal', self.signal_queue),
+                        ('order', self.order_queue), ('execution', self.execution_queue)):
+            queue_depth.labels(name).set_function(q.qsize)
+        registry.gauge('trading_ticks_per_second', "Tick rate since the previous scrape").set_function(RateGauge(TICKS))
+        registry.gauge('trading_open_positions', "Open positions").set_function(
+            lambda: len(self.position_manager.open_positions)
+        )
+        registry.gauge('trading_realized_pnl', "Realized P&L today").set_function(lambda: self.position_manager.daily_pnl)
+        registry.gauge('trading_unrealized_pnl', "Unrealized P&L of open positions").set_function(
+            lambda: sum(p['unrealized_pnl'] for p in self._mark_positions())
+        )
+        registry.gauge('trading_risk_pnl', "Realized plus unrealized P&L per the risk engine").set_function(
+            lambda: self.risk_manager.engine.total_pnl
+        )
+        registry.gauge('trading_gross_exposure', "Gross premium exposure").set_function(
+            lambda: self.risk_manager.engine.gross_exposure
+        )
+        registry.gauge('trading_margin_estimate', "Estimated margin in use").set_function(
+            lambda: self.risk_manager.engine.margin
+        )
+        registry.gauge('trading_equity', "Mark-to-market portfolio equity").set_function(lambda: self.mtm.equity)
+        registry.gauge('trading_drawdown', "Drawdown from the intraday equity high").set_function(
+            lambda: self.mtm.drawdown
+        )
+        registry.gauge('trading_trades_today', "Orders let through by the risk manager today").set_function(
+            lambda: self.risk_manager.trades_today
+        )
+        registry.gauge('trading_feed_connected', "1 if the websocket feed is connected").set_function(
+            lambda: 1 if self.data_handler.ws_connected else 0
+        )
+        try:
+            from trading_bot.monitor.health_check import SystemHealthMonitor
+            SystemHealthMonitor.register_metrics(registry)
+        except ImportError as e:
+            logger.info(f"System resource metrics unavailable: {e}")
+    
+    def _record_handler(self, name: str, started: int):
+        """Record a handler call started at perf_counter_ns() == started"""
+        elapsed = time.perf_counter_ns() - started
+        self.handler_stats.record(name, elapsed)
+        histogram = self._handler_latency.get(name)
+        if histogram is None:
+            histogram = self._handler_latency[name] = HANDLER_LATENCY.labels(name)
+        histogram.observe(elapsed / 1e9)
+    
+    def _mark_positions(self) -> list:
+        """Open positions marked to the last seen price"""
+        last_price = getattr(self.position_manager.open_positions, 'last_price', {})
+        positions = []
+        for pos_id, position in list(self.position_manager.open_positions.items()):
+            price = last_price.get(position['symbol'], position['entry_price'])
+            sign = 1 if position['side'] == 'BUY' else -1
+            positions.append({
+                'id': pos_id,
+                'symbol': position['symbol'],
+                'side': position['side'],
+                'quantity': position['quantity'],
+                'entry_price': position['entry_price'],
+                'sl_price': position.get('sl_price'),
+                'last_price': price,
+                'unrealized_pnl': (price - position['entry_price']) * position['quantity'] * sign,
+                'trailing_sl': position.get('trailing_sl', False)
+            })
+        return positions
+    
+    def _collect_live_state(self) -> dict:
+        """Build the compact state snapshot published for the live dashboard"""
+        positions = self._mark_positions()
+        now = datetime.now()
+        tick_age = {
+            symbol: (now - ts).total_seconds()
+            for symbol, ts in list(self.data_handler.last_tick_time.items())
+        }
+        
+        instances = list(self.strategy.instances.values())
+        primary = instances[0] if instances else None
+        state = {
+            'timestamp': now.isoformat(),
+            'mode': self.get_config('mode', 'papertrading'),
+            'running': self.running,
+            'feed_connected': self.data_handler.ws_connected,
+            'tick_age_seconds': tick_age,
+            'zones': primary.zones if primary else None,
+            'gates': primary.gates_status if primary else {},
+            'position_type': primary.current_position_type if primary else None,
+            'strategies': [
+                {'name': s.name, 'symbol': s.symbol, 'zones': s.zones, 'gates': s.gates_status,
+                 'position_type': s.current_position_type}
+                for s in instances
+            ],
+            'positions': positions,
+            'daily_pnl': self.position_manager.daily_pnl,
+            'unrealized_pnl': sum(p['unrealized_pnl'] for p in positions),
+            'trades_today': self.risk_manager.trades_today,
+            'mtm': self._pnl.to_dict() if self._pnl else None,
+            'halted': self.risk_manager.halted,
+            'open_orders': [
+                {'uuid': o.order_uuid, 'symbol': o.symbol, 'side': o.side, 'state': o.state,
+                 'filled': o.filled_quantity, 'quantity': o.quantity, 'broker_order_id': o.broker_order_id}
+                for o in self.order_book.open_orders()
+            ],
+            'queues': {
+                'event': self.event_queue.qsize(),
+                'signal': self.signal_queue.qsize(),
+                'order': self.order_queue.qsize(),
+                'execution': self.execution_queue.qsize()
+            },
+            'loop_busy_us': {
+                'last': self._loop_busy_ns / 1000,
+                'max': self._loop_busy_max_ns / 1000
+            },
+            'latency': latency.summary(),
+            'handlers': self.handler_stats.summary(),
+            'profiling': self.profiler.running,
+            'health': self.health_monitor.latest if self.health_monitor else {}
+        }
+        self._loop_busy_max_ns = 0
+        return state
+    
     def _create_mock_gateway(self):
         """Create a mock execution gateway for testing"""
         class MockExecutionGateway:
@@ -249,7 +642,8 @@ class TradingBotOrchestrator:
                 logger.info(f"Connecting to broker (attempt {attempt + 1}/{max_retries})")
                 
                 if hasattr(self.api_wrapper, 'connect'):
-                    self.api_wrapper.connect()
+                    if not self.api_wrapper.connect():
+                        raise ConnectionError("broker login was not accepted")
                     logger.info("Successfully connected to broker")
                     return True
                 else:
@@ -264,6 +658,112 @@ class TradingBotOrchestrator:
         logger.error("Failed to connect to broker after all attempts")
         return False
     
+    def load_local_state(self) -> dict:
+        """Restore in-memory state from the journal (positions fall back to the database), plus the halt flag"""
+        restored = self.state_journal.restore() if self.state_journal else []
+        if 'positions' not in restored:
+            self.position_manager.load_positions_from_db()
+        return {
+            'restored': restored,
+            'system_halted': (
+                hasattr(self.database, 'get_system_state')
+                and self.database.get_system_state('SYSTEM_HALTED') == 'TRUE'
+            )
+        }
+    
+    def _load_session(self) -> dict:
+        """Scrip master, then local state: restored strategies build their option symbols from the calendar"""
+        try:
+            self.load_scrip_master()
+        except Exception as e:
+            logger.error(f"Failed to load scrip master, using rule-based expiries: {e}")
+        return self.load_local_state()
+    
+    def startup(self) -> bool:
+        """Log in to the broker while the scrip master and local state load, then reconcile the two"""
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="Startup") as pool:
+            connecting = pool.submit(self.connect_to_broker)
+            loading = pool.submit(self._load_session)
+            try:
+                local_state = loading.result()
+            except Exception as e:
+                logger.error(f"Failed to load local state: {e}")
+                local_state = None
+            connected = connecting.result()
+        
+        if not connected:
+            logger.error("Cannot proceed without broker connection")
+            send_alert("Failed to connect to broker", "CRITICAL")
+            return False
+        if local_state is None:
+            logger.error("Cannot proceed without local state")
+            return False
+        
+        # Check if system was previously halted
+        if local_state['system_halted']:
+            logger.warning("System was previously halted. Manual intervention may be required.")
+            # In production, you might want to require manual intervention
+            # For now, we'll reset and continue
+            if hasattr(self.database, 'reset_system_halt'):
+                self.database.reset_system_halt()
+        
+        # Paper positions and orders never reach the broker, so its books have nothing to say about them
+        mode = self.get_config('mode', 'papertrading')
+        if mode != 'live':
+            logger.info(f"Skipping broker reconciliation in {mode} mode")
+            return True
+        
+        local_positions = self._local_positions()
+        
+        # Journal-restored positions already carry their stops and SL order ids, so the
+        # broker check runs alongside the feed instead of delaying the first tick; its
+        # position repairs (or the halt, if it fails) are applied by the main loop
+        if 'positions' in local_state.get('restored', []):
+            def reconcile_in_background():
+                report = reconcile_state(self.api_wrapper, self.database, local_positions)
+                self._reconciliation_failed = report is None
+                self._reconciliation = report
+            
+            reconcile_thread = threading.Thread(target=reconcile_in_background, daemon=True, name="Reconcile")
+            reconcile_thread.start()
+            return True
+        
+        # Perform state reconciliation
+        report = reconcile_state(self.api_wrapper, self.database, local_positions)
+        if report is None:
+            logger.error("State reconciliation failed, cannot proceed safely")
+            return False
+        self._apply_reconciliation(report)
+        return True
+    
+    def _local_positions(self) -> Dict[str, int]:
+        """Signed net quantity per symbol from the position manager"""
+        net: Dict[str, int] = {}
+        for position in self.position_manager.open_positions.values():
+            quantity = position.get('quantity') or 0
+            if position.get('side') not in ('BUY', 'LONG'):
+                quantity = -quantity
+            net[position['symbol']] = net.get(position['symbol'], 0) + quantity
+        return net
+    
+    def _check_reconciliation(self):
+        """Apply a finished background reconciliation, or halt entries if it failed (main loop thread)"""
+        if self._reconciliation_failed:
+            self._reconciliation_failed = False
+            logger.error("Background state reconciliation failed, halting new entries")
+            self.risk_manager.halt('RECONCILIATION_FAILED')
+        if self._reconciliation is not None:
+            report, self._reconciliation = self._reconciliation, None
+            self._apply_reconciliation(report)
+    
+    def _apply_reconciliation(self, report: ReconciliationReport):
+        """Stop managing positions the broker shows flat (must run on the main loop thread)"""
+        for symbol in report.flat_symbols:
+            book = self.position_manager.open_positions
+            for pos_id in list(book.for_symbol(symbol)):
+                logger.warning(f"Dropping position {pos_id} in {symbol}: broker shows no open quantity")
+                del book[pos_id]
+    
     def start_data_feed(self):
         """Start market data feed in separate thread"""
         try:
@@ -284,6 +784,20 @@ class TradingBotOrchestrator:
             self.threads.append(data_thread)
             logger.info("Data feed thread started")
             
+            if self.health_monitor:
+                self.health_monitor.start(
+                    position_manager=self.position_manager,
+                    database=self.database,
+                    data_handler=self.data_handler,
+                    queues={
+                        'event': self.event_queue,
+                        'signal': self.signal_queue,
+                        'order': self.order_queue,
+                        'execution': self.execution_queue
+                    },
+                    last_loop_time=lambda: self._last_loop_time
+                )
+            
         except Exception as e:
             logger.error(f"Failed to start data feed: {e}")
     
@@ -295,8 +809,17 @@ class TradingBotOrchestrator:
         
         while self.running:
             try:
+                loop_start = time.perf_counter_ns()
+                self._last_loop_time = time.monotonic()
                 current_time = datetime.now().time()
                 
+                if self._profiler_toggle_requested:
+                    self._profiler_toggle_requested = False
+                    self.toggle_profiler()
+                
+                # Position repairs (or a halt) from a background reconciliation
+                self._check_reconciliation()
+                
                 # Check for 3 PM closure
                 if current_time >= dt_time(15, 0, 0) and current_time <= dt_time(15, 5, 0):
                     self._close_all_positions_at_3pm()
@@ -304,6 +827,7 @@ class TradingBotOrchestrator:
                     break
                 
                 events_processed = 0
+                state_changed = False
                 
                 # Process market events
                 while not self.event_queue.empty() and events_processed < 100:
@@ -311,10 +835,22 @@ class TradingBotOrchestrator:
                         event = self.event_queue.get(block=False)
                         
                         if hasattr(self.strategy, 'process_event'):
+                            started = time.perf_counter_ns()
                             self.strategy.process_event(event)
+                            self._record_handler('strategy.process_event', started)
                         
                         # Update position manager with current prices
                         if isinstance(event, MarketEvent):
+                            started = time.perf_counter_ns()
+                            self.risk_manager.on_market_event(event)
+                            self._record_handler('risk.on_tick', started)
+                            started = time.perf_counter_ns()
+                            self.mtm.on_tick(event.symbol, event.price)
+                            self._record_handler('mtm.on_tick', started)
+                            if self._kill is not None:
+                                state_changed = True
+                                self._flatten_on_kill()
+                            started = time.perf_counter_ns()
                             if hasattr(self.position_manager, 'update_trailing_sl'):
                                 self.position_manager.update_trailing_sl(event.symbol, event.price)
                             
@@ -322,25 +858,34 @@ class TradingBotOrchestrator:
                             if hasattr(self.position_manager, 'check_exit_conditions'):
                                 exits = self.position_manager.check_exit_conditions(event.symbol, event.price)
                                 for pos_id, reason, exit_price in exits:
+                                    state_changed = True
                                     logger.info(f"Exit condition met: {pos_id} - {reason}")
                                     if hasattr(self.position_manager, 'close_position'):
-                                        self.position_manager.close_position(pos_id, reason, exit_price)
+                                        self._close_position(pos_id, reason, exit_price)
+                            self._record_handler('position.on_tick', started)
                         
                         # For paper trading, update execution gateway
                         if hasattr(self.execution_gateway, 'on_market_event'):
+                            started = time.perf_counter_ns()
                             self.execution_gateway.on_market_event(event)
+                            self._record_handler('gateway.on_market_event', started)
                         
                         events_processed += 1
                         
                     except Exception as e:
                         logger.error(f"Error processing market event: {e}")
                 
+                # Trailing stop ratchets held back by the modify interval
+                self.position_manager.sl_manager.flush()
+                
                 # Process signals
                 while not self.signal_queue.empty():
                     try:
                         signal_event = self.signal_queue.get(block=False)
                         if hasattr(self.risk_manager, 'process_signal'):
+                            started = time.perf_counter_ns()
                             self.risk_manager.process_signal(signal_event)
+                            self._record_handler('risk.process_signal', started)
                     except Exception as e:
                         logger.error(f"Error processing signal: {e}")
                 
@@ -348,8 +893,11 @@ class TradingBotOrchestrator:
                 while not self.order_queue.empty():
                     try:
                         order = self.order_queue.get(block=False)
+                        ORDERS.inc()
                         if hasattr(self.execution_gateway, 'process_order'):
+                            started = time.perf_counter_ns()
                             self.execution_gateway.process_order(order)
+                            self._record_handler('gateway.process_order', started)
                     except Exception as e:
                         logger.error(f"Error processing order: {e}")
                 
@@ -357,18 +905,39 @@ class TradingBotOrchestrator:
                 while not self.execution_queue.empty():
                     try:
                         execution_event = self.execution_queue.get(block=False)
+                        state_changed = True
+                        EXECUTIONS.labels(execution_event.status).inc()
+                        stamps = execution_event.latency
+                        if stamps and 'order' in stamps and 'fill' in stamps:
+                            ORDER_ROUND_TRIP.observe((stamps['fill'] - stamps['order']) / 1e9)
+                        
+                        self.risk_manager.on_execution(execution_event)
+                        self.mtm.on_execution(execution_event)
                         
                         # Add position to position manager
                         if execution_event.status == 'FILLED':
                             if hasattr(self.position_manager, 'add_position'):
                                 sl_points = self.get_config('strategy.sl_points', 2.5)
+                                started = time.perf_counter_ns()
                                 self.position_manager.add_position(execution_event, sl_points=sl_points)
+                                self._record_handler('position.add_position', started)
+                        
+                        # A fill that trips the kill switch flattens at once, including the new position
+                        if self._kill is not None:
+                            self._flatten_on_kill()
                         
                         logger.info(f"Execution processed: {execution_event}")
                         
                     except Exception as e:
                         logger.error(f"Error processing execution: {e}")
                 
+                # Risk limit breaches
+                while not self.risk_queue.empty():
+                    violation = self.risk_queue.get(block=False)
+                    logger.warning(f"Risk violation: {violation.reason} on {violation.symbol}")
+                    if violation.reason == MAX_DAILY_LOSS and violation.signal_event is None:
+                        send_alert(f"Daily loss limit breached: P&L {violation.info.get('pnl', 0):.2f}", "CRITICAL")
+                
                 # Heartbeat logging every minute
                 now = datetime.now()
                 if (now - last_heartbeat).seconds >= 60:
@@ -379,6 +948,21 @@ class TradingBotOrchestrator:
                     logger.info(f"System heartbeat - Active positions: {position_count}")
                     last_heartbeat = now
                 
+                # Loop time without the idle sleep, for the live snapshot
+                self._loop_busy_ns = time.perf_counter_ns() - loop_start
+                if self._loop_busy_ns > self._loop_busy_max_ns:
+                    self._loop_busy_max_ns = self._loop_busy_ns
+                
+                if self.snapshot_publisher:
+                    self.snapshot_publisher.maybe_publish(self._collect_live_state)
+                
+                # Fills and exits are journaled at once; trailing stops and gates on the interval
+                if self.state_journal:
+                    if state_changed:
+                        self.state_journal.checkpoint()
+                    else:
+                        self.state_journal.maybe_checkpoint()
+                
                 # Small sleep to prevent CPU spinning
                 time.sleep(0.01)
                 
@@ -386,6 +970,50 @@ class TradingBotOrchestrator:
                 logger.error(f"Error in main event loop: {e}")
                 time.sleep(1)
     
+    def _close_position(self, pos_id: str, reason: str, exit_price: float):
+        """Close a position through the position manager and book the exit with the risk engine"""
+        position = self.position_manager.open_positions.get(pos_id)
+        booked = self.position_manager.close_position(pos_id, reason, exit_price)
+        if position is not None and pos_id not in self.position_manager.open_positions:
+            exit_price = booked if booked is not None else exit_price
+            side = 'SELL' if position.get('side') in ('BUY', 'LONG') else 'BUY'
+            self.risk_manager.engine.on_trade(position['symbol'], side, position['quantity'], exit_price)
+            self.mtm.on_fill(position['symbol'], side, position['quantity'], exit_price)
+    
+    def _on_pnl(self, snapshot: PnLSnapshot):
+        """Keep the latest P&L for the live snapshot"""
+        self._pnl = snapshot
+    
+    def _on_drawdown_kill(self, snapshot: PnLSnapshot):
+        """Kill switch: halt entries now, flatten once the tick that tripped it is handled"""
+        self.risk_manager.halt('DRAWDOWN')
+        self._kill = snapshot
+    
+    def _flatten_on_kill(self):
+        """Close every open position and record the halt after an intraday drawdown kill"""
+        snapshot, self._kill = self._kill, None
+        message = (f"Drawdown kill switch: equity {snapshot.equity:.2f} is {snapshot.drawdown:.2f} "
+                   f"below the intraday high {snapshot.high_water:.2f}")
+        send_alert(message, "CRITICAL")
+        if hasattr(self.database, 'save_system_state'):
+            self.database.save_system_state('SYSTEM_HALTED', 'TRUE')
+            self.database.save_system_state('HALT_TIMESTAMP', datetime.now().isoformat())
+        last_price = self.position_manager.open_positions.last_price
+        for pos_id, position in list(self.position_manager.open_positions.items()):
+            self._close_position(pos_id, 'DRAWDOWN_KILL', last_price.get(position['symbol'], position['entry_price']))
+    
+    def profiler_signal_handler(self, signum, frame):
+        """Request a profiler toggle; the event loop acts on it at the top of its next iteration"""
+        self._profiler_toggle_requested = True
+    
+    def toggle_profiler(self) -> bool:
+        """Start or stop the sampling profiler; returns True if it is now running"""
+        if self.profiler.toggle():
+            self.handler_stats.reset()
+            return True
+        logger.info(f"Handler time since profiling started: {self.handler_stats.summary()}")
+        return False
+    
     def _close_all_positions_at_3pm(self):
         """Force close all positions at 3 PM"""
         try:
@@ -460,6 +1088,36 @@ class TradingBotOrchestrator:
         if hasattr(self.database, 'save_system_state'):
             self.database.save_system_state('LAST_SHUTDOWN', datetime.now().isoformat())
         
+        if self.health_monitor:
+            self.health_monitor.stop()
+        
+        if self.state_journal:
+            self.state_journal.close()
+        
+        self.position_manager.sl_manager.close()
+        self.order_book.close()
+        
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        
+        if self.profiler.stop():
+            self.profiler.join(timeout=5)
+        logger.info(f"Handler time: {self.handler_stats.summary()}")
+        
+        latency_file = latency.dump(self.get_config('logging.path', LOG_DIR))
+        if latency_file:
+            logger.info(f"Latency histograms written to {latency_file}")
+        
+        if self.snapshot_publisher:
+            self.snapshot_publisher.close()
+            self.snapshot_publisher = None
+        
+        # Give queued alerts a bounded chance to go out before the process exits
+        if _notifier:
+            _notifier.close(timeout=self.get_config('alerts.shutdown_timeout', 10))
+        
+        fastlog.stop()
         logger.info("Graceful shutdown completed")
     
     def signal_handler(self, signum, frame):
@@ -474,33 +1132,21 @@ class TradingBotOrchestrator:
             logger.info("Starting Nifty Options Trading Bot")
             send_alert("Trading bot starting up", "INFO")
             
-            # Perform state reconciliation
-            if not reconcile_state(self.api_wrapper, self.database):
-                logger.error("State reconciliation failed, cannot proceed safely")
-                return
-            
-            # Connect to broker
-            if not self.connect_to_broker():
-                logger.error("Cannot proceed without broker connection")
-                send_alert("Failed to connect to broker", "CRITICAL")
+            # Connect to broker and load local state, then reconcile
+            if not self.startup():
                 return
             
-            # Check if system was previously halted
-            if hasattr(self.database, 'get_system_state'):
-                system_halted = self.database.get_system_state('SYSTEM_HALTED')
-                if system_halted == 'TRUE':
-                    logger.warning("System was previously halted. Manual intervention may be required.")
-                    # In production, you might want to require manual intervention
-                    # For now, we'll reset and continue
-                    if hasattr(self.database, 'reset_system_halt'):
-                        self.database.reset_system_halt()
+            # Option chains need the broker for the spot, and must be subscribed before the feed starts
+            self._attach_strike_selectors()
             
             # Start data feed
             self.start_data_feed()
             
-            # Give data feed time to establish connection
+            # Wait until the feed is subscribed (returns as soon as it is, not after a fixed delay)
             logger.info("Waiting for data feed to establish connection...")
-            time.sleep(5)
+            ready_timeout = self.get_config('data.feed_ready_timeout', 30)
+            if not self.data_handler.ready.wait(timeout=ready_timeout):
+                logger.warning(f"Data feed not ready after {ready_timeout}s, continuing; it keeps retrying in the background")
             
             # Start main event processing loop
             logger.info("Starting main event processing loop")
@@ -525,8 +1171,7 @@ def main():
         bot.run()
     except Exception as e:
         logger.error(f"Failed to start trading bot: {e}")
-        if ALERTS_AVAILABLE:
-            send_alert(f"Failed to start bot: {e}", "CRITICAL")
+        send_alert(f"Failed to start bot: {e}", "CRITICAL")
 
 
 if __name__ == '__main__':
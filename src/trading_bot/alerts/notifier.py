@@ -1,66 +1,103 @@
 # Missing Component: Alert System
 # trading_bot/alerts/notifier.py
 
+import json
+import queue
 import smtplib
+import threading
+import time
 import requests
+from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import Optional, List, Dict, Any
 from loguru import logger
 import os
 
+PRIORITY_ORDER = ['INFO', 'SUCCESS', 'WARNING', 'ERROR', 'CRITICAL']
+URGENT_PRIORITIES = ('ERROR', 'CRITICAL')  # flushed without waiting out the batch window
+TELEGRAM_MAX_LENGTH = 4096
+
 class AlertNotifier:
     """
     Alert system for trading bot notifications via email, Telegram, etc.
+    
+    ``alert`` only logs and drops the message into an outbox; a background
+    worker batches whatever arrives within ``batch_window`` seconds (urgent
+    priorities are sent straight away), collapses repeats, and delivers each
+    batch over a persistent HTTP session and SMTP connection. Delivery is retried
+    ``max_retries`` times with backoff; batches that still fail, or alerts that
+    arrive while the outbox is full, are appended to ``spill_path`` as JSON lines.
+    The caller never waits on the network.
     """
     
-    def __init__(self):
+    def __init__(self, batch_window: float = 2.0, dedup_seconds: float = 60.0, max_retries: int = 3,
+                 retry_backoff: float = 1.0, max_queue: int = 1000, max_batch: int = 50,
+                 spill_path: str = 'logs/alerts_spillover.jsonl'):
         self.telegram_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.telegram_chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        self.telegram_api_url = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
         self.email_config = {
             'smtp_server': os.getenv('SMTP_SERVER', 'smtp.gmail.com'),
             'smtp_port': int(os.getenv('SMTP_PORT', '587')),
+            'starttls': os.getenv('SMTP_STARTTLS', 'true').lower() != 'false',
             'username': os.getenv('EMAIL_USERNAME'),
             'password': os.getenv('EMAIL_PASSWORD'),
             'alert_email': os.getenv('ALERT_EMAIL')
         }
+        
+        self.batch_window = batch_window
+        self.dedup_seconds = dedup_seconds
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_batch = max_batch
+        self.spill_path = spill_path
+        
+        self._outbox: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._closing = threading.Event()
+        self._session: Optional[requests.Session] = None
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_sent: Dict[tuple, float] = {}  # (priority, message) -> monotonic time of last delivery
+        self._suppressed: Dict[tuple, int] = {}   # repeats dropped since the last delivery
     
     def send_telegram_alert(self, message: str, priority: str = 'INFO'):
-        """Send alert via Telegram"""
+        """Send alert via Telegram (blocking; used by the outbox worker)"""
         if not self.telegram_token or not self.telegram_chat_id:
             return False
         
+        emoji = {'INFO': 'ℹ️', 'WARNING': '⚠️', 'ERROR': '🚨', 'CRITICAL': '🚨', 'SUCCESS': '✅'}
+        formatted_message = f"{emoji.get(priority, 'ℹ️')} *Trading Bot Alert*\n\n{message}"
+        return self._post_telegram(formatted_message)
+    
+    def _post_telegram(self, text: str) -> bool:
         try:
-            emoji = {'INFO': 'ℹ️', 'WARNING': '⚠️', 'ERROR': '🚨', 'SUCCESS': '✅'}
-            formatted_message = f"{emoji.get(priority, 'ℹ️')} *Trading Bot Alert*\n\n{message}"
+            if self._session is None:
+                self._session = requests.Session()
             
-            url = f"https://api.telegram.org/bot{self.telegram_token}/sendMessage"
+            url = f"{self.telegram_api_url}/bot{self.telegram_token}/sendMessage"
             payload = {
                 'chat_id': self.telegram_chat_id,
-                'text': formatted_message,
+                'text': text[:TELEGRAM_MAX_LENGTH],
                 'parse_mode': 'Markdown'
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self._session.post(url, json=payload, timeout=10)
+            if response.status_code != 200:
+                logger.warning(f"Telegram API returned {response.status_code}")
             return response.status_code == 200
-            
+        
         except Exception as e:
             logger.error(f"Failed to send Telegram alert: {e}")
             return False
     
     def send_email_alert(self, subject: str, message: str, priority: str = 'INFO'):
-        """Send alert via email"""
-        if not all([self.email_config['username'], self.email_config['password'], 
-                   self.email_config['alert_email']]):
+        """Send alert via email (blocking; used by the outbox worker)"""
+        if not self.email_config['username'] or not self.email_config['alert_email']:
             return False
         
-        try:
-            msg = MIMEMultipart()
-            msg['From'] = self.email_config['username']
-            msg['To'] = self.email_config['alert_email']
-            msg['Subject'] = f"[{priority}] Trading Bot: {subject}"
-            
-            body = f"""
+        body = f"""
             Trading Bot Alert
             
             Priority: {priority}
@@ -72,39 +109,229 @@ class AlertNotifier:
             ---
             Automated message from Nifty Options Trading Bot
             """
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            server = smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port'])
+        return self._send_email(f"[{priority}] Trading Bot: {subject}", body)
+    
+    def _smtp_connection(self) -> smtplib.SMTP:
+        """Reuse the open SMTP connection if it still answers NOOP, otherwise reconnect"""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except Exception:
+                pass
+            self._close_smtp()
+        
+        server = smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port'], timeout=10)
+        if self.email_config['starttls']:
             server.starttls()
+        if self.email_config['password']:
             server.login(self.email_config['username'], self.email_config['password'])
+        self._smtp = server
+        return server
+    
+    def _send_email(self, subject: str, body: str) -> bool:
+        try:
+            msg = MIMEMultipart()
+            msg['From'] = self.email_config['username']
+            msg['To'] = self.email_config['alert_email']
+            msg['Subject'] = subject
+            msg.attach(MIMEText(body, 'plain'))
             
-            text = msg.as_string()
-            server.sendmail(self.email_config['username'], self.email_config['alert_email'], text)
-            server.quit()
-            
+            server = self._smtp_connection()
+            server.sendmail(self.email_config['username'], self.email_config['alert_email'], msg.as_string())
             return True
-            
+        
         except Exception as e:
             logger.error(f"Failed to send email alert: {e}")
+            self._close_smtp()
             return False
     
-    def alert(self, message: str, priority: str = 'INFO', 
+    def _close_smtp(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception:
+                try:
+                    self._smtp.close()
+                except Exception:
+                    pass
+            self._smtp = None
+    
+    def alert(self, message: str, priority: str = 'INFO',
              telegram: bool = True, email: bool = False):
-        """Send alert via multiple channels"""
+        """Queue an alert for the background sender; never blocks on the network"""
         logger.info(f"[{priority}] {message}")
         
-        success = True
+        if not (telegram or email):
+            return True
+        
+        item = {
+            'message': message,
+            'priority': priority,
+            'telegram': telegram,
+            'email': email,
+            'time': datetime.now().isoformat()
+        }
+        self._ensure_worker()
+        try:
+            self._outbox.put_nowait(item)
+            return True
+        except queue.Full:
+            logger.warning("Alert outbox full, spilling alert to disk")
+            self._spill([item], 'outbox_full')
+            return False
+    
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._closing.clear()
+                self._worker = threading.Thread(target=self._run, daemon=True, name="AlertNotifier")
+                self._worker.start()
+    
+    def _run(self):
+        """Worker loop: collect a batch, deliver it, mark it done"""
+        stop = False
+        while not stop:
+            item = self._outbox.get()
+            if item is None:
+                self._outbox.task_done()
+                break
+            
+            batch = [item]
+            deadline = time.monotonic() if item['priority'] in URGENT_PRIORITIES else time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    nxt = self._outbox.get(timeout=remaining) if remaining > 0 else self._outbox.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._outbox.task_done()
+                    stop = True
+                    break
+                batch.append(nxt)
+                if nxt['priority'] in URGENT_PRIORITIES:
+                    deadline = time.monotonic()
+            
+            try:
+                self._deliver(batch)
+            except Exception as e:
+                logger.error(f"Alert delivery failed: {e}")
+                self._spill(batch, str(e))
+            finally:
+                for _ in batch:
+                    self._outbox.task_done()
+        
+        self._close_smtp()
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+    
+    def _dedup(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Collapse repeats within the batch and drop ones delivered within dedup_seconds"""
+        merged: Dict[tuple, Dict[str, Any]] = {}
+        for item in batch:
+            key = (item['priority'], item['message'])
+            if key in merged:
+                entry = merged[key]
+                entry['count'] += 1
+                entry['telegram'] = entry['telegram'] or item['telegram']
+                entry['email'] = entry['email'] or item['email']
+            else:
+                merged[key] = {**item, 'count': 1}
+        
+        now = time.monotonic()
+        result = []
+        for key, entry in merged.items():
+            last = self._last_sent.get(key)
+            if last is not None and now - last < self.dedup_seconds:
+                self._suppressed[key] = self._suppressed.get(key, 0) + entry['count']
+                continue
+            entry['count'] += self._suppressed.pop(key, 0)
+            self._last_sent[key] = now
+            result.append(entry)
+        return result
+    
+    @staticmethod
+    def _line(entry: Dict[str, Any]) -> str:
+        repeat = f" (x{entry['count']})" if entry['count'] > 1 else ""
+        return f"{entry['message']}{repeat}"
+    
+    def _deliver(self, batch: List[Dict[str, Any]]):
+        entries = self._dedup(batch)
+        if not entries:
+            return
         
-        if telegram:
-            if not self.send_telegram_alert(message, priority):
-                success = False
+        top = max((e['priority'] for e in entries), key=lambda p: PRIORITY_ORDER.index(p) if p in PRIORITY_ORDER else 0)
         
-        if email:
-            if not self.send_email_alert("Alert", message, priority):
-                success = False
+        telegram_entries = [e for e in entries if e['telegram']]
+        if telegram_entries:
+            if len(telegram_entries) == 1:
+                entry = telegram_entries[0]
+                send = lambda: self.send_telegram_alert(self._line(entry), entry['priority'])
+            else:
+                text = f"*Trading Bot Alerts* ({len(telegram_entries)})\n\n" + "\n".join(
+                    f"[{e['priority']}] {self._line(e)}" for e in telegram_entries
+                )
+                send = lambda: self._post_telegram(text)
+            if not self._with_retries(send):
+                self._spill(telegram_entries, 'telegram')
         
-        return success
+        email_entries = [e for e in entries if e['email']]
+        if email_entries:
+            if len(email_entries) == 1:
+                entry = email_entries[0]
+                send = lambda: self.send_email_alert("Alert", self._line(entry), entry['priority'])
+            else:
+                body = "\n".join(f"{e['time']} [{e['priority']}] {self._line(e)}" for e in email_entries)
+                send = lambda: self._send_email(f"[{top}] Trading Bot: {len(email_entries)} alerts", body)
+            if not self._with_retries(send):
+                self._spill(email_entries, 'email')
+    
+    def _with_retries(self, send) -> bool:
+        for attempt in range(self.max_retries):
+            if send():
+                return True
+            if attempt < self.max_retries - 1 and self._closing.wait(self.retry_backoff * (2 ** attempt)):
+                # Shutting down: one last try, no more waiting
+                return send()
+        return False
+    
+    def _spill(self, items: List[Dict[str, Any]], reason: str):
+        """Append undeliverable alerts to the spillover file"""
+        try:
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.spill_path, 'a') as f:
+                for item in items:
+                    f.write(json.dumps({**item, 'spill_reason': reason}) + "\n")
+        except Exception as e:
+            logger.error(f"Failed to spill alerts to {self.spill_path}: {e}")
+    
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until the outbox is empty; returns False on timeout"""
+        deadline = time.monotonic() + timeout
+        while self._outbox.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    
+    def close(self, timeout: float = 10.0):
+        """Deliver what is queued (retries cut short), then stop the worker and close connections"""
+        if self._worker is None or not self._worker.is_alive():
+            return
+        self._closing.set()
+        try:
+            self._outbox.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._worker.join(timeout)
+        if self._worker.is_alive():
+            logger.warning("Alert worker did not finish before shutdown")
 
 # Global notifier instance
 notifier = AlertNotifier()
@@ -2,18 +2,22 @@
 # Updated to use official Shoonya API patterns
 
 import os
-import pyotp
 import yaml
-from typing import Any, Optional, Dict, List
+from typing import TYPE_CHECKING, Any, Optional, Dict, List
 from datetime import datetime
 from loguru import logger
 
-# Import the official Shoonya API
-try:
+if TYPE_CHECKING:
     from NorenRestApiPy.NorenApi import NorenApi
-except ImportError:
-    logger.error("NorenRestApiPy not installed. Install with: pip install NorenRestApiPy")
-    raise
+
+def _load_noren_api():
+    """Import the official Shoonya API on first connect rather than at startup"""
+    try:
+        from NorenRestApiPy.NorenApi import NorenApi
+    except ImportError:
+        logger.error("NorenRestApiPy not installed. Install with: pip install NorenRestApiPy")
+        raise
+    return NorenApi
 
 class ShoonyaAPIWrapper:
     """
@@ -24,7 +28,7 @@ class ShoonyaAPIWrapper:
     def __init__(self, config_path: str = 'config/config.yaml') -> None:
         """Initialize the Shoonya API wrapper with configuration."""
         self.config = self._load_config(config_path)
-        self.session: Optional[NorenApi] = None
+        self.session: Optional['NorenApi'] = None
         self.susertoken: Optional[str] = None
         self.is_connected = False
         
@@ -68,12 +72,14 @@ class ShoonyaAPIWrapper:
         Returns True if successful, False otherwise.
         """
         try:
-            # Generate TOTP for 2FA
+            # Generate TOTP for 2FA (login-only dependency, imported here to keep startup light)
+            import pyotp
             totp = pyotp.TOTP(self.totp_secret)
             otp = totp.now()
             logger.info(f"Generated OTP for Shoonya login: {otp}")
             
             # Initialize API session
+            NorenApi = _load_noren_api()
             self.session = NorenApi(
                 host='https://api.shoonya.com/NorenWClientTP/',
                 websocket='wss://api.shoonya.com/NorenWSTP/'
@@ -147,6 +153,25 @@ class ShoonyaAPIWrapper:
             logger.error(f"Error placing order: {e}")
             raise
     
+    def place_prepared(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Place an order from a payload already in Shoonya ``place_order`` format.
+        
+        Args:
+            payload: Keyword arguments for the session's place_order, e.g. from an OrderTemplate
+            
+        Returns:
+            API response dictionary
+        """
+        if not self.is_connected:
+            raise RuntimeError("Not connected to Shoonya API")
+        
+        try:
+            return self.session.place_order(**payload) or {}
+        except Exception as e:
+            logger.error(f"Error placing order {payload.get('tradingsymbol')}: {e}")
+            raise
+    
     def modify_order(self, order_id: str, **kwargs) -> Dict[str, Any]:
         """Modify an existing order."""
         if not self.is_connected:
@@ -234,6 +259,9 @@ class ShoonyaAPIWrapper:
         
         try:
             ret = self.session.single_order_history(orderno=order_id)
+            # The order's history, latest state first
+            if isinstance(ret, list):
+                ret = ret[0] if ret else None
             return ret if ret else {}
             
         except Exception as e:
@@ -1,12 +1,27 @@
-import json
 import time
 import threading
 from datetime import datetime, time as dt_time
-from typing import Any, List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional
 from loguru import logger
 
 from trading_bot.event import MarketEvent
 from trading_bot.event_queue import EventQueue
+from trading_bot.monitor.latency import latency
+from trading_bot.monitor.metrics import TICKS
+from trading_bot.utils.fastlog import fastlog
+
+# Hot-path log sites: recorded raw into the fastlog ring, formatted only when decoded
+_log_raw_tick = fastlog.site('data.tick_raw', "Raw tick: {}", level='DEBUG')
+_log_tick = fastlog.site('data.tick', "Tick: {} @ {}", level='DEBUG', every=1.0, echo=True)
+_log_order_update = fastlog.site('data.order_update', "Order update: {}", level='INFO', echo=True)
+
+def _best_price(value: Any) -> Optional[float]:
+    """Best bid/ask from a touchline field; Shoonya sends '0' or nothing for an empty side"""
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
 
 class DataHandler:
     """
@@ -24,6 +39,10 @@ class DataHandler:
         self.max_reconnect_attempts = 5
         self.heartbeat_thread = None
         self.running = False
+        # Set once the websocket is open and symbols are subscribed; cleared on disconnect
+        self.ready = threading.Event()
+        # Called with each websocket order update, e.g. OrderBook.on_order_update
+        self.order_listeners: List[Callable[[dict], Any]] = []
         
         # Indian market hours (IST)
         self.market_open = dt_time(9, 15)
@@ -64,8 +83,11 @@ class DataHandler:
                     # Subscribe to symbols
                     formatted_symbols = []
                     for symbol in self.symbols:
+                        # Already in exchange|token form
+                        if '|' in symbol:
+                            formatted_symbols.append(symbol)
                         # Format for index symbols
-                        if symbol in ['NIFTY', 'BANKNIFTY']:
+                        elif symbol in ['NIFTY', 'BANKNIFTY']:
                             formatted_symbols.append(f"NSE|{symbol}")
                         # Format for option symbols (if needed)
                         elif 'CE' in symbol or 'PE' in symbol:
@@ -75,6 +97,7 @@ class DataHandler:
                     
                     self.api_wrapper.subscribe_symbols(formatted_symbols)
                     logger.info(f"Subscribed to: {formatted_symbols}")
+                    self.ready.set()
                     
                     # Reset reconnect counter on successful connection
                     self.reconnect_attempts = 0
@@ -128,6 +151,7 @@ class DataHandler:
                 if not self.ping_connection():
                     logger.error("Connection appears dead, will reconnect")
                     self.ws_connected = False
+                    self.ready.clear()
                     break
                 last_heartbeat = now
     
@@ -143,10 +167,13 @@ class DataHandler:
     
     def on_tick(self, tick_data: dict):
         """Enhanced tick processing with validation"""
+        stamps = latency.start('recv')
         try:
             # Validate tick data
             if not self.validate_tick_data(tick_data):
                 return
+            TICKS.inc()
+            _log_raw_tick(tick_data)
             
             # Extract data
             symbol = tick_data.get('tsym', '').replace('-EQ', '').replace('-I', '')
@@ -166,17 +193,21 @@ class DataHandler:
                     'low': float(tick_data.get('l', price)),
                     'close': price,
                     'volume': volume
-                }
+                },
+                latency=stamps,
+                bid=_best_price(tick_data.get('bp1')),
+                ask=_best_price(tick_data.get('sp1'))
             )
             
             # Update last tick time for connection monitoring
             self.last_tick_time[symbol] = timestamp
             
             # Queue the event
+            latency.stamp(stamps, 'enqueue')
             self.event_queue.put(event)
             
             if symbol in ['NIFTY', 'BANKNIFTY']:  # Log only major indices for cleaner logs
-                logger.debug(f"Tick: {symbol} @ {price}")
+                _log_tick(symbol, price)
                 
         except Exception as e:
             logger.error(f"Error processing tick: {e}, Data: {tick_data}")
@@ -212,13 +243,20 @@ class DataHandler:
         """WebSocket close callback"""
         logger.warning("WebSocket connection closed")
         self.ws_connected = False
+        self.ready.clear()
     
     def on_order_update(self, order_data: dict):
         """Handle order updates from WebSocket"""
-        logger.info(f"Order update: {json.dumps(order_data, indent=2)}")
+        _log_order_update(order_data)
+        for listener in self.order_listeners:
+            try:
+                listener(order_data)
+            except Exception as e:
+                logger.error(f"Error handling order update: {e}")
     
     def stop(self):
         """Stop the data handler and close connections"""
         self.running = False
         self.ws_connected = False
+        self.ready.clear()
         logger.info("Data handler stopping...")
\ No newline at end of file
@@ -0,0 +1,345 @@
+"""
+Option expiries and Shoonya trading symbols for any underlying, strike and date.
+
+The exchange's own contract list, Shoonya's NFO scrip master
+(``NFO_symbols.txt.zip``), is authoritative: its expiries already account for
+holidays, and it carries the trading symbol, token and lot size of every
+listed option. Without it, expiries follow the configured weekday rule,
+moved back to the previous trading day across weekends and the NSE holiday
+list, and symbols are built in Shoonya's ``NIFTY25JUL24C24500`` format with no
+token.
+
+Lookups are memoized for the trading session, so repeated symbol
+construction on the signal path is a dict hit; so are strikes the scrip
+master does not list. The ATM strike snaps to the nearest listed strike, or
+to the underlying's strike step without a scrip master.
+"""
+import bisect
+import csv
+import io
+import os
+import zipfile
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+SCRIP_MASTER_URL = 'https://api.shoonya.com/NFO_symbols.txt.zip'
+WEEKDAYS = {'MON': 0, 'TUE': 1, 'WED': 2, 'THU': 3, 'FRI': 4}
+STRIKE_STEPS = {'NIFTY': 50, 'BANKNIFTY': 100}  # strike spacing used without a scrip master; 50 otherwise
+
+
+@dataclass(frozen=True)
+class OptionContract:
+    """One listed option."""
+    underlying: str
+    expiry: date
+    strike: float
+    option_type: str
+    tsym: str
+    token: Optional[str] = None
+    lot_size: Optional[int] = None
+
+
+def format_tsym(underlying: str, expiry: date, strike: float, option_type: str) -> str:
+    """
+    Shoonya option trading symbol, e.g. NIFTY25JUL24C24500.
+
+    Args:
+        underlying (str): Underlying symbol.
+        expiry (date): Expiry date.
+        strike (float): Strike price.
+        option_type (str): 'CE' or 'PE'.
+
+    Returns:
+        str: Trading symbol.
+    """
+    return f"{underlying}{expiry.strftime('%d%b%y').upper()}{option_type[0].upper()}{strike:g}"
+
+
+def parse_scrip_master(text: str, underlyings: Optional[Iterable[str]] = None) -> List[OptionContract]:
+    """
+    Options from the text of a Shoonya NFO scrip master.
+
+    Args:
+        text (str): CSV with Exchange, Token, LotSize, Symbol, TradingSymbol, Expiry, Instrument, OptionType, StrikePrice.
+        underlyings (Optional[Iterable[str]]): Keep only these underlyings; all by default.
+
+    Returns:
+        List[OptionContract]: Index and stock options; futures and malformed rows are skipped.
+    """
+    wanted = set(underlyings) if underlyings is not None else None
+    contracts = []
+    for row in csv.DictReader(io.StringIO(text)):
+        row = {(k or '').strip(): (v or '').strip() for k, v in row.items()}
+        if row.get('OptionType') not in ('CE', 'PE'):
+            continue
+        if wanted is not None and row.get('Symbol') not in wanted:
+            continue
+        try:
+            contracts.append(OptionContract(
+                underlying=row['Symbol'],
+                expiry=datetime.strptime(row['Expiry'], '%d-%b-%Y').date(),
+                strike=float(row['StrikePrice']),
+                option_type=row['OptionType'],
+                tsym=row['TradingSymbol'],
+                token=row['Token'],
+                lot_size=int(row['LotSize']) if row.get('LotSize') else None
+            ))
+        except (KeyError, ValueError):
+            continue
+    return contracts
+
+
+def load_scrip_master(path: str, url: Optional[str] = SCRIP_MASTER_URL,
+                      underlyings: Optional[Iterable[str]] = None) -> List[OptionContract]:
+    """
+    Options from the scrip master at ``path``, downloaded first if missing or not from today.
+
+    Args:
+        path (str): Local copy, zipped or plain text.
+        url (Optional[str]): Where to download it from; None to only read the local copy.
+        underlyings (Optional[Iterable[str]]): Keep only these underlyings.
+
+    Returns:
+        List[OptionContract]: Parsed options; empty if no copy could be read.
+    """
+    fresh = os.path.exists(path) and date.fromtimestamp(os.path.getmtime(path)) == date.today()
+    if url and not fresh:
+        try:
+            import requests
+            response = requests.get(url, timeout=30)
+            response.raise_for_status()
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(response.content)
+            logger.info(f"Downloaded scrip master to {path}")
+        except Exception as e:
+            logger.error(f"Failed to download scrip master from {url}: {e}")
+    if not os.path.exists(path):
+        return []
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                text = archive.read(archive.namelist()[0]).decode('utf-8', errors='replace')
+        else:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                text = f.read()
+    except Exception as e:
+        logger.error(f"Failed to read scrip master {path}: {e}")
+        return []
+    contracts = parse_scrip_master(text, underlyings)
+    logger.info(f"Loaded {len(contracts)} options from scrip master {path}")
+    return contracts
+
+
+class ExpiryCalendar:
+    """
+    Expiry and contract resolution, from the scrip master when loaded and by rule otherwise.
+
+    Args:
+        holidays (Iterable[date]): NSE trading holidays.
+        weekdays (Optional[Dict[str, str]]): Underlying -> expiry weekday ('TUE', 'THU', ...); default 'TUE'.
+        weekly (Iterable[str]): Underlyings with weekly contracts; the rest only expire monthly.
+        contracts (Optional[Iterable[OptionContract]]): Listed options, e.g. from ``load_scrip_master``.
+        strike_steps (Optional[Dict[str, float]]): Underlying -> strike spacing, over ``STRIKE_STEPS``.
+    """
+    def __init__(self, holidays: Iterable[date] = (), weekdays: Optional[Dict[str, str]] = None,
+                 weekly: Iterable[str] = ('NIFTY',), contracts: Optional[Iterable[OptionContract]] = None,
+                 strike_steps: Optional[Dict[str, float]] = None) -> None:
+        """
+        Initialize the calendar and index the listed contracts.
+
+        Args:
+            holidays (Iterable[date]): NSE trading holidays.
+            weekdays (Optional[Dict[str, str]]): Underlying -> expiry weekday.
+            weekly (Iterable[str]): Underlyings with weekly contracts.
+            contracts (Optional[Iterable[OptionContract]]): Listed options.
+            strike_steps (Optional[Dict[str, float]]): Underlying -> strike spacing.
+        """
+        self.holidays = frozenset(holidays)
+        self.weekdays = {k: WEEKDAYS[v.upper()] for k, v in (weekdays or {}).items()}
+        self.weekly = frozenset(weekly)
+        self.strike_steps = {**STRIKE_STEPS, **(strike_steps or {})}
+        self._session: Optional[date] = None
+        self._expiry_memo: Dict[Tuple[str, bool], date] = {}
+        self._contract_memo: Dict[Tuple[str, float, str, bool], Optional[OptionContract]] = {}
+        self.load(contracts or ())
+
+    def load(self, contracts: Iterable[OptionContract]) -> None:
+        """
+        Replace the listed contracts, e.g. once the scrip master has downloaded; memoized lookups are dropped.
+
+        Args:
+            contracts (Iterable[OptionContract]): Listed options.
+        """
+        listed: Dict[Tuple[str, date, float, str], OptionContract] = {}
+        expiries: Dict[str, set] = {}
+        strikes: Dict[Tuple[str, date], set] = {}
+        for contract in contracts:
+            listed[(contract.underlying, contract.expiry, contract.strike, contract.option_type)] = contract
+        for underlying, expiry, strike, _ in listed:
+            expiries.setdefault(underlying, set()).add(expiry)
+            strikes.setdefault((underlying, expiry), set()).add(strike)
+        self._listed = listed
+        self._listed_expiries = {k: sorted(v) for k, v in expiries.items()}
+        self._listed_strikes = {k: sorted(v) for k, v in strikes.items()}
+        self._session = None
+
+    def is_trading_day(self, day: date) -> bool:
+        """
+        True unless ``day`` is a weekend or an NSE holiday.
+
+        Args:
+            day (date): Date to check.
+
+        Returns:
+            bool: Whether the exchange is open.
+        """
+        return day.weekday() < 5 and day not in self.holidays
+
+    def _previous_trading_day(self, day: date) -> date:
+        while not self.is_trading_day(day):
+            day -= timedelta(days=1)
+        return day
+
+    def _rule_expiry(self, underlying: str, day: date, monthly: bool) -> date:
+        weekday = self.weekdays.get(underlying, WEEKDAYS['TUE'])
+        if monthly or underlying not in self.weekly:
+            year, month = day.year, day.month
+            while True:
+                month_end = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+                last = month_end - timedelta(days=(month_end.weekday() - weekday) % 7)
+                expiry = self._previous_trading_day(last)
+                if expiry >= day:
+                    return expiry
+                year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        nominal = day + timedelta(days=(weekday - day.weekday()) % 7)
+        expiry = self._previous_trading_day(nominal)
+        if expiry < day:  # a holiday moved this week's expiry before today
+            expiry = self._previous_trading_day(nominal + timedelta(days=7))
+        return expiry
+
+    def _resolve_expiry(self, underlying: str, day: date, monthly: bool) -> Optional[date]:
+        listed = self._listed_expiries.get(underlying)
+        if not listed:
+            return self._rule_expiry(underlying, day, monthly)
+        upcoming = [expiry for expiry in listed if expiry >= day]
+        if not upcoming:
+            return None
+        if not monthly:
+            return upcoming[0]
+        # The monthly contract is the last listed expiry of its month
+        for i, expiry in enumerate(upcoming):
+            if i + 1 == len(upcoming) or upcoming[i + 1].month != expiry.month:
+                return expiry
+        return None
+
+    def _start_session(self, day: date) -> None:
+        self._session = day
+        self._expiry_memo.clear()
+        self._contract_memo.clear()
+
+    def expiry(self, underlying: str, on_date: Optional[date] = None, monthly: bool = False) -> Optional[date]:
+        """
+        Nearest expiry on or after ``on_date``.
+
+        Args:
+            underlying (str): Underlying symbol.
+            on_date (Optional[date]): Trading date; defaults to today.
+            monthly (bool): Nearest monthly expiry instead of the nearest weekly one.
+
+        Returns:
+            Optional[date]: Expiry date, or None if the scrip master lists none ahead.
+        """
+        day = on_date or date.today()
+        if day != self._session:
+            self._start_session(day)
+        key = (underlying, monthly)
+        expiry = self._expiry_memo.get(key)
+        if expiry is None:
+            expiry = self._resolve_expiry(underlying, day, monthly)
+            if expiry is not None:
+                self._expiry_memo[key] = expiry
+        return expiry
+
+    def contract(self, underlying: str, strike: float, option_type: str, on_date: Optional[date] = None,
+                 monthly: bool = False) -> Optional[OptionContract]:
+        """
+        Option of the nearest expiry for a strike and side.
+
+        Args:
+            underlying (str): Underlying symbol.
+            strike (float): Strike price.
+            option_type (str): 'CE' or 'PE'.
+            on_date (Optional[date]): Trading date; defaults to today.
+            monthly (bool): Use the monthly instead of the weekly expiry.
+
+        Returns:
+            Optional[OptionContract]: The contract, or None if the scrip master does not list it.
+        """
+        day = on_date or date.today()
+        if day != self._session:
+            self._start_session(day)
+        key = (underlying, strike, option_type, monthly)
+        if key in self._contract_memo:
+            return self._contract_memo[key]
+        expiry = self.expiry(underlying, day, monthly)
+        if expiry is None:
+            return None
+        if self._listed_expiries.get(underlying):
+            contract = self._listed.get((underlying, expiry, float(strike), option_type))
+            if contract is None:
+                # Warned once; the miss is memoized for the session like a hit
+                logger.warning(f"No listed {underlying} {strike:g} {option_type} expiring {expiry}")
+        else:
+            contract = OptionContract(underlying, expiry, float(strike), option_type,
+                                      format_tsym(underlying, expiry, strike, option_type))
+        self._contract_memo[key] = contract
+        return contract
+
+    def tsym(self, underlying: str, strike: float, option_type: str, on_date: Optional[date] = None,
+             monthly: bool = False) -> Optional[str]:
+        """
+        Trading symbol of ``contract(...)``.
+
+        Returns:
+            Optional[str]: Trading symbol, or None if the contract is not listed.
+        """
+        contract = self.contract(underlying, strike, option_type, on_date, monthly)
+        return contract.tsym if contract else None
+
+    def strikes(self, underlying: str, expiry: date) -> List[float]:
+        """
+        Listed strikes of one expiry.
+
+        Args:
+            underlying (str): Underlying symbol.
+            expiry (date): Expiry date.
+
+        Returns:
+            List[float]: Sorted strikes; empty without a scrip master.
+        """
+        return list(self._listed_strikes.get((underlying, expiry), ()))
+
+    def atm_strike(self, underlying: str, price: float, on_date: Optional[date] = None,
+                   monthly: bool = False) -> float:
+        """
+        Strike nearest to ``price``: a listed strike of the nearest expiry, else a multiple of the strike step.
+
+        Args:
+            underlying (str): Underlying symbol.
+            price (float): Underlying price.
+            on_date (Optional[date]): Trading date; defaults to today.
+            monthly (bool): Use the monthly instead of the weekly expiry.
+
+        Returns:
+            float: ATM strike.
+        """
+        expiry = self.expiry(underlying, on_date, monthly) if self._listed_expiries.get(underlying) else None
+        listed = self._listed_strikes.get((underlying, expiry)) if expiry is not None else None
+        if listed:
+            i = bisect.bisect_left(listed, price)
+            return min(listed[max(i - 1, 0):i + 1], key=lambda strike: abs(strike - price))
+        step = self.strike_steps.get(underlying, 50)
+        return round(price / step) * step
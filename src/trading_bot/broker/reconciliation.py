@@ -0,0 +1,366 @@
+"""
+Startup reconciliation of local orders, trades and positions against the broker.
+
+``Reconciler.run`` fetches the order book, trade book and positions concurrently,
+indexes both sides by broker order id (``norenordno``) and symbol, and produces a
+``ReconciliationReport`` of typed differences. Differences with an unambiguous fix
+are repaired in the database in one transaction:
+
+* a local active order the broker has moved on (filled, cancelled, rejected) takes the broker status
+* a local order that reached the broker before its id was saved is linked by its ``remarks`` tag
+* a cancelled earlier attempt of a re-sent order (same tag, older broker id) is not a difference
+* a local order that never reached the broker is marked cancelled
+* a local open position the broker shows flat is closed locally, so its stop is no longer managed
+
+Anything else (orders the bot does not know about, positions that disagree, fills that
+do not add up) is reported for a human; nothing here ever sends an order.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from loguru import logger
+
+# Broker order status -> local order status
+BROKER_STATUS = {
+    'COMPLETE': 'FILLED',
+    'CANCELED': 'CANCELLED',
+    'CANCELLED': 'CANCELLED',
+    'REJECTED': 'REJECTED',
+    'OPEN': 'OPEN',
+    'PENDING': 'OPEN',
+    'TRIGGER_PENDING': 'OPEN',
+}
+TERMINAL_STATUSES = ('FILLED', 'CANCELLED', 'REJECTED')
+NOT_SENT_STATUSES = ('PENDING',)
+
+# OrderDiff kinds
+STATUS_CHANGED = 'STATUS_CHANGED'          # local active, broker moved on -> take broker status
+UNLINKED = 'UNLINKED'                      # broker order tagged with a local order_uuid that has no broker id
+NEVER_SENT = 'NEVER_SENT'                  # local pending order the broker never received
+REOPENED_AT_BROKER = 'REOPENED_AT_BROKER'  # local terminal, broker still working the order
+UNTRACKED_AT_BROKER = 'UNTRACKED_AT_BROKER'
+MISSING_AT_BROKER = 'MISSING_AT_BROKER'
+FILL_MISMATCH = 'FILL_MISMATCH'
+
+# Repairs
+SET_STATUS = 'SET_STATUS'
+LINK_BROKER_ID = 'LINK_BROKER_ID'
+CLOSE_LOCAL = 'CLOSE_LOCAL'
+
+
+@dataclass
+class BrokerState:
+    """Broker books fetched for one reconciliation."""
+    orders: List[Dict[str, Any]] = field(default_factory=list)
+    trades: List[Dict[str, Any]] = field(default_factory=list)
+    positions: List[Dict[str, Any]] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+
+
+@dataclass
+class OrderDiff:
+    """One order that differs between the database and the broker."""
+    kind: str
+    symbol: Optional[str]
+    broker_order_id: Optional[str] = None
+    order_uuid: Optional[str] = None
+    local_status: Optional[str] = None
+    broker_status: Optional[str] = None
+    filled_quantity: int = 0
+    avg_price: Optional[float] = None
+    repair: Optional[str] = None  # None: needs a human
+
+
+@dataclass
+class PositionDiff:
+    """Net quantity of one symbol that differs between local state and the broker."""
+    symbol: str
+    local_quantity: int
+    broker_quantity: int
+    repair: Optional[str] = None
+
+
+@dataclass
+class ReconciliationReport:
+    """Differences found by a reconciliation run and the repairs applied."""
+    order_diffs: List[OrderDiff] = field(default_factory=list)
+    position_diffs: List[PositionDiff] = field(default_factory=list)
+    repaired: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    broker_orders: int = 0
+    local_orders: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def clean(self) -> bool:
+        """True when nothing differs and every fetch succeeded."""
+        return not (self.order_diffs or self.position_diffs or self.errors)
+
+    @property
+    def unresolved(self) -> List[Any]:
+        """Differences without an automatic repair."""
+        return [d for d in self.order_diffs + self.position_diffs if d.repair is None]
+
+    @property
+    def flat_symbols(self) -> List[str]:
+        """Symbols the broker shows flat while local state has a position."""
+        return [d.symbol for d in self.position_diffs if d.repair == CLOSE_LOCAL]
+
+    def summary(self) -> str:
+        """One-line description for logs and alerts."""
+        kinds: Dict[str, int] = {}
+        for diff in self.order_diffs:
+            kinds[diff.kind] = kinds.get(diff.kind, 0) + 1
+        parts = [f"{count} {kind}" for kind, count in sorted(kinds.items())]
+        if self.position_diffs:
+            parts.append(f"{len(self.position_diffs)} position mismatches")
+        return (f"{self.broker_orders} broker / {self.local_orders} local orders; "
+                f"{', '.join(parts) or 'no differences'}; {len(self.repaired)} repaired, "
+                f"{len(self.unresolved)} unresolved in {self.elapsed * 1000:.0f} ms")
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def aggregate_fills(trades: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    """
+    Sum trade-book fills per broker order.
+
+    Args:
+        trades (List[Dict[str, Any]]): Broker trade book rows.
+
+    Returns:
+        Dict[str, List[float]]: ``norenordno`` -> [filled quantity, average price].
+    """
+    fills: Dict[str, List[float]] = {}
+    for trade in trades:
+        order_id = trade.get('norenordno')
+        if not order_id:
+            continue
+        qty = _to_int(trade.get('flqty', trade.get('qty')))
+        price = _to_float(trade.get('flprc', trade.get('avgprc'))) or 0.0
+        entry = fills.get(order_id)
+        if entry is None:
+            fills[order_id] = [qty, price]
+        else:
+            total = entry[0] + qty
+            entry[1] = (entry[0] * entry[1] + qty * price) / total if total else 0.0
+            entry[0] = total
+    return fills
+
+
+def diff_orders(broker_orders: List[Dict[str, Any]], trades: List[Dict[str, Any]],
+                local_orders: List[Dict[str, Any]]) -> List[OrderDiff]:
+    """
+    Match broker orders to local order rows and classify the differences.
+
+    Args:
+        broker_orders (List[Dict[str, Any]]): Broker order book rows.
+        trades (List[Dict[str, Any]]): Broker trade book rows.
+        local_orders (List[Dict[str, Any]]): Local order rows (dicts with the ``orders`` table columns).
+
+    Returns:
+        List[OrderDiff]: Differences, each with its repair (None when it needs a human).
+    """
+    by_broker_id = {o['broker_order_id']: o for o in local_orders if o.get('broker_order_id')}
+    by_uuid = {o['order_uuid']: o for o in local_orders if o.get('order_uuid')}
+    fills = aggregate_fills(trades)
+    diffs: List[OrderDiff] = []
+    seen_uuids = set()
+
+    for broker in broker_orders:
+        order_id = broker.get('norenordno')
+        if not order_id:
+            continue
+        broker_status = BROKER_STATUS.get(str(broker.get('status', '')).upper(), 'OPEN')
+        filled, avg_price = fills.get(order_id, (_to_int(broker.get('fillshares')), _to_float(broker.get('avgprc'))))
+        symbol = broker.get('tsym')
+
+        local = by_broker_id.get(order_id)
+        if local is None:
+            tagged = by_uuid.get(broker.get('remarks'))
+            if tagged is not None and not tagged.get('broker_order_id'):
+                seen_uuids.add(tagged['order_uuid'])
+                diffs.append(OrderDiff(UNLINKED, symbol, order_id, tagged['order_uuid'], tagged.get('status'),
+                                       broker_status, filled, avg_price, repair=LINK_BROKER_ID))
+            elif tagged is not None and broker_status == 'CANCELLED':
+                continue  # an attempt the gateway cancelled before re-sending the order
+            else:
+                diffs.append(OrderDiff(UNTRACKED_AT_BROKER, symbol, order_id, broker_status=broker_status,
+                                       filled_quantity=filled, avg_price=avg_price))
+            continue
+
+        seen_uuids.add(local.get('order_uuid'))
+        local_status = local.get('status')
+        if local_status in TERMINAL_STATUSES:
+            if broker_status not in TERMINAL_STATUSES:
+                diffs.append(OrderDiff(REOPENED_AT_BROKER, symbol, order_id, local.get('order_uuid'),
+                                       local_status, broker_status, filled, avg_price))
+            elif local_status == 'FILLED' and broker_status == 'FILLED' and filled != _to_int(local.get('quantity')):
+                diffs.append(OrderDiff(FILL_MISMATCH, symbol, order_id, local.get('order_uuid'),
+                                       local_status, broker_status, filled, avg_price))
+            elif local_status != broker_status:
+                diffs.append(OrderDiff(STATUS_CHANGED, symbol, order_id, local.get('order_uuid'),
+                                       local_status, broker_status, filled, avg_price))
+        elif local_status != broker_status:
+            diffs.append(OrderDiff(STATUS_CHANGED, symbol, order_id, local.get('order_uuid'),
+                                   local_status, broker_status, filled, avg_price, repair=SET_STATUS))
+
+    for local in local_orders:
+        if local.get('order_uuid') in seen_uuids or local.get('status') in TERMINAL_STATUSES:
+            continue
+        if local.get('broker_order_id'):
+            diffs.append(OrderDiff(MISSING_AT_BROKER, local.get('symbol'), local['broker_order_id'],
+                                   local.get('order_uuid'), local.get('status')))
+        elif local.get('status') in NOT_SENT_STATUSES:
+            diffs.append(OrderDiff(NEVER_SENT, local.get('symbol'), None, local.get('order_uuid'),
+                                   local.get('status'), broker_status='CANCELLED', repair=SET_STATUS))
+        else:
+            diffs.append(OrderDiff(MISSING_AT_BROKER, local.get('symbol'), None,
+                                   local.get('order_uuid'), local.get('status')))
+    return diffs
+
+
+def diff_positions(broker_positions: List[Dict[str, Any]], local_positions: Dict[str, int]) -> List[PositionDiff]:
+    """
+    Compare net quantity per symbol.
+
+    Args:
+        broker_positions (List[Dict[str, Any]]): Broker position rows (``tsym``, ``netqty``).
+        local_positions (Dict[str, int]): Local signed net quantity per symbol.
+
+    Returns:
+        List[PositionDiff]: Mismatches; a position the broker shows flat is repaired by closing it locally.
+    """
+    broker_net: Dict[str, int] = {}
+    for position in broker_positions:
+        symbol = position.get('tsym')
+        if symbol:
+            broker_net[symbol] = broker_net.get(symbol, 0) + _to_int(position.get('netqty'))
+
+    diffs = []
+    for symbol in sorted(set(broker_net) | set(local_positions)):
+        broker_qty, local_qty = broker_net.get(symbol, 0), local_positions.get(symbol, 0)
+        if broker_qty != local_qty:
+            repair = CLOSE_LOCAL if broker_qty == 0 else None
+            diffs.append(PositionDiff(symbol, local_qty, broker_qty, repair))
+    return diffs
+
+
+class Reconciler:
+    """
+    Reconciles the database with the broker's books.
+
+    Args:
+        api_wrapper: Connected broker wrapper (``get_order_book``, ``get_trade_book``, ``get_positions``).
+        database: Database with ``get_reconciliation_orders``, ``apply_order_repairs`` and ``close_open_trades``.
+        timeout (float): Seconds to wait for each broker fetch.
+    """
+    def __init__(self, api_wrapper: Any, database: Any, timeout: float = 10.0) -> None:
+        """
+        Initialize the reconciler.
+
+        Args:
+            api_wrapper: Connected broker wrapper.
+            database: Trading database.
+            timeout (float): Seconds to wait for each broker fetch.
+        """
+        self.api_wrapper = api_wrapper
+        self.database = database
+        self.timeout = timeout
+
+    def fetch_broker_state(self) -> BrokerState:
+        """
+        Fetch the order book, trade book and positions concurrently.
+
+        Returns:
+            BrokerState: Broker rows; failed fetches are listed in ``errors``.
+        """
+        state = BrokerState()
+        calls = {'orders': 'get_order_book', 'trades': 'get_trade_book', 'positions': 'get_positions'}
+        with ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="Reconcile") as pool:
+            futures = {name: pool.submit(getattr(self.api_wrapper, method)) for name, method in calls.items()}
+            for name, future in futures.items():
+                try:
+                    setattr(state, name, list(future.result(timeout=self.timeout) or []))
+                except Exception as e:
+                    state.errors.append(f"{calls[name]}: {e}")
+        return state
+
+    def run(self, local_positions: Optional[Dict[str, int]] = None, repair: bool = True) -> ReconciliationReport:
+        """
+        Fetch, diff and (optionally) apply the safe repairs.
+
+        Args:
+            local_positions (Optional[Dict[str, int]]): Local signed net quantity per symbol;
+                defaults to the database's open trades.
+            repair (bool): Apply safe repairs to the database.
+
+        Returns:
+            ReconciliationReport: What differed and what was repaired.
+        """
+        started = time.perf_counter()
+        broker = self.fetch_broker_state()
+        report = ReconciliationReport(errors=list(broker.errors), broker_orders=len(broker.orders))
+
+        if not any(e.startswith('get_order_book') for e in broker.errors):
+            local_orders = self.database.get_reconciliation_orders(
+                broker_order_ids=[o['norenordno'] for o in broker.orders if o.get('norenordno')],
+                order_uuids=[o['remarks'] for o in broker.orders if o.get('remarks')]
+            )
+            report.local_orders = len(local_orders)
+            report.order_diffs = diff_orders(broker.orders, broker.trades, local_orders)
+
+        if not any(e.startswith('get_positions') for e in broker.errors):
+            if local_positions is None:
+                local_positions = self.database.get_open_position_quantities()
+            report.position_diffs = diff_positions(broker.positions, local_positions)
+
+        if repair:
+            report.repaired = self.apply_safe_repairs(report)
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def apply_safe_repairs(self, report: ReconciliationReport) -> List[str]:
+        """
+        Write the automatic repairs to the database.
+
+        Args:
+            report (ReconciliationReport): Report from ``run``.
+
+        Returns:
+            List[str]: Description of each repair applied.
+        """
+        updates, applied = [], []
+        for diff in report.order_diffs:
+            if diff.repair in (SET_STATUS, LINK_BROKER_ID):
+                updates.append({
+                    'order_uuid': diff.order_uuid,
+                    'status': diff.broker_status,
+                    'broker_order_id': diff.broker_order_id,
+                    'price': diff.avg_price if diff.broker_status == 'FILLED' else None
+                })
+                applied.append(f"{diff.repair} {diff.order_uuid}: {diff.local_status} -> {diff.broker_status}")
+        if updates:
+            self.database.apply_order_repairs(updates)
+
+        flat = report.flat_symbols
+        if flat:
+            closed = self.database.close_open_trades(flat, datetime.now().isoformat())
+            applied.extend(f"{CLOSE_LOCAL} {symbol}" for symbol in flat)
+            if closed:
+                logger.info(f"Closed {closed} local trades the broker shows flat")
+        return applied
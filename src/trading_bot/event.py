@@ -12,6 +12,9 @@ class MarketEvent:
     price: float
     volume: Optional[float] = None
     ohlcv: Optional[dict] = None  # {'open': float, 'high': float, 'low': float, 'close': float, 'volume': float}
+    latency: Optional[dict] = None  # stage -> perf_counter_ns stamps, see monitor.latency
+    bid: Optional[float] = None  # best bid/ask when the feed sends depth (options)
+    ask: Optional[float] = None
 
 @dataclass
 class SignalEvent:
@@ -23,6 +26,7 @@ class SignalEvent:
     signal_type: str  # e.g., 'LONG', 'SHORT', 'EXIT'
     strength: Optional[float] = None
     info: Optional[Any] = None
+    latency: Optional[dict] = None
 
 @dataclass
 class OrderEvent:
@@ -38,6 +42,7 @@ class OrderEvent:
     stop_price: Optional[float] = None
     order_uuid: Optional[str] = None
     info: Optional[Any] = None
+    latency: Optional[dict] = None
 
 @dataclass
 class ExecutionEvent:
@@ -52,6 +57,7 @@ class ExecutionEvent:
     avg_fill_price: Optional[float] = None
     broker_order_id: Optional[str] = None
     info: Optional[Any] = None
+    latency: Optional[dict] = None
 
 @dataclass
 class RiskViolationEvent:
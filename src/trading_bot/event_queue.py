@@ -39,6 +39,16 @@ class EventQueue:
         """
         return self._queue.get(block=block, timeout=timeout)
 
+    def peek(self) -> Any:
+        """
+        Return the next event without removing it.
+
+        Returns:
+            Any: The oldest queued event, or None if the queue is empty.
+        """
+        with self._queue.mutex:
+            return self._queue.queue[0] if self._queue.queue else None
+
     def empty(self) -> bool:
         """
         Check if the queue is empty.
@@ -1,6 +1,10 @@
 import time
 from typing import Any, Optional
 from trading_bot.event import OrderEvent, ExecutionEvent
+from trading_bot.execution.order_templates import OrderTemplates
+from trading_bot.execution.order_book import OrderBook, ACK
+from trading_bot.monitor.latency import latency
+from trading_bot.monitor.metrics import ORDER_REJECTS
 from loguru import logger
 from datetime import datetime
 
@@ -8,23 +12,30 @@ class ExecutionGateway:
     """Enhanced execution gateway with retry logic and order management"""
     
     def __init__(self, order_queue: Any, execution_queue: Any, api_wrapper: Any, 
-                 max_retries: int = 10, retry_gap: float = 1.0):
+                 max_retries: int = 10, retry_gap: float = 1.0, templates: Optional[OrderTemplates] = None,
+                 order_book: Optional[OrderBook] = None):
         self.order_queue = order_queue
         self.execution_queue = execution_queue
         self.api_wrapper = api_wrapper
         self.max_retries = max_retries
         self.retry_gap = retry_gap
+        # Entry payloads armed by the strategy ahead of the signal; unarmed orders are built on first use
+        self.templates = templates if templates is not None else OrderTemplates()
+        # Every order's lifecycle, shared with the websocket order updates
+        self.order_book = order_book if order_book is not None else OrderBook()
     
     def process_order(self, order: OrderEvent) -> None:
         """Process order with retry logic"""
         try:
-            # Cancel pending order if requested
+            # Cancel the previous entry if the book still has it open
             if order.info and order.info.get('cancel_pending'):
-                pending_id = order.info.get('pending_order_id')
-                if pending_id:
-                    self._cancel_order(pending_id)
+                pending = self.order_book.get(order.info.get('pending_order_id'))
+                if pending is not None and pending.is_open and pending.broker_order_id:
+                    if self._cancel_order(pending.broker_order_id):
+                        self.order_book.cancelled(pending.order_uuid, 'REPLACED')
             
             # Place new order with retries
+            self.order_book.create(order)
             self._place_order_with_retries(order)
             
         except Exception as e:
@@ -32,6 +43,7 @@ class ExecutionGateway:
     
     def _place_order_with_retries(self, order: OrderEvent):
         """Place order with retry mechanism"""
+        template = self.templates.get(order.symbol, order.side, order.quantity)
         for attempt in range(self.max_retries):
             try:
                 # Get current option price
@@ -43,42 +55,48 @@ class ExecutionGateway:
                 # Calculate limit price (LTP + 1 rupee + retry gap)
                 limit_price = current_price + 1.0 + (attempt * self.retry_gap)
                 
-                # Place order
-                result = self.api_wrapper.place_order(
-                    buy_or_sell='B' if order.side == 'BUY' else 'S',
-                    product_type='M',  # NRML for options
-                    exchange='NFO',
-                    tradingsymbol=order.symbol,
-                    quantity=order.quantity,
-                    price_type='LMT',
-                    price=limit_price,
-                    retention='DAY'
-                )
+                # Place order: only the price and tag are written into the armed payload
+                latency.stamp(order.latency, 'send')
+                self.order_book.sent(order.order_uuid, limit_price)
+                result = self.api_wrapper.place_prepared(template.fire(limit_price, order.order_uuid))
                 
                 if result.get('stat') == 'Ok':
                     # Order placed successfully
+                    latency.stamp(order.latency, 'ack')
                     order_id = result.get('norenordno')
+                    self.order_book.acknowledged(order.order_uuid, order_id)
                     logger.info(f"Order placed successfully: {order_id} at {limit_price}")
                     
                     # Wait for fill (1 second)
                     time.sleep(1)
                     
-                    # Check order status
-                    if self._check_order_filled(order_id):
-                        self._create_execution_event(order, result, 'FILLED')
+                    # Check order status; the fill price is only in the status, not the placement reply
+                    filled = self._check_order_filled(order_id)
+                    if filled is not None:
+                        fill = {**result, **filled}
+                        self.order_book.filled(order.order_uuid, order.quantity,
+                                               float(fill['avgprc']) if fill.get('avgprc') else None)
+                        self._create_execution_event(order, fill, 'FILLED')
                         return
                     else:
-                        # Not filled, cancel and retry
+                        # Not filled, cancel and retry; updates for this attempt no longer count
+                        self.order_book.replacing(order.order_uuid)
                         self._cancel_order(order_id)
                         logger.info(f"Order not filled, retrying... (attempt {attempt + 1}/{self.max_retries})")
                         continue
                 else:
+                    ORDER_REJECTS.inc()
                     logger.error(f"Order placement failed: {result}")
                     
             except Exception as e:
                 logger.error(f"Retry {attempt + 1} failed: {e}")
         
-        # All retries exhausted
+        # All retries exhausted: the last attempt was either cancelled unfilled or rejected
+        record = self.order_book.get(order.order_uuid)
+        if record is not None and record.state == ACK:
+            self.order_book.cancelled(order.order_uuid, 'RETRIES_EXHAUSTED')
+        else:
+            self.order_book.rejected(order.order_uuid, 'RETRIES_EXHAUSTED')
         logger.error(f"All {self.max_retries} retries exhausted for order {order.symbol}")
     
     def _get_option_price(self, symbol: str) -> Optional[float]:
@@ -91,14 +109,14 @@ class ExecutionGateway:
             logger.error(f"Error getting option price: {e}")
         return None
     
-    def _check_order_filled(self, order_id: str) -> bool:
-        """Check if order is filled"""
+    def _check_order_filled(self, order_id: str) -> Optional[dict]:
+        """Order status if the order is filled, else None"""
         try:
             order_status = self.api_wrapper.get_order_status(order_id)
-            return order_status.get('status') == 'COMPLETE'
+            return order_status if order_status.get('status') == 'COMPLETE' else None
         except Exception as e:
             logger.error(f"Error checking order status: {e}")
-            return False
+            return None
     
     def _cancel_order(self, order_id: str) -> bool:
         """Cancel order"""
@@ -114,11 +132,14 @@ class ExecutionGateway:
         exec_event = ExecutionEvent(
             symbol=order.symbol,
             timestamp=datetime.now(),
-            order_uuid=result.get('norenordno'),
+            order_uuid=order.order_uuid or result.get('norenordno'),
             status=status,
             filled_quantity=order.quantity if status == 'FILLED' else 0,
             avg_fill_price=float(result.get('avgprc', 0)) if result.get('avgprc') else None,
             broker_order_id=result.get('norenordno'),
-            info={'order_response': result, 'side': order.side}
+            info={'order_response': result, 'side': order.side},
+            latency=order.latency
         )
+        if status == 'FILLED':
+            latency.finish(exec_event.latency, 'fill')
         self.execution_queue.put(exec_event)
\ No newline at end of file
@@ -0,0 +1,479 @@
+"""
+In-memory order book with an explicit order state machine and an append-only event log.
+
+Every order the bot sends has one ``OrderRecord``, found in O(1) by order uuid
+or by any broker order number it was sent under. Its state only moves along
+
+    NEW -> SENT -> ACK -> PARTIAL -> FILLED / CANCELLED / REJECTED
+
+(ACK -> SENT is a cancel-and-replace re-send: ``replacing`` retires the broker
+order number before the old attempt is cancelled, and SENT -> SENT is the next
+attempt going out). Transitions that don't fit, such as a late OPEN after a
+fill, are ignored, as is every update for a retired broker order number, so
+gateways and websocket order updates can report the same order in any order.
+Orders first seen in a websocket update (placed by hand, or stop orders) are
+tracked as ``external``.
+
+Each accepted transition is appended to a JSON-lines log before it is
+applied. Replaying the log rebuilds the book after a restart, and
+``OrderBook.replay`` gives auditors the full history of a session without
+touching the live file. With a ``database`` every change is also saved to the
+``orders`` table, on a background thread, so the startup reconciliation can
+match the broker's order book against it.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from loguru import logger
+from trading_bot.event import OrderEvent
+
+NEW = 'NEW'
+SENT = 'SENT'
+ACK = 'ACK'
+PARTIAL = 'PARTIAL'
+FILLED = 'FILLED'
+CANCELLED = 'CANCELLED'
+REJECTED = 'REJECTED'
+TERMINAL = frozenset((FILLED, CANCELLED, REJECTED))
+TRANSITIONS = {
+    NEW: frozenset((SENT, CANCELLED, REJECTED)),
+    SENT: frozenset((SENT, ACK, PARTIAL, FILLED, CANCELLED, REJECTED)),
+    ACK: frozenset((SENT, PARTIAL, FILLED, CANCELLED, REJECTED)),
+    PARTIAL: frozenset((PARTIAL, FILLED, CANCELLED)),
+}
+# Shoonya order statuses, as sent by the order update websocket and the order book
+BROKER_STATUS = {
+    'PENDING': ACK,
+    'OPEN': ACK,
+    'TRIGGER_PENDING': ACK,
+    'COMPLETE': FILLED,
+    'CANCELED': CANCELLED,
+    'REJECTED': REJECTED,
+}
+# Book state -> ``orders`` table status, as the reconciliation reads it
+DB_STATUS = {
+    NEW: 'PENDING',
+    SENT: 'SENT_TO_BROKER',
+    ACK: 'OPEN',
+    PARTIAL: 'OPEN',
+    FILLED: 'FILLED',
+    CANCELLED: 'CANCELLED',
+    REJECTED: 'REJECTED',
+}
+
+
+@dataclass
+class OrderRecord:
+    """One order and where it is in its lifecycle."""
+    order_uuid: str
+    symbol: str
+    side: str
+    quantity: int
+    state: str = NEW
+    price: Optional[float] = None
+    broker_order_id: Optional[str] = None
+    filled_quantity: int = 0
+    avg_fill_price: Optional[float] = None
+    reason: Optional[str] = None
+    external: bool = False
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    @property
+    def is_open(self) -> bool:
+        """True until the order is filled, cancelled or rejected."""
+        return self.state not in TERMINAL
+
+
+class OrderBook:
+    """
+    Orders keyed by uuid and broker order number, persisted as an event log.
+
+    Args:
+        log_path (Optional[str]): JSON-lines event log, replayed on construction and appended to; None keeps the book in memory.
+        fsync (bool): fsync after every event.
+        database (Optional[Any]): Database with ``save_order``; each changed order is saved to it.
+    """
+    def __init__(self, log_path: Optional[str] = None, fsync: bool = False, database: Optional[Any] = None) -> None:
+        """
+        Initialize the book, replaying ``log_path`` if it exists.
+
+        Args:
+            log_path (Optional[str]): Event log.
+            fsync (bool): fsync after every event.
+            database (Optional[Any]): Database the orders are saved to.
+        """
+        self.log_path = log_path
+        self.fsync = fsync
+        self.database = database
+        self._saver: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._orders: Dict[str, OrderRecord] = {}
+        self._broker_ids: Dict[str, str] = {}
+        self._retired: set = set()  # broker order numbers of replaced attempts
+        self._open: Dict[str, OrderRecord] = {}
+        self._history: Dict[str, List[Dict[str, Any]]] = {}
+        self._seq = 0
+        self._file = None
+        if log_path and os.path.exists(log_path):
+            for event in self.read_events(log_path):
+                self._apply(event)
+            logger.info(f"Replayed {self._seq} order events from {log_path}: {len(self._open)} open orders")
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def __contains__(self, order_uuid: str) -> bool:
+        return order_uuid in self._orders
+
+    @staticmethod
+    def read_events(path: str) -> List[Dict[str, Any]]:
+        """
+        Events of a log file, oldest first; a torn last line from a crash is dropped.
+
+        Args:
+            path (str): Event log.
+
+        Returns:
+            List[Dict[str, Any]]: Events as written.
+        """
+        events = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable order event in {path}: {line[:80]!r}")
+        return events
+
+    @classmethod
+    def replay(cls, path: str) -> 'OrderBook':
+        """
+        Read-only book rebuilt from a log, for audits.
+
+        Args:
+            path (str): Event log.
+
+        Returns:
+            OrderBook: Book with every order and its history; it writes nothing.
+        """
+        book = cls()
+        for event in cls.read_events(path):
+            book._apply(event)
+        return book
+
+    def get(self, order_uuid: Optional[str]) -> Optional[OrderRecord]:
+        """
+        Order by uuid.
+
+        Args:
+            order_uuid (Optional[str]): Order uuid.
+
+        Returns:
+            Optional[OrderRecord]: The order, or None if unknown.
+        """
+        return self._orders.get(order_uuid) if order_uuid else None
+
+    def by_broker_id(self, broker_order_id: Optional[str]) -> Optional[OrderRecord]:
+        """
+        Order by any broker order number it was sent under.
+
+        Args:
+            broker_order_id (Optional[str]): Broker order number.
+
+        Returns:
+            Optional[OrderRecord]: The order, or None if unknown.
+        """
+        order_uuid = self._broker_ids.get(broker_order_id) if broker_order_id else None
+        return self._orders.get(order_uuid) if order_uuid else None
+
+    def open_orders(self, symbol: Optional[str] = None, external: bool = True) -> List[OrderRecord]:
+        """
+        Orders not yet filled, cancelled or rejected, oldest first.
+
+        Args:
+            symbol (Optional[str]): Only orders for this symbol.
+            external (bool): Include orders this process did not place.
+
+        Returns:
+            List[OrderRecord]: Open orders.
+        """
+        with self._lock:
+            return [o for o in self._open.values()
+                    if (symbol is None or o.symbol == symbol) and (external or not o.external)]
+
+    def history(self, order_uuid: str) -> List[Dict[str, Any]]:
+        """
+        Events of one order, oldest first.
+
+        Args:
+            order_uuid (str): Order uuid.
+
+        Returns:
+            List[Dict[str, Any]]: Events as logged.
+        """
+        return list(self._history.get(order_uuid, ()))
+
+    def to_dict(self, order_uuid: str) -> Optional[Dict[str, Any]]:
+        """
+        Plain dict of one order, for the live snapshot and logs.
+
+        Args:
+            order_uuid (str): Order uuid.
+
+        Returns:
+            Optional[Dict[str, Any]]: Order fields, or None if unknown.
+        """
+        record = self._orders.get(order_uuid)
+        return asdict(record) if record else None
+
+    def create(self, order: OrderEvent, external: bool = False) -> OrderRecord:
+        """
+        Record a new order; an order already in the book is returned as is.
+
+        Args:
+            order (OrderEvent): Order with its uuid set.
+            external (bool): The order was not placed by this process.
+
+        Returns:
+            OrderRecord: The order in state NEW.
+        """
+        with self._lock:
+            record = self._orders.get(order.order_uuid)
+            if record is not None:
+                return record
+            event = {'uuid': order.order_uuid, 'state': NEW, 'symbol': order.symbol, 'side': order.side,
+                     'quantity': order.quantity, 'price': order.price}
+            if external:
+                event['external'] = True
+            self._record(event)
+            return self._orders[order.order_uuid]
+
+    def sent(self, order_uuid: str, price: Optional[float] = None) -> Optional[OrderRecord]:
+        """
+        The order is on its way to the broker, at ``price`` if it has one.
+
+        Returns:
+            Optional[OrderRecord]: The order, or None if the transition was not allowed.
+        """
+        return self._transition(order_uuid, SENT, price=price)
+
+    def replacing(self, order_uuid: str) -> Optional[OrderRecord]:
+        """
+        Retire the current broker order number ahead of cancelling it for a re-send.
+
+        Updates for the retired number, including its cancellation, are ignored
+        from here on, so they cannot close the order its next attempt fills.
+
+        Returns:
+            Optional[OrderRecord]: The order back in SENT, or None if it had no live attempt.
+        """
+        record = self._orders.get(order_uuid)
+        if record is None or record.state != ACK or not record.broker_order_id:
+            return None
+        return self._transition(order_uuid, SENT, retired=record.broker_order_id)
+
+    def acknowledged(self, order_uuid: str, broker_order_id: str) -> Optional[OrderRecord]:
+        """
+        The broker accepted the order under ``broker_order_id``.
+
+        Returns:
+            Optional[OrderRecord]: The order, or None if the transition was not allowed.
+        """
+        return self._transition(order_uuid, ACK, broker_order_id=broker_order_id)
+
+    def filled(self, order_uuid: str, filled_quantity: int, avg_fill_price: Optional[float]) -> Optional[OrderRecord]:
+        """
+        Cumulative fill; PARTIAL below the order quantity, FILLED at it.
+
+        Args:
+            order_uuid (str): Order uuid.
+            filled_quantity (int): Quantity filled so far.
+            avg_fill_price (Optional[float]): Average price of the filled quantity.
+
+        Returns:
+            Optional[OrderRecord]: The order, or None if the fill was stale or not allowed.
+        """
+        record = self._orders.get(order_uuid)
+        if record is None:
+            return None
+        state = FILLED if filled_quantity >= record.quantity else PARTIAL
+        return self._transition(order_uuid, state, filled_quantity=filled_quantity, avg_fill_price=avg_fill_price)
+
+    def cancelled(self, order_uuid: str, reason: Optional[str] = None) -> Optional[OrderRecord]:
+        """
+        The order was cancelled, by the bot or the broker.
+
+        Returns:
+            Optional[OrderRecord]: The order, or None if the transition was not allowed.
+        """
+        return self._transition(order_uuid, CANCELLED, reason=reason)
+
+    def rejected(self, order_uuid: str, reason: Optional[str] = None) -> Optional[OrderRecord]:
+        """
+        The order was rejected, by the broker or before it was sent.
+
+        Returns:
+            Optional[OrderRecord]: The order, or None if the transition was not allowed.
+        """
+        return self._transition(order_uuid, REJECTED, reason=reason)
+
+    def on_order_update(self, data: Dict[str, Any]) -> Optional[OrderRecord]:
+        """
+        Apply a Shoonya order update (websocket or order book row).
+
+        Orders the bot did not send, e.g. placed by hand, are added under their
+        broker order number so the log covers every order of the account.
+
+        Args:
+            data (Dict[str, Any]): Update with norenordno, status, remarks, fillshares, avgprc, ...
+
+        Returns:
+            Optional[OrderRecord]: The order, or None if the update was stale or unusable.
+        """
+        broker_order_id = data.get('norenordno')
+        state = BROKER_STATUS.get(str(data.get('status', '')).upper())
+        if not broker_order_id or state is None or broker_order_id in self._retired:
+            return None
+        record = self.by_broker_id(broker_order_id)
+        if record is not None and record.broker_order_id != broker_order_id:
+            return None  # an earlier attempt of a re-sent order
+        if record is None:
+            record = self.get(data.get('remarks'))
+        if record is None:
+            record = self._external(data)
+        if record.state == NEW:
+            self.sent(record.order_uuid)
+        if record.broker_order_id != broker_order_id:
+            if self.acknowledged(record.order_uuid, broker_order_id) is None:
+                return None
+        filled = int(float(data.get('fillshares') or 0))
+        avg_price = float(data['avgprc']) if data.get('avgprc') else None
+        if state == CANCELLED:
+            return self.cancelled(record.order_uuid, data.get('rejreason') or 'BROKER')
+        if state == REJECTED:
+            return self.rejected(record.order_uuid, data.get('rejreason'))
+        if state == FILLED or filled > record.filled_quantity:
+            return self.filled(record.order_uuid, record.quantity if state == FILLED else filled, avg_price)
+        return record if record.is_open else None
+
+    def close(self) -> None:
+        """Close the event log and wait for pending database saves."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            saver, self._saver = self._saver, None
+        if saver is not None:
+            saver.shutdown(wait=True)
+
+    def _external(self, data: Dict[str, Any]) -> OrderRecord:
+        order = OrderEvent(
+            symbol=data.get('tsym', ''),
+            timestamp=datetime.now(),
+            order_type=data.get('prctyp', 'LMT'),
+            side='SELL' if data.get('trantype') == 'S' else 'BUY',
+            quantity=int(float(data.get('qty') or 0)),
+            price=float(data['prc']) if data.get('prc') else None,
+            order_uuid=data['norenordno']
+        )
+        logger.info(f"Order {order.order_uuid} for {order.symbol} was not placed by this process; tracking it")
+        return self.create(order, external=True)
+
+    def _transition(self, order_uuid: str, state: str, **fields: Any) -> Optional[OrderRecord]:
+        with self._lock:
+            record = self._orders.get(order_uuid)
+            if record is None:
+                logger.warning(f"Order {order_uuid} is not in the order book; {state} ignored")
+                return None
+            if state not in TRANSITIONS.get(record.state, ()):
+                if state != record.state:
+                    logger.debug(f"Order {order_uuid}: {record.state} -> {state} not allowed, ignored")
+                return None
+            if state == PARTIAL and fields.get('filled_quantity', 0) <= record.filled_quantity:
+                return None
+            event = {'uuid': order_uuid, 'state': state}
+            event.update((k, v) for k, v in fields.items() if v is not None)
+            self._record(event)
+            return record
+
+    def _record(self, event: Dict[str, Any]) -> None:
+        # Called with the lock held: number, log, then apply
+        event['seq'] = self._seq + 1
+        event['ts'] = datetime.now().isoformat()
+        if self.log_path:
+            try:
+                if self._file is None:
+                    self._open_log()
+                self._file.write(json.dumps(event, separators=(',', ':')) + '\n')
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            except OSError as e:
+                logger.error(f"Failed to log order event {event}: {e}")
+        self._apply(event)
+        if self.database is not None:
+            self._save(self._orders[event['uuid']])
+
+    def _save(self, record: OrderRecord) -> None:
+        # Called with the lock held: the row is taken now, written in order by one thread
+        row = {
+            'order_uuid': record.order_uuid,
+            'broker_order_id': record.broker_order_id,
+            'timestamp': record.created_at,
+            'symbol': record.symbol,
+            'side': record.side,
+            'price': record.avg_fill_price if record.avg_fill_price is not None else record.price,
+            'quantity': record.quantity,
+            'status': DB_STATUS[record.state],
+        }
+        if self._saver is None:
+            self._saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="OrderSave")
+        self._saver.submit(self._write, row)
+
+    def _write(self, row: Dict[str, Any]) -> None:
+        try:
+            self.database.save_order(row)
+        except Exception as e:
+            logger.error(f"Failed to save order {row['order_uuid']}: {e}")
+
+    def _open_log(self) -> None:
+        os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+        torn = False
+        if os.path.exists(self.log_path) and os.path.getsize(self.log_path):
+            with open(self.log_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b'\n'
+        self._file = open(self.log_path, 'a', encoding='utf-8')
+        if torn:
+            # Start after a torn last line from a crash instead of running on from it
+            self._file.write('\n')
+
+    def _apply(self, event: Dict[str, Any]) -> None:
+        order_uuid, state = event['uuid'], event['state']
+        self._seq = max(self._seq, event.get('seq', self._seq + 1))
+        record = self._orders.get(order_uuid)
+        if record is None:
+            record = self._orders[order_uuid] = OrderRecord(
+                order_uuid=order_uuid, symbol=event.get('symbol', ''), side=event.get('side', ''),
+                quantity=event.get('quantity', 0), external=event.get('external', False), created_at=event.get('ts')
+            )
+        for key in ('price', 'broker_order_id', 'filled_quantity', 'avg_fill_price', 'reason'):
+            if key in event:
+                setattr(record, key, event[key])
+        if 'broker_order_id' in event:
+            self._broker_ids[event['broker_order_id']] = order_uuid
+        if 'retired' in event:
+            self._retired.add(event['retired'])
+            record.broker_order_id = None
+        record.state = state
+        record.updated_at = event.get('ts')
+        if record.is_open:
+            self._open[order_uuid] = record
+        else:
+            self._open.pop(order_uuid, None)
+        self._history.setdefault(order_uuid, []).append(event)
@@ -0,0 +1,157 @@
+"""
+Entry orders built ahead of the signal, so firing one is a price patch and a send.
+
+The strategy arms a template for each option its next CE or PE signal would
+trade, when the zones are calculated and whenever that option changes (a new
+ATM strike or a new strike pick). A template holds the complete Shoonya
+``place_order`` payload with every field already in wire format; at signal
+time the gateway only writes the limit price (and the order tag) into it.
+"""
+from typing import Dict, Optional, Tuple
+from loguru import logger
+
+SIDES = {'BUY': 'B', 'SELL': 'S'}
+
+
+class OrderTemplate:
+    """
+    Pre-built limit order payload for one option and side.
+
+    Args:
+        symbol (str): Option trading symbol.
+        side (str): 'BUY' or 'SELL'.
+        quantity (int): Order quantity.
+        exchange (str): Exchange segment.
+        product_type (str): Shoonya product ('M' NRML, 'I' intraday).
+        tick_size (float): Price tick limit prices are rounded to.
+    """
+    __slots__ = ('symbol', 'side', 'quantity', 'tick_size', 'payload', 'fired')
+
+    def __init__(self, symbol: str, side: str, quantity: int, exchange: str = 'NFO', product_type: str = 'M',
+                 tick_size: float = 0.05) -> None:
+        """
+        Build the payload.
+
+        Args:
+            symbol (str): Option trading symbol.
+            side (str): 'BUY' or 'SELL'.
+            quantity (int): Order quantity.
+            exchange (str): Exchange segment.
+            product_type (str): Shoonya product.
+            tick_size (float): Price tick.
+        """
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.tick_size = tick_size
+        self.fired = 0
+        self.payload = {
+            'buy_or_sell': SIDES[side],
+            'product_type': product_type,
+            'exchange': exchange,
+            'tradingsymbol': symbol,
+            'quantity': str(quantity),
+            'discloseqty': '0',
+            'price_type': 'LMT',
+            'price': '0',
+            'trigger_price': None,
+            'retention': 'DAY',
+            'remarks': 'algo_trade'
+        }
+
+    def fire(self, price: float, tag: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """
+        Patch the limit price (rounded to the tick) and order tag into the payload.
+
+        Args:
+            price (float): Limit price.
+            tag (Optional[str]): Order tag sent as ``remarks``; reconciliation links orders by it.
+
+        Returns:
+            Dict[str, Optional[str]]: The payload, ready for ``place_order``; reused by the next fire.
+        """
+        payload = self.payload
+        payload['price'] = f"{round(price / self.tick_size) * self.tick_size:.2f}"
+        payload['remarks'] = tag or 'algo_trade'
+        self.fired += 1
+        return payload
+
+
+class OrderTemplates:
+    """
+    Armed entry templates keyed by option symbol and side.
+
+    Args:
+        quantity (int): Default order quantity.
+        exchange (str): Exchange segment.
+        product_type (str): Shoonya product.
+        tick_size (float): Price tick.
+    """
+    def __init__(self, quantity: int = 1, exchange: str = 'NFO', product_type: str = 'M',
+                 tick_size: float = 0.05) -> None:
+        """
+        Initialize an empty set of templates.
+
+        Args:
+            quantity (int): Default order quantity.
+            exchange (str): Exchange segment.
+            product_type (str): Shoonya product.
+            tick_size (float): Price tick.
+        """
+        self.quantity = quantity
+        self.exchange = exchange
+        self.product_type = product_type
+        self.tick_size = tick_size
+        self._templates: Dict[Tuple[str, str], OrderTemplate] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def arm(self, symbol: str, side: str = 'BUY', quantity: Optional[int] = None) -> OrderTemplate:
+        """
+        Build (or rebuild) the template for an option and side.
+
+        Args:
+            symbol (str): Option trading symbol.
+            side (str): 'BUY' or 'SELL'.
+            quantity (Optional[int]): Order quantity; the default quantity if None.
+
+        Returns:
+            OrderTemplate: The armed template.
+        """
+        template = OrderTemplate(symbol, side, quantity or self.quantity, self.exchange, self.product_type,
+                                 self.tick_size)
+        self._templates[(symbol, side)] = template
+        logger.debug(f"Armed {side} template for {symbol} x{template.quantity}")
+        return template
+
+    def get(self, symbol: str, side: str, quantity: int) -> OrderTemplate:
+        """
+        Armed template for an order, arming one on a miss or a quantity change.
+
+        Args:
+            symbol (str): Option trading symbol.
+            side (str): 'BUY' or 'SELL'.
+            quantity (int): Order quantity.
+
+        Returns:
+            OrderTemplate: Template for the order.
+        """
+        template = self._templates.get((symbol, side))
+        if template is not None and template.quantity == quantity:
+            self.hits += 1
+            return template
+        self.misses += 1
+        return self.arm(symbol, side, quantity)
+
+    def discard(self, symbol: str, side: str = 'BUY') -> None:
+        """
+        Drop a template, e.g. for a strike that is no longer the one a signal would trade.
+
+        Args:
+            symbol (str): Option trading symbol.
+            side (str): 'BUY' or 'SELL'.
+        """
+        self._templates.pop((symbol, side), None)
@@ -1,19 +1,25 @@
-from typing import Any
+from typing import Any, Optional
 from trading_bot.event import OrderEvent, ExecutionEvent, MarketEvent
+from trading_bot.execution.order_book import OrderBook
+from trading_bot.position.book import PositionBook
+from trading_bot.monitor.latency import latency
 from loguru import logger
 from datetime import datetime
 
 class PaperExecutionGateway:
     """
     Simulates order execution for paper trading. Does not place real orders.
-    Tracks open positions, simulates fills, and checks for SL/TP hits using live prices.
+    Tracks open positions in a PositionBook, simulates fills, and checks for SL/TP hits
+    using live prices. Closed positions are evicted from the book.
 
     Args:
         order_queue: Queue for incoming OrderEvents.
         execution_queue: Queue for outgoing ExecutionEvents.
         api_wrapper: (Optional) Broker API wrapper instance (not used in paper trading).
+        order_book (Optional[OrderBook]): Order lifecycle book; simulated entries are recorded in it too.
     """
-    def __init__(self, order_queue: Any, execution_queue: Any, api_wrapper: Any = None) -> None:
+    def __init__(self, order_queue: Any, execution_queue: Any, api_wrapper: Any = None,
+                 order_book: Optional[OrderBook] = None) -> None:
         """
         Initialize the PaperExecutionGateway.
 
@@ -21,10 +27,12 @@ class PaperExecutionGateway:
             order_queue: Queue for incoming OrderEvents.
             execution_queue: Queue for outgoing ExecutionEvents.
             api_wrapper: (Optional) Broker API wrapper instance (not used in paper trading).
+            order_book (Optional[OrderBook]): Order lifecycle book.
         """
         self.order_queue = order_queue
+        self.order_book = order_book if order_book is not None else OrderBook()
         self.execution_queue = execution_queue
-        self.open_positions: dict[str, dict[str, Any]] = {}
+        self.open_positions = PositionBook(stop_key='sl', target_key='tp')
         self.last_price: dict[str, float] = {}
 
     def process_order(self, order: OrderEvent) -> None:
@@ -35,6 +43,11 @@ class PaperExecutionGateway:
             order (OrderEvent): The incoming order event.
         """
         try:
+            latency.stamp(order.latency, 'send')
+            fill_price = order.price or self.last_price.get(order.symbol, 0.0)
+            self.order_book.create(order)
+            self.order_book.sent(order.order_uuid, fill_price)
+            self.order_book.filled(order.order_uuid, order.quantity, fill_price)
             exec_event = ExecutionEvent(
                 symbol=order.symbol,
                 timestamp=datetime.now(),
@@ -43,8 +56,10 @@ class PaperExecutionGateway:
                 filled_quantity=order.quantity,
                 avg_fill_price=order.price or self.last_price.get(order.symbol, 0.0),
                 broker_order_id='PAPER_ORDER',
-                info={'paper': True, 'entry': True}
+                info={'paper': True, 'entry': True, 'side': order.side},
+                latency=order.latency
             )
+            latency.finish(exec_event.latency, 'fill')
             self.execution_queue.put(exec_event)
             logger.info(f"[PaperExecutionGateway] Simulated entry ExecutionEvent: {exec_event}")
             self.open_positions[order.order_uuid] = {
@@ -53,37 +68,22 @@ class PaperExecutionGateway:
                 'entry_price': order.price or self.last_price.get(order.symbol, 0.0),
                 'quantity': order.quantity,
                 'sl': order.info.get('sl') if order.info else None,
-                'tp': order.info.get('tp') if order.info else None,
-                'open': True
+                'tp': order.info.get('tp') if order.info else None
             }
         except Exception as exc:
             logger.error(f"[PaperExecutionGateway] Error processing order: {exc}")
 
     def on_market_event(self, event: MarketEvent) -> None:
         """
-        Update last seen price and check all open positions for SL/TP hit.
-        Generate exit ExecutionEvents if SL/TP is triggered.
+        Update last seen price and check the event symbol's positions for SL/TP hit.
+        Generate exit ExecutionEvents if SL/TP is triggered and evict the closed positions.
 
         Args:
             event (MarketEvent): The incoming market event.
         """
         try:
             self.last_price[event.symbol] = event.price
-            to_close: list[tuple[str, str]] = []
-            for order_uuid, pos in self.open_positions.items():
-                if not pos['open']:
-                    continue
-                if pos['side'] == 'BUY':
-                    if pos['sl'] is not None and event.price <= pos['sl']:
-                        to_close.append((order_uuid, 'SL'))
-                    elif pos['tp'] is not None and event.price >= pos['tp']:
-                        to_close.append((order_uuid, 'TP'))
-                elif pos['side'] == 'SELL':
-                    if pos['sl'] is not None and event.price >= pos['sl']:
-                        to_close.append((order_uuid, 'SL'))
-                    elif pos['tp'] is not None and event.price <= pos['tp']:
-                        to_close.append((order_uuid, 'TP'))
-            for order_uuid, reason in to_close:
+            for order_uuid, reason in self.open_positions.crossed(event.symbol, event.price):
                 pos = self.open_positions[order_uuid]
                 exec_event = ExecutionEvent(
                     symbol=pos['symbol'],
@@ -97,6 +97,6 @@ class PaperExecutionGateway:
                 )
                 self.execution_queue.put(exec_event)
                 logger.info(f"[PaperExecutionGateway] Simulated exit ExecutionEvent: {exec_event}")
-                pos['open'] = False
+                del self.open_positions[order_uuid]
         except Exception as exc:
             logger.error(f"[PaperExecutionGateway] Error processing market event: {exc}") 
\ No newline at end of file
@@ -2,16 +2,27 @@
 # Missing Component: System Health Monitor
 # trading_bot/monitor/health_check.py
 
-import psutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from loguru import logger
-from trading_bot.alerts.notifier import notifier
+from trading_bot.monitor.latency import latency
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 class SystemHealthMonitor:
     """
     Monitor system health, performance, and trading metrics.
+    
+    ``start`` runs the checks on a daemon thread every ``health_interval``
+    seconds; nothing here ever runs on the trading thread. Alerts are handed to
+    a single background sender so slow Telegram/SMTP calls delay neither
+    trading nor the next sample.
     """
     
     def __init__(self, config: Dict[str, Any]):
@@ -21,15 +32,31 @@ class SystemHealthMonitor:
         self.alerts_sent = {}  # To prevent spam
         
         # Thresholds
-        self.cpu_threshold = 80  # %
-        self.memory_threshold = 80  # %
-        self.disk_threshold = 90  # %
-        self.connection_timeout = 30  # seconds
+        self.cpu_threshold = config.get('cpu_threshold', 80)  # %
+        self.memory_threshold = config.get('memory_threshold', 80)  # %
+        self.disk_threshold = config.get('disk_threshold', 90)  # %
+        self.connection_timeout = config.get('feed_stale_seconds', 30)  # seconds
+        self.queue_depth_threshold = config.get('queue_depth_threshold', 500)
+        self.queue_lag_threshold = config.get('queue_lag_seconds', 1.0)  # seconds
+        self.loop_stall_threshold = config.get('loop_stall_seconds', 5.0)  # seconds
+        self.ack_latency_threshold = config.get('ack_latency_threshold_ms', 1500) / 1000.0  # seconds
+        self.interval = config.get('health_interval', 5.0)  # seconds
+        
+        self.latest: Dict[str, Any] = {}
+        self._ack_seen = (0, 0)  # (count, total ns) of send->ack at the previous check
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._alert_sender: Optional[ThreadPoolExecutor] = None
+        
+        if psutil:
+            psutil.cpu_percent(interval=None)  # prime the non-blocking CPU sampler
     
     def check_system_resources(self) -> Dict[str, float]:
-        """Check CPU, memory, and disk usage"""
+        """Check CPU, memory, and disk usage (CPU is averaged since the previous call, without blocking)"""
+        if psutil is None:
+            return {}
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
             
@@ -51,11 +78,111 @@ class SystemHealthMonitor:
                 self.send_alert(f"High disk usage: {disk.percent:.1f}%", "WARNING")
             
             return metrics
-            
+        
         except Exception as e:
             logger.error(f"Error checking system resources: {e}")
             return {}
     
+    @staticmethod
+    def register_metrics(registry) -> None:
+        """Expose CPU, memory and disk usage as scrape-time gauges"""
+        if psutil is None:
+            raise ImportError("psutil is not installed")
+        psutil.cpu_percent(interval=None)  # prime the non-blocking CPU sampler
+        registry.gauge('system_cpu_percent', "System CPU usage since the previous scrape").set_function(
+            lambda: psutil.cpu_percent(interval=None)
+        )
+        registry.gauge('system_memory_percent', "System memory usage").set_function(
+            lambda: psutil.virtual_memory().percent
+        )
+        registry.gauge('system_disk_percent', "Root filesystem usage").set_function(
+            lambda: psutil.disk_usage('/').percent
+        )
+    
+    def check_feed(self, data_handler) -> Dict[str, Any]:
+        """Check per-symbol tick staleness from DataHandler.last_tick_time"""
+        try:
+            if hasattr(data_handler, 'is_market_hours') and not data_handler.is_market_hours():
+                return {}
+            
+            now = datetime.now()
+            tick_age = {
+                symbol: (now - ts).total_seconds()
+                for symbol, ts in list(data_handler.last_tick_time.items())
+            }
+            stale = sorted(symbol for symbol, age in tick_age.items() if age > self.connection_timeout)
+            missing = sorted(set(getattr(data_handler, 'symbols', [])) - set(tick_age))
+            uptime = (now - self.start_time).total_seconds()
+            
+            if stale:
+                self.send_alert(f"Feed stale for {', '.join(stale)} (>{self.connection_timeout}s without ticks)", "WARNING")
+            if missing and uptime > self.connection_timeout:
+                self.send_alert(f"No ticks received yet for {', '.join(missing)}", "WARNING")
+            if not data_handler.ws_connected:
+                self.send_alert("Market data websocket is disconnected", "ERROR")
+            
+            return {
+                'feed_connected': data_handler.ws_connected,
+                'tick_age_seconds': tick_age,
+                'stale_symbols': stale + missing
+            }
+        
+        except Exception as e:
+            logger.error(f"Error checking feed: {e}")
+            return {}
+    
+    def check_queues(self, queues: Dict[str, Any], last_loop_time: Optional[float] = None) -> Dict[str, Any]:
+        """Check queue depth, how long the oldest queued event has waited, and main loop liveness"""
+        try:
+            depths = {name: q.qsize() for name, q in queues.items()}
+            lag = {}
+            for name, q in queues.items():
+                oldest = q.peek() if hasattr(q, 'peek') else None
+                timestamp = getattr(oldest, 'timestamp', None)
+                if isinstance(timestamp, datetime):
+                    lag[name] = max(0.0, (datetime.now() - timestamp).total_seconds())
+            
+            for name, depth in depths.items():
+                if depth > self.queue_depth_threshold:
+                    self.send_alert(f"{name} queue backed up: {depth} events", "WARNING")
+            for name, seconds in lag.items():
+                if seconds > self.queue_lag_threshold:
+                    self.send_alert(f"{name} queue lagging: oldest event waited {seconds:.1f}s", "WARNING")
+            
+            metrics = {'queue_depth': depths, 'queue_lag_seconds': lag}
+            if last_loop_time is not None:
+                stall = time.monotonic() - last_loop_time
+                metrics['loop_stall_seconds'] = stall
+                if stall > self.loop_stall_threshold:
+                    self.send_alert(f"Main event loop has not completed an iteration for {stall:.1f}s", "ERROR")
+            return metrics
+        
+        except Exception as e:
+            logger.error(f"Error checking queues: {e}")
+            return {}
+    
+    def check_ack_latency(self) -> Dict[str, Any]:
+        """Check mean broker order-ack latency over the interval since the previous check"""
+        try:
+            hist = latency.hops.get('send->ack')
+            if hist is None:
+                return {}
+            
+            count, total = hist.count, hist.total
+            seen_count, seen_total = self._ack_seen
+            self._ack_seen = (count, total)
+            if count <= seen_count:
+                return {}
+            
+            mean = (total - seen_total) / (count - seen_count) / 1e9
+            if mean > self.ack_latency_threshold:
+                self.send_alert(f"Slow order acks: {mean * 1000:.0f} ms average over {count - seen_count} orders", "WARNING")
+            return {'ack_latency_ms': mean * 1000}
+        
+        except Exception as e:
+            logger.error(f"Error checking ack latency: {e}")
+            return {}
+    
     def check_trading_metrics(self, position_manager, database) -> Dict[str, Any]:
         """Check trading-related health metrics"""
         try:
@@ -74,13 +201,13 @@ class SystemHealthMonitor:
             }
             
             return metrics
-            
+        
         except Exception as e:
             logger.error(f"Error checking trading metrics: {e}")
             return {}
     
     def send_alert(self, message: str, priority: str = "INFO"):
-        """Send alert with rate limiting to prevent spam"""
+        """Send alert with rate limiting to prevent spam; delivery happens off the calling thread"""
         alert_key = f"{message}_{priority}"
         now = datetime.now()
         
@@ -90,9 +217,20 @@ class SystemHealthMonitor:
                 return
         
         self.alerts_sent[alert_key] = now
-        notifier.alert(message, priority, telegram=True, email=True)
+        if self._alert_sender is None:
+            self._alert_sender = ThreadPoolExecutor(max_workers=1, thread_name_prefix="HealthAlert")
+        self._alert_sender.submit(self._deliver_alert, message, priority)
+    
+    def _deliver_alert(self, message: str, priority: str):
+        try:
+            # Imported on the first alert so a healthy start never loads the HTTP/SMTP stack
+            from trading_bot.alerts.notifier import notifier
+            notifier.alert(message, priority, telegram=True, email=True)
+        except Exception as e:
+            logger.error(f"Failed to deliver health alert: {e}")
     
-    def run_health_check(self, position_manager=None, database=None):
+    def run_health_check(self, position_manager=None, database=None, data_handler=None,
+                         queues: Optional[Dict[str, Any]] = None, last_loop_time: Optional[float] = None):
         """Run complete health check"""
         try:
             self.last_check = datetime.now()
@@ -105,15 +243,44 @@ class SystemHealthMonitor:
             if position_manager and database:
                 trading_metrics = self.check_trading_metrics(position_manager, database)
             
+            # Pipeline health
+            feed_metrics = self.check_feed(data_handler) if data_handler else {}
+            queue_metrics = self.check_queues(queues, last_loop_time) if queues else {}
+            ack_metrics = self.check_ack_latency()
+            
             # Log health status
             logger.info(f"Health Check - CPU: {system_metrics.get('cpu_percent', 0):.1f}%, "
                        f"Memory: {system_metrics.get('memory_percent', 0):.1f}%, "
                        f"Positions: {trading_metrics.get('open_positions', 0)}")
             
-            return {**system_metrics, **trading_metrics}
-            
+            self.latest = {**system_metrics, **trading_metrics, **feed_metrics, **queue_metrics, **ack_metrics}
+            return self.latest
+        
         except Exception as e:
             logger.error(f"Health check failed: {e}")
             self.send_alert(f"Health check failed: {e}", "ERROR")
             return {}
-
+    
+    def start(self, **sources):
+        """Run run_health_check(**sources) every interval on a daemon thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, kwargs=sources, daemon=True, name="HealthMonitor")
+        self._thread.start()
+        logger.info(f"Health monitor started ({self.interval}s interval)")
+    
+    def _run(self, last_loop_time=None, **sources):
+        while not self._stop.wait(self.interval):
+            self.run_health_check(
+                last_loop_time=last_loop_time() if callable(last_loop_time) else last_loop_time,
+                **sources
+            )
+    
+    def stop(self):
+        """Stop the monitor thread and let queued alerts finish sending"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+        if self._alert_sender:
+            self._alert_sender.shutdown(wait=False)
@@ -0,0 +1,390 @@
+import bisect
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from loguru import logger
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# Seconds; covers sub-millisecond handlers up to multi-second broker round trips
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class _Metric:
+    """Base for metric families; children are keyed by label values."""
+    kind = 'unknown'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], '_Metric'] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> '_Metric':
+        """
+        Child series for the given label values (created on first use).
+
+        Args:
+            *values: One value per label name, in order.
+
+        Returns:
+            _Metric: The child series; cache it at the call site on hot paths.
+        """
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._new_child()
+                    self._children[key] = child
+        return child
+
+    def _new_child(self) -> '_Metric':
+        raise NotImplementedError
+
+    def _series(self) -> List[Tuple[Tuple[str, ...], '_Metric']]:
+        if self.labelnames:
+            return list(self._children.items())
+        return [((), self)]
+
+    def render(self) -> List[str]:
+        """OpenMetrics lines for this family."""
+        lines = [f"# TYPE {self.name} {self.kind}", f"# HELP {self.name} {self.documentation}"]
+        for values, series in self._series():
+            lines.extend(series._samples(self.name, self.labelnames, values))
+        return lines
+
+    def _samples(self, name: str, labelnames: Sequence[str], values: Sequence[str]) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count.
+
+    ``inc`` is a plain attribute update with no lock. Keep one writing thread per
+    series (the feed thread or the main loop) so increments are never lost.
+    """
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def _new_child(self) -> 'Counter':
+        return Counter(self.name, self.documentation)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Increment the counter.
+
+        Args:
+            amount (float): Non-negative increment.
+        """
+        self.value += amount
+
+    def _samples(self, name, labelnames, values):
+        return [f"{name}_total{_format_labels(labelnames, values)} {_format_value(self.value)}"]
+
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down, or is computed by a callback at scrape time.
+
+    Callback gauges cost nothing on the hot path: queue depths, P&L and the like
+    are read only when the endpoint is scraped.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_child(self) -> 'Gauge':
+        return Gauge(self.name, self.documentation)
+
+    def set(self, value: float) -> None:
+        """
+        Set the gauge.
+
+        Args:
+            value (float): New value.
+        """
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        """
+        Increase the gauge.
+
+        Args:
+            amount (float): Increment.
+        """
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """
+        Decrease the gauge.
+
+        Args:
+            amount (float): Decrement.
+        """
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Compute the value at scrape time.
+
+        Args:
+            function (Callable[[], float]): Called on every scrape.
+        """
+        self._function = function
+
+    def get(self) -> float:
+        """
+        Current value.
+
+        Returns:
+            float: The callback result (NaN if it raises) or the last set value.
+        """
+        if self._function is None:
+            return self.value
+        try:
+            return float(self._function())
+        except Exception as e:
+            logger.debug(f"Metric callback for {self.name} failed: {e}")
+            return math.nan
+
+    def _samples(self, name, labelnames, values):
+        return [f"{name}{_format_labels(labelnames, values)} {_format_value(self.get())}"]
+
+
+class Histogram(_Metric):
+    """
+    Bucketed distribution of observed values (seconds by convention).
+
+    ``observe`` is a bisect over the bucket bounds and two additions; buckets are
+    stored non-cumulatively and accumulated at render time.
+
+    Args:
+        buckets (Sequence[float]): Upper bounds, ascending; +Inf is implied.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.bounds = sorted(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def _new_child(self) -> 'Histogram':
+        return Histogram(self.name, self.documentation, buckets=self.bounds)
+
+    def observe(self, value: float) -> None:
+        """
+        Record one observation.
+
+        Args:
+            value (float): Observed value.
+        """
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        """Total number of observations."""
+        return sum(self.counts)
+
+    def _samples(self, name, labelnames, values):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + [math.inf], self.counts):
+            cumulative += count
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{name}_bucket{_format_labels(labelnames, values, le)} {cumulative}")
+        lines.append(f"{name}_count{_format_labels(labelnames, values)} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, values)} {_format_value(self.sum)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together in OpenMetrics text format."""
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """
+        Add a metric family, or return the existing one with the same name.
+
+        Args:
+            metric (_Metric): Metric family.
+
+        Returns:
+            _Metric: The registered family.
+        """
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered as {existing.kind}")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Register (or fetch) a Counter."""
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Register (or fetch) a Gauge."""
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        """Register (or fetch) a Histogram."""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Registered family by name, if any."""
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """
+        Render every family.
+
+        Returns:
+            str: OpenMetrics exposition, terminated by ``# EOF``.
+        """
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """
+    Serves ``registry.render()`` at ``/metrics`` from a daemon thread.
+
+    Args:
+        registry (MetricsRegistry): Registry to expose.
+        host (str): Bind address; keep it local unless a scraper runs elsewhere.
+        port (int): TCP port (0 picks a free one).
+    """
+    def __init__(self, registry: 'MetricsRegistry', host: str = '127.0.0.1', port: int = 9108) -> None:
+        """
+        Bind the HTTP server (not yet serving).
+
+        Args:
+            registry (MetricsRegistry): Registry to expose.
+            host (str): Bind address.
+            port (int): TCP port (0 picks a free one).
+        """
+        self.registry = registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    handler.send_error(404)
+                    return
+                body = registry.render().encode()
+                handler.send_response(200)
+                handler.send_header('Content-Type', CONTENT_TYPE)
+                handler.send_header('Content-Length', str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="MetricsServer")
+        self._thread.start()
+        logger.info(f"Metrics endpoint listening on http://{self._server.server_address[0]}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class RateGauge:
+    """
+    Callback that turns a counter into a per-second rate between scrapes.
+
+    Args:
+        counter (Counter): Counter to differentiate.
+    """
+    def __init__(self, counter: Counter) -> None:
+        """
+        Initialize from the counter's current value.
+
+        Args:
+            counter (Counter): Counter to differentiate.
+        """
+        self.counter = counter
+        self._last_value = counter.value
+        self._last_time = time.monotonic()
+
+    def __call__(self) -> float:
+        now = time.monotonic()
+        value = self.counter.value
+        elapsed = now - self._last_time
+        rate = (value - self._last_value) / elapsed if elapsed > 0 else 0.0
+        self._last_value, self._last_time = value, now
+        return rate
+
+
+def register_process_metrics(registry: 'MetricsRegistry') -> None:
+    """
+    Add stdlib-only process CPU time and peak RSS gauges.
+
+    Args:
+        registry (MetricsRegistry): Registry to add to.
+    """
+    registry.gauge('process_cpu_seconds', "CPU time used by the process").set_function(time.process_time)
+    try:
+        import resource
+    except ImportError:
+        return  # not available on Windows
+    registry.gauge('process_max_resident_memory_bytes', "Peak resident set size").set_function(
+        lambda: resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    )
+
+
+# Process-wide registry and the metrics updated from the trading hot path
+registry = MetricsRegistry()
+TICKS = registry.counter('trading_ticks', "Valid market data ticks received")
+HANDLER_LATENCY = registry.histogram('trading_handler_latency_seconds', "Event handler wall time", ['handler'])
+ORDER_ROUND_TRIP = registry.histogram('trading_order_round_trip_seconds', "Order creation to fill")
+ORDERS = registry.counter('trading_orders', "Orders sent to the execution gateway")
+EXECUTIONS = registry.counter('trading_executions', "Execution reports by status", ['status'])
+ORDER_REJECTS = registry.counter('trading_order_rejects', "Order placements rejected by the broker")
@@ -0,0 +1,189 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+from loguru import logger
+
+
+class SamplingProfiler:
+    """
+    Low-overhead sampling profiler that can be started and stopped at runtime.
+
+    A daemon thread snapshots every thread's stack with ``sys._current_frames()``
+    at a fixed interval and counts identical stacks. On stop, the counts are
+    written by the sampler thread itself in collapsed-stack format
+    (``thread;file:func;file:func count``), which flamegraph.pl, speedscope and
+    inferno read directly, so neither starting nor stopping blocks the caller.
+
+    Args:
+        log_dir (str): Directory for the ``profile_*.folded`` output.
+        interval (float): Seconds between samples.
+        max_depth (int): Innermost frames kept per stack.
+    """
+    def __init__(self, log_dir: str = 'logs', interval: float = 0.005, max_depth: int = 64) -> None:
+        """
+        Initialize the profiler (not started).
+
+        Args:
+            log_dir (str): Directory for the ``profile_*.folded`` output.
+            interval (float): Seconds between samples.
+            max_depth (int): Innermost frames kept per stack.
+        """
+        self.log_dir = log_dir
+        self.interval = interval
+        self.max_depth = max_depth
+        self.last_output: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._labels: Dict[object, str] = {}
+
+    @property
+    def running(self) -> bool:
+        """Whether the sampler thread is active."""
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self) -> bool:
+        """
+        Start sampling.
+
+        Returns:
+            bool: False if already running.
+        """
+        if self.running:
+            return False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True, name="SamplingProfiler")
+        self._thread.start()
+        logger.info(f"Sampling profiler started ({self.interval * 1000:.1f} ms interval)")
+        return True
+
+    def stop(self) -> bool:
+        """
+        Ask the sampler to stop; it writes its output and exits on its own.
+
+        Returns:
+            bool: False if it was not running.
+        """
+        if not self.running:
+            return False
+        self._stop.set()
+        return True
+
+    def toggle(self) -> bool:
+        """
+        Start if stopped, stop if running.
+
+        Returns:
+            bool: True if the profiler is now running.
+        """
+        if self.running:
+            self.stop()
+            return False
+        return self.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """
+        Wait for a stopped sampler to finish writing its output.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait.
+        """
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+            self._labels[code] = label
+        return label
+
+    def _run(self, stop: threading.Event) -> None:
+        stacks: Counter = Counter()
+        own_id = threading.get_ident()
+        started = time.monotonic()
+        samples = 0
+        while not stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = []
+                while frame is not None and len(frames) < self.max_depth:
+                    frames.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                frames.append(names.get(thread_id, str(thread_id)))
+                stacks[';'.join(reversed(frames))] += 1
+            samples += 1
+        self.last_output = self._write(stacks)
+        logger.info(
+            f"Sampling profiler stopped after {time.monotonic() - started:.1f}s, {samples} samples"
+            + (f": {self.last_output}" if self.last_output else "")
+        )
+
+    def _write(self, stacks: Counter) -> Optional[str]:
+        if not stacks:
+            return None
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            path = os.path.join(self.log_dir, f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.folded")
+            with open(path, 'w') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            return path
+        except Exception as e:
+            logger.error(f"Failed to write profile: {e}")
+            return None
+
+
+class HandlerStats:
+    """
+    Cumulative wall time per event handler (strategy, risk, position, gateway).
+
+    The event loop times each handler call with ``perf_counter_ns`` and passes
+    the elapsed time to ``record``; only the main loop writes, so no lock is taken.
+    """
+    def __init__(self) -> None:
+        """Initialize empty stats."""
+        self.stats: Dict[str, list] = {}  # name -> [calls, total_ns, max_ns]
+
+    def record(self, name: str, elapsed_ns: int) -> None:
+        """
+        Add one handler call.
+
+        Args:
+            name (str): Handler name.
+            elapsed_ns (int): Call duration in ns.
+        """
+        entry = self.stats.get(name)
+        if entry is None:
+            entry = self.stats[name] = [0, 0, 0]
+        entry[0] += 1
+        entry[1] += elapsed_ns
+        if elapsed_ns > entry[2]:
+            entry[2] = elapsed_ns
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per-handler totals, busiest first.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Handler -> calls, total_ms, mean_us and max_us.
+        """
+        ordered = sorted(self.stats.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            name: {
+                'calls': calls,
+                'total_ms': round(total / 1e6, 3),
+                'mean_us': round(total / calls / 1e3, 1) if calls else 0.0,
+                'max_us': round(peak / 1e3, 1)
+            }
+            for name, (calls, total, peak) in ordered
+        }
+
+    def reset(self) -> None:
+        """Drop all recorded calls."""
+        self.stats = {}
@@ -0,0 +1,162 @@
+import json
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Dict, Optional
+from loguru import logger
+
+SNAPSHOT_NAME = 'trading_bot_live'
+SNAPSHOT_SIZE = 1 << 16
+
+# seq (odd while a write is in progress), publish wall time in ns, payload length
+_HEADER = struct.Struct('<QQI')
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach to an existing segment without letting this process's tracker unlink it on exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers attached segments with the resource tracker
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class SnapshotPublisher:
+    """
+    Publishes a compact JSON state snapshot into a shared-memory segment.
+
+    Writes are guarded by a sequence lock: the sequence number is odd while the
+    payload is being copied, so readers in other processes can detect and retry a
+    torn read without any lock the trading process has to wait on.
+
+    Args:
+        name (str): Shared-memory segment name.
+        size (int): Segment size in bytes, header included.
+        interval (float): Minimum seconds between publishes in ``maybe_publish``.
+    """
+    def __init__(self, name: str = SNAPSHOT_NAME, size: int = SNAPSHOT_SIZE, interval: float = 1.0) -> None:
+        """
+        Create (or take over) the shared-memory segment.
+
+        Args:
+            name (str): Shared-memory segment name.
+            size (int): Segment size in bytes, header included.
+            interval (float): Minimum seconds between publishes in ``maybe_publish``.
+        """
+        self.name = name
+        self.interval = interval
+        self._next_publish = 0.0
+        self._seq = 0
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a crashed session; reuse it if it is large enough
+            stale = shared_memory.SharedMemory(name=name)
+            if stale.size >= size:
+                self._shm = stale
+            else:
+                stale.close()
+                stale.unlink()
+                self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._capacity = self._shm.size - _HEADER.size
+        _HEADER.pack_into(self._shm.buf, 0, 0, 0, 0)
+
+    def maybe_publish(self, collect: Callable[[], Dict[str, Any]]) -> bool:
+        """
+        Publish ``collect()`` if the publish interval has elapsed.
+
+        Args:
+            collect (Callable[[], Dict[str, Any]]): Builds the state; only called when publishing.
+
+        Returns:
+            bool: True if a snapshot was published.
+        """
+        now = time.monotonic()
+        if now < self._next_publish:
+            return False
+        self._next_publish = now + self.interval
+        return self.publish(collect())
+
+    def publish(self, state: Dict[str, Any]) -> bool:
+        """
+        Write a snapshot into the segment.
+
+        Args:
+            state (Dict[str, Any]): JSON-serializable state.
+
+        Returns:
+            bool: True if written, False if it did not fit or failed to serialize.
+        """
+        try:
+            payload = json.dumps(state, separators=(',', ':'), default=str).encode()
+        except Exception as e:
+            logger.error(f"Failed to serialize live snapshot: {e}")
+            return False
+        if len(payload) > self._capacity:
+            logger.warning(f"Live snapshot of {len(payload)} bytes exceeds {self._capacity} byte segment")
+            return False
+        buf = self._shm.buf
+        self._seq += 1
+        struct.pack_into('<Q', buf, 0, self._seq)
+        buf[_HEADER.size:_HEADER.size + len(payload)] = payload
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, self._seq, time.time_ns(), len(payload))
+        return True
+
+    def close(self) -> None:
+        """Release and remove the segment."""
+        try:
+            self._shm.close()
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class SnapshotReader:
+    """
+    Reads the latest snapshot written by a SnapshotPublisher in another process.
+
+    Args:
+        name (str): Shared-memory segment name.
+    """
+    def __init__(self, name: str = SNAPSHOT_NAME) -> None:
+        """
+        Attach to the segment. Raises FileNotFoundError if no session is publishing.
+
+        Args:
+            name (str): Shared-memory segment name.
+        """
+        self._shm = _attach(name)
+
+    def read(self, retries: int = 10) -> Optional[Dict[str, Any]]:
+        """
+        Read a consistent copy of the latest snapshot.
+
+        Args:
+            retries (int): Attempts before giving up on a snapshot being rewritten.
+
+        Returns:
+            Optional[Dict[str, Any]]: The state plus ``published_at`` (epoch seconds), or None
+            if nothing was published yet or no consistent copy could be taken.
+        """
+        buf = self._shm.buf
+        for _ in range(retries):
+            seq, published_ns, length = _HEADER.unpack_from(buf, 0)
+            if seq == 0:
+                return None
+            if seq % 2:
+                time.sleep(0.0001)
+                continue
+            payload = bytes(buf[_HEADER.size:_HEADER.size + length])
+            if struct.unpack_from('<Q', buf, 0)[0] != seq:
+                continue
+            state = json.loads(payload)
+            state['published_at'] = published_ns / 1e9
+            return state
+        return None
+
+    def close(self) -> None:
+        """Detach from the segment (the publisher owns and removes it)."""
+        self._shm.close()
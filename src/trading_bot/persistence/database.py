@@ -1,7 +1,10 @@
+from datetime import date
 from typing import Optional, Any, Dict, List
 import sqlite3
 from threading import Lock
 
+SQLITE_MAX_VARIABLES = 900  # stay under SQLite's default limit of 999 bound parameters
+
 class Database:
     """
     SQLite interface for persisting trades, orders, and system state.
@@ -57,6 +60,9 @@ class Database:
                     status TEXT
                 )
             ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_orders_broker_order_id ON orders (broker_order_id)
+            ''')
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS system_state (
                     key TEXT PRIMARY KEY,
@@ -154,6 +160,92 @@ class Database:
             cursor.execute('''SELECT * FROM orders WHERE status IN ('PENDING', 'SENT_TO_BROKER')''')
             return cursor.fetchall()
 
+    def get_reconciliation_orders(self, broker_order_ids: List[str], order_uuids: List[str],
+                                  session_date: Optional[date] = None) -> List[Dict[str, Any]]:
+        """
+        Get the local orders a broker reconciliation needs: every order placed this
+        session that is not filled, cancelled or rejected, plus any order matching the
+        given ids. The broker's order book only covers the current day, so older open
+        orders are left out rather than reported missing.
+
+        Args:
+            broker_order_ids (List[str]): Broker order ids (``norenordno``) from the order book.
+            order_uuids (List[str]): Local order ids found in broker order tags.
+            session_date (Optional[date]): Trading day to reconcile; defaults to today.
+
+        Returns:
+            List[Dict[str, Any]]: Order rows as dicts keyed by column name.
+        """
+        with self._lock, self._get_conn() as conn:
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.execute(
+                '''SELECT * FROM orders WHERE timestamp >= ?
+                   AND (status IS NULL OR status NOT IN ('FILLED', 'CANCELLED', 'REJECTED'))''',
+                ((session_date or date.today()).isoformat(),)
+            )
+            rows = {row['order_uuid']: dict(row) for row in cursor.fetchall()}
+            for column, values in (('broker_order_id', broker_order_ids), ('order_uuid', order_uuids)):
+                values = list(dict.fromkeys(values))
+                for start in range(0, len(values), SQLITE_MAX_VARIABLES):
+                    chunk = values[start:start + SQLITE_MAX_VARIABLES]
+                    cursor.execute(
+                        f"SELECT * FROM orders WHERE {column} IN ({','.join('?' * len(chunk))})", chunk
+                    )
+                    for row in cursor.fetchall():
+                        rows[row['order_uuid']] = dict(row)
+            return list(rows.values())
+
+    def apply_order_repairs(self, updates: List[Dict[str, Any]]) -> None:
+        """
+        Update order status, broker id and fill price in one transaction.
+
+        Args:
+            updates (List[Dict[str, Any]]): Dicts with ``order_uuid``, ``status`` and optional
+                ``broker_order_id`` and ``price`` (None keeps the stored value).
+        """
+        with self._lock, self._get_conn() as conn:
+            conn.executemany('''
+                UPDATE orders SET status = ?, broker_order_id = COALESCE(?, broker_order_id), price = COALESCE(?, price)
+                WHERE order_uuid = ?
+            ''', [(u['status'], u.get('broker_order_id'), u.get('price'), u['order_uuid']) for u in updates])
+            conn.commit()
+
+    def get_open_position_quantities(self) -> Dict[str, int]:
+        """
+        Get the net open quantity per symbol from open trades.
+
+        Returns:
+            Dict[str, int]: Symbol -> summed quantity of its open trades.
+        """
+        with self._lock, self._get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''SELECT symbol, SUM(quantity) FROM trades WHERE status = 'OPEN' GROUP BY symbol''')
+            return {symbol: int(quantity or 0) for symbol, quantity in cursor.fetchall()}
+
+    def close_open_trades(self, symbols: List[str], exit_timestamp: str) -> int:
+        """
+        Mark the open trades of the given symbols closed (exit price unknown).
+
+        Args:
+            symbols (List[str]): Symbols to close.
+            exit_timestamp (str): Time recorded as the exit.
+
+        Returns:
+            int: Number of trades closed.
+        """
+        if not symbols:
+            return 0
+        with self._lock, self._get_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"UPDATE trades SET status = 'CLOSED', exit_timestamp = ? "
+                f"WHERE status = 'OPEN' AND symbol IN ({','.join('?' * len(symbols))})",
+                [exit_timestamp, *symbols]
+            )
+            conn.commit()
+            return cursor.rowcount
+
     def get_system_state(self, key: str) -> Optional[str]:
         """
         Get the value of a system state variable from the database.
@@ -0,0 +1,233 @@
+"""
+Crash-recovery journal for in-memory trading state.
+
+Components (strategy, positions, risk) expose ``snapshot_state()`` returning a
+picklable dict and ``restore_state(state)``. ``StateJournal.checkpoint`` pickles
+each registered component and appends a frame only for those whose state changed
+since the last write, so a quiet loop costs a few microseconds and writes nothing.
+Frames carry a CRC32, and a torn final frame from a crash mid-write is dropped on
+load. Once the file passes ``compact_bytes`` it is rewritten with only the latest
+frame per component and swapped in with ``os.replace``, so a reader only ever sees
+the old file or the new one.
+
+The journal is a private file written and read by this process only (it is
+unpickled on restore); keep it out of shared or untrusted locations.
+"""
+import os
+import pickle
+import struct
+import time
+import zlib
+from typing import Any, Dict, List, Tuple
+from loguru import logger
+
+MAGIC = b'TBJ1\n'
+# crc32 of the rest of the frame, save time in ns, component name length, state length
+_FRAME = struct.Struct('<IqHI')
+
+
+class StateJournal:
+    """
+    Append-only binary journal of component state snapshots with compaction.
+
+    Args:
+        path (str): Journal file.
+        interval (float): Minimum seconds between checkpoints in ``maybe_checkpoint``.
+        compact_bytes (int): File size that triggers compaction after a write.
+        fsync (bool): fsync after every write (survives power loss, not just a process crash).
+    """
+    def __init__(self, path: str = 'data/state.journal', interval: float = 1.0,
+                 compact_bytes: int = 1 << 20, fsync: bool = False) -> None:
+        """
+        Initialize the journal (the file is opened on first load or write).
+
+        Args:
+            path (str): Journal file.
+            interval (float): Minimum seconds between checkpoints in ``maybe_checkpoint``.
+            compact_bytes (int): File size that triggers compaction after a write.
+            fsync (bool): fsync after every write.
+        """
+        self.path = path
+        self.interval = interval
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        self.components: Dict[str, Any] = {}
+        self._file = None
+        self._last: Dict[str, bytes] = {}    # component -> last written state bytes
+        self._frames: Dict[str, bytes] = {}  # component -> last written frame, for compaction
+        self._next_checkpoint = 0.0
+        self._loaded = False
+
+    def register(self, name: str, component: Any) -> None:
+        """
+        Add a component to checkpoint and restore.
+
+        Args:
+            name (str): Stable name used as the journal key.
+            component (Any): Object with ``snapshot_state()`` and ``restore_state(state)``.
+        """
+        self.components[name] = component
+
+    @staticmethod
+    def _frame(name: str, state_bytes: bytes, saved_ns: int) -> bytes:
+        key = name.encode()
+        body = _FRAME.pack(0, saved_ns, len(key), len(state_bytes))[4:] + key + state_bytes
+        return struct.pack('<I', zlib.crc32(body)) + body
+
+    def load(self) -> Dict[str, Tuple[int, Any]]:
+        """
+        Read the journal, keeping the latest snapshot of each component.
+
+        A corrupt or torn tail is truncated so later appends start on a frame boundary.
+
+        Returns:
+            Dict[str, Tuple[int, Any]]: Component name -> (save time in ns, state).
+        """
+        latest: Dict[str, Tuple[int, bytes, bytes]] = {}
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            if data:
+                os.replace(self.path, f"{self.path}.corrupt")
+                logger.error(f"{self.path} is not a state journal, moved it to {self.path}.corrupt")
+            return {}
+
+        offset, good_end = len(MAGIC), len(MAGIC)
+        while offset + _FRAME.size <= len(data):
+            crc, saved_ns, key_len, state_len = _FRAME.unpack_from(data, offset)
+            end = offset + _FRAME.size + key_len + state_len
+            if end > len(data) or zlib.crc32(data[offset + 4:end]) != crc:
+                break
+            name = data[offset + _FRAME.size:offset + _FRAME.size + key_len].decode()
+            latest[name] = (saved_ns, data[end - state_len:end], data[offset:end])
+            offset = good_end = end
+        if good_end < len(data):
+            logger.warning(f"Dropping {len(data) - good_end} bytes of torn journal tail in {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+
+        result = {}
+        for name, (saved_ns, state_bytes, frame) in latest.items():
+            try:
+                result[name] = (saved_ns, pickle.loads(state_bytes))
+            except Exception as e:
+                logger.error(f"Unreadable journal state for {name}: {e}")
+                continue
+            self._last[name] = state_bytes
+            self._frames[name] = frame
+        return result
+
+    def restore(self) -> List[str]:
+        """
+        Load the journal and hand each registered component its latest state.
+
+        Returns:
+            List[str]: Names of the components that were restored.
+        """
+        started = time.perf_counter()
+        restored = []
+        for name, (saved_ns, state) in self.load().items():
+            component = self.components.get(name)
+            if component is None:
+                continue
+            try:
+                component.restore_state(state)
+                restored.append(name)
+            except Exception as e:
+                logger.error(f"Failed to restore {name} from journal: {e}")
+        if restored:
+            logger.info(f"Restored {', '.join(restored)} from {self.path} in "
+                        f"{(time.perf_counter() - started) * 1000:.1f} ms")
+        return restored
+
+    def _open(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, 'ab')
+        if new_file:
+            self._file.write(MAGIC)
+
+    def checkpoint(self) -> int:
+        """
+        Append the state of every component that changed since its last write.
+
+        Returns:
+            int: Number of components written.
+        """
+        if not self._loaded:
+            # Validate (and trim a torn tail) before appending to an existing file
+            self.load()
+        frames, written = [], []
+        now_ns = time.time_ns()
+        for name, component in self.components.items():
+            try:
+                state_bytes = pickle.dumps(component.snapshot_state(), protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                logger.error(f"Failed to snapshot {name}: {e}")
+                continue
+            if self._last.get(name) == state_bytes:
+                continue
+            frame = self._frame(name, state_bytes, now_ns)
+            frames.append(frame)
+            written.append(name)
+            self._last[name] = state_bytes
+            self._frames[name] = frame
+        if not frames:
+            return 0
+
+        try:
+            if self._file is None:
+                self._open()
+            self._file.write(b''.join(frames))
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            if self._file.tell() > self.compact_bytes:
+                self.compact()
+        except OSError as e:
+            logger.error(f"Failed to write state journal {self.path}: {e}")
+            # Force a rewrite of these components on the next checkpoint
+            for name in written:
+                self._last.pop(name, None)
+            return 0
+        return len(frames)
+
+    def maybe_checkpoint(self) -> int:
+        """
+        Checkpoint if the interval has elapsed.
+
+        Returns:
+            int: Number of components written.
+        """
+        now = time.monotonic()
+        if now < self._next_checkpoint:
+            return 0
+        self._next_checkpoint = now + self.interval
+        return self.checkpoint()
+
+    def compact(self) -> None:
+        """Rewrite the journal with only the latest frame per component, atomically."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC + b''.join(self._frames.values()))
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def close(self) -> None:
+        """Write a final checkpoint and close the file."""
+        self.checkpoint()
+        if self._file is not None:
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
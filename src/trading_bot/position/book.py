@@ -0,0 +1,255 @@
+from bisect import bisect_left, bisect_right
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+LONG_SIDES = ('BUY', 'LONG')
+
+
+class _Levels:
+    """
+    Ascending price levels with the position id that owns each one.
+
+    Prices and ids are parallel lists so lookups bisect on floats only.
+    """
+    __slots__ = ('prices', 'ids')
+
+    def __init__(self) -> None:
+        self.prices: List[float] = []
+        self.ids: List[str] = []
+
+    def add(self, price: float, position_id: str) -> None:
+        idx = bisect_right(self.prices, price)
+        self.prices.insert(idx, price)
+        self.ids.insert(idx, position_id)
+
+    def remove(self, price: float, position_id: str) -> None:
+        lo = bisect_left(self.prices, price)
+        hi = bisect_right(self.prices, price, lo)
+        for idx in range(lo, hi):
+            if self.ids[idx] == position_id:
+                del self.prices[idx]
+                del self.ids[idx]
+                return
+
+    def at_or_below(self, price: float) -> List[str]:
+        if not self.prices or self.prices[0] > price:
+            return []
+        return self.ids[:bisect_right(self.prices, price)]
+
+    def at_or_above(self, price: float) -> List[str]:
+        if not self.prices or self.prices[-1] < price:
+            return []
+        return self.ids[bisect_left(self.prices, price):]
+
+
+class _SymbolLevels:
+    """
+    Sorted stop and target levels for the open positions of one symbol.
+
+    Longs and shorts are kept apart because they trigger in opposite directions.
+    """
+    __slots__ = ('positions', 'long_stops', 'long_targets', 'short_stops', 'short_targets')
+
+    def __init__(self) -> None:
+        self.positions: Dict[str, Dict[str, Any]] = {}
+        self.long_stops = _Levels()
+        self.long_targets = _Levels()
+        self.short_stops = _Levels()
+        self.short_targets = _Levels()
+
+
+class PositionBook(MutableMapping):
+    """
+    Open-position store indexed by symbol with sorted stop and target levels.
+
+    Behaves like the plain ``Dict[str, Dict]`` it replaces, so existing
+    ``book[pos_id]``, ``items()`` and ``len()`` callers keep working. Positions are
+    indexed on insert and evicted on delete. Stop and target prices must be
+    changed through ``set_stop``/``set_target`` so the index stays in sync.
+
+    Args:
+        stop_key (str): Position dict key holding the stop price.
+        target_key (str): Position dict key holding the target price.
+    """
+    def __init__(self, stop_key: str = 'sl_price', target_key: str = 'tp_price') -> None:
+        """
+        Initialize an empty PositionBook.
+
+        Args:
+            stop_key (str): Position dict key holding the stop price.
+            target_key (str): Position dict key holding the target price.
+        """
+        self.stop_key = stop_key
+        self.target_key = target_key
+        self._positions: Dict[str, Dict[str, Any]] = {}
+        self._by_symbol: Dict[str, _SymbolLevels] = {}
+        self.last_price: Dict[str, float] = {}
+
+    # MutableMapping interface
+
+    def __getitem__(self, position_id: str) -> Dict[str, Any]:
+        return self._positions[position_id]
+
+    def __setitem__(self, position_id: str, position: Dict[str, Any]) -> None:
+        if position_id in self._positions:
+            self._evict(position_id)
+        self._positions[position_id] = position
+        levels = self._by_symbol.get(position['symbol'])
+        if levels is None:
+            levels = self._by_symbol[position['symbol']] = _SymbolLevels()
+        levels.positions[position_id] = position
+        stop = position.get(self.stop_key)
+        if stop is not None:
+            self._stops(levels, position).add(stop, position_id)
+        target = position.get(self.target_key)
+        if target is not None:
+            self._targets(levels, position).add(target, position_id)
+
+    def __delitem__(self, position_id: str) -> None:
+        self._evict(position_id)
+        del self._positions[position_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._positions)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, position_id: object) -> bool:
+        return position_id in self._positions
+
+    # Index maintenance
+
+    @staticmethod
+    def _is_long(position: Dict[str, Any]) -> bool:
+        return position.get('side') in LONG_SIDES
+
+    def _stops(self, levels: _SymbolLevels, position: Dict[str, Any]) -> _Levels:
+        return levels.long_stops if self._is_long(position) else levels.short_stops
+
+    def _targets(self, levels: _SymbolLevels, position: Dict[str, Any]) -> _Levels:
+        return levels.long_targets if self._is_long(position) else levels.short_targets
+
+    def _evict(self, position_id: str) -> None:
+        position = self._positions[position_id]
+        symbol = position['symbol']
+        levels = self._by_symbol.get(symbol)
+        if levels is None:
+            return
+        stop = position.get(self.stop_key)
+        if stop is not None:
+            self._stops(levels, position).remove(stop, position_id)
+        target = position.get(self.target_key)
+        if target is not None:
+            self._targets(levels, position).remove(target, position_id)
+        levels.positions.pop(position_id, None)
+        if not levels.positions:
+            del self._by_symbol[symbol]
+
+    def set_stop(self, position_id: str, price: Optional[float]) -> None:
+        """
+        Move the stop level of a position, keeping the sorted index in sync.
+
+        Args:
+            position_id (str): Position to update.
+            price (Optional[float]): New stop price, or None to clear it.
+        """
+        self._set_level(position_id, self.stop_key, price, self._stops)
+
+    def set_target(self, position_id: str, price: Optional[float]) -> None:
+        """
+        Move the target level of a position, keeping the sorted index in sync.
+
+        Args:
+            position_id (str): Position to update.
+            price (Optional[float]): New target price, or None to clear it.
+        """
+        self._set_level(position_id, self.target_key, price, self._targets)
+
+    def _set_level(self, position_id: str, key: str, price: Optional[float], select) -> None:
+        position = self._positions[position_id]
+        levels = select(self._by_symbol[position['symbol']], position)
+        old = position.get(key)
+        if old is not None:
+            levels.remove(old, position_id)
+        position[key] = price
+        if price is not None:
+            levels.add(price, position_id)
+
+    # Queries
+
+    def for_symbol(self, symbol: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the open positions of one symbol.
+
+        Args:
+            symbol (str): Instrument symbol.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Positions keyed by position id (do not mutate).
+        """
+        levels = self._by_symbol.get(symbol)
+        return levels.positions if levels is not None else {}
+
+    def symbols(self) -> List[str]:
+        """Return the symbols that currently have open positions."""
+        return list(self._by_symbol)
+
+    def crossed_stops(self, symbol: str, price: float) -> List[str]:
+        """
+        Get positions whose stop the price has reached.
+
+        A long stop triggers at or below its level, a short stop at or above it.
+
+        Args:
+            symbol (str): Instrument symbol.
+            price (float): Current price.
+
+        Returns:
+            List[str]: Ids of positions with a crossed stop.
+        """
+        levels = self._by_symbol.get(symbol)
+        if levels is None:
+            return []
+        return levels.long_stops.at_or_above(price) + levels.short_stops.at_or_below(price)
+
+    def crossed_targets(self, symbol: str, price: float) -> List[str]:
+        """
+        Get positions whose target the price has reached.
+
+        A long target triggers at or above its level, a short target at or below it.
+
+        Args:
+            symbol (str): Instrument symbol.
+            price (float): Current price.
+
+        Returns:
+            List[str]: Ids of positions with a crossed target.
+        """
+        levels = self._by_symbol.get(symbol)
+        if levels is None:
+            return []
+        return levels.long_targets.at_or_below(price) + levels.short_targets.at_or_above(price)
+
+    def crossed(self, symbol: str, price: float) -> List[Tuple[str, str]]:
+        """
+        Get positions whose stop or target the price has reached.
+
+        The stop wins when both are crossed on the same tick.
+
+        Args:
+            symbol (str): Instrument symbol.
+            price (float): Current price.
+
+        Returns:
+            List[Tuple[str, str]]: (position_id, 'SL' or 'TP') pairs.
+        """
+        stops = self.crossed_stops(symbol, price)
+        hits = [(pos_id, 'SL') for pos_id in stops]
+        if stops:
+            stopped = set(stops)
+            hits.extend((pos_id, 'TP') for pos_id in self.crossed_targets(symbol, price)
+                        if pos_id not in stopped)
+        else:
+            hits.extend((pos_id, 'TP') for pos_id in self.crossed_targets(symbol, price))
+        return hits
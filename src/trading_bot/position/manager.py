@@ -3,18 +3,59 @@ from datetime import datetime
 from loguru import logger
 from trading_bot.event import ExecutionEvent, OrderEvent
 from trading_bot.persistence.database import Database
+from trading_bot.position.book import PositionBook
+from trading_bot.position.sl_manager import StopLossManager
+from trading_bot.execution.order_book import CANCELLED, FILLED, OrderBook, OrderRecord
 
 class PositionManager:
     """Enhanced position manager with trailing SL and position tracking for zone-based strategy"""
     
-    def __init__(self, database: Database, api_wrapper: Any):
+    def __init__(self, database: Database, api_wrapper: Any, load_state: bool = True,
+                 sl_manager: Optional[StopLossManager] = None, order_book: Optional[OrderBook] = None,
+                 paper: bool = False):
         self.db = database
         self.api_wrapper = api_wrapper
-        self.open_positions: Dict[str, Dict] = {}
-        self.pending_orders: Dict[str, Dict] = {}
+        # Paper positions never reach the broker: stops are checked locally on each tick
+        self.paper = paper
+        # Trailing stops move the live SL order in place, with ratchets coalesced
+        self.sl_manager = sl_manager or StopLossManager(api_wrapper)
+        # 'peak_price' is the price a position must beat to set a new highest profit,
+        # so trailing SL work only happens for positions the tick actually moved
+        self.open_positions = PositionBook(stop_key='sl_price', target_key='peak_price')
+        # Order lifecycle lives in the order book (its own event log), not in the journal
+        self.order_book = order_book if order_book is not None else OrderBook()
         self.daily_trades_count = 0
         self.daily_pnl = 0.0
-        self.load_positions_from_db()
+        if load_state:
+            self.load_positions_from_db()
+    
+    @property
+    def pending_orders(self) -> Dict[str, OrderRecord]:
+        """Open orders this process placed, by order uuid; stop orders and manual orders are left alone"""
+        return {record.order_uuid: record for record in self.order_book.open_orders(external=False)}
+    
+    def snapshot_state(self) -> Dict[str, Any]:
+        """Positions (with SL order ids and trailing state) and daily counters for the journal"""
+        return {
+            'session_date': datetime.now().date().isoformat(),
+            'positions': {pos_id: dict(position) for pos_id, position in self.open_positions.items()},
+            # Only symbols with open positions, so a flat book doesn't change on every tick
+            'last_price': {symbol: self.open_positions.last_price[symbol]
+                           for symbol in self.open_positions.symbols() if symbol in self.open_positions.last_price},
+            'daily_trades_count': self.daily_trades_count,
+            'daily_pnl': self.daily_pnl
+        }
+    
+    def restore_state(self, state: Dict[str, Any]):
+        """Rebuild the position book from journal state; daily counters only for the same session"""
+        self.open_positions = PositionBook(stop_key='sl_price', target_key='peak_price')
+        for pos_id, position in state.get('positions', {}).items():
+            self.open_positions[pos_id] = dict(position)
+        self.open_positions.last_price.update(state.get('last_price', {}))
+        if state.get('session_date') == datetime.now().date().isoformat():
+            self.daily_trades_count = state.get('daily_trades_count', 0)
+            self.daily_pnl = state.get('daily_pnl', 0.0)
+        logger.info(f"Restored {len(self.open_positions)} positions from journal")
     
     def add_position(self, execution_event: ExecutionEvent, sl_points: float = 2.5):
         """Add new position with automatic SL calculation"""
@@ -38,6 +79,7 @@ class PositionManager:
                 'side': side,
                 'trailing_sl': False,
                 'highest_profit': 0.0,
+                'peak_price': entry_price,
                 'current_price': entry_price,
                 'profit_milestones': [5.0, 10.0, 15.0, 20.0]  # For trailing SL
             }
@@ -48,23 +90,28 @@ class PositionManager:
             logger.info(f"Added position: {position_id} at {entry_price} with SL: {sl_price}")
     
     def _place_sl_order(self, position_id: str):
-        """Place stop-loss order for position"""
+        """Place stop-loss order for position (live only; paper stops stay local)"""
+        if self.paper:
+            return
         try:
             position = self.open_positions[position_id]
             
             # Create SL order
+            sl_price = self.sl_manager.round_price(position['sl_price'])
             sl_order_data = {
                 'symbol': position['symbol'],
+                'exchange': self.sl_manager.exchange,
+                'product_type': self.sl_manager.product_type,
                 'quantity': position['quantity'],
-                'price': position['sl_price'],
+                'price': sl_price,
                 'side': 'SELL' if position['side'] == 'BUY' else 'BUY',
-                'order_type': 'SL',
-                'trigger_price': position['sl_price']
+                'order_type': 'SL-LMT',
+                'trigger_price': sl_price
             }
             
             # Place SL order through API
             if hasattr(self.api_wrapper, 'place_order'):
-                result = self.api_wrapper.place_order(**sl_order_data)
+                result = self.api_wrapper.place_order(sl_order_data)
                 if result.get('stat') == 'Ok':
                     position['sl_order_id'] = result.get('norenordno')
                     logger.info(f"SL order placed for position {position_id}: {result.get('norenordno')}")
@@ -74,11 +121,11 @@ class PositionManager:
     
     def update_trailing_sl(self, symbol: str, current_price: float):
         """Update trailing stop-loss based on profit milestones"""
-        for pos_id, position in self.open_positions.items():
-            if position['symbol'] != symbol:
-                continue
-                
-            position['current_price'] = current_price
+        self.open_positions.last_price[symbol] = current_price
+        
+        # Only positions whose peak price was beaten can have a new highest profit
+        for pos_id in self.open_positions.crossed_targets(symbol, current_price):
+            position = self.open_positions[pos_id]
             
             # Calculate current profit
             if position['side'] == 'BUY':
@@ -89,6 +136,7 @@ class PositionManager:
             # Update highest profit
             if profit > position['highest_profit']:
                 position['highest_profit'] = profit
+                self.open_positions.set_target(pos_id, current_price)
                 
                 # Check for trailing SL activation
                 self._check_trailing_sl_activation(pos_id, profit)
@@ -101,6 +149,7 @@ class PositionManager:
         if current_profit >= 20.0 and not position['trailing_sl']:
             # Activate trailing SL at 15 rupees profit
             new_sl = position['entry_price'] + 15.0 if position['side'] == 'BUY' else position['entry_price'] - 15.0
+            self.open_positions.set_stop(position_id, new_sl)
             self._update_sl_order(position_id, new_sl)
             position['trailing_sl'] = True
             logger.info(f"Trailing SL activated for {position_id} at {new_sl}")
@@ -114,43 +163,41 @@ class PositionManager:
             
             if ((position['side'] == 'BUY' and new_sl > position['sl_price']) or 
                 (position['side'] == 'SELL' and new_sl < position['sl_price'])):
+                self.open_positions.set_stop(position_id, new_sl)
                 self._update_sl_order(position_id, new_sl)
-                position['sl_price'] = new_sl
                 logger.info(f"Trailing SL updated for {position_id} to {new_sl}")
     
     def _update_sl_order(self, position_id: str, new_sl_price: float):
-        """Update existing SL order"""
+        """Move the existing SL order to a new trigger (coalesced modify), or place one if there is none"""
+        if self.paper:
+            return
         try:
             position = self.open_positions[position_id]
             
-            # Cancel existing SL order
-            if 'sl_order_id' in position:
-                self.api_wrapper.cancel_order(position['sl_order_id'])
+            if not position.get('sl_order_id'):
+                self._place_sl_order(position_id)
+                return
             
-            # Place new SL order
-            sl_order_data = {
-                'symbol': position['symbol'],
-                'quantity': position['quantity'],
-                'price': new_sl_price,
-                'side': 'SELL' if position['side'] == 'BUY' else 'BUY',
-                'order_type': 'SL',
-                'trigger_price': new_sl_price
-            }
-            
-            result = self.api_wrapper.place_order(**sl_order_data)
-            if result.get('stat') == 'Ok':
-                position['sl_order_id'] = result.get('norenordno')
+            self.sl_manager.request(
+                position_id,
+                position['sl_order_id'],
+                position['symbol'],
+                'SELL' if position['side'] == 'BUY' else 'BUY',
+                position['quantity'],
+                new_sl_price
+            )
                 
         except Exception as e:
             logger.error(f"Failed to update SL order for position {position_id}: {e}")
     
     def cancel_pending_order(self, order_id: str) -> bool:
-        """Cancel pending order - critical for zone strategy"""
+        """Cancel an open order by uuid or broker order number - critical for zone strategy"""
         try:
-            if order_id in self.pending_orders:
-                result = self.api_wrapper.cancel_order(order_id)
+            record = self.order_book.get(order_id) or self.order_book.by_broker_id(order_id)
+            if record is not None and record.is_open and not record.external and record.broker_order_id:
+                result = self.api_wrapper.cancel_order(record.broker_order_id)
                 if result.get('stat') == 'Ok':
-                    del self.pending_orders[order_id]
+                    self.order_book.cancelled(record.order_uuid, 'USER')
                     logger.info(f"Cancelled pending order: {order_id}")
                     return True
             return False
@@ -161,9 +208,7 @@ class PositionManager:
     def cancel_all_pending_orders(self) -> int:
         """Cancel all pending orders - required for zone strategy"""
         cancelled_count = 0
-        pending_order_ids = list(self.pending_orders.keys())
-        
-        for order_id in pending_order_ids:
+        for order_id in list(self.pending_orders):
             if self.cancel_pending_order(order_id):
                 cancelled_count += 1
         
@@ -171,68 +216,112 @@ class PositionManager:
         return cancelled_count
     
     def check_exit_conditions(self, symbol: str, current_price: float) -> List[Tuple[str, str, float]]:
-        """Check SL/TP conditions for all positions"""
-        exits_needed = []
-        
-        for pos_id, position in self.open_positions.items():
-            if position['symbol'] != symbol:
-                continue
-                
-            if position['side'] == 'BUY':
-                if current_price <= position['sl_price']:
-                    exits_needed.append((pos_id, 'SL_HIT', current_price))
-            else:  # SELL
-                if current_price >= position['sl_price']:
-                    exits_needed.append((pos_id, 'SL_HIT', current_price))
-        
-        return exits_needed
+        """Check SL/TP conditions for positions whose stop the price crossed or whose broker stop filled"""
+        crossed = self.open_positions.crossed_stops(symbol, current_price)
+        exits = [(pos_id, 'SL_HIT', current_price) for pos_id in crossed]
+        if not self.paper:
+            for pos_id, position in self.open_positions.for_symbol(symbol).items():
+                if pos_id not in crossed and self._stop_state(position) == FILLED:
+                    exits.append((pos_id, 'SL_HIT', current_price))
+        return exits
     
-    def close_position(self, position_id: str, reason: str, exit_price: float):
-        """Close position and calculate P&L"""
+    def _stop_state(self, position: Dict) -> Optional[str]:
+        """Order book state of a position's broker stop, if it has one"""
+        record = self.order_book.by_broker_id(position.get('sl_order_id'))
+        return record.state if record is not None else None
+    
+    def _cancel_stop(self, position: Dict) -> Tuple[Optional[str], Optional[float]]:
+        """Take a position's broker stop off: (CANCELLED, None), (FILLED, fill price), or (None, None) if unconfirmed"""
+        order_id = position['sl_order_id']
+        record = self.order_book.by_broker_id(order_id)
+        if record is not None and record.state == FILLED:
+            return FILLED, record.avg_fill_price
+        try:
+            if self.api_wrapper.cancel_order(order_id).get('stat') == 'Ok':
+                return CANCELLED, None
+            # Cancel refused: the stop may have triggered or filled in the meantime
+            status = self.api_wrapper.get_order_status(order_id)
+        except Exception as e:
+            logger.error(f"Failed to cancel SL order {order_id}: {e}")
+            return None, None
+        if status.get('status') == 'COMPLETE':
+            return FILLED, float(status['avgprc']) if status.get('avgprc') else None
+        if status.get('status') in ('CANCELED', 'REJECTED'):
+            return CANCELLED, None
+        return None, None
+    
+    def close_position(self, position_id: str, reason: str, exit_price: float) -> Optional[float]:
+        """
+        Close position and calculate P&L; returns the exit price booked, or None if still open.
+        A live position's broker stop is cancelled first; if it already filled, that fill is the exit.
+        A paper position's exit is only booked.
+        """
         if position_id not in self.open_positions:
             logger.warning(f"Position {position_id} not found for closing")
-            return
+            return None
         
         position = self.open_positions[position_id]
+        if self.paper:
+            self._book_exit(position_id, position, exit_price, reason)
+            return exit_price
         
         try:
+            # Only one of the stop and the market exit may ever sell the position
+            if position.get('sl_order_id'):
+                stop_state, stop_price = self._cancel_stop(position)
+                if stop_state == FILLED:
+                    exit_price = stop_price if stop_price is not None else exit_price
+                    self._book_exit(position_id, position, exit_price, 'SL_HIT')
+                    return exit_price
+                if stop_state is None:
+                    logger.error(f"SL order {position['sl_order_id']} of {position_id} not confirmed cancelled; "
+                                 f"exit held back")
+                    return None
+                # The stop is gone; a failed exit below puts a new one in place
+                position.pop('sl_order_id')
+            
             # Place market order to close position
             close_order_data = {
                 'symbol': position['symbol'],
+                'exchange': self.sl_manager.exchange,
+                'product_type': self.sl_manager.product_type,
                 'quantity': position['quantity'],
                 'side': 'SELL' if position['side'] == 'BUY' else 'BUY',
                 'order_type': 'MKT'
             }
             
-            result = self.api_wrapper.place_order(**close_order_data)
+            result = self.api_wrapper.place_order(close_order_data)
             
             if result.get('stat') == 'Ok':
-                # Calculate P&L
-                if position['side'] == 'BUY':
-                    pnl = (exit_price - position['entry_price']) * position['quantity']
-                else:
-                    pnl = (position['entry_price'] - exit_price) * position['quantity']
-                
-                # Update daily P&L
-                self.daily_pnl += pnl
-                
-                # Cancel SL order if exists
-                if 'sl_order_id' in position:
-                    try:
-                        self.api_wrapper.cancel_order(position['sl_order_id'])
-                    except:
-                        pass
-                
-                # Save to database
-                self._save_closed_position(position_id, position, exit_price, pnl, reason)
-                
-                # Remove from open positions
-                del self.open_positions[position_id]
-                
-                logger.info(f"Position {position_id} closed. Reason: {reason}, P&L: {pnl:.2f}")
+                self._book_exit(position_id, position, exit_price, reason)
+                return exit_price
+            logger.error(f"Exit order for {position_id} failed: {result}")
                 
         except Exception as e:
             logger.error(f"Failed to close position {position_id}: {e}")
+        if 'sl_order_id' not in position:
+            self._place_sl_order(position_id)
+        return None
+    
+    def _book_exit(self, position_id: str, position: Dict, exit_price: float, reason: str):
+        """Book a closed position: P&L, database record, and out of the book"""
+        # Calculate P&L
+        if position['side'] == 'BUY':
+            pnl = (exit_price - position['entry_price']) * position['quantity']
+        else:
+            pnl = (position['entry_price'] - exit_price) * position['quantity']
+        
+        # Update daily P&L
+        self.daily_pnl += pnl
+        self.sl_manager.forget(position_id)
+        
+        # Save to database
+        self._save_closed_position(position_id, position, exit_price, pnl, reason)
+        
+        # Remove from open positions
+        del self.open_positions[position_id]
+        
+        logger.info(f"Position {position_id} closed. Reason: {reason}, P&L: {pnl:.2f}")
     
     def close_all_positions(self, reason: str = "SESSION_END"):
         """Close all open positions - for 3 PM closure"""
@@ -240,7 +329,8 @@ class PositionManager:
         
         for pos_id in position_ids:
             position = self.open_positions[pos_id]
-            current_price = position.get('current_price', position['entry_price'])
+            current_price = self.open_positions.last_price.get(position['symbol'], position['entry_price'])
+            position['current_price'] = current_price
             self.close_position(pos_id, reason, current_price)
         
         logger.info(f"Closed all positions. Reason: {reason}")
@@ -300,6 +390,7 @@ class PositionManager:
                             'side': trade.get('side'),
                             'trailing_sl': trade.get('trailing_sl', False),
                             'highest_profit': trade.get('highest_profit', 0.0),
+                            'peak_price': trade.get('entry_price'),
                             'current_price': trade.get('entry_price')
                         }
                         
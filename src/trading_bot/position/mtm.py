@@ -0,0 +1,286 @@
+"""
+Mark-to-market equity, intraday high-water mark and drawdown, updated per tick.
+
+Net quantity, average price and last price per symbol live in NumPy arrays
+indexed by a symbol -> row dict, so a tick is one dict lookup and a few
+scalar updates: unrealized P&L moves by ``quantity * price change`` and the
+high-water mark and drawdown follow from the new equity. The drawdown limit
+is checked on the same tick, and the kill switch callback runs before
+``on_tick`` returns.
+
+Subscribers (risk manager, dashboard, alerts) get a ``PnLSnapshot`` at most
+every ``publish_interval`` seconds, plus immediately on a fill or a kill.
+"""
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from loguru import logger
+
+
+@dataclass
+class PnLSnapshot:
+    """Portfolio P&L at one instant."""
+    timestamp: datetime
+    equity: float
+    realized: float
+    unrealized: float
+    high_water: float
+    drawdown: float
+    max_drawdown: float
+    open_symbols: int
+    killed: bool = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with an ISO timestamp, for the live snapshot and logs."""
+        data = asdict(self)
+        data['timestamp'] = self.timestamp.isoformat()
+        return data
+
+
+class MarkToMarket:
+    """
+    Array-backed portfolio marks with a throttled P&L stream and a drawdown kill switch.
+
+    Args:
+        capital (float): Equity at the start of the day, before any P&L.
+        max_drawdown (Optional[float]): Drawdown from the intraday high that trips the kill switch; None for no limit.
+        publish_interval (float): Minimum seconds between tick-driven snapshots.
+        on_kill (Optional[Callable[[PnLSnapshot], None]]): Called once, on the tick that trips the kill switch.
+    """
+    def __init__(self, capital: float = 0.0, max_drawdown: Optional[float] = None, publish_interval: float = 1.0,
+                 on_kill: Optional[Callable[[PnLSnapshot], None]] = None) -> None:
+        """
+        Initialize a flat book.
+
+        Args:
+            capital (float): Equity at the start of the day.
+            max_drawdown (Optional[float]): Drawdown that trips the kill switch.
+            publish_interval (float): Minimum seconds between tick-driven snapshots.
+            on_kill (Optional[Callable[[PnLSnapshot], None]]): Kill switch callback.
+        """
+        self.capital = capital
+        self.max_drawdown_limit = max_drawdown
+        self.publish_interval = publish_interval
+        self.on_kill = on_kill
+        self._subscribers: List[Callable[[PnLSnapshot], None]] = []
+        self._index: Dict[str, int] = {}
+        self._free: List[int] = []
+        self._quantity = np.zeros(16)
+        self._avg = np.zeros(16)
+        self._last = np.zeros(16)
+        self.realized = 0.0
+        self.unrealized = 0.0
+        self.high_water = capital
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.killed = False
+        self._next_publish = 0.0
+
+    @property
+    def equity(self) -> float:
+        """Capital plus realized and unrealized P&L."""
+        return self.capital + self.realized + self.unrealized
+
+    def subscribe(self, callback: Callable[[PnLSnapshot], None]) -> None:
+        """
+        Receive the P&L stream.
+
+        Args:
+            callback (Callable[[PnLSnapshot], None]): Called with each published snapshot.
+        """
+        self._subscribers.append(callback)
+
+    def _row(self, symbol: str) -> int:
+        row = self._index.get(symbol)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                row = len(self._index)
+                if row == len(self._quantity):
+                    size = 2 * row
+                    self._quantity, self._avg, self._last = (np.resize(a, size) for a in
+                                                             (self._quantity, self._avg, self._last))
+            self._quantity[row] = self._avg[row] = self._last[row] = 0.0
+            self._index[symbol] = row
+        return row
+
+    def on_fill(self, symbol: str, side: str, quantity: int, price: float) -> float:
+        """
+        Apply a fill and publish.
+
+        Args:
+            symbol (str): Traded symbol.
+            side (str): 'BUY' or 'SELL'.
+            quantity (int): Filled quantity.
+            price (float): Fill price.
+
+        Returns:
+            float: P&L realized by the fill.
+        """
+        row = self._row(symbol)
+        held, avg, last = float(self._quantity[row]), float(self._avg[row]), float(self._last[row])
+        signed = quantity if side in ('BUY', 'LONG', 'B') else -quantity
+        # Take the position out at its old mark, then put the new one back in at the fill price
+        self.unrealized -= held * (last - avg)
+        realized = 0.0
+        if held and (held > 0) != (signed > 0):
+            closed = min(abs(held), abs(signed))
+            realized = closed * (price - avg) * (1 if held > 0 else -1)
+            self.realized += realized
+        new = held + signed
+        if new == 0:
+            del self._index[symbol]
+            self._free.append(row)
+            self._quantity[row] = 0.0
+        else:
+            if held == 0 or (held > 0) != (new > 0):
+                avg = price
+            elif (held > 0) == (signed > 0):
+                avg = (held * avg + signed * price) / new
+            self._quantity[row], self._avg[row], self._last[row] = new, avg, price
+            self.unrealized += new * (price - avg)
+        self._mark(time.monotonic(), force=True)
+        return realized
+
+    def on_execution(self, event: Any) -> float:
+        """
+        Apply an ExecutionEvent; anything but a priced fill is ignored.
+
+        Args:
+            event (Any): ExecutionEvent from a gateway.
+
+        Returns:
+            float: P&L realized by the fill.
+        """
+        if event.status not in ('FILLED', 'PARTIALLY_FILLED') or not event.filled_quantity or not event.avg_fill_price:
+            return 0.0
+        side = (event.info or {}).get('side')
+        if side is None:
+            # Paper exits carry no side; they close whatever is held
+            row = self._index.get(event.symbol)
+            side = 'SELL' if row is None or self._quantity[row] > 0 else 'BUY'
+        return self.on_fill(event.symbol, side, event.filled_quantity, event.avg_fill_price)
+
+    def on_tick(self, symbol: str, price: float) -> Optional[PnLSnapshot]:
+        """
+        Mark a held symbol to a tick.
+
+        Args:
+            symbol (str): Tick symbol.
+            price (float): Last traded price.
+
+        Returns:
+            Optional[PnLSnapshot]: The snapshot if one was published on this tick.
+        """
+        row = self._index.get(symbol)
+        if row is None:
+            return None
+        self.unrealized += self._quantity[row] * (price - self._last[row])
+        self._last[row] = price
+        return self._mark(time.monotonic())
+
+    def _mark(self, now: float, force: bool = False) -> Optional[PnLSnapshot]:
+        equity = self.capital + self.realized + self.unrealized
+        if equity > self.high_water:
+            self.high_water = equity
+        self.drawdown = self.high_water - equity
+        if self.drawdown > self.max_drawdown:
+            self.max_drawdown = self.drawdown
+        if (self.max_drawdown_limit is not None and not self.killed
+                and self.drawdown >= self.max_drawdown_limit):
+            self.killed = True
+            snapshot = self.snapshot()
+            logger.critical(f"[MTM] Drawdown {self.drawdown:.2f} from high {self.high_water:.2f} hit the "
+                            f"{self.max_drawdown_limit:.2f} limit, kill switch tripped")
+            if self.on_kill is not None:
+                try:
+                    self.on_kill(snapshot)
+                except Exception as e:
+                    logger.error(f"[MTM] Kill switch callback failed: {e}")
+            self._publish(snapshot, now)
+            return snapshot
+        if force or now >= self._next_publish:
+            snapshot = self.snapshot()
+            self._publish(snapshot, now)
+            return snapshot
+        return None
+
+    def _publish(self, snapshot: PnLSnapshot, now: float) -> None:
+        self._next_publish = now + self.publish_interval
+        for callback in self._subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"[MTM] P&L subscriber failed: {e}")
+
+    def snapshot(self) -> PnLSnapshot:
+        """
+        Current P&L.
+
+        Returns:
+            PnLSnapshot: Equity, P&L, high-water mark and drawdowns.
+        """
+        return PnLSnapshot(
+            timestamp=datetime.now(),
+            equity=self.equity,
+            realized=self.realized,
+            unrealized=self.unrealized,
+            high_water=self.high_water,
+            drawdown=self.drawdown,
+            max_drawdown=self.max_drawdown,
+            open_symbols=len(self._index),
+            killed=self.killed
+        )
+
+    def reset_day(self) -> None:
+        """Start a new day: realized P&L is banked into capital and the high-water mark restarts."""
+        self.capital += self.realized
+        self.realized = 0.0
+        self.high_water = self.equity
+        self.drawdown = self.max_drawdown = 0.0
+        self.killed = False
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """
+        Book and intraday marks for the crash-recovery journal.
+
+        Returns:
+            Dict[str, Any]: Session date, positions and the P&L marks.
+        """
+        return {
+            'session_date': datetime.now().date().isoformat(),
+            'positions': {symbol: [float(self._quantity[row]), float(self._avg[row]), float(self._last[row])]
+                          for symbol, row in self._index.items()},
+            'capital': self.capital,
+            'realized': self.realized,
+            'high_water': self.high_water,
+            'max_drawdown': self.max_drawdown,
+            'killed': self.killed
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """
+        Rebuild the book; intraday marks and the kill switch only for the same session.
+
+        Args:
+            state (Dict[str, Any]): Output of ``snapshot_state``.
+        """
+        self._index.clear()
+        self._free.clear()
+        self.unrealized = 0.0
+        for symbol, (quantity, avg, last) in (state.get('positions') or {}).items():
+            row = self._row(symbol)
+            self._quantity[row], self._avg[row], self._last[row] = quantity, avg, last
+            self.unrealized += quantity * (last - avg)
+        self.capital = state.get('capital', self.capital)
+        self.realized = state.get('realized', 0.0)
+        if state.get('session_date') == datetime.now().date().isoformat():
+            self.high_water = max(state.get('high_water', self.equity), self.equity)
+            self.max_drawdown = state.get('max_drawdown', 0.0)
+            self.killed = state.get('killed', False)
+            self.drawdown = self.high_water - self.equity
+        else:
+            self.reset_day()
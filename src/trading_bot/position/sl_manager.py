@@ -0,0 +1,216 @@
+"""
+Trailing stop-loss orders moved in place with coalesced ``modify_order`` calls.
+
+Each ratchet of a trailing stop only records the new target trigger. A
+modify is sent when no other modify for the position is in flight and the
+target is at least ``min_step`` away from the last trigger sent, or
+``min_interval`` seconds have passed since that send; smaller ratchets wait
+for ``flush``. Modifies run on a single background thread so the trading
+loop never waits on the REST call, and when one is acknowledged the latest
+target (if it moved meanwhile) goes out straight away. The stop order stays
+live throughout, unlike a cancel and re-place.
+"""
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from loguru import logger
+
+
+@dataclass
+class _StopOrder:
+    """A live stop-loss order and the trigger it should be at."""
+    order_id: str
+    symbol: str
+    side: str
+    quantity: int
+    target: float
+    sent: Optional[float] = None
+    confirmed: Optional[float] = None
+    in_flight: bool = False
+    last_sent: float = float('-inf')
+
+
+class StopLossManager:
+    """
+    Coalesces trailing stop ratchets into at most one in-flight modify per position.
+
+    Args:
+        api_wrapper (Any): Broker wrapper with ``modify_order``.
+        min_interval (float): Seconds between modifies of one stop unless the target moved by ``min_step``.
+        min_step (float): Target move that is sent without waiting for ``min_interval``.
+        exchange (str): Exchange segment of the stop orders.
+        product_type (str): Shoonya product of the stop orders.
+        tick_size (float): Price tick triggers are rounded to.
+        executor (Optional[Executor]): Runs the modifies; a single background thread by default.
+    """
+    def __init__(self, api_wrapper: Any, min_interval: float = 0.5, min_step: float = 1.0, exchange: str = 'NFO',
+                 product_type: str = 'M', tick_size: float = 0.05, executor: Optional[Executor] = None) -> None:
+        """
+        Initialize with no tracked stops.
+
+        Args:
+            api_wrapper (Any): Broker wrapper with ``modify_order``.
+            min_interval (float): Seconds between modifies of one stop.
+            min_step (float): Target move sent without waiting.
+            exchange (str): Exchange segment.
+            product_type (str): Shoonya product.
+            tick_size (float): Price tick.
+            executor (Optional[Executor]): Runs the modifies.
+        """
+        self.api_wrapper = api_wrapper
+        self.min_interval = min_interval
+        self.min_step = min_step
+        self.exchange = exchange
+        self.product_type = product_type
+        self.tick_size = tick_size
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._stops: Dict[str, _StopOrder] = {}
+        self.requested = 0
+        self.sent = 0
+        self.failed = 0
+
+    def round_price(self, price: float) -> float:
+        """
+        Round a trigger to the price tick.
+
+        Args:
+            price (float): Trigger price.
+
+        Returns:
+            float: Price on the tick grid.
+        """
+        return round(round(price / self.tick_size) * self.tick_size, 2)
+
+    def request(self, position_id: str, order_id: str, symbol: str, side: str, quantity: int, trigger: float,
+                now: Optional[float] = None) -> bool:
+        """
+        Move a position's stop order to a new trigger, now or once coalesced.
+
+        Args:
+            position_id (str): Position the stop protects.
+            order_id (str): Broker order number of the live stop order.
+            symbol (str): Trading symbol.
+            side (str): Side of the stop order, 'BUY' or 'SELL'.
+            quantity (int): Order quantity.
+            trigger (float): New trigger price.
+            now (Optional[float]): ``time.monotonic()`` reading; taken if None.
+
+        Returns:
+            bool: True if a modify was sent for this request.
+        """
+        now = time.monotonic() if now is None else now
+        trigger = self.round_price(trigger)
+        with self._lock:
+            self.requested += 1
+            stop = self._stops.get(position_id)
+            if stop is None or stop.order_id != order_id:
+                stop = self._stops[position_id] = _StopOrder(order_id, symbol, side, quantity, trigger)
+            else:
+                stop.target, stop.quantity = trigger, quantity
+            if not self._due(stop, now):
+                return False
+            self._mark_sent(stop, now)
+        self._submit(position_id, stop, trigger)
+        return True
+
+    def flush(self, now: Optional[float] = None) -> int:
+        """
+        Send coalesced targets whose interval has passed; called from the trading loop.
+
+        Args:
+            now (Optional[float]): ``time.monotonic()`` reading; taken if None.
+
+        Returns:
+            int: Modifies sent.
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._lock:
+            for position_id, stop in self._stops.items():
+                if not stop.in_flight and stop.target != stop.sent and now - stop.last_sent >= self.min_interval:
+                    self._mark_sent(stop, now)
+                    due.append((position_id, stop, stop.target))
+        for position_id, stop, trigger in due:
+            self._submit(position_id, stop, trigger)
+        return len(due)
+
+    def forget(self, position_id: str) -> None:
+        """
+        Stop tracking a position's stop, e.g. once it is closed; an in-flight modify is left to finish.
+
+        Args:
+            position_id (str): Position the stop protected.
+        """
+        with self._lock:
+            self._stops.pop(position_id, None)
+
+    def pending(self, position_id: str) -> Optional[float]:
+        """
+        Target trigger not yet acknowledged by the broker.
+
+        Args:
+            position_id (str): Position the stop protects.
+
+        Returns:
+            Optional[float]: Target trigger, or None if the broker has the latest one.
+        """
+        with self._lock:
+            stop = self._stops.get(position_id)
+            if stop is None or stop.target == stop.confirmed:
+                return None
+            return stop.target
+
+    def close(self) -> None:
+        """Wait for in-flight modifies and stop the background thread."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _due(self, stop: _StopOrder, now: float) -> bool:
+        if stop.in_flight or stop.target == stop.sent:
+            return False
+        if stop.sent is None or abs(stop.target - stop.sent) >= self.min_step:
+            return True
+        return now - stop.last_sent >= self.min_interval
+
+    def _mark_sent(self, stop: _StopOrder, now: float) -> None:
+        stop.sent = stop.target
+        stop.in_flight = True
+        stop.last_sent = now
+        self.sent += 1
+
+    def _submit(self, position_id: str, stop: _StopOrder, trigger: float) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SLModify")
+        future = self._executor.submit(
+            self.api_wrapper.modify_order, stop.order_id, exchange=self.exchange, symbol=stop.symbol,
+            quantity=stop.quantity, order_type='SL-LMT', price=trigger, trigger_price=trigger
+        )
+        future.add_done_callback(lambda f: self._on_ack(position_id, stop, trigger, f))
+
+    def _on_ack(self, position_id: str, stop: _StopOrder, trigger: float, future: Future) -> None:
+        try:
+            result = future.result()
+            ok = (result or {}).get('stat') == 'Ok'
+            error = None if ok else (result or {}).get('emsg', result)
+        except Exception as e:
+            ok, error = False, e
+        with self._lock:
+            stop.in_flight = False
+            if ok:
+                stop.confirmed = trigger
+            else:
+                self.failed += 1
+            # The latest target goes out on the ack; a rejected trigger is not retried as is
+            resend = self._stops.get(position_id) is stop and stop.target != trigger
+            if resend:
+                self._mark_sent(stop, time.monotonic())
+                target = stop.target
+        if ok:
+            logger.info(f"SL order {stop.order_id} for {position_id} moved to {trigger}")
+        else:
+            logger.error(f"Failed to modify SL order {stop.order_id} for {position_id} to {trigger}: {error}")
+        if resend:
+            self._submit(position_id, stop, target)
@@ -0,0 +1,311 @@
+"""
+Cached IV and Greeks for one underlying's option chain at one expiry.
+
+Ticks only record prices and mark rows stale: a premium tick invalidates its
+own strike, an underlying tick invalidates every strike, and so does the clock
+once ``time_step`` seconds of decay have accrued. ``refresh`` reprices just the
+stale rows in one vectorized pass, starting the IV solve from each row's last
+IV so a reprice after a small move converges in one or two Newton steps.
+Readers call ``refresh`` implicitly, so a burst of ticks costs one reprice.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from trading_bot.pricing.greeks import bs_greeks, implied_vol
+
+SECONDS_PER_YEAR = 365.0 * 86400.0
+FIELDS = ('iv', 'price', 'delta', 'gamma', 'theta', 'vega')
+
+
+class OptionChain:
+    """
+    Per-strike implied volatility and Greeks, recomputed lazily for invalidated rows.
+
+    Args:
+        underlying (str): Symbol whose ticks set the spot, e.g. 'NIFTY'.
+        expiry (datetime): Expiry date and time of the chain.
+        rate (float): Risk-free rate.
+        dividend (float): Dividend yield of the underlying.
+        time_step (float): Seconds of time decay after which every row is repriced.
+    """
+    def __init__(self, underlying: str, expiry: datetime, rate: float = 0.065, dividend: float = 0.0,
+                 time_step: float = 60.0) -> None:
+        """
+        Initialize an empty chain.
+
+        Args:
+            underlying (str): Symbol whose ticks set the spot.
+            expiry (datetime): Expiry date and time of the chain.
+            rate (float): Risk-free rate.
+            dividend (float): Dividend yield of the underlying.
+            time_step (float): Seconds of time decay after which every row is repriced.
+        """
+        self.underlying = underlying
+        self.expiry = expiry
+        self.rate = rate
+        self.dividend = dividend
+        self.time_step = time_step
+        self.spot = float('nan')
+        self.index: Dict[str, int] = {}
+        self.symbols: List[str] = []
+        self._size = 0
+        self._strike = np.empty(0)
+        self._is_call = np.empty(0, dtype=bool)
+        self._premium = np.empty(0)
+        self._bid = np.empty(0)
+        self._ask = np.empty(0)
+        self._dirty = np.empty(0, dtype=bool)
+        self._values = {name: np.empty(0) for name in FIELDS}
+        self._priced_at: Optional[float] = None  # epoch seconds of the last full reprice
+        self.reprices = 0
+        self.version = 0  # bumped by every tick that changes the chain
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    def _grow(self, capacity: int) -> None:
+        def grown(array, fill):
+            out = np.full(capacity, fill, dtype=array.dtype)
+            out[:self._size] = array[:self._size]
+            return out
+        self._strike = grown(self._strike, np.nan)
+        self._is_call = grown(self._is_call, False)
+        self._premium = grown(self._premium, np.nan)
+        self._bid = grown(self._bid, np.nan)
+        self._ask = grown(self._ask, np.nan)
+        self._dirty = grown(self._dirty, False)
+        self._values = {name: grown(values, np.nan) for name, values in self._values.items()}
+
+    def add(self, symbol: str, strike: float, option_type: str) -> int:
+        """
+        Add an option to the chain (idempotent).
+
+        Args:
+            symbol (str): Option trading symbol as it appears on ticks.
+            strike (float): Strike price.
+            option_type (str): 'CE' or 'PE'.
+
+        Returns:
+            int: Row of the option.
+        """
+        row = self.index.get(symbol)
+        if row is not None:
+            return row
+        if self._size == len(self._strike):
+            self._grow(max(16, 2 * self._size))
+        row = self._size
+        self._strike[row] = strike
+        self._is_call[row] = option_type.upper() == 'CE'
+        self._dirty[row] = True
+        self.index[symbol] = row
+        self.symbols.append(symbol)
+        self._size += 1
+        self.version += 1
+        return row
+
+    def on_tick(self, symbol: str, price: float, bid: Optional[float] = None, ask: Optional[float] = None) -> bool:
+        """
+        Record a tick for the underlying or one of the chain's options.
+
+        Args:
+            symbol (str): Tick symbol.
+            price (float): Last traded price.
+            bid (Optional[float]): Best bid, if the tick carries depth.
+            ask (Optional[float]): Best ask, if the tick carries depth.
+
+        Returns:
+            bool: True if the tick belongs to this chain.
+        """
+        if symbol == self.underlying:
+            self.set_spot(price)
+            return True
+        row = self.index.get(symbol)
+        if row is None:
+            return False
+        if bid is not None or ask is not None:
+            self._bid[row] = np.nan if bid is None else bid
+            self._ask[row] = np.nan if ask is None else ask
+            self.version += 1
+        if self._premium[row] != price:
+            self._premium[row] = price
+            self._dirty[row] = True
+            self.version += 1
+        return True
+
+    def set_spot(self, price: float) -> None:
+        """
+        Set the underlying price, invalidating every row if it moved.
+
+        Args:
+            price (float): Underlying price.
+        """
+        if price != self.spot:
+            self.spot = price
+            self._dirty[:self._size] = True
+            self.version += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Read-only view of one column over the chain's rows, as of the last refresh.
+
+        Args:
+            name (str): 'strike', 'is_call', 'premium', 'bid', 'ask' or one of FIELDS.
+
+        Returns:
+            np.ndarray: The column, one entry per row.
+        """
+        source = self._values.get(name)
+        if source is None:
+            source = {'strike': self._strike, 'is_call': self._is_call, 'premium': self._premium,
+                      'bid': self._bid, 'ask': self._ask}[name]
+        view = source[:self._size].view()
+        view.flags.writeable = False
+        return view
+
+    def cached(self, symbol: str, name: str = 'delta') -> Optional[float]:
+        """
+        Value of one field for an option as of the last refresh, without repricing.
+
+        Args:
+            symbol (str): Option symbol.
+            name (str): One of FIELDS.
+
+        Returns:
+            Optional[float]: The value (NaN if never priced), or None if the option is not in the chain.
+        """
+        row = self.index.get(symbol)
+        return None if row is None else float(self._values[name][row])
+
+    def years_to_expiry(self, now: Optional[datetime] = None) -> float:
+        """
+        Time to expiry in years.
+
+        Args:
+            now (Optional[datetime]): Valuation time; defaults to now.
+
+        Returns:
+            float: Years, zero once expired.
+        """
+        now = now or datetime.now()
+        return max((self.expiry - now).total_seconds(), 0.0) / SECONDS_PER_YEAR
+
+    def refresh(self, now: Optional[datetime] = None) -> int:
+        """
+        Reprice the stale rows.
+
+        Args:
+            now (Optional[datetime]): Valuation time; defaults to now.
+
+        Returns:
+            int: Rows repriced.
+        """
+        if not self._size or not np.isfinite(self.spot):
+            return 0
+        now = now or datetime.now()
+        stamp = now.timestamp()
+        if self._priced_at is None or abs(stamp - self._priced_at) >= self.time_step:
+            self._dirty[:self._size] = True
+            self._priced_at = stamp
+        rows = np.flatnonzero(self._dirty[:self._size] & np.isfinite(self._premium[:self._size]))
+        if not rows.size:
+            return 0
+
+        t = (self.expiry - datetime.fromtimestamp(self._priced_at)).total_seconds() / SECONDS_PER_YEAR
+        strike, is_call = self._strike[rows], self._is_call[rows]
+        iv = implied_vol(self._premium[rows], self.spot, strike, t, self.rate, is_call, self.dividend,
+                         initial=self._values['iv'][rows])
+        greeks = bs_greeks(self.spot, strike, t, self.rate, iv, is_call, self.dividend)
+        self._values['iv'][rows] = iv
+        for name, values in greeks.items():
+            self._values[name][rows] = values
+        self._dirty[rows] = False
+        self.reprices += 1
+        return int(rows.size)
+
+    def greeks(self, symbol: str, now: Optional[datetime] = None) -> Optional[Dict[str, float]]:
+        """
+        IV and Greeks of one option.
+
+        Args:
+            symbol (str): Option symbol.
+            now (Optional[datetime]): Valuation time; defaults to now.
+
+        Returns:
+            Optional[Dict[str, float]]: ``strike``, ``premium``, ``bid``, ``ask`` and FIELDS, or None if unknown.
+        """
+        row = self.index.get(symbol)
+        if row is None:
+            return None
+        self.refresh(now)
+        result = {name: float(values[row]) for name, values in self._values.items()}
+        result['strike'] = float(self._strike[row])
+        result['premium'] = float(self._premium[row])
+        result['bid'] = float(self._bid[row])
+        result['ask'] = float(self._ask[row])
+        return result
+
+    def select_by_delta(self, target: float, option_type: str, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        Option whose absolute delta is closest to ``abs(target)``.
+
+        Args:
+            target (float): Target delta, e.g. 0.5 for ATM (sign ignored).
+            option_type (str): 'CE' or 'PE'.
+            now (Optional[datetime]): Valuation time; defaults to now.
+
+        Returns:
+            Optional[str]: Symbol, or None if no option of that type is priced.
+        """
+        self.refresh(now)
+        delta = np.abs(self._values['delta'][:self._size])
+        candidates = (self._is_call[:self._size] == (option_type.upper() == 'CE')) & np.isfinite(delta)
+        if not candidates.any():
+            return None
+        distance = np.where(candidates, np.abs(delta - abs(target)), np.inf)
+        return self.symbols[int(np.argmin(distance))]
+
+    def net_greeks(self, quantities: Dict[str, float], now: Optional[datetime] = None) -> Dict[str, float]:
+        """
+        Position-weighted delta, gamma, theta and vega.
+
+        Args:
+            quantities (Dict[str, float]): Option symbol -> signed quantity (negative for shorts).
+            now (Optional[datetime]): Valuation time; defaults to now.
+
+        Returns:
+            Dict[str, float]: Net Greeks over the options priced in this chain.
+        """
+        self.refresh(now)
+        rows, qty = [], []
+        for symbol, quantity in quantities.items():
+            row = self.index.get(symbol)
+            if row is not None:
+                rows.append(row)
+                qty.append(quantity)
+        qty = np.asarray(qty, dtype=float)
+        return {name: float(np.nansum(self._values[name][rows] * qty)) for name in ('delta', 'gamma', 'theta', 'vega')}
+
+    def rows(self, symbols: Optional[Iterable[str]] = None, now: Optional[datetime] = None) -> List[Dict[str, float]]:
+        """
+        Table of the chain for display.
+
+        Args:
+            symbols (Optional[Iterable[str]]): Subset to include; all by default.
+            now (Optional[datetime]): Valuation time; defaults to now.
+
+        Returns:
+            List[Dict[str, float]]: One dict per option with ``symbol``, ``type`` and ``greeks`` fields.
+        """
+        self.refresh(now)
+        table = []
+        for symbol in (self.symbols if symbols is None else symbols):
+            row = self.index[symbol]
+            entry = {'symbol': symbol, 'type': 'CE' if self._is_call[row] else 'PE',
+                     'strike': float(self._strike[row]), 'premium': float(self._premium[row]),
+                     'bid': float(self._bid[row]), 'ask': float(self._ask[row])}
+            entry.update({name: float(values[row]) for name, values in self._values.items()})
+            table.append(entry)
+        return table
@@ -0,0 +1,195 @@
+"""
+Vectorized Black-Scholes prices, Greeks and implied volatility.
+
+Every function takes NumPy arrays (or scalars, broadcast together) so a whole
+option chain is priced in one call. Conventions:
+
+  * ``t`` is time to expiry in years (calendar, 365 days)
+  * ``rate`` and ``dividend`` are continuously compounded annual rates
+  * theta is per calendar day and vega per one volatility point (0.01)
+
+The normal CDF uses a Chebyshev fit of erfc (fractional error below 1.2e-7),
+which keeps the module NumPy-only.
+"""
+import math
+from typing import Dict, Optional
+import numpy as np
+
+VOL_MIN = 1e-4
+VOL_MAX = 5.0
+T_MIN = 1.0 / (365.0 * 86400.0)  # one second; at expiry prices collapse to intrinsic value
+_SQRT2 = math.sqrt(2.0)
+_INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    poly = -1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277))))))))
+    r = t * np.exp(-z * z + poly)
+    return np.where(x >= 0, r, 2.0 - r)
+
+
+def norm_cdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal CDF."""
+    return 0.5 * _erfc(-np.asarray(x, dtype=float) / _SQRT2)
+
+
+def norm_pdf(x: np.ndarray) -> np.ndarray:
+    """Standard normal density."""
+    x = np.asarray(x, dtype=float)
+    return _INV_SQRT_2PI * np.exp(-0.5 * x * x)
+
+
+def _d1_d2(spot, strike, t, rate, dividend, sigma):
+    sqrt_t = np.sqrt(t)
+    vol_t = sigma * sqrt_t
+    d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * sigma * sigma) * t) / vol_t
+    return d1, d1 - vol_t, sqrt_t
+
+
+def _price_vega(spot, strike, t, rate, dividend, sigma, is_call):
+    d1, d2, sqrt_t = _d1_d2(spot, strike, t, rate, dividend, sigma)
+    spot_df = spot * np.exp(-dividend * t)
+    strike_df = strike * np.exp(-rate * t)
+    call = spot_df * norm_cdf(d1) - strike_df * norm_cdf(d2)
+    # Put from parity: one CDF pair serves both sides
+    price = np.where(is_call, call, call - spot_df + strike_df)
+    return price, spot_df * norm_pdf(d1) * sqrt_t
+
+
+def bs_price(spot, strike, t, rate, sigma, is_call, dividend: float = 0.0) -> np.ndarray:
+    """
+    Black-Scholes option prices.
+
+    Args:
+        spot: Underlying price.
+        strike: Strike prices.
+        t: Years to expiry.
+        rate (float): Risk-free rate.
+        sigma: Volatilities.
+        is_call: True for calls, False for puts.
+        dividend (float): Dividend yield.
+
+    Returns:
+        np.ndarray: Option prices.
+    """
+    t = np.maximum(np.asarray(t, dtype=float), T_MIN)
+    return _price_vega(np.asarray(spot, dtype=float), np.asarray(strike, dtype=float), t, rate, dividend,
+                       np.asarray(sigma, dtype=float), np.asarray(is_call, dtype=bool))[0]
+
+
+def bs_greeks(spot, strike, t, rate, sigma, is_call, dividend: float = 0.0) -> Dict[str, np.ndarray]:
+    """
+    Black-Scholes price, delta, gamma, theta and vega.
+
+    Args:
+        spot: Underlying price.
+        strike: Strike prices.
+        t: Years to expiry.
+        rate (float): Risk-free rate.
+        sigma: Volatilities.
+        is_call: True for calls, False for puts.
+        dividend (float): Dividend yield.
+
+    Returns:
+        Dict[str, np.ndarray]: ``price``, ``delta``, ``gamma``, ``theta`` (per day), ``vega`` (per vol point).
+    """
+    spot = np.asarray(spot, dtype=float)
+    strike = np.asarray(strike, dtype=float)
+    sigma = np.asarray(sigma, dtype=float)
+    is_call = np.asarray(is_call, dtype=bool)
+    t = np.maximum(np.asarray(t, dtype=float), T_MIN)
+
+    d1, d2, sqrt_t = _d1_d2(spot, strike, t, rate, dividend, sigma)
+    q_df = np.exp(-dividend * t)
+    r_df = np.exp(-rate * t)
+    nd1, nd2, pdf1 = norm_cdf(d1), norm_cdf(d2), norm_pdf(d1)
+
+    call = spot * q_df * nd1 - strike * r_df * nd2
+    price = np.where(is_call, call, call - spot * q_df + strike * r_df)
+    delta = np.where(is_call, q_df * nd1, q_df * (nd1 - 1.0))
+    gamma = q_df * pdf1 / (spot * sigma * sqrt_t)
+    decay = -spot * q_df * pdf1 * sigma / (2.0 * sqrt_t)
+    theta_call = decay - rate * strike * r_df * nd2 + dividend * spot * q_df * nd1
+    theta_put = decay + rate * strike * r_df * (1.0 - nd2) - dividend * spot * q_df * (1.0 - nd1)
+    return {
+        'price': price,
+        'delta': delta,
+        'gamma': gamma,
+        'theta': np.where(is_call, theta_call, theta_put) / 365.0,
+        'vega': spot * q_df * pdf1 * sqrt_t / 100.0,
+    }
+
+
+def implied_vol(price, spot, strike, t, rate, is_call, dividend: float = 0.0,
+                initial: Optional[np.ndarray] = None, tol: float = 1e-7, max_iter: int = 60) -> np.ndarray:
+    """
+    Implied volatility by safeguarded Newton iteration, all options at once.
+
+    Each option keeps a bracket [lo, hi] that the price error narrows every
+    iteration; a Newton step that leaves the bracket (or has no vega to work
+    with) is replaced by bisection, so every element converges. Only options
+    still unconverged are evaluated in later iterations.
+
+    Args:
+        price: Observed option prices.
+        spot: Underlying price.
+        strike: Strike prices.
+        t: Years to expiry.
+        rate (float): Risk-free rate.
+        is_call: True for calls, False for puts.
+        dividend (float): Dividend yield.
+        initial (Optional[np.ndarray]): Starting guesses, e.g. the previous tick's IVs.
+        tol (float): Volatility tolerance; converged once the Newton step or the bracket is smaller.
+        max_iter (int): Iteration cap.
+
+    Returns:
+        np.ndarray: Volatilities; NaN where the price is outside the no-arbitrage bounds.
+    """
+    arrays = np.broadcast_arrays(np.asarray(price, dtype=float), np.asarray(spot, dtype=float),
+                                 np.asarray(strike, dtype=float), np.asarray(t, dtype=float),
+                                 np.asarray(is_call, dtype=bool))
+    shape = arrays[0].shape
+    price, spot, strike, t, is_call = (np.ravel(a) for a in arrays)
+    t = np.maximum(t, T_MIN)
+
+    spot_df = spot * np.exp(-dividend * t)
+    strike_df = strike * np.exp(-rate * t)
+    lower = np.where(is_call, np.maximum(spot_df - strike_df, 0.0), np.maximum(strike_df - spot_df, 0.0))
+    upper = np.where(is_call, spot_df, strike_df)
+    valid = np.isfinite(price) & (price > lower) & (price < upper)
+
+    # Brenner-Subrahmanyam guess unless a usable starting point was given
+    sigma = np.clip(np.sqrt(2.0 * np.pi / t) * price / spot, 0.01, 3.0)
+    if initial is not None:
+        guess = np.ravel(np.broadcast_to(np.asarray(initial, dtype=float), shape))
+        usable = np.isfinite(guess) & (guess > VOL_MIN) & (guess < VOL_MAX)
+        sigma = np.where(usable, guess, sigma)
+    lo = np.full(sigma.shape, VOL_MIN)
+    hi = np.full(sigma.shape, VOL_MAX)
+
+    active = np.flatnonzero(valid)
+    for _ in range(max_iter):
+        if not active.size:
+            break
+        s = sigma[active]
+        model, vega = _price_vega(spot[active], strike[active], t[active], rate, dividend, s, is_call[active])
+        diff = model - price[active]
+        # Price rises with volatility, so the sign of the error moves one end of the bracket
+        a_lo = np.where(diff < 0, s, lo[active])
+        a_hi = np.where(diff > 0, s, hi[active])
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            step = s - diff / vega
+        step = np.where((vega > 1e-12) & (step > a_lo) & (step < a_hi), step, 0.5 * (a_lo + a_hi))
+        # Judged on volatility, not price, so cheap far-from-money options still solve accurately
+        done = (np.abs(diff) <= tol * vega) | (a_hi - a_lo < tol)
+        sigma[active] = np.where(done, s, step)
+        lo[active] = a_lo
+        hi[active] = a_hi
+        active = active[~done]
+
+    result = np.where(valid, sigma, np.nan)
+    return result.reshape(shape) if shape else result[0]
@@ -0,0 +1,316 @@
+"""
+Running P&L, exposure, delta and margin aggregates for pre-trade risk checks.
+
+Every fill and every tick of a held symbol adjusts the aggregates by the
+change it causes (a tick moves unrealized P&L and exposure by
+``quantity * price change``), so nothing is ever summed over the book and a
+pre-trade check is a handful of comparisons however many positions are open.
+
+Option positions are recognised by their Shoonya trading symbol
+(``NIFTY28OCT25C24500``) and grouped under their underlying for delta and
+margin. Delta comes from ``delta_source`` (e.g. the option chain) when it has
+one, and is taken as +/-0.5, the ATM value, otherwise. Margin is estimated as
+the premium paid for long options plus ``short_margin_rate`` of the
+underlying's notional for short ones.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Set
+from loguru import logger
+from trading_bot.event import ExecutionEvent, MarketEvent, OrderEvent, RiskViolationEvent
+
+OPTION_SYMBOL = re.compile(r'^([A-Z&-]+?)\d{2}[A-Z]{3}\d{2}([CP])(\d+(?:\.\d+)?)$')
+ATM_DELTA = 0.5
+
+# RiskViolationEvent reasons
+MAX_DAILY_LOSS = 'MAX_DAILY_LOSS'
+MAX_EXPOSURE = 'MAX_EXPOSURE'
+MAX_DELTA = 'MAX_DELTA'
+MAX_MARGIN = 'MAX_MARGIN'
+
+
+@dataclass
+class _Position:
+    underlying: str
+    is_option: bool
+    is_call: bool
+    strike: float
+    quantity: int = 0  # signed, negative for shorts
+    avg_price: float = 0.0
+    last_price: float = 0.0
+    delta: float = 0.0  # per unit
+
+
+class RiskEngine:
+    """
+    Incrementally maintained portfolio aggregates and O(1) pre-trade checks.
+
+    Args:
+        max_daily_loss (Optional[float]): Largest realized plus unrealized loss allowed.
+        max_exposure (Optional[float]): Largest gross premium exposure (sum of |quantity| * price).
+        max_delta (Optional[float]): Largest absolute net delta per underlying, in units of the underlying.
+        max_margin (Optional[float]): Largest estimated margin.
+        short_margin_rate (float): Margin for short options as a fraction of the underlying notional.
+        delta_source (Optional[Callable[[str], Optional[float]]]): Option symbol -> current delta.
+        violation_queue (Any): Receives the RiskViolationEvents; None to only log them.
+    """
+    def __init__(self, max_daily_loss: Optional[float] = None, max_exposure: Optional[float] = None,
+                 max_delta: Optional[float] = None, max_margin: Optional[float] = None,
+                 short_margin_rate: float = 0.12,
+                 delta_source: Optional[Callable[[str], Optional[float]]] = None,
+                 violation_queue: Any = None) -> None:
+        """
+        Initialize an empty book.
+
+        Args:
+            max_daily_loss (Optional[float]): Largest realized plus unrealized loss allowed.
+            max_exposure (Optional[float]): Largest gross premium exposure.
+            max_delta (Optional[float]): Largest absolute net delta per underlying.
+            max_margin (Optional[float]): Largest estimated margin.
+            short_margin_rate (float): Margin for short options as a fraction of the underlying notional.
+            delta_source (Optional[Callable[[str], Optional[float]]]): Option symbol -> current delta.
+            violation_queue (Any): Receives the RiskViolationEvents.
+        """
+        self.max_daily_loss = max_daily_loss
+        self.max_exposure = max_exposure
+        self.max_delta = max_delta
+        self.max_margin = max_margin
+        self.short_margin_rate = short_margin_rate
+        self.delta_source = delta_source
+        self.violation_queue = violation_queue
+        self.violations = 0
+        self._clear()
+
+    def _clear(self) -> None:
+        self.positions: Dict[str, _Position] = {}
+        self.spot: Dict[str, float] = {}
+        self.realized_pnl = 0.0
+        self.unrealized_pnl = 0.0
+        self.gross_exposure = 0.0
+        self.net_exposure = 0.0
+        self.long_premium = 0.0  # premium paid for open long options
+        self.short_quantity: Dict[str, int] = {}  # underlying -> short option units
+        self.delta: Dict[str, float] = {}  # underlying -> net delta
+        self._breached: Set[str] = set()  # post-trade breaches already reported today
+
+    @property
+    def total_pnl(self) -> float:
+        """Realized plus unrealized P&L."""
+        return self.realized_pnl + self.unrealized_pnl
+
+    @property
+    def margin(self) -> float:
+        """Estimated margin: long premium plus the short option notional at ``short_margin_rate``."""
+        short = sum(quantity * self.spot.get(u, 0.0) for u, quantity in self.short_quantity.items())
+        return self.long_premium + self.short_margin_rate * short
+
+    def _position(self, symbol: str) -> _Position:
+        position = self.positions.get(symbol)
+        if position is None:
+            match = OPTION_SYMBOL.match(symbol)
+            if match:
+                position = _Position(match.group(1), True, match.group(2) == 'C', float(match.group(3)))
+            else:
+                position = _Position(symbol, False, False, 0.0)
+            position.delta = self._unit_delta(symbol, position)
+            self.positions[symbol] = position
+        return position
+
+    def _unit_delta(self, symbol: str, position: _Position) -> float:
+        if not position.is_option:
+            return 1.0
+        delta = self.delta_source(symbol) if self.delta_source else None
+        if delta is None or delta != delta:
+            return ATM_DELTA if position.is_call else -ATM_DELTA
+        return delta
+
+    def _apply(self, position: _Position, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a position's contribution to every aggregate."""
+        quantity = position.quantity
+        self.unrealized_pnl += sign * quantity * (position.last_price - position.avg_price)
+        self.gross_exposure += sign * abs(quantity) * position.last_price
+        self.net_exposure += sign * quantity * position.last_price
+        self.delta[position.underlying] = self.delta.get(position.underlying, 0.0) + sign * quantity * position.delta
+        if position.is_option:
+            if quantity > 0:
+                self.long_premium += sign * quantity * position.avg_price
+            elif quantity < 0:
+                self.short_quantity[position.underlying] = (self.short_quantity.get(position.underlying, 0)
+                                                            - sign * quantity)
+
+    def on_trade(self, symbol: str, side: str, quantity: int, price: float) -> float:
+        """
+        Apply a fill to the book.
+
+        Args:
+            symbol (str): Traded symbol.
+            side (str): 'BUY' or 'SELL'.
+            quantity (int): Filled quantity.
+            price (float): Fill price.
+
+        Returns:
+            float: P&L realized by the fill.
+        """
+        position = self._position(symbol)
+        self._apply(position, -1)
+        signed = quantity if side in ('BUY', 'LONG', 'B') else -quantity
+        realized = 0.0
+        held = position.quantity
+        if held and (held > 0) != (signed > 0):
+            closed = min(abs(held), abs(signed))
+            realized = closed * (price - position.avg_price) * (1 if held > 0 else -1)
+            self.realized_pnl += realized
+        new_quantity = held + signed
+        if new_quantity == 0:
+            position.avg_price = 0.0
+        elif held == 0 or (held > 0) != (new_quantity > 0):
+            position.avg_price = price  # opened, or flipped through flat
+        elif (held > 0) == (signed > 0):
+            position.avg_price = (held * position.avg_price + signed * price) / new_quantity
+        position.quantity = new_quantity
+        position.last_price = price
+        position.delta = self._unit_delta(symbol, position)
+        self._apply(position, 1)
+        if new_quantity == 0:
+            del self.positions[symbol]
+        self._check_breaches(symbol)
+        return realized
+
+    def on_fill(self, event: ExecutionEvent) -> float:
+        """
+        Apply an ExecutionEvent; anything but a fill with a price is ignored.
+
+        Args:
+            event (ExecutionEvent): Execution from a gateway.
+
+        Returns:
+            float: P&L realized by the fill.
+        """
+        if event.status not in ('FILLED', 'PARTIALLY_FILLED') or not event.filled_quantity or not event.avg_fill_price:
+            return 0.0
+        side = (event.info or {}).get('side')
+        if side is None:
+            # Paper exits carry no side; they close whatever is held
+            position = self.positions.get(event.symbol)
+            side = 'SELL' if position is None or position.quantity > 0 else 'BUY'
+        return self.on_trade(event.symbol, side, event.filled_quantity, event.avg_fill_price)
+
+    def on_tick(self, event: MarketEvent) -> None:
+        """
+        Mark a held symbol, or move the spot of an underlying, to the tick price.
+
+        Args:
+            event (MarketEvent): Market tick.
+        """
+        symbol, price = event.symbol, event.price
+        if symbol in self.spot or symbol in self.delta:
+            self.spot[symbol] = price
+        position = self.positions.get(symbol)
+        if position is None:
+            return
+        change = price - position.last_price
+        quantity = position.quantity
+        self.unrealized_pnl += quantity * change
+        self.gross_exposure += abs(quantity) * change
+        self.net_exposure += quantity * change
+        position.last_price = price
+        if position.is_option and self.delta_source is not None:
+            unit = self._unit_delta(symbol, position)
+            self.delta[position.underlying] += quantity * (unit - position.delta)
+            position.delta = unit
+        if self.max_daily_loss is not None and self.total_pnl <= -abs(self.max_daily_loss):
+            self._check_breaches(symbol)
+
+    def check(self, order: OrderEvent, price: Optional[float] = None) -> Optional[RiskViolationEvent]:
+        """
+        Pre-trade check of an order against every limit.
+
+        Args:
+            order (OrderEvent): Order about to be sent.
+            price (Optional[float]): Expected fill price; the order price or the last seen price otherwise.
+
+        Returns:
+            Optional[RiskViolationEvent]: The first limit breached (also queued), or None if the order may go.
+        """
+        position = self.positions.get(order.symbol)
+        price = price or order.price or (position.last_price if position else 0.0)
+        signed = order.quantity if order.side == 'BUY' else -order.quantity
+        reason, info = None, {}
+        if self.max_daily_loss is not None and self.total_pnl <= -abs(self.max_daily_loss):
+            reason, info = MAX_DAILY_LOSS, {'pnl': self.total_pnl, 'limit': self.max_daily_loss}
+        elif self.max_exposure is not None and self.gross_exposure + order.quantity * price > self.max_exposure:
+            reason, info = MAX_EXPOSURE, {'exposure': self.gross_exposure + order.quantity * price,
+                                          'limit': self.max_exposure}
+        elif self.max_delta is not None or self.max_margin is not None:
+            probe = position or self._probe(order.symbol)
+            if self.max_delta is not None:
+                delta = self.delta.get(probe.underlying, 0.0) + signed * probe.delta
+                if abs(delta) > self.max_delta:
+                    reason, info = MAX_DELTA, {'underlying': probe.underlying, 'delta': delta, 'limit': self.max_delta}
+            if reason is None and self.max_margin is not None and probe.is_option:
+                added = (signed * price if signed > 0
+                         else -signed * self.short_margin_rate * self.spot.get(probe.underlying, probe.strike))
+                if self.margin + added > self.max_margin:
+                    reason, info = MAX_MARGIN, {'margin': self.margin + added, 'limit': self.max_margin}
+        if reason is None:
+            return None
+        return self._violation(order.symbol, reason, info, order)
+
+    def _probe(self, symbol: str) -> _Position:
+        # Classify a symbol not in the book without adding it
+        position = self._position(symbol)
+        del self.positions[symbol]
+        return position
+
+    def _check_breaches(self, symbol: str) -> None:
+        if (self.max_daily_loss is not None and self.total_pnl <= -abs(self.max_daily_loss)
+                and MAX_DAILY_LOSS not in self._breached):
+            self._breached.add(MAX_DAILY_LOSS)
+            self._violation(symbol, MAX_DAILY_LOSS, {'pnl': self.total_pnl, 'limit': self.max_daily_loss})
+
+    def _violation(self, symbol: str, reason: str, info: Dict[str, Any],
+                   order: Optional[OrderEvent] = None) -> RiskViolationEvent:
+        signal = (order.info or {}).get('from_signal') if order is not None else None
+        info = dict(info, order=order) if order is not None else info
+        event = RiskViolationEvent(symbol=symbol, timestamp=datetime.now(), reason=reason,
+                                   signal_event=signal, info=info)
+        self.violations += 1
+        logger.warning(f"[RiskEngine] {reason} on {symbol}: "
+                       f"{ {k: v for k, v in info.items() if k != 'order'} }")
+        if self.violation_queue is not None:
+            self.violation_queue.put(event)
+        return event
+
+    def reset_day(self) -> None:
+        """Start a new trading day: realized P&L and reported breaches reset, open positions carry over."""
+        self.realized_pnl = 0.0
+        self._breached.clear()
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """
+        Book and realized P&L for the crash-recovery journal.
+
+        Returns:
+            Dict[str, Any]: Positions (quantity, average and last price) and realized P&L.
+        """
+        return {
+            'realized_pnl': self.realized_pnl,
+            'positions': {symbol: [p.quantity, p.avg_price, p.last_price] for symbol, p in self.positions.items()},
+            'spot': dict(self.spot)
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """
+        Rebuild the book and every aggregate from a snapshot.
+
+        Args:
+            state (Dict[str, Any]): Output of ``snapshot_state``.
+        """
+        self._clear()
+        self.spot = dict(state.get('spot') or {})
+        for symbol, (quantity, avg_price, last_price) in (state.get('positions') or {}).items():
+            position = self._position(symbol)
+            position.quantity, position.avg_price, position.last_price = quantity, avg_price, last_price
+            self._apply(position, 1)
+        self.realized_pnl = state.get('realized_pnl', 0.0)
@@ -1,13 +1,17 @@
+import uuid
 from typing import Optional
-from trading_bot.event import SignalEvent, OrderEvent
+from trading_bot.event import SignalEvent, OrderEvent, ExecutionEvent, MarketEvent
+from trading_bot.risk.engine import RiskEngine
 from trading_bot.persistence.database import Database
+from trading_bot.monitor.latency import latency
 from loguru import logger
 from datetime import datetime
 
 class RiskManager:
     """
     Consumes SignalEvents, evaluates them against the configured risk rules, and produces OrderEvents if they are valid.
-    Enforces max trades per day, max daily loss, and position sizing.
+    Enforces max trades per day and position sizing itself; daily loss, exposure, delta and
+    margin limits are checked by a RiskEngine kept current from fills and ticks.
 
     Args:
         signal_queue: Queue for incoming SignalEvents.
@@ -16,6 +20,7 @@ class RiskManager:
         max_trades_per_day (int): Maximum trades allowed per day.
         max_daily_loss (float): Maximum daily loss allowed.
         position_size (int): Position size for each trade.
+        engine (Optional[RiskEngine]): Aggregates and limits; one with only ``max_daily_loss`` if None.
     """
     def __init__(
         self,
@@ -24,7 +29,8 @@ class RiskManager:
         db_path: str = 'data/trading_bot.db',
         max_trades_per_day: int = 4,
         max_daily_loss: float = 500.0,
-        position_size: int = 1
+        position_size: int = 1,
+        engine: Optional[RiskEngine] = None
     ) -> None:
         """
         Initialize the RiskManager.
@@ -36,6 +42,7 @@ class RiskManager:
             max_trades_per_day (int): Maximum trades allowed per day.
             max_daily_loss (float): Maximum daily loss allowed.
             position_size (int): Position size for each trade.
+            engine (Optional[RiskEngine]): Aggregates and limits.
         """
         self.signal_queue = signal_queue
         self.order_queue = order_queue
@@ -43,9 +50,84 @@ class RiskManager:
         self.max_trades_per_day: int = max_trades_per_day
         self.max_daily_loss: float = max_daily_loss
         self.position_size: int = position_size
+        self.engine = engine or RiskEngine(max_daily_loss=max_daily_loss)
         self.trades_today: int = 0
-        self.daily_loss: float = 0.0
         self.today: datetime.date = datetime.now().date()
+        self.halted: Optional[str] = None  # reason new entries are blocked for the rest of the day
+        self.pnl = None  # latest PnLSnapshot from the mark-to-market stream
+
+    def on_pnl(self, snapshot) -> None:
+        """
+        Receive the mark-to-market P&L stream; a tripped kill switch halts new entries.
+
+        Args:
+            snapshot (PnLSnapshot): Latest portfolio P&L.
+        """
+        self.pnl = snapshot
+        if snapshot.killed and self.halted is None:
+            self.halt('DRAWDOWN')
+
+    def halt(self, reason: str) -> None:
+        """
+        Block every new entry until the next trading day.
+
+        Args:
+            reason (str): Why trading was halted.
+        """
+        self.halted = reason
+        logger.critical(f"[RiskManager] Trading halted: {reason}")
+
+    @property
+    def daily_loss(self) -> float:
+        """Realized plus unrealized P&L today (negative for a loss), from the risk engine."""
+        return self.engine.total_pnl
+
+    def on_execution(self, event: ExecutionEvent) -> None:
+        """
+        Update the risk aggregates from a fill.
+
+        Args:
+            event (ExecutionEvent): Execution from the gateway.
+        """
+        self.engine.on_fill(event)
+
+    def on_market_event(self, event: MarketEvent) -> None:
+        """
+        Mark held positions to a tick.
+
+        Args:
+            event (MarketEvent): Market tick.
+        """
+        self.engine.on_tick(event)
+
+    def snapshot_state(self) -> dict:
+        """
+        Daily counters for the crash-recovery journal.
+
+        Returns:
+            dict: Trading day, trades taken, loss so far and the risk engine's book.
+        """
+        return {'today': self.today.isoformat(), 'trades_today': self.trades_today, 'daily_loss': self.daily_loss,
+                'halted': self.halted, 'engine': self.engine.snapshot_state()}
+
+    def restore_state(self, state: dict) -> None:
+        """
+        Restore daily counters saved earlier the same trading day.
+
+        Args:
+            state (dict): Output of ``snapshot_state``.
+        """
+        if state.get('engine'):
+            # Open positions carry over from an earlier day; realized P&L does not
+            self.engine.restore_state(state['engine'])
+        if state.get('today') != datetime.now().date().isoformat():
+            self.engine.reset_day()
+            return
+        self.trades_today = state.get('trades_today', 0)
+        self.halted = state.get('halted')
+        if not state.get('engine'):
+            self.engine.realized_pnl = state.get('daily_loss', 0.0)
+        logger.info(f"[RiskManager] Restored daily counters: {self.trades_today} trades, loss {self.daily_loss}")
 
     def process_signal(self, signal: SignalEvent) -> None:
         """
@@ -55,28 +137,43 @@ class RiskManager:
             signal (SignalEvent): The incoming signal event.
         """
         try:
+            latency.stamp(signal.latency, 'risk')
             now = datetime.now().date()
             if now != self.today:
                 self.trades_today = 0
-                self.daily_loss = 0.0
+                self.engine.reset_day()
+                self.halted = None
                 self.today = now
+            if self.halted:
+                logger.warning(f"[RiskManager] Trading halted ({self.halted}). Signal blocked: {signal}")
+                return
             if self.trades_today >= self.max_trades_per_day:
                 logger.warning(f"[RiskManager] Max trades per day reached. Signal blocked: {signal}")
                 return
-            if self.daily_loss <= -abs(self.max_daily_loss):
-                logger.warning(f"[RiskManager] Max daily loss reached. Signal blocked: {signal}")
+            option_symbol = (signal.info or {}).get('option_symbol')
+            if option_symbol is None and signal.signal_type in ('CE', 'PE'):
+                # Never send an option signal to the underlying's symbol
+                logger.warning(f"[RiskManager] No {signal.signal_type} contract to trade. Signal blocked: {signal}")
                 return
             order = OrderEvent(
-                symbol=signal.symbol,
+                symbol=option_symbol or signal.symbol,
                 timestamp=signal.timestamp,
                 order_type='MARKET',
-                side='BUY' if signal.signal_type == 'LONG' else 'SELL',
+                # CE and PE signals buy the option; only a SHORT signal sells
+                side='SELL' if signal.signal_type == 'SHORT' else 'BUY',
                 quantity=self.position_size,
                 price=None,
                 stop_price=None,
-                order_uuid=None,
-                info={'from_signal': signal}
+                # The strategy names the order so it can cancel-and-replace it later
+                order_uuid=(signal.info or {}).get('order_uuid') or uuid.uuid4().hex,
+                info={'from_signal': signal},
+                latency=signal.latency
             )
+            premium = (signal.info or {}).get('premium')
+            if self.engine.check(order, premium) is not None:
+                logger.warning(f"[RiskManager] Risk limit breached. Signal blocked: {signal}")
+                return
+            latency.stamp(order.latency, 'order')
             self.order_queue.put(order)
             self.trades_today += 1
             logger.info(f"[RiskManager] OrderEvent created and enqueued: {order}")
@@ -0,0 +1,4 @@
+from trading_bot.sharding.deployment import main
+
+if __name__ == '__main__':
+    main()
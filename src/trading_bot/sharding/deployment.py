@@ -0,0 +1,474 @@
+"""
+Sharded deployment: one feed process, N strategy/risk workers and one execution
+process on a single box.
+
+    feed ──▶ TickBus (shared memory) ──▶ shard 0 .. shard N-1   StrategyHost + RiskManager
+                                     └─▶ execution              paper fills need prices
+    shards ──OrderEvents──▶ order queue ──▶ execution           owns the broker session
+    execution ──ExecutionEvents──▶ fill queue ──▶ supervisor
+
+Each shard trades a disjoint set of underlyings, so tick processing spreads over
+cores instead of sharing one GIL. Ticks stay in shared memory; only orders and
+fills are pickled through multiprocessing queues. Workers are started with the
+spawn method, so none inherits the supervisor's threads or a broker session.
+
+Risk limits (trades per day, daily loss) apply per shard; the execution process
+is the single place orders reach the broker. Fills only reach the supervisor,
+which logs them: no process manages the positions they open (stops, exits,
+realized loss), so the sharded mode runs paper trading only.
+"""
+import argparse
+import multiprocessing as mp
+import queue
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, time as dt_time
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+from trading_bot.event import MarketEvent
+from trading_bot.sharding.tick_bus import TICK_BUS_NAME, TickBus, TickSubscriber
+
+# Starting prices for simulated underlyings; anything else starts at 20000
+SIMULATED_PRICES = {'NIFTY': 24500.0, 'BANKNIFTY': 52000.0, 'FINNIFTY': 23500.0, 'MIDCPNIFTY': 12500.0}
+IDLE_SLEEP = 0.0005
+
+
+@dataclass
+class ShardSpec:
+    """Underlyings and strategy instances owned by one worker process."""
+    name: str
+    symbols: List[str] = field(default_factory=list)
+    instances: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def plan_shards(instances: List[Dict[str, Any]], workers: int) -> List[ShardSpec]:
+    """
+    Deal the underlyings round-robin over the workers; every instance goes with its symbol.
+
+    Args:
+        instances (List[Dict[str, Any]]): Strategy instance specs (``symbol``, ``name``, ``zone_offset``).
+        workers (int): Worker processes wanted; capped at the number of underlyings.
+
+    Returns:
+        List[ShardSpec]: One spec per worker.
+    """
+    instances = [dict(spec, symbol=spec['symbol'].split('|')[-1]) for spec in instances]
+    symbols = list(dict.fromkeys(spec['symbol'] for spec in instances))
+    workers = max(1, min(workers, len(symbols)))
+    shards = [ShardSpec(f"shard{i}") for i in range(workers)]
+    owner = {}
+    for i, symbol in enumerate(symbols):
+        owner[symbol] = shards[i % workers]
+        owner[symbol].symbols.append(symbol)
+    for spec in instances:
+        owner[spec['symbol']].instances.append(spec)
+    return shards
+
+
+def _init_worker(name: str, log_level: str) -> None:
+    logger.remove()
+    logger.add(sys.stderr, level=log_level,
+               format="{time:HH:mm:ss.SSS} | {level: <8} | " + name + " | {message}")
+
+
+def _events(batch, symbols: List[str]):
+    for symbol_id, ts_ns, price, volume in zip(batch['symbol'].tolist(), batch['ts_ns'].tolist(),
+                                               batch['price'].tolist(), batch['volume'].tolist()):
+        yield MarketEvent(symbol=symbols[symbol_id], timestamp=datetime.fromtimestamp(ts_ns / 1e9),
+                          price=price, volume=volume)
+
+
+def simulate_feed(handler: Any, symbols: List[str], stop: Any, rate: float = 1000.0,
+                  limit: Optional[int] = None, seed: int = 1) -> int:
+    """
+    Push random-walk ticks in Shoonya's wire format through ``handler.on_tick``.
+
+    Args:
+        handler (Any): DataHandler (or anything with ``on_tick(dict)``).
+        symbols (List[str]): Underlyings, ticked round-robin.
+        stop (Any): Event that ends the feed.
+        rate (float): Ticks per second.
+        limit (Optional[int]): Stop after this many ticks.
+        seed (int): Random seed.
+
+    Returns:
+        int: Ticks sent.
+    """
+    rng = random.Random(seed)
+    prices = {symbol: SIMULATED_PRICES.get(symbol, 20000.0) for symbol in symbols}
+    interval = 1.0 / rate
+    next_at = time.perf_counter()
+    sent = 0
+    while not stop.is_set() and (limit is None or sent < limit):
+        symbol = symbols[sent % len(symbols)]
+        prices[symbol] = round(prices[symbol] + rng.gauss(0.0, 1.0), 2)
+        handler.on_tick({'tsym': symbol, 'lp': str(prices[symbol]), 'v': '1'})
+        sent += 1
+        next_at += interval
+        delay = next_at - time.perf_counter()
+        if delay > 0.001:
+            time.sleep(delay)
+    return sent
+
+
+def run_feed(symbols: List[str], bus_name: str, stop: Any, simulate: Optional[Dict[str, Any]],
+             options: Dict[str, Any], ready: Any) -> None:
+    """
+    Feed process: decode broker (or simulated) ticks and publish them on the bus.
+
+    Args:
+        symbols (List[str]): Bus symbol table.
+        bus_name (str): Tick bus segment name.
+        stop (Any): Event that ends the process.
+        simulate (Optional[Dict[str, Any]]): ``simulate_feed`` options, or None for the live feed.
+        options (Dict[str, Any]): ``log_level``.
+        ready (Any): Set once the bus is attached.
+    """
+    from trading_bot.broker.data_handler import DataHandler
+    _init_worker('feed', options.get('log_level', 'INFO'))
+    bus = TickBus(symbols, name=bus_name, create=False)
+    # The bus stands in for the event queue, so ticks are decoded exactly as in-process
+    handler = DataHandler(None, bus, symbols)
+    ready.set()
+    try:
+        if simulate is not None:
+            sent = simulate_feed(handler, symbols, stop, **simulate)
+            logger.info(f"Simulated feed sent {sent} ticks")
+            return
+        from trading_bot.broker.api_wrapper import ShoonyaAPIWrapper
+        handler.api_wrapper = ShoonyaAPIWrapper()
+        if not handler.api_wrapper.connect():
+            raise ConnectionError("Broker login failed in the feed process")
+        threading.Thread(target=lambda: (stop.wait(), handler.stop()), daemon=True).start()
+        handler.start_with_reconnection()
+    finally:
+        if bus.unknown_symbols:
+            logger.warning(f"Dropped {bus.unknown_symbols} ticks for symbols outside the bus table")
+        bus.close()
+
+
+def run_shard(spec: ShardSpec, symbols: List[str], bus_name: str, order_queue: Any, stats_queue: Any,
+              stop: Any, options: Dict[str, Any], ready: Any) -> None:
+    """
+    Strategy/risk worker: run the shard's strategy instances on its symbols' ticks.
+
+    Args:
+        spec (ShardSpec): Symbols and instances of this shard.
+        symbols (List[str]): Bus symbol table.
+        bus_name (str): Tick bus segment name.
+        order_queue (Any): Queue to the execution process.
+        stats_queue (Any): Receives this worker's counters on exit.
+        stop (Any): Event that ends the process.
+        options (Dict[str, Any]): ``zone_offset``, ``zone_time``, ``risk`` kwargs and ``log_level``.
+        ready (Any): Set once subscribed.
+    """
+    from trading_bot.risk.manager import RiskManager
+    from trading_bot.strategy.host import build_zone_host
+    _init_worker(spec.name, options.get('log_level', 'INFO'))
+    subscriber = TickSubscriber(symbols, spec.symbols, name=bus_name)
+    signals = queue.Queue()
+    host = build_zone_host(spec.instances, None, signals, options.get('zone_offset', 2.5),
+                           options.get('zone_time', dt_time(9, 16)))
+    risk = RiskManager(signals, order_queue, **options.get('risk', {}))
+    ready.set()
+    ticks = signal_count = 0
+    try:
+        while not stop.is_set():
+            batch = subscriber.poll()
+            if not len(batch):
+                time.sleep(IDLE_SLEEP)
+                continue
+            for event in _events(batch, symbols):
+                host.process_event(event)
+            ticks += len(batch)
+            while not signals.empty():
+                risk.process_signal(signals.get_nowait())
+                signal_count += 1
+    finally:
+        stats_queue.put({'process': spec.name, 'symbols': spec.symbols, 'ticks': ticks, 'signals': signal_count,
+                         'orders': risk.trades_today, 'dropped': subscriber.dropped, 'errors': host.errors})
+        subscriber.close()
+
+
+def run_execution(symbols: List[str], bus_name: str, order_queue: Any, fill_queue: Any, stats_queue: Any,
+                  stop: Any, options: Dict[str, Any], ready: Any) -> None:
+    """
+    Execution process: the only holder of the broker session; turns orders into fills.
+
+    Args:
+        symbols (List[str]): Bus symbol table.
+        bus_name (str): Tick bus segment name.
+        order_queue (Any): OrderEvents from every shard.
+        fill_queue (Any): ExecutionEvents back to the supervisor.
+        stats_queue (Any): Receives this worker's counters on exit.
+        stop (Any): Event that ends the process.
+        options (Dict[str, Any]): ``mode`` and ``log_level``.
+        ready (Any): Set once the gateway is up.
+    """
+    _init_worker('execution', options.get('log_level', 'INFO'))
+    subscriber = None
+    if options.get('mode', 'papertrading') == 'papertrading':
+        from trading_bot.execution.paper_gateway import PaperExecutionGateway
+        gateway = PaperExecutionGateway(order_queue, fill_queue)
+        # Paper fills are priced off the last tick
+        subscriber = TickSubscriber(symbols, name=bus_name)
+    else:
+        from trading_bot.broker.api_wrapper import ShoonyaAPIWrapper
+        from trading_bot.execution.gateway import ExecutionGateway
+        api_wrapper = ShoonyaAPIWrapper()
+        if not api_wrapper.connect():
+            raise ConnectionError("Broker login failed in the execution process")
+        gateway = ExecutionGateway(order_queue, fill_queue, api_wrapper)
+    ready.set()
+    orders = 0
+    try:
+        while not stop.is_set():
+            if subscriber is not None:
+                for event in _events(subscriber.poll(), symbols):
+                    gateway.on_market_event(event)
+            try:
+                order = order_queue.get(timeout=IDLE_SLEEP)
+            except queue.Empty:
+                continue
+            gateway.process_order(order)
+            orders += 1
+    finally:
+        stats_queue.put({'process': 'execution', 'orders': orders})
+        if subscriber is not None:
+            subscriber.close()
+
+
+class ShardedDeployment:
+    """
+    Starts and supervises the feed, shard and execution processes.
+
+    Args:
+        instances (List[Dict[str, Any]]): Strategy instance specs, as in ``strategy.instances``.
+        workers (int): Strategy/risk worker processes.
+        mode (str): 'papertrading'; live is refused until fills reach a position owner.
+        simulate (Optional[Dict[str, Any]]): ``simulate_feed`` options; None for the broker feed.
+        capacity (int): Tick bus ring size.
+        bus_name (str): Tick bus segment name.
+        zone_offset (float): Default zone offset.
+        zone_time (dt_time): Zone calculation time.
+        risk (Optional[Dict[str, Any]]): RiskManager kwargs for every shard.
+        log_level (str): Log level in the worker processes.
+        start_timeout (float): Seconds to wait for each process to come up.
+    """
+    def __init__(self, instances: List[Dict[str, Any]], workers: int = 2, mode: str = 'papertrading',
+                 simulate: Optional[Dict[str, Any]] = None, capacity: int = 1 << 16,
+                 bus_name: str = TICK_BUS_NAME, zone_offset: float = 2.5, zone_time: dt_time = dt_time(9, 16),
+                 risk: Optional[Dict[str, Any]] = None, log_level: str = 'INFO',
+                 start_timeout: float = 30.0) -> None:
+        """
+        Plan the shards; nothing is started until ``start``.
+
+        Args:
+            instances (List[Dict[str, Any]]): Strategy instance specs.
+            workers (int): Strategy/risk worker processes.
+            mode (str): 'papertrading' or live.
+            simulate (Optional[Dict[str, Any]]): ``simulate_feed`` options; None for the broker feed.
+            capacity (int): Tick bus ring size.
+            bus_name (str): Tick bus segment name.
+            zone_offset (float): Default zone offset.
+            zone_time (dt_time): Zone calculation time.
+            risk (Optional[Dict[str, Any]]): RiskManager kwargs for every shard.
+            log_level (str): Log level in the worker processes.
+            start_timeout (float): Seconds to wait for each process to come up.
+
+        Raises:
+            ValueError: For any mode but 'papertrading'.
+        """
+        if mode != 'papertrading':
+            # Nothing here would place stops, take exits or stop at the daily loss limit
+            raise ValueError(f"Sharded deployment does not manage positions; mode '{mode}' is not supported")
+        self.shards = plan_shards(instances, workers)
+        self.symbols = [symbol for shard in self.shards for symbol in shard.symbols]
+        self.mode = mode
+        self.simulate = simulate
+        self.capacity = capacity
+        self.bus_name = bus_name
+        self.start_timeout = start_timeout
+        self.options = {'zone_offset': zone_offset, 'zone_time': zone_time, 'risk': risk or {},
+                        'mode': mode, 'log_level': log_level}
+        self.processes: Dict[str, Any] = {}
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self.bus: Optional[TickBus] = None
+        self._pending_fills: List[Any] = []
+
+    @classmethod
+    def from_config(cls, get_config: Callable[[str, Any], Any], simulate: Optional[Dict[str, Any]] = None,
+                    workers: Optional[int] = None) -> 'ShardedDeployment':
+        """
+        Build a deployment from the bot configuration.
+
+        Args:
+            get_config (Callable[[str, Any], Any]): Dotted-key getter, e.g. ``ConfigManager.get``.
+            simulate (Optional[Dict[str, Any]]): ``simulate_feed`` options; None for the broker feed.
+            workers (Optional[int]): Overrides ``sharding.workers``.
+
+        Returns:
+            ShardedDeployment: The planned deployment.
+
+        Raises:
+            ValueError: If ``mode`` is not 'papertrading'.
+        """
+        instances = get_config('strategy.instances', None) or [
+            {'symbol': symbol} for symbol in get_config('strategy.symbols', ['NIFTY'])
+        ]
+        zone_time = datetime.strptime(get_config('strategy.zone_calculation_time', '09:16:00'), '%H:%M:%S').time()
+        return cls(
+            instances,
+            workers=workers or get_config('sharding.workers', 2),
+            mode=get_config('mode', 'papertrading'),
+            simulate=simulate,
+            capacity=get_config('sharding.ring_capacity', 1 << 16),
+            zone_offset=get_config('strategy.zone_offset', 2.5),
+            zone_time=zone_time,
+            risk={
+                'db_path': get_config('data.db_path', 'data/trading_bot.db'),
+                'max_trades_per_day': get_config('risk.max_trades_per_day', 4),
+                'max_daily_loss': get_config('risk.max_daily_loss', 500),
+                'position_size': get_config('risk.position_size', 1)
+            },
+            log_level=get_config('sharding.log_level', 'INFO')
+        )
+
+    def _spawn(self, ctx: Any, name: str, target: Callable, *args: Any) -> None:
+        ready = ctx.Event()
+        process = ctx.Process(target=target, name=name, args=args + (ready,), daemon=True)
+        process.start()
+        self.processes[name] = process
+        deadline = time.monotonic() + self.start_timeout
+        while not ready.wait(0.05):
+            if not process.is_alive() or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError(f"Sharded deployment: {name} process failed to start")
+
+    def start(self) -> None:
+        """Create the bus and start execution, the shards and then the feed."""
+        ctx = mp.get_context('spawn')
+        self.bus = TickBus(self.symbols, capacity=self.capacity, name=self.bus_name)
+        self._stop_workers = ctx.Event()
+        self._stop_execution = ctx.Event()
+        self.order_queue, self.fill_queue, self.stats_queue = ctx.Queue(), ctx.Queue(), ctx.Queue()
+        self._spawn(ctx, 'execution', run_execution, self.symbols, self.bus_name, self.order_queue,
+                    self.fill_queue, self.stats_queue, self._stop_execution, self.options)
+        for shard in self.shards:
+            self._spawn(ctx, shard.name, run_shard, shard, self.symbols, self.bus_name, self.order_queue,
+                        self.stats_queue, self._stop_workers, self.options)
+        # Subscribers start at the bus head, so the feed goes last and no tick is missed
+        self._spawn(ctx, 'feed', run_feed, self.symbols, self.bus_name, self._stop_workers,
+                    self.simulate, self.options)
+        logger.info(f"Sharded deployment up: {len(self.shards)} workers for {self.symbols} "
+                    f"({', '.join(f'{s.name}={s.symbols}' for s in self.shards)})")
+
+    def fills(self, timeout: float = 0.0) -> List[Any]:
+        """
+        Take the ExecutionEvents received so far.
+
+        Args:
+            timeout (float): Seconds to wait for the first one if none are pending.
+
+        Returns:
+            List[Any]: ExecutionEvents, oldest first.
+        """
+        fills, self._pending_fills = self._pending_fills, []
+        try:
+            if not fills and timeout > 0:
+                fills.append(self.fill_queue.get(timeout=timeout))
+            while True:
+                fills.append(self.fill_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return fills
+
+    def _join(self, names: List[str], timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        for name in names:
+            process = self.processes.get(name)
+            if process is None:
+                continue
+            # Keep the fill pipe drained so a worker never blocks flushing it on exit
+            while process.is_alive() and time.monotonic() < deadline:
+                self._pending_fills.extend(self.fills())
+                process.join(0.05)
+            if process.is_alive():
+                logger.warning(f"Sharded deployment: {name} did not stop, terminating")
+                process.terminate()
+                process.join()
+
+    def stop(self, timeout: float = 10.0) -> Dict[str, Dict[str, Any]]:
+        """
+        Stop the feed and shards, then execution once their orders are in, and remove the bus.
+
+        Args:
+            timeout (float): Seconds to wait for each group of processes.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Counters reported by each worker.
+        """
+        if self.bus is None:
+            return self.stats
+        self._stop_workers.set()
+        self._join(['feed'] + [shard.name for shard in self.shards], timeout)
+        self._stop_execution.set()
+        self._join(['execution'], timeout)
+        try:
+            while True:
+                stats = self.stats_queue.get(timeout=0.1)
+                self.stats[stats.pop('process')] = stats
+        except queue.Empty:
+            pass
+        self.bus.close()
+        self.bus = None
+        logger.info(f"Sharded deployment stopped: {self.stats}")
+        return self.stats
+
+    def run(self, duration: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Start, log fills until ``duration`` elapses or Ctrl-C, then stop.
+
+        Args:
+            duration (Optional[float]): Seconds to run; None runs until interrupted.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: Counters reported by each worker.
+        """
+        self.start()
+        deadline = None if duration is None else time.monotonic() + duration
+        try:
+            while deadline is None or time.monotonic() < deadline:
+                for fill in self.fills(timeout=0.5):
+                    logger.info(f"Fill: {fill.symbol} {fill.status} {fill.filled_quantity} @ {fill.avg_fill_price}")
+                if not self.processes['execution'].is_alive():
+                    logger.error("Sharded deployment: execution process died")
+                    break
+        except KeyboardInterrupt:
+            logger.info("Sharded deployment interrupted")
+        finally:
+            stats = self.stop()
+        return stats
+
+
+def main(argv=None) -> None:
+    """Entry point: ``python -m trading_bot.sharding``"""
+    parser = argparse.ArgumentParser(description="Run the bot as feed, shard and execution processes")
+    parser.add_argument('--config', default='config/config.yaml', help="Config file")
+    parser.add_argument('--workers', type=int, help="Strategy/risk worker processes (default sharding.workers)")
+    parser.add_argument('--simulate', action='store_true', help="Use a simulated feed instead of the broker")
+    parser.add_argument('--rate', type=float, default=1000.0, help="Simulated ticks per second")
+    parser.add_argument('--duration', type=float, help="Seconds to run (default: until Ctrl-C)")
+    args = parser.parse_args(argv)
+
+    from config.manager import ConfigManager
+    config = ConfigManager(args.config)
+    simulate = {'rate': args.rate} if args.simulate else None
+    deployment = ShardedDeployment.from_config(config.get, simulate=simulate, workers=args.workers)
+    stats = deployment.run(args.duration)
+    for name, counters in sorted(stats.items()):
+        print(f"{name:<10} {counters}")
@@ -0,0 +1,263 @@
+"""
+Shared-memory tick bus between the feed process and sharded worker processes.
+
+One writer (the feed process) appends fixed-size tick records to a ring of
+NumPy structured records in a ``multiprocessing.shared_memory`` segment and
+then advances a head counter in the segment header. Any number of reader
+processes keep their own cursor and take batches straight out of the segment:
+the records of the symbols a reader subscribes to are gathered with one
+vectorized selection, without pickling, pipes or per-tick Python objects.
+
+Nothing is locked. The writer never waits for readers; a reader that falls more
+than ``capacity`` records behind skips ahead and counts what it missed. Each
+record carries its sequence number, and records the writer may have been
+overwriting while a batch was copied are discarded, so a reader never sees a
+torn tick. Readers rely on the slot being stored before the head counter, which
+holds for the x86-64 Linux boxes the bot runs on.
+
+Symbols travel as indices into a symbol table that every process is given in
+the same order.
+"""
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from loguru import logger
+
+TICK_BUS_NAME = 'trading_bot_ticks'
+
+TICK_DTYPE = np.dtype([
+    ('seq', '<u8'),      # position in the stream, 0-based
+    ('ts_ns', '<i8'),    # exchange/receive time in epoch ns
+    ('price', '<f8'),
+    ('volume', '<f8'),
+    ('symbol', '<u4'),   # index into the symbol table
+], align=True)
+
+_HEADER_SLOTS = 8                   # uint64 words; cache-line sized
+_HEAD, _CAPACITY, _UNKNOWN = 0, 1, 2  # next seq to write, ring size, ticks for symbols outside the table
+_HEADER_BYTES = _HEADER_SLOTS * 8
+_EMPTY = np.empty(0, dtype=TICK_DTYPE)
+
+
+def _views(shm: shared_memory.SharedMemory, capacity: int):
+    header = np.ndarray((_HEADER_SLOTS,), dtype='<u8', buffer=shm.buf)
+    ticks = np.ndarray((capacity,), dtype=TICK_DTYPE, buffer=shm.buf, offset=_HEADER_BYTES)
+    return header, ticks
+
+
+class TickBus:
+    """
+    Writer side of the tick bus.
+
+    The supervisor creates the segment; the feed process attaches with
+    ``create=False`` and becomes the single writer. Only the creator removes it.
+
+    Args:
+        symbols (List[str]): Symbol table shared with every reader.
+        capacity (int): Ring size in records, rounded up to a power of two.
+        name (str): Shared-memory segment name.
+        create (bool): Create the segment rather than attach to an existing one.
+    """
+    def __init__(self, symbols: List[str], capacity: int = 1 << 16, name: str = TICK_BUS_NAME,
+                 create: bool = True) -> None:
+        """
+        Create (or take over) the segment, or attach to it.
+
+        Args:
+            symbols (List[str]): Symbol table shared with every reader.
+            capacity (int): Ring size in records, rounded up to a power of two; ignored when attaching.
+            name (str): Shared-memory segment name.
+            create (bool): Create the segment rather than attach to an existing one.
+        """
+        self.name = name
+        self.symbols = list(symbols)
+        self.symbol_ids: Dict[str, int] = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._owner = create
+        if not create:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self.capacity = int(np.ndarray((_HEADER_SLOTS,), dtype='<u8', buffer=self._shm.buf)[_CAPACITY])
+            self._mask = self.capacity - 1
+            self._header, self._ticks = _views(self._shm, self.capacity)
+            self._head = int(self._header[_HEAD])
+            return
+        self.capacity = 1 << max(capacity - 1, 1).bit_length()
+        self._mask = self.capacity - 1
+        size = _HEADER_BYTES + self.capacity * TICK_DTYPE.itemsize
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a crashed session
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._header, self._ticks = _views(self._shm, self.capacity)
+        self._header[:] = 0
+        self._header[_CAPACITY] = self.capacity
+        self._ticks['seq'] = np.iinfo(np.uint64).max  # never matches a live sequence number
+        self._head = 0
+
+    @property
+    def head(self) -> int:
+        """Number of ticks published so far."""
+        return self._head
+
+    def publish(self, symbol: str, price: float, volume: float, ts_ns: int) -> bool:
+        """
+        Append one tick.
+
+        Args:
+            symbol (str): Symbol from the table.
+            price (float): Last traded price.
+            volume (float): Volume.
+            ts_ns (int): Tick time in epoch ns.
+
+        Returns:
+            bool: False if the symbol is not in the table (the tick is dropped).
+        """
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            self._header[_UNKNOWN] += 1
+            return False
+        seq = self._head
+        self._ticks[seq & self._mask] = (seq, ts_ns, price, volume, symbol_id)
+        self._head = seq + 1
+        self._header[_HEAD] = self._head
+        return True
+
+    def publish_many(self, symbol_ids: np.ndarray, prices: np.ndarray, volumes: np.ndarray,
+                     ts_ns: np.ndarray) -> None:
+        """
+        Append a batch of ticks given as parallel arrays of symbol indices and values.
+
+        Args:
+            symbol_ids (np.ndarray): Indices into the symbol table.
+            prices (np.ndarray): Prices.
+            volumes (np.ndarray): Volumes.
+            ts_ns (np.ndarray): Tick times in epoch ns.
+        """
+        count = len(symbol_ids)
+        done = 0
+        while done < count:
+            # Fill at most up to the end of the ring, then wrap
+            start = (self._head + done) & self._mask
+            n = min(count - done, self.capacity - start)
+            window = self._ticks[start:start + n]
+            window['ts_ns'] = ts_ns[done:done + n]
+            window['price'] = prices[done:done + n]
+            window['volume'] = volumes[done:done + n]
+            window['symbol'] = symbol_ids[done:done + n]
+            window['seq'] = np.arange(self._head + done, self._head + done + n, dtype=np.uint64)
+            done += n
+        self._head += count
+        self._header[_HEAD] = self._head
+
+    def put(self, event) -> None:
+        """
+        Publish a MarketEvent, so the bus can stand in for the DataHandler's event queue.
+
+        Args:
+            event (MarketEvent): Decoded tick.
+        """
+        self.publish(event.symbol, event.price, event.volume or 0.0, int(event.timestamp.timestamp() * 1e9))
+
+    @property
+    def unknown_symbols(self) -> int:
+        """Ticks dropped because their symbol is not in the table."""
+        return int(self._header[_UNKNOWN])
+
+    def close(self) -> None:
+        """Release the segment, removing it if this side created it."""
+        del self._header, self._ticks
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class TickSubscriber:
+    """
+    Reader side of the tick bus for one worker.
+
+    Meant for processes started by the one that created the bus: they share its
+    resource tracker, so attaching here never removes the segment on exit.
+
+    Args:
+        symbols (List[str]): The bus symbol table.
+        wanted (Optional[Iterable[str]]): Symbols to receive; None for all.
+        name (str): Shared-memory segment name.
+        from_start (bool): Start at the oldest tick still in the ring instead of the newest.
+    """
+    def __init__(self, symbols: List[str], wanted: Optional[Iterable[str]] = None,
+                 name: str = TICK_BUS_NAME, from_start: bool = False) -> None:
+        """
+        Attach to the segment. Raises FileNotFoundError if the bus does not exist.
+
+        Args:
+            symbols (List[str]): The bus symbol table.
+            wanted (Optional[Iterable[str]]): Symbols to receive; None for all.
+            name (str): Shared-memory segment name.
+            from_start (bool): Start at the oldest tick still in the ring instead of the newest.
+        """
+        self.symbols = list(symbols)
+        self._shm = shared_memory.SharedMemory(name=name)
+        capacity = int(np.ndarray((_HEADER_SLOTS,), dtype='<u8', buffer=self._shm.buf)[_CAPACITY])
+        self.capacity = capacity
+        self._header, self._ticks = _views(self._shm, capacity)
+        self._mask = capacity - 1
+        if wanted is None:
+            self._wanted = None
+        else:
+            wanted = set(wanted)
+            unknown = wanted.difference(self.symbols)
+            if unknown:
+                logger.warning(f"Tick bus has no symbols {sorted(unknown)}")
+            self._wanted = np.array([symbol in wanted for symbol in self.symbols], dtype=bool)
+        head = int(self._header[_HEAD])
+        self.cursor = max(head - capacity + 1, 0) if from_start else head
+        self.dropped = 0
+
+    def poll(self, max_batch: int = 4096) -> np.ndarray:
+        """
+        Take the next batch of subscribed ticks.
+
+        Args:
+            max_batch (int): Maximum records to scan (subscribed or not) in this call.
+
+        Returns:
+            np.ndarray: Records of ``TICK_DTYPE``, oldest first; empty if nothing is new.
+        """
+        head = int(self._header[_HEAD])
+        cursor = self.cursor
+        if head - cursor >= self.capacity:
+            # The writer lapped this reader; the oldest slot may be being rewritten right now
+            self.dropped += head - cursor - self.capacity + 1
+            cursor = head - self.capacity + 1
+        start = cursor & self._mask
+        count = min(head - cursor, max_batch, self.capacity - start)
+        if count <= 0:
+            return _EMPTY
+        window = self._ticks[start:start + count]
+        batch = window.copy() if self._wanted is None else window[self._wanted[window['symbol']]]
+
+        # Slots at or before head - capacity may have been rewritten during the copy
+        oldest_intact = int(self._header[_HEAD]) - self.capacity + 1
+        if cursor < oldest_intact:
+            seqs = batch['seq']
+            intact = (seqs >= max(cursor, oldest_intact)) & (seqs < cursor + count)
+            self.dropped += min(oldest_intact - cursor, count)
+            batch = batch[intact]
+        self.cursor = cursor + count
+        return batch
+
+    @property
+    def lag(self) -> int:
+        """Ticks published but not yet polled."""
+        return int(self._header[_HEAD]) - self.cursor
+
+    def close(self) -> None:
+        """Detach from the segment (the writer owns and removes it)."""
+        del self._header, self._ticks
+        self._shm.close()
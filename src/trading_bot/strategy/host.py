@@ -0,0 +1,191 @@
+"""
+Runs many independent strategy instances off one market data feed.
+
+Each instance is registered with the symbols it trades. The host keeps a
+dispatch table from symbol to the bound ``process_event`` methods of the
+instances that want it, so a tick costs one dict lookup plus one call per
+interested instance instead of a call into every instance. Instances
+registered with no symbols see every tick.
+"""
+import time
+from datetime import time as dt_time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+from trading_bot.strategy.main_strategy import MainStrategy
+from trading_bot.broker.expiry_calendar import ExpiryCalendar
+from trading_bot.execution.order_templates import OrderTemplates
+
+Handler = Callable[[Any], None]
+
+
+class StrategyHost:
+    """
+    Symbol-routed set of named strategy instances.
+
+    Instances need ``process_event(event)``; ``snapshot_state()`` and
+    ``restore_state(state)`` are used for the crash-recovery journal when present.
+    """
+    def __init__(self) -> None:
+        """Initialize an empty host."""
+        self.instances: Dict[str, Any] = {}
+        self._symbols: Dict[str, Tuple[str, ...]] = {}  # instance name -> symbols, () for every symbol
+        self._routes: Dict[str, Tuple[Handler, ...]] = {}
+        self._wildcard: Tuple[Handler, ...] = ()
+        self.errors = 0
+
+    def add(self, name: str, strategy: Any, symbols: Optional[Iterable[str]] = None) -> None:
+        """
+        Register a strategy instance.
+
+        Args:
+            name (str): Unique instance name, also its journal key.
+            strategy (Any): Object with ``process_event(event)``.
+            symbols (Optional[Iterable[str]]): Symbols routed to the instance; None or empty for all.
+
+        Raises:
+            ValueError: If the name is already registered.
+        """
+        if name in self.instances:
+            raise ValueError(f"Strategy instance {name} already registered")
+        self.instances[name] = strategy
+        self._symbols[name] = tuple(dict.fromkeys(symbols or ()))
+        self._rebuild_routes()
+
+    def add_symbols(self, name: str, symbols: Iterable[str]) -> None:
+        """
+        Route more symbols to a registered instance, e.g. its option chain.
+
+        Args:
+            name (str): Instance name.
+            symbols (Iterable[str]): Symbols to add.
+        """
+        self._symbols[name] = tuple(dict.fromkeys(self._symbols[name] + tuple(symbols)))
+        self._rebuild_routes()
+
+    def remove(self, name: str) -> Any:
+        """
+        Unregister a strategy instance.
+
+        Args:
+            name (str): Instance name.
+
+        Returns:
+            Any: The removed instance.
+        """
+        strategy = self.instances.pop(name)
+        del self._symbols[name]
+        self._rebuild_routes()
+        return strategy
+
+    def _rebuild_routes(self) -> None:
+        # Routes are rebuilt on registration only, so dispatch never filters
+        wildcard = tuple(s.process_event for n, s in self.instances.items() if not self._symbols[n])
+        routes: Dict[str, List[Handler]] = {}
+        for name, strategy in self.instances.items():
+            for symbol in self._symbols[name]:
+                routes.setdefault(symbol, []).append(strategy.process_event)
+        self._routes = {symbol: tuple(handlers) + wildcard for symbol, handlers in routes.items()}
+        self._wildcard = wildcard
+
+    def symbols(self) -> List[str]:
+        """
+        Union of the symbols the instances trade.
+
+        Returns:
+            List[str]: Symbols in registration order.
+        """
+        return list(self._routes)
+
+    def handlers_for(self, symbol: str) -> Tuple[Handler, ...]:
+        """
+        Handlers a tick for ``symbol`` is dispatched to.
+
+        Args:
+            symbol (str): Event symbol.
+
+        Returns:
+            Tuple[Handler, ...]: Bound ``process_event`` methods.
+        """
+        return self._routes.get(symbol, self._wildcard)
+
+    def process_event(self, event: Any) -> None:
+        """
+        Dispatch a market event to the instances trading its symbol.
+
+        Args:
+            event (Any): Event with a ``symbol`` attribute.
+        """
+        for handler in self._routes.get(event.symbol, self._wildcard):
+            try:
+                handler(event)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Strategy instance failed on {event.symbol}: {e}")
+
+    def snapshot_state(self) -> Dict[str, Any]:
+        """
+        Per-instance state for the crash-recovery journal.
+
+        Returns:
+            Dict[str, Any]: Instance name -> snapshot.
+        """
+        return {
+            name: strategy.snapshot_state()
+            for name, strategy in self.instances.items()
+            if hasattr(strategy, 'snapshot_state')
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restore instances from a journal snapshot; unknown names are skipped.
+
+        Args:
+            state (Dict[str, Any]): Instance name -> snapshot.
+        """
+        started = time.perf_counter()
+        restored = 0
+        for name, instance_state in state.items():
+            strategy = self.instances.get(name)
+            if strategy is None or not isinstance(instance_state, dict) or not hasattr(strategy, 'restore_state'):
+                continue
+            strategy.restore_state(instance_state)
+            restored += 1
+        logger.info(f"Restored {restored}/{len(self.instances)} strategy instances in "
+                    f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+def build_zone_host(instances: List[Dict[str, Any]], event_queue: Any, signal_queue: Any,
+                    zone_offset: float = 2.5, zone_time: dt_time = dt_time(9, 16),
+                    calendar: Optional[ExpiryCalendar] = None,
+                    order_templates: Optional[OrderTemplates] = None) -> StrategyHost:
+    """
+    Build a host with one zone strategy per instance spec.
+
+    Args:
+        instances (List[Dict[str, Any]]): Specs with ``symbol`` and optional ``name`` and ``zone_offset``.
+        event_queue (Any): Passed through to each strategy.
+        signal_queue (Any): Queue the strategies put their SignalEvents on.
+        zone_offset (float): Offset for specs that do not set one.
+        zone_time (dt_time): Time the zones are taken at.
+        calendar (Optional[ExpiryCalendar]): Resolves the option traded on a signal.
+        order_templates (Optional[OrderTemplates]): Entry orders the strategies arm ahead of their signals.
+
+    Returns:
+        StrategyHost: The populated host.
+    """
+    host = StrategyHost()
+    for spec in instances:
+        symbol = spec['symbol'].split('|')[-1]
+        name = spec.get('name') or symbol.lower()
+        strategy = MainStrategy(
+            event_queue,
+            signal_queue,
+            zone_offset=spec.get('zone_offset', zone_offset),
+            symbol=symbol,
+            name=name,
+            zone_time=zone_time,
+            calendar=calendar,
+            order_templates=order_templates
+        )
+        host.add(name, strategy, [symbol])
+    return host
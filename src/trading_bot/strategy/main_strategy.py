@@ -1,41 +1,129 @@
-from typing import Optional, Dict
+import uuid
+from typing import TYPE_CHECKING, Optional, Dict
 from trading_bot.event import MarketEvent, SignalEvent
 from trading_bot.strategy.zone_calculator import ZoneCalculator
+from trading_bot.broker.expiry_calendar import ExpiryCalendar
+from trading_bot.execution.order_templates import OrderTemplates
+from trading_bot.monitor.latency import latency
 from loguru import logger
-from datetime import datetime, time
+from datetime import date, datetime, time
+
+if TYPE_CHECKING:
+    # numpy-backed; only loaded when strike selection is enabled
+    from trading_bot.strategy.strike_selector import StrikeSelector
 
 class MainStrategy:
     """Nifty Small SL Algo - Zone-based options trading strategy"""
     
-    def __init__(self, event_queue, signal_queue, zone_offset: float = 2.5):
+    def __init__(self, event_queue, signal_queue, zone_offset: float = 2.5,
+                 symbol: Optional[str] = None, name: Optional[str] = None, zone_time: time = time(9, 16),
+                 strike_selector: Optional['StrikeSelector'] = None, calendar: Optional[ExpiryCalendar] = None,
+                 order_templates: Optional[OrderTemplates] = None):
         self.event_queue = event_queue
         self.signal_queue = signal_queue
-        self.zone_calculator = ZoneCalculator(zone_offset)
+        self.symbol = symbol  # underlying whose ticks drive the zones; None accepts every tick
+        self.name = name or (symbol.lower() if symbol else 'main')
+        self.zone_calculator = ZoneCalculator(zone_offset, zone_time, calendar, symbol or 'NIFTY')
+        self.session_date: Optional[date] = None
         self.zones: Optional[Dict] = None
         self.current_position_type: Optional[str] = None  # 'CE', 'PE', or None
         self.pending_order_id: Optional[str] = None
         self.gates_status = {'ce_gate': True, 'pe_gate': True}  # Both gates open initially
+        self.strike_selector = strike_selector  # None trades the ATM option of the nearest expiry
+        self.order_templates = order_templates  # entry orders armed ahead of the signal
+        self._armed: Dict[str, str] = {}  # 'CE'/'PE' -> option symbol with an armed template
+        
+    def snapshot_state(self) -> Dict:
+        """Zones, gates and pending order for the crash-recovery journal"""
+        return {
+            'session_date': (self.session_date or datetime.now().date()).isoformat(),
+            'zones': self.zones,
+            'current_position_type': self.current_position_type,
+            'pending_order_id': self.pending_order_id,
+            'gates_status': dict(self.gates_status)
+        }
+    
+    def restore_state(self, state: Dict) -> None:
+        """Restore journal state; zones and gates from an earlier session are ignored"""
+        if state.get('session_date') != datetime.now().date().isoformat():
+            logger.info("Strategy journal state is from an earlier session, not restoring")
+            return
+        self.session_date = date.fromisoformat(state['session_date'])
+        self.zones = state.get('zones')
+        self.zone_calculator.zones_calculated = self.zones is not None
+        if self.zones:
+            self.zone_calculator.atm_strike = self.zone_calculator.nearest_strike(self.zones['middle_zone'])
+        self.current_position_type = state.get('current_position_type')
+        self.pending_order_id = state.get('pending_order_id')
+        self.gates_status = dict(state.get('gates_status') or {'ce_gate': True, 'pe_gate': True})
+        if self.zones and self.order_templates is not None:
+            self._arm_templates()
+        logger.info(f"Strategy {self.name} restored: zones={self.zones}, gates={self.gates_status}")
         
     def process_event(self, event: MarketEvent) -> None:
         """Process market events for zone-based trading"""
         try:
+            if self.strike_selector is not None:
+                # Chain quotes keep the strike pick current; only underlying ticks move the zones
+                self.strike_selector.on_tick(event.symbol, event.price, event.bid, event.ask)
+            if self.symbol is not None and event.symbol != self.symbol:
+                return
+            latency.stamp(event.latency, 'strategy')
+            if event.timestamp.date() != self.session_date:
+                self._start_session(event.timestamp.date())
             current_time = event.timestamp.time()
             
             # Calculate zones at 9:16 AM
             if self.zone_calculator.should_calculate_zones(current_time):
                 self.zones = self.zone_calculator.calculate_zones_at_916(event.price)
+                if self.order_templates is not None:
+                    self._arm_templates()
                 return
             
             # Skip if zones not calculated yet
             if not self.zones:
                 return
             
+            # Follow the strike pick so the armed entries are the ones a signal would send
+            if self.order_templates is not None and self.strike_selector is not None:
+                self._arm_templates()
+            
             # Check for zone crossings
             self._check_zone_crossings(event)
             
         except Exception as e:
             logger.error(f"Error processing event in strategy: {e}")
     
+    def _start_session(self, session_date: date):
+        """Clear zones and reopen both gates for a new trading day"""
+        if self.session_date is not None:
+            self.zone_calculator.reset_daily()
+        self.session_date = session_date
+        self.zones = None
+        self.current_position_type = None
+        self.pending_order_id = None
+        self.gates_status = {'ce_gate': True, 'pe_gate': True}
+        self._armed = {}
+    
+    def _entry_option(self, option_type: str):
+        """Strike pick for a side if one is available, else the ATM option of the nearest expiry"""
+        selection = self.strike_selector.select(option_type) if self.strike_selector else None
+        if selection is not None:
+            return selection.symbol, selection
+        return self.zone_calculator.get_option_symbol(f"{option_type}_ENTRY"), None
+    
+    def _arm_templates(self):
+        """Pre-build the CE and PE entry orders; only rebuilt when the option to trade changes"""
+        for option_type in ('CE', 'PE'):
+            symbol, _ = self._entry_option(option_type)
+            armed = self._armed.get(option_type)
+            if symbol is None or symbol == armed:
+                continue
+            if armed is not None:
+                self.order_templates.discard(armed)
+            self.order_templates.arm(symbol)
+            self._armed[option_type] = symbol
+    
     def _check_zone_crossings(self, event: MarketEvent):
         """Check for zone crossings and generate signals"""
         current_price = event.price
@@ -61,6 +149,10 @@ class MainStrategy:
     
     def _generate_signal(self, event: MarketEvent, option_type: str, reason: str):
         """Generate trading signal with cancel-and-replace logic"""
+        stamps = dict(event.latency) if event.latency else None
+        latency.stamp(stamps, 'signal')
+        option_symbol, selection = self._entry_option(option_type)
+        order_uuid = uuid.uuid4().hex
         signal = SignalEvent(
             symbol=event.symbol,
             timestamp=event.timestamp,
@@ -68,12 +160,22 @@ class MainStrategy:
             strength=1.0,
             info={
                 'reason': reason,
+                'strategy': self.name,
                 'index_price': event.price,
                 'zones': self.zones,
                 'cancel_pending': self.pending_order_id is not None,
-                'pending_order_id': self.pending_order_id
-            }
+                'pending_order_id': self.pending_order_id,
+                'order_uuid': order_uuid,
+                'option_symbol': option_symbol,
+                'strike': selection.strike if selection else self.zone_calculator.atm_strike,
+                'delta': selection.delta if selection else None,
+                'premium': selection.premium if selection else None
+            },
+            latency=stamps
         )
         
         self.signal_queue.put(signal)
-        logger.info(f"Generated {option_type} signal: {reason} at price {event.price}")
+        # The gateway cancels this entry on the next signal if the order book still has it open
+        self.pending_order_id = order_uuid
+        picked = f" -> {selection.symbol} (delta {selection.delta:.2f})" if selection else ""
+        logger.info(f"Generated {option_type} signal: {reason} at price {event.price}{picked}")
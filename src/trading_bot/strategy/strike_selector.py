@@ -0,0 +1,149 @@
+"""
+Keeps the best CE and PE strike for the next signal picked ahead of time.
+
+Chain ticks go into an ``OptionChain``; at most every ``update_interval``
+seconds (and only if the chain changed) the selector reprices the stale rows
+and picks, per side, the option whose absolute delta is closest to the target
+among those inside the premium band and under the maximum bid/ask spread.
+When the zone is crossed the strategy reads the stored pick, a dict lookup,
+instead of scanning the chain.
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+import numpy as np
+from loguru import logger
+from trading_bot.pricing.chain import OptionChain
+
+
+@dataclass
+class StrikeSelection:
+    """The option picked for one side of the chain."""
+    symbol: str
+    option_type: str
+    strike: float
+    delta: float
+    iv: float
+    premium: float
+    spread: Optional[float]
+    selected_at: datetime
+
+
+class StrikeSelector:
+    """
+    Continuously precomputed delta-targeted strike choice for one chain.
+
+    Args:
+        chain (OptionChain): Chain of the traded expiry.
+        target_delta (float): Absolute delta wanted, e.g. 0.5 for ATM.
+        premium_band (Optional[Tuple[float, float]]): Allowed premium range, inclusive.
+        max_spread (Optional[float]): Largest bid/ask spread allowed; options without quotes are then skipped.
+        update_interval (float): Minimum seconds between reselections driven by ticks.
+    """
+    def __init__(self, chain: OptionChain, target_delta: float = 0.5,
+                 premium_band: Optional[Tuple[float, float]] = None, max_spread: Optional[float] = None,
+                 update_interval: float = 0.25) -> None:
+        """
+        Initialize the selector; nothing is selected until the chain is priced.
+
+        Args:
+            chain (OptionChain): Chain of the traded expiry.
+            target_delta (float): Absolute delta wanted.
+            premium_band (Optional[Tuple[float, float]]): Allowed premium range, inclusive.
+            max_spread (Optional[float]): Largest bid/ask spread allowed.
+            update_interval (float): Minimum seconds between reselections driven by ticks.
+        """
+        self.chain = chain
+        self.target_delta = abs(target_delta)
+        self.premium_band = premium_band
+        self.max_spread = max_spread
+        self.update_interval = update_interval
+        self._best: Dict[str, Optional[StrikeSelection]] = {'CE': None, 'PE': None}
+        self._seen_version = -1
+        self._next_update = 0.0
+        self.updates = 0
+
+    def on_tick(self, symbol: str, price: float, bid: Optional[float] = None, ask: Optional[float] = None) -> bool:
+        """
+        Feed a tick to the chain and reselect if the interval has elapsed.
+
+        Args:
+            symbol (str): Tick symbol.
+            price (float): Last traded price.
+            bid (Optional[float]): Best bid.
+            ask (Optional[float]): Best ask.
+
+        Returns:
+            bool: True if the tick belongs to the chain.
+        """
+        if not self.chain.on_tick(symbol, price, bid, ask):
+            return False
+        now = time.monotonic()
+        if now >= self._next_update:
+            self._next_update = now + self.update_interval
+            self.update()
+        return True
+
+    def update(self, now: Optional[datetime] = None) -> bool:
+        """
+        Reprice stale rows and redo the selection for both sides.
+
+        Args:
+            now (Optional[datetime]): Valuation time; defaults to now.
+
+        Returns:
+            bool: True if the selection was recomputed.
+        """
+        now = now or datetime.now()
+        repriced = self.chain.refresh(now)
+        if not repriced and self.chain.version == self._seen_version:
+            return False
+        self._seen_version = self.chain.version
+        try:
+            chain = self.chain
+            delta = chain.column('delta')
+            premium = chain.column('premium')
+            spread = chain.column('ask') - chain.column('bid')
+            eligible = np.isfinite(delta) & np.isfinite(premium)
+            if self.premium_band is not None:
+                low, high = self.premium_band
+                eligible &= (premium >= low) & (premium <= high)
+            if self.max_spread is not None:
+                with np.errstate(invalid='ignore'):
+                    eligible &= spread <= self.max_spread
+            distance = np.abs(np.abs(delta) - self.target_delta)
+            is_call = chain.column('is_call')
+            for option_type, side in (('CE', is_call), ('PE', ~is_call)):
+                candidates = eligible & side
+                if not candidates.any():
+                    self._best[option_type] = None
+                    continue
+                row = int(np.argmin(np.where(candidates, distance, np.inf)))
+                self._best[option_type] = StrikeSelection(
+                    symbol=chain.symbols[row],
+                    option_type=option_type,
+                    strike=float(chain.column('strike')[row]),
+                    delta=float(delta[row]),
+                    iv=float(chain.column('iv')[row]),
+                    premium=float(premium[row]),
+                    spread=float(spread[row]) if np.isfinite(spread[row]) else None,
+                    selected_at=now
+                )
+            self.updates += 1
+        except Exception as e:
+            logger.error(f"Strike selection failed for {self.chain.underlying}: {e}")
+            return False
+        return True
+
+    def select(self, option_type: str) -> Optional[StrikeSelection]:
+        """
+        The precomputed pick for a side.
+
+        Args:
+            option_type (str): 'CE' or 'PE'.
+
+        Returns:
+            Optional[StrikeSelection]: The pick, or None if no option qualifies yet.
+        """
+        return self._best.get(option_type)
@@ -2,12 +2,17 @@ from typing import List, Dict, Optional
 from datetime import datetime, time as dt_time
 from loguru import logger
 from trading_bot.event import MarketEvent
+from trading_bot.broker.expiry_calendar import ExpiryCalendar
 
 class ZoneCalculator:
     """Enhanced zone calculator for Nifty Small SL Algo strategy"""
     
-    def __init__(self, buffer: float = 2.5):
+    def __init__(self, buffer: float = 2.5, zone_time: dt_time = dt_time(9, 16),
+                 calendar: Optional[ExpiryCalendar] = None, underlying: str = 'NIFTY'):
         self.buffer = buffer  # ±2.5 points for zone calculation
+        self.zone_time = zone_time  # zones are taken from the first tick at or after this time
+        self.calendar = calendar or ExpiryCalendar()  # rule-based expiries unless a scrip master is loaded
+        self.underlying = underlying
         self.zones_calculated = False
         self.setup_complete = False
         self.atm_strike = None
@@ -50,8 +55,8 @@ class ZoneCalculator:
             return
         
         try:
-            # Find ATM strike (nearest 50 multiple)
-            self.atm_strike = round(self.index_ltp / 50) * 50
+            # Find ATM strike (nearest listed strike, or strike step multiple)
+            self.atm_strike = self.nearest_strike(self.index_ltp)
             
             # Calculate zones based on INDEX LTP ± 2.5 points
             self.zones = {
@@ -71,6 +76,33 @@ class ZoneCalculator:
         except Exception as e:
             logger.error(f"Failed to calculate zones: {e}")
     
+    def should_calculate_zones(self, current_time: dt_time) -> bool:
+        """True for the first tick at or after the zone time until zones are calculated"""
+        return not self.zones_calculated and current_time >= self.zone_time
+    
+    def calculate_zones_at_916(self, index_price: float) -> Dict[str, float]:
+        """Calculate zones from the index price at the zone time, in MainStrategy's format"""
+        self.index_ltp = index_price
+        self.atm_strike = self.nearest_strike(index_price)
+        self.zones = {
+            'upper': index_price + self.buffer,
+            'middle': index_price,
+            'lower': index_price - self.buffer
+        }
+        self.zones_calculated = True
+        self.setup_complete = True
+        logger.info(f"Zones calculated at {index_price:.2f} - Upper: {self.zones['upper']:.2f}, "
+                    f"Lower: {self.zones['lower']:.2f}, ATM Strike: {self.atm_strike}")
+        return {
+            'upper_zone': self.zones['upper'],
+            'middle_zone': self.zones['middle'],
+            'lower_zone': self.zones['lower']
+        }
+    
+    def nearest_strike(self, price: float) -> float:
+        """ATM strike of the underlying for a price, from the calendar's listed strikes or strike step"""
+        return self.calendar.atm_strike(self.underlying, price)
+    
     def get_zone_signal(self, current_price: float) -> Optional[str]:
         """Get trading signal based on zone crossing"""
         if not self.zones_calculated:
@@ -85,21 +117,13 @@ class ZoneCalculator:
             return None  # No signal in middle zone
     
     def get_option_symbol(self, signal_type: str) -> Optional[str]:
-        """Get option symbol based on signal type"""
+        """ATM option trading symbol of the nearest expiry for a CE_ENTRY/PE_ENTRY signal"""
         if not self.atm_strike:
             return None
-        
-        # Get current week expiry (simplified - you may need to enhance this)
-        current_date = datetime.now()
-        
-        # For now, using a simplified symbol format
-        # You'll need to implement proper symbol generation based on your broker's format
-        if signal_type == 'CE_ENTRY':
-            return f"NIFTY{current_date.strftime('%y%m%d')}{self.atm_strike}CE"
-        elif signal_type == 'PE_ENTRY':
-            return f"NIFTY{current_date.strftime('%y%m%d')}{self.atm_strike}PE"
-        
-        return None
+        option_type = {'CE_ENTRY': 'CE', 'PE_ENTRY': 'PE'}.get(signal_type)
+        if option_type is None:
+            return None
+        return self.calendar.tsym(self.underlying, self.atm_strike, option_type)
     
     def is_setup_complete(self) -> bool:
         """Check if zone setup is complete"""
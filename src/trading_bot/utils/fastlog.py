@@ -0,0 +1,278 @@
+"""
+Low-overhead binary logging for hot paths (ticks, order updates).
+
+A call site is declared once with a format template and called with raw
+arguments; the call appends ``(time_ns, site_id, args)`` to an in-memory ring
+buffer and returns. Formatting never happens on the hot path: a background
+writer drains the ring into a compact binary file (marshal-encoded arguments)
+and ``python -m trading_bot.utils.fastlog <file>`` decodes it back into JSON
+lines. Sites can be rate-limited so chatty tick-level messages cost one clock
+read and a comparison when suppressed.
+"""
+import argparse
+import json
+import marshal
+import os
+import struct
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from loguru import logger
+
+MAGIC = b'FLOG1\n'
+_FRAME = struct.Struct('<qHI')  # time_ns, site id, payload length
+_SITE_DEF = 0xFFFF             # frame carrying a site definition instead of a record
+LEVELS = {'TRACE': 5, 'DEBUG': 10, 'INFO': 20, 'SUCCESS': 25, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50}
+
+
+class LogSite:
+    """
+    One logging call site. Create with ``FastLog.site`` and call with the template arguments.
+
+    Args:
+        sink (FastLog): Owning log.
+        site_id (int): Index in the owning log's site table.
+        name (str): Site name, e.g. ``'data.tick'``.
+        template (str): ``str.format`` template using ``{}`` placeholders.
+        level (str): Loguru level name.
+        every (float): Minimum seconds between recorded calls (0 records every call).
+        echo (bool): Also forward recorded calls to loguru (formatted lazily by loguru).
+    """
+    __slots__ = ('sink', 'site_id', 'name', 'template', 'level', 'every_ns', 'echo',
+                 'enabled', 'suppressed', '_next_ns')
+
+    def __init__(self, sink: 'FastLog', site_id: int, name: str, template: str, level: str,
+                 every: float, echo: bool) -> None:
+        self.sink = sink
+        self.site_id = site_id
+        self.name = name
+        self.template = template
+        self.level = level
+        self.every_ns = int(every * 1e9)
+        self.echo = echo
+        self.enabled = True
+        self.suppressed = 0
+        self._next_ns = 0
+
+    def __call__(self, *args: Any) -> None:
+        if not self.enabled:
+            return
+        now = time.time_ns()
+        if now < self._next_ns:
+            self.suppressed += 1
+            return
+        self._next_ns = now + self.every_ns
+        self.sink.ring.append((now, self.site_id, args))
+        if self.echo:
+            logger.log(self.level, self.template, *args)
+
+
+class FastLog:
+    """
+    Ring buffer of raw log records with a background binary writer.
+
+    Args:
+        capacity (int): Records held in memory; the oldest are dropped when full.
+        flush_interval (float): Seconds between writer drains.
+    """
+    def __init__(self, capacity: int = 100_000, flush_interval: float = 0.5) -> None:
+        """
+        Initialize the log (the writer is not started).
+
+        Args:
+            capacity (int): Records held in memory; the oldest are dropped when full.
+            flush_interval (float): Seconds between writer drains.
+        """
+        self.ring: deque = deque(maxlen=capacity)
+        self.flush_interval = flush_interval
+        self.sites: List[LogSite] = []
+        self.min_level = LEVELS['DEBUG']
+        self.path: Optional[str] = None
+        self._file = None
+        self._written_sites = set()
+        self._reported_suppressed: Dict[int, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._stats_site = self.site('fastlog.suppressed', "{} suppressed {} calls", level='DEBUG')
+
+    def site(self, name: str, template: str, level: str = 'DEBUG', every: float = 0.0, echo: bool = False) -> LogSite:
+        """
+        Declare a call site.
+
+        Args:
+            name (str): Site name, e.g. ``'data.tick'``.
+            template (str): ``str.format`` template using ``{}`` placeholders.
+            level (str): Loguru level name.
+            every (float): Minimum seconds between recorded calls (0 records every call).
+            echo (bool): Also forward recorded calls to loguru.
+
+        Returns:
+            LogSite: Callable site.
+        """
+        with self._lock:
+            site = LogSite(self, len(self.sites), name, template, level, every, echo)
+            site.enabled = LEVELS.get(level, 0) >= self.min_level
+            self.sites.append(site)
+            return site
+
+    def set_level(self, level: str) -> None:
+        """
+        Enable only sites at or above a level.
+
+        Args:
+            level (str): Loguru level name.
+        """
+        self.min_level = LEVELS.get(level, 0)
+        for site in self.sites:
+            site.enabled = LEVELS.get(site.level, 0) >= self.min_level
+
+    def start(self, log_dir: str = 'logs') -> str:
+        """
+        Open today's binary log and start the background writer.
+
+        Args:
+            log_dir (str): Directory for ``fastlog_YYYYMMDD.bin``.
+
+        Returns:
+            str: Path being written.
+        """
+        if self._thread and self._thread.is_alive():
+            return self.path
+        os.makedirs(log_dir, exist_ok=True)
+        self.path = os.path.join(log_dir, f"fastlog_{datetime.now().strftime('%Y%m%d')}.bin")
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        self._file = open(self.path, 'ab')
+        if new_file:
+            self._file.write(MAGIC)
+        # Every run re-declares its sites; ids are only stable within a run
+        self._written_sites = set()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="FastLogWriter")
+        self._thread.start()
+        return self.path
+
+    def stop(self) -> None:
+        """Drain the ring, flush and close the file."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write every buffered record to the file.
+
+        Returns:
+            int: Records written.
+        """
+        with self._lock:
+            if self._file is None:
+                return 0
+            self._report_suppressed()
+            ring, out, written = self.ring, [], 0
+            while ring:
+                try:
+                    ts, site_id, args = ring.popleft()
+                except IndexError:
+                    break
+                if site_id not in self._written_sites:
+                    site = self.sites[site_id]
+                    definition = marshal.dumps((site_id, site.name, site.template, site.level))
+                    out.append(_FRAME.pack(0, _SITE_DEF, len(definition)) + definition)
+                    self._written_sites.add(site_id)
+                payload = self._encode(args)
+                out.append(_FRAME.pack(ts, site_id, len(payload)) + payload)
+                written += 1
+            if out:
+                self._file.write(b''.join(out))
+                self._file.flush()
+            return written
+
+    def _report_suppressed(self) -> None:
+        for site in self.sites:
+            reported = self._reported_suppressed.get(site.site_id, 0)
+            if site.suppressed > reported:
+                self.ring.append((time.time_ns(), self._stats_site.site_id, (site.name, site.suppressed - reported)))
+                self._reported_suppressed[site.site_id] = site.suppressed
+
+    @staticmethod
+    def _encode(args: tuple) -> bytes:
+        try:
+            return marshal.dumps(args)
+        except ValueError:
+            # Objects marshal cannot encode (datetimes, dataclasses) are stored as their repr
+            return marshal.dumps(tuple(a if type(a) in (int, float, str, bool, type(None)) else repr(a) for a in args))
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Decode a fastlog file.
+
+    Args:
+        path (str): File written by FastLog.
+
+    Yields:
+        Dict[str, Any]: ``time`` (epoch ns), ``level``, ``site``, ``message`` and ``args`` per record.
+    """
+    sites: Dict[int, tuple] = {}
+    with open(path, 'rb') as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a fastlog file")
+        while True:
+            header = f.read(_FRAME.size)
+            if len(header) < _FRAME.size:
+                return
+            ts, site_id, length = _FRAME.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return  # truncated tail from a crash
+            if site_id == _SITE_DEF:
+                definition = marshal.loads(payload)
+                sites[definition[0]] = definition[1:]
+                continue
+            name, template, level = sites.get(site_id, (f"site{site_id}", None, 'INFO'))
+            args = marshal.loads(payload)
+            try:
+                message = template.format(*args) if template else ' '.join(map(str, args))
+            except (IndexError, KeyError, ValueError):
+                message = f"{template} {args!r}"
+            yield {'time': ts, 'level': level, 'site': name, 'message': message, 'args': list(args)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Decode fastlog files to JSON lines on stdout."""
+    parser = argparse.ArgumentParser(description="Decode fastlog binary logs to JSON lines")
+    parser.add_argument('files', nargs='+', help="fastlog_*.bin files")
+    parser.add_argument('--site', action='append', help="Only records from this site (repeatable)")
+    parser.add_argument('--level', default=None, help="Minimum level")
+    args = parser.parse_args(argv)
+
+    min_level = LEVELS.get(args.level.upper(), 0) if args.level else 0
+    out = sys.stdout
+    for path in args.files:
+        for record in read_records(path):
+            if args.site and record['site'] not in args.site:
+                continue
+            if LEVELS.get(record['level'], 0) < min_level:
+                continue
+            record['time'] = datetime.fromtimestamp(record['time'] / 1e9).isoformat(timespec='microseconds')
+            out.write(json.dumps(record, default=str) + "\n")
+
+
+# Process-wide fast log; sites are declared at import time by the modules that use them
+fastlog = FastLog()
+
+if __name__ == '__main__':
+    main()
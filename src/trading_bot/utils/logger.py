@@ -2,19 +2,26 @@ import sys
 import os
 from datetime import datetime
 from loguru import logger
+from trading_bot.utils.fastlog import fastlog
 
-def setup_logger(log_dir: str = "logs", log_level: str = "INFO") -> None:
+def setup_logger(log_dir: str = "logs", log_level: str = "INFO", fast_path: bool = True) -> None:
     """
     Sets up structured logging for the trading bot using Loguru.
     Logs are written in JSON format to both console and a daily rotating file.
+    Hot-path call sites (ticks, order updates) additionally go to the binary
+    fastlog ring, drained to ``fastlog_YYYYMMDD.bin`` by a background writer.
 
     Args:
         log_dir (str): Directory to store log files.
         log_level (str): Logging level (e.g., 'INFO', 'DEBUG').
+        fast_path (bool): Start the fastlog background writer.
     """
     os.makedirs(log_dir, exist_ok=True)
     log_file = os.path.join(log_dir, f"trading_bot_{datetime.now().strftime('%Y%m%d')}.log")
     logger.remove()
     logger.add(sys.stdout, level=log_level, serialize=True, enqueue=True)
     logger.add(log_file, level=log_level, serialize=True, rotation="1 day", retention="7 days", enqueue=True)
+    fastlog.set_level(log_level)
+    if fast_path:
+        fastlog.start(log_dir)
     logger.info("Structured logger initialized.") 
\ No newline at end of file
@@ -0,0 +1,326 @@
+"""
+Indexed queries over the serialized Loguru JSON logs.
+
+``build_index`` makes one pass over a ``trading_bot_YYYYMMDD.log`` file and
+writes a sidecar ``.idx.npz`` with the byte offset, timestamp, level and module
+of every record plus an order-id -> record map. Queries then bisect the
+timestamps and seek straight to matching records, streaming them one line at a
+time. Indexes are extended incrementally as the log grows.
+
+Usage::
+
+    python -m trading_bot.utils.logquery logs/trading_bot_20250801.log --order 25080100001
+    python -m trading_bot.utils.logquery logs/trading_bot_20250801.log --level ERROR --from 10:02 --to 10:05
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime, time as dt_time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import numpy as np
+
+INDEX_VERSION = 1
+LEVEL_NAMES = {5: 'TRACE', 10: 'DEBUG', 20: 'INFO', 25: 'SUCCESS', 30: 'WARNING', 40: 'ERROR', 50: 'CRITICAL'}
+LEVEL_NUMBERS = {name: no for no, name in LEVEL_NAMES.items()}
+
+# Order identifiers as they appear in gateway, risk and order-update messages and in event reprs
+ORDER_ID_PATTERN = re.compile(
+    r"(?:order_uuid|broker_order_id|norenordno|pending_order_id|order_id)['\"]?\s*[:=]\s*['\"]?([A-Za-z0-9_-]{4,})"
+    r"|Order placed successfully: ([A-Za-z0-9_-]+)"
+    r"|\b([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})\b"
+)
+ORDER_ID_KEYS = ('order_uuid', 'broker_order_id', 'norenordno', 'order_id')
+
+
+def extract_order_ids(record: Dict[str, Any]) -> List[str]:
+    """
+    Order ids mentioned in a log record's message or extra fields.
+
+    Args:
+        record (Dict[str, Any]): The ``record`` part of a serialized Loguru line.
+
+    Returns:
+        List[str]: Distinct ids in order of appearance.
+    """
+    found = []
+    for match in ORDER_ID_PATTERN.finditer(record.get('message', '')):
+        value = next(group for group in match.groups() if group)
+        if value != 'None' and value not in found:
+            found.append(value)
+    extra = record.get('extra') or {}
+    for key in ORDER_ID_KEYS:
+        value = extra.get(key)
+        if value and str(value) not in found:
+            found.append(str(value))
+    return found
+
+
+def index_path(log_path: str) -> str:
+    """Sidecar index path for a log file."""
+    return log_path + '.idx.npz'
+
+
+class LogIndex:
+    """
+    In-memory form of a sidecar index.
+
+    Attributes:
+        offsets (np.ndarray): Byte offset of each record.
+        timestamps (np.ndarray): Epoch seconds of each record.
+        levels (np.ndarray): Loguru level number of each record.
+        modules (np.ndarray): Index into ``module_names`` of each record.
+        module_names (List[str]): Logger names (``record['name']``).
+        order_ids (np.ndarray): Sorted order ids, one entry per (id, record) pair.
+        order_records (np.ndarray): Record number for each ``order_ids`` entry.
+        indexed_bytes (int): Bytes of the log covered by the index.
+    """
+    def __init__(self, offsets, timestamps, levels, modules, module_names, order_ids, order_records, indexed_bytes):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self.levels = np.asarray(levels, dtype=np.int16)
+        self.modules = np.asarray(modules, dtype=np.int32)
+        self.module_names = list(module_names)
+        order = np.argsort(np.asarray(order_ids, dtype=str), kind='stable')
+        self.order_ids = np.asarray(order_ids, dtype=str)[order]
+        self.order_records = np.asarray(order_records, dtype=np.int64)[order]
+        self.indexed_bytes = int(indexed_bytes)
+        # Sink threads can interleave records slightly out of time order; these bound the search
+        self._prefix_max = np.maximum.accumulate(self.timestamps) if len(self.timestamps) else self.timestamps
+        self._suffix_min = np.minimum.accumulate(self.timestamps[::-1])[::-1] if len(self.timestamps) else self.timestamps
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def time_range(self, start: Optional[float], end: Optional[float]) -> range:
+        """
+        Record numbers that can fall within [start, end].
+
+        Args:
+            start (Optional[float]): Epoch seconds, or None for the beginning.
+            end (Optional[float]): Epoch seconds, or None for the end.
+
+        Returns:
+            range: Candidate record numbers (filter by timestamp for exact results).
+        """
+        lo = int(np.searchsorted(self._prefix_max, start, side='left')) if start is not None else 0
+        hi = int(np.searchsorted(self._suffix_min, end, side='right')) if end is not None else len(self)
+        return range(lo, max(lo, hi))
+
+    def records_for_order(self, order_id: str) -> np.ndarray:
+        """
+        Record numbers mentioning an order id.
+
+        Args:
+            order_id (str): Order id.
+
+        Returns:
+            np.ndarray: Ascending record numbers.
+        """
+        lo = np.searchsorted(self.order_ids, order_id, side='left')
+        hi = np.searchsorted(self.order_ids, order_id, side='right')
+        return np.unique(self.order_records[lo:hi])
+
+    def save(self, path: str) -> None:
+        """Write the index (no pickled objects) atomically."""
+        tmp = path + '.tmp.npz'
+        np.savez(
+            tmp,
+            version=np.array(INDEX_VERSION),
+            offsets=self.offsets, timestamps=self.timestamps, levels=self.levels, modules=self.modules,
+            module_names=np.asarray(self.module_names, dtype=str),
+            order_ids=self.order_ids, order_records=self.order_records,
+            indexed_bytes=np.array(self.indexed_bytes)
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['LogIndex']:
+        """Read an index, or None if missing or from another version."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version']) != INDEX_VERSION:
+                    return None
+                return cls(
+                    data['offsets'], data['timestamps'], data['levels'], data['modules'],
+                    data['module_names'].tolist(), data['order_ids'], data['order_records'],
+                    int(data['indexed_bytes'])
+                )
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def build_index(log_path: str, rebuild: bool = False) -> LogIndex:
+    """
+    Create or extend the sidecar index for a log file.
+
+    Only bytes past the previously indexed length are read; the index is rebuilt
+    from scratch if the log shrank (rotated or truncated).
+
+    Args:
+        log_path (str): Serialized Loguru log.
+        rebuild (bool): Ignore any existing index.
+
+    Returns:
+        LogIndex: The up-to-date index.
+    """
+    size = os.path.getsize(log_path)
+    existing = None if rebuild else LogIndex.load(index_path(log_path))
+    if existing is not None and existing.indexed_bytes > size:
+        existing = None
+    if existing is not None and existing.indexed_bytes == size:
+        return existing
+
+    offsets = existing.offsets.tolist() if existing is not None else []
+    timestamps = existing.timestamps.tolist() if existing is not None else []
+    levels = existing.levels.tolist() if existing is not None else []
+    modules = existing.modules.tolist() if existing is not None else []
+    module_names = existing.module_names if existing is not None else []
+    module_ids = {name: i for i, name in enumerate(module_names)}
+    order_ids = existing.order_ids.tolist() if existing is not None else []
+    order_records = existing.order_records.tolist() if existing is not None else []
+    start = existing.indexed_bytes if existing is not None else 0
+
+    indexed = start
+    with open(log_path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # partial line still being written; pick it up next time
+            record_offset, offset = offset, offset + len(line)
+            indexed = offset
+            try:
+                record = json.loads(line)['record']
+            except (ValueError, KeyError, TypeError):
+                continue
+            number = len(offsets)
+            offsets.append(record_offset)
+            timestamps.append(record['time']['timestamp'])
+            levels.append(record['level']['no'])
+            name = record.get('name') or record.get('module') or ''
+            if name not in module_ids:
+                module_ids[name] = len(module_names)
+                module_names.append(name)
+            modules.append(module_ids[name])
+            for order_id in extract_order_ids(record):
+                order_ids.append(order_id)
+                order_records.append(number)
+
+    index = LogIndex(offsets, timestamps, levels, modules, module_names, order_ids, order_records, indexed)
+    index.save(index_path(log_path))
+    return index
+
+
+def query(log_path: str, start: Optional[float] = None, end: Optional[float] = None,
+          min_level: Optional[int] = None, module: Optional[str] = None, order_id: Optional[str] = None,
+          text: Optional[str] = None, index: Optional[LogIndex] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream matching records, seeking directly to them via the index.
+
+    Args:
+        log_path (str): Serialized Loguru log.
+        start (Optional[float]): Epoch seconds lower bound (inclusive).
+        end (Optional[float]): Epoch seconds upper bound (inclusive).
+        min_level (Optional[int]): Minimum Loguru level number.
+        module (Optional[str]): Logger name prefix, e.g. ``trading_bot.execution``.
+        order_id (Optional[str]): Only records mentioning this order id.
+        text (Optional[str]): Substring the message must contain.
+        index (Optional[LogIndex]): Index to use; built or refreshed if omitted.
+
+    Yields:
+        Dict[str, Any]: Parsed serialized lines (``text`` and ``record``).
+    """
+    if index is None:
+        index = build_index(log_path)
+    if not len(index):
+        return
+
+    span = index.time_range(start, end)
+    candidates = np.arange(span.start, span.stop)
+    if order_id is not None:
+        candidates = np.intersect1d(candidates, index.records_for_order(order_id), assume_unique=True)
+
+    mask = np.ones(len(candidates), dtype=bool)
+    ts = index.timestamps[candidates]
+    if start is not None:
+        mask &= ts >= start
+    if end is not None:
+        mask &= ts <= end
+    if min_level is not None:
+        mask &= index.levels[candidates] >= min_level
+    if module is not None:
+        wanted = [i for i, name in enumerate(index.module_names) if name == module or name.startswith(module + '.')]
+        mask &= np.isin(index.modules[candidates], wanted)
+    candidates = candidates[mask]
+
+    with open(log_path, 'rb') as f:
+        position = -1
+        for number in candidates:
+            offset = int(index.offsets[number])
+            if offset != position:
+                f.seek(offset)
+            line = f.readline()
+            position = offset + len(line)
+            entry = json.loads(line)
+            if text is not None and text not in entry['record'].get('message', ''):
+                continue
+            yield entry
+
+
+def parse_time(value: Optional[str], day: datetime) -> Optional[float]:
+    """
+    Parse ``HH:MM[:SS]`` (on the log's day) or an ISO timestamp into epoch seconds.
+
+    Args:
+        value (Optional[str]): Time text.
+        day (datetime): Local date the log covers.
+
+    Returns:
+        Optional[float]: Epoch seconds, or None if value is None.
+    """
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return datetime.combine(day.date(), dt_time.fromisoformat(value)).timestamp()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Query one or more serialized log files from the command line."""
+    parser = argparse.ArgumentParser(description="Indexed queries over serialized trading bot logs")
+    parser.add_argument('files', nargs='+', help="logs/trading_bot_YYYYMMDD.log files")
+    parser.add_argument('--order', help="Records mentioning this order id (uuid or broker order number)")
+    parser.add_argument('--level', help="Minimum level, e.g. ERROR")
+    parser.add_argument('--from', dest='start', help="Start time, HH:MM[:SS] on the log's day or ISO")
+    parser.add_argument('--to', dest='end', help="End time, HH:MM[:SS] on the log's day or ISO")
+    parser.add_argument('--module', help="Logger name prefix, e.g. trading_bot.execution")
+    parser.add_argument('--grep', help="Substring the message must contain")
+    parser.add_argument('--format', choices=['text', 'json'], default='text', help="Output the formatted text or the raw JSON line")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild indexes from scratch")
+    parser.add_argument('--stats', action='store_true', help="Print index statistics instead of records")
+    args = parser.parse_args(argv)
+
+    min_level = LEVEL_NUMBERS[args.level.upper()] if args.level else None
+    out = sys.stdout
+    for path in args.files:
+        index = build_index(path, rebuild=args.rebuild)
+        if args.stats:
+            levels = {LEVEL_NAMES.get(int(no), str(no)): int(n) for no, n in zip(*np.unique(index.levels, return_counts=True))}
+            out.write(json.dumps({
+                'file': path, 'records': len(index), 'levels': levels,
+                'modules': len(index.module_names), 'order_ids': int(len(np.unique(index.order_ids)))
+            }) + "\n")
+            continue
+        if not len(index):
+            continue
+        day = datetime.fromtimestamp(float(index.timestamps[0]))
+        for entry in query(path, parse_time(args.start, day), parse_time(args.end, day), min_level,
+                           args.module, args.order, args.grep, index=index):
+            out.write(entry['text'] if args.format == 'text' else json.dumps(entry) + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('streamlit')
+from dashboard.backtest_viewer import calculate_cumulative_metrics
+
+def loop_metrics(trades):
+    """Reference: the viewer's original per-pair loop, booking P&L on the exit, with a running-peak drawdown"""
+    pnl = [0.0] * len(trades)
+    for i in range(0, len(trades) - 1, 2):
+        pnl[i + 1] = (trades['avg_fill_price'].iloc[i + 1] - trades['avg_fill_price'].iloc[i]) * trades['filled_quantity'].iloc[i]
+    cumulative, drawdown, total, peak = [], [], 0.0, 0.0
+    for value in pnl:
+        total += value
+        peak = max(peak, total)
+        cumulative.append(total)
+        drawdown.append(total - peak)
+    return pnl, cumulative, drawdown
+
+def test_cumulative_metrics_match_the_loop():
+    trades = pd.DataFrame({
+        'timestamp': pd.date_range('2024-07-01 09:20', periods=9, freq='10min'),
+        'avg_fill_price': [100.0, 105.0, 50.0, 47.0, 80.0, 78.0, 60.0, 70.0, 90.0],
+        'filled_quantity': [50, 50, 25, 25, 50, 50, 75, 75, 50],
+    })  # four long round trips and an unmatched entry
+
+    result = calculate_cumulative_metrics(trades)
+
+    pnl, cumulative, drawdown = loop_metrics(trades)
+    assert result['trade_pnl'].tolist() == pytest.approx(pnl)
+    assert result['cumulative_pnl'].tolist() == pytest.approx(cumulative)
+    assert result['drawdown'].tolist() == pytest.approx(drawdown)
+    assert min(drawdown) < 0
+    assert result['cumulative_trades'].tolist() == list(range(1, 10))
@@ -0,0 +1,81 @@
+import io
+import zipfile
+from datetime import date
+from loguru import logger
+from trading_bot.broker.expiry_calendar import ExpiryCalendar, format_tsym, load_scrip_master, parse_scrip_master
+from trading_bot.strategy.zone_calculator import ZoneCalculator
+
+MASTER = """Exchange,Token,LotSize,Symbol,TradingSymbol,Expiry,Instrument,OptionType,StrikePrice,TickSize,
+NFO,35003,75,NIFTY,NIFTY23OCT25C24500,23-OCT-2025,OPTIDX,CE,24500,0.05,
+NFO,35004,75,NIFTY,NIFTY23OCT25P24500,23-OCT-2025,OPTIDX,PE,24500,0.05,
+NFO,35101,75,NIFTY,NIFTY28OCT25C24500,28-OCT-2025,OPTIDX,CE,24500,0.05,
+NFO,35201,75,NIFTY,NIFTY04NOV25C24500,04-NOV-2025,OPTIDX,CE,24500,0.05,
+NFO,35011,75,NIFTY,NIFTY28OCT25F,28-OCT-2025,FUTIDX,XX,0,0.05,
+NFO,40001,35,BANKNIFTY,BANKNIFTY28OCT25C55000,28-OCT-2025,OPTIDX,CE,55000,0.05,
+"""
+
+def test_rule_expiries_skip_weekends_and_holidays():
+    calendar = ExpiryCalendar(holidays=[date(2025, 10, 21)], weekdays={'NIFTY': 'TUE'}, weekly=['NIFTY'])
+    assert calendar.expiry('NIFTY', date(2025, 10, 15)) == date(2025, 10, 20)  # Tuesday holiday -> Monday
+    assert calendar.expiry('NIFTY', date(2025, 10, 21)) == date(2025, 10, 28)  # moved expiry already past
+    assert calendar.expiry('NIFTY', date(2025, 10, 28)) == date(2025, 10, 28)
+    assert calendar.expiry('NIFTY', date(2025, 10, 15), monthly=True) == date(2025, 10, 28)
+    assert calendar.expiry('BANKNIFTY', date(2025, 10, 29)) == date(2025, 11, 25)  # monthly only
+    assert calendar.expiry('BANKNIFTY', date(2025, 12, 31)) == date(2026, 1, 27)
+
+def test_rule_symbols_are_memoized_per_session():
+    calendar = ExpiryCalendar()
+    day = date(2025, 10, 22)
+    contract = calendar.contract('NIFTY', 24500, 'CE', day)
+    assert contract.tsym == format_tsym('NIFTY', date(2025, 10, 28), 24500, 'CE') == 'NIFTY28OCT25C24500'
+    assert contract.token is None
+    assert calendar.contract('NIFTY', 24500, 'CE', day) is contract
+    assert calendar.tsym('NIFTY', 24500, 'PE', date(2025, 10, 29)) == 'NIFTY04NOV25P24500'
+
+def test_scrip_master_is_authoritative():
+    contracts = parse_scrip_master(MASTER)
+    assert len(contracts) == 5  # the future is skipped
+    calendar = ExpiryCalendar(weekdays={'NIFTY': 'TUE'}, contracts=contracts)
+    # Listed Thursday expiry wins over the Tuesday rule
+    contract = calendar.contract('NIFTY', 24500, 'PE', date(2025, 10, 20))
+    assert (contract.tsym, contract.token, contract.lot_size) == ('NIFTY23OCT25P24500', '35004', 75)
+    assert calendar.expiry('NIFTY', date(2025, 10, 20), monthly=True) == date(2025, 10, 28)
+    assert calendar.contract('NIFTY', 25000, 'CE', date(2025, 10, 20)) is None  # not listed
+    assert calendar.strikes('NIFTY', date(2025, 10, 23)) == [24500.0]
+
+def test_load_scrip_master_reads_the_zip(tmp_path):
+    path = tmp_path / 'NFO_symbols.txt.zip'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('NFO_symbols.txt', MASTER)
+    path.write_bytes(buffer.getvalue())
+    contracts = load_scrip_master(str(path), url=None, underlyings=['BANKNIFTY'])
+    assert [c.tsym for c in contracts] == ['BANKNIFTY28OCT25C55000']
+    assert load_scrip_master(str(tmp_path / 'missing.zip'), url=None) == []
+
+def test_zone_calculator_builds_the_expiry_symbol():
+    calculator = ZoneCalculator()
+    calculator.calculate_zones_at_916(24512.0)
+    expiry = calculator.calendar.expiry('NIFTY')
+    assert expiry.weekday() <= 1 and expiry >= date.today()
+    assert calculator.get_option_symbol('CE_ENTRY') == format_tsym('NIFTY', expiry, 24500, 'CE')
+    assert calculator.get_option_symbol('HOLD') is None
+
+def test_atm_strike_follows_the_underlying():
+    calculator = ZoneCalculator(underlying='BANKNIFTY')
+    calculator.calculate_zones_at_916(55060.0)
+    assert calculator.atm_strike == 55100
+    listed = ExpiryCalendar(weekdays={'NIFTY': 'TUE'}, contracts=parse_scrip_master(MASTER))
+    assert listed.atm_strike('NIFTY', 24720.0, date(2025, 10, 20)) == 24500.0  # the only listed strike
+    assert ExpiryCalendar(strike_steps={'NIFTY': 100}).atm_strike('NIFTY', 24560.0) == 24600
+
+def test_unlisted_contract_is_warned_once_per_session():
+    calendar = ExpiryCalendar(weekdays={'NIFTY': 'TUE'}, contracts=parse_scrip_master(MASTER))
+    warnings = []
+    sink = logger.add(warnings.append, level='WARNING')
+    try:
+        for _ in range(3):
+            assert calendar.tsym('NIFTY', 25000, 'CE', date(2025, 10, 20)) is None
+    finally:
+        logger.remove(sink)
+    assert len(warnings) == 1
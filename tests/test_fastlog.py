@@ -0,0 +1,85 @@
+import json
+import time
+from datetime import datetime
+import pytest
+from trading_bot.utils.fastlog import FastLog, read_records, main
+
+@pytest.fixture
+def log(tmp_path):
+    """Fixture with a started fast log writing into tmp_path"""
+    log = FastLog(capacity=1000, flush_interval=60)
+    log.start(str(tmp_path))
+    yield log
+    log.stop()
+
+def test_round_trip(log):
+    tick = log.site('data.tick', "Tick: {} @ {}")
+    order = log.site('data.order_update', "Order update: {}", level='INFO')
+    tick('NIFTY', 25000.5)
+    order({'norenordno': '123', 'status': 'COMPLETE'})
+    order(datetime(2025, 8, 1, 9, 15))
+    assert log.flush() == 3
+    records = list(read_records(log.path))
+    assert [r['site'] for r in records] == ['data.tick', 'data.order_update', 'data.order_update']
+    assert records[0]['message'] == "Tick: NIFTY @ 25000.5"
+    assert records[0]['args'] == ['NIFTY', 25000.5]
+    assert records[1]['args'][0] == {'norenordno': '123', 'status': 'COMPLETE'}
+    assert records[2]['args'][0] == repr(datetime(2025, 8, 1, 9, 15))
+    assert records[0]['time'] <= records[2]['time']
+
+def test_rate_limit_reports_suppressed(log):
+    tick = log.site('data.tick', "Tick: {} @ {}", every=60.0)
+    for i in range(100):
+        tick('NIFTY', i)
+    log.flush()
+    log.flush()
+    records = list(read_records(log.path))
+    assert [r['args'] for r in records if r['site'] == 'data.tick'] == [['NIFTY', 0]]
+    assert [r['message'] for r in records if r['site'] == 'fastlog.suppressed'] == ["data.tick suppressed 99 calls"]
+
+def test_level_gating(log):
+    debug = log.site('debug.site', "{}", level='DEBUG')
+    log.set_level('INFO')
+    debug('hidden')
+    late = log.site('late.debug', "{}", level='DEBUG')
+    late('hidden')
+    assert log.flush() == 0
+
+def test_ring_drops_oldest_when_full(tmp_path):
+    log = FastLog(capacity=3)
+    site = log.site('s', "{}")
+    for i in range(5):
+        site(i)
+    log.start(str(tmp_path))
+    log.stop()
+    assert [r['args'][0] for r in read_records(log.path)] == [2, 3, 4]
+
+def test_truncated_tail_is_ignored(log):
+    site = log.site('s', "{}")
+    site(1)
+    site(2)
+    log.flush()
+    with open(log.path, 'ab') as f:
+        f.write(b'\x01\x02\x03')
+    assert [r['args'][0] for r in read_records(log.path)] == [1, 2]
+
+def test_decoder_cli(log, capsys):
+    log.site('a', "A {}")(1)
+    log.site('b', "B {}", level='WARNING')(2)
+    log.flush()
+    main([log.path, '--level', 'warning'])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])['message'] == "B 2"
+
+def test_hot_path_cost():
+    log = FastLog(capacity=1_000_000)
+    site = log.site('data.tick', "Tick: {} @ {}")
+    limited = log.site('data.tick_limited', "Tick: {} @ {}", every=60.0)
+    n = 100_000
+    started = time.perf_counter()
+    for i in range(n):
+        site('NIFTY', 25000.0)
+        limited('NIFTY', 25000.0)
+    per_call_ns = (time.perf_counter() - started) / (2 * n) * 1e9
+    assert per_call_ns < 5000
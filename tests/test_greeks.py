@@ -0,0 +1,92 @@
+import math
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from trading_bot.pricing.chain import OptionChain
+from trading_bot.pricing.greeks import bs_greeks, bs_price, implied_vol, norm_cdf
+
+def test_norm_cdf_matches_erf():
+    x = np.linspace(-8, 8, 161)
+    exact = np.array([0.5 * math.erfc(-v / math.sqrt(2)) for v in x])
+    assert np.max(np.abs(norm_cdf(x) - exact)) < 1e-7
+
+def test_textbook_values_and_parity():
+    g = bs_greeks(100.0, 100.0, 1.0, 0.05, 0.2, [True, False])
+    assert g['price'] == pytest.approx([10.4506, 5.5735], abs=1e-4)
+    assert g['delta'] == pytest.approx([0.6368, -0.3632], abs=1e-4)
+    assert g['gamma'] == pytest.approx(0.018762, abs=1e-6)
+    assert g['vega'] == pytest.approx(0.37524, abs=1e-5)
+    assert g['theta'] == pytest.approx([-6.414 / 365, -1.658 / 365], abs=1e-4)
+    assert g['price'][0] - g['price'][1] == pytest.approx(100 - 100 * math.exp(-0.05), abs=1e-9)
+
+@pytest.mark.parametrize('sigma', [0.08, 0.15, 0.45])
+@pytest.mark.parametrize('days', [0.5, 3, 30])
+def test_implied_vol_round_trip(sigma, days):
+    t = days / 365
+    strikes = np.tile(np.arange(23500.0, 25501.0, 50.0), 2)
+    is_call = np.repeat([True, False], strikes.size // 2)
+    prices = bs_price(24512.0, strikes, t, 0.065, sigma, is_call)
+    intrinsic = np.where(is_call, 24512.0 - strikes * np.exp(-0.065 * t), strikes * np.exp(-0.065 * t) - 24512.0)
+    quoted = prices - np.maximum(intrinsic, 0) > 0.05  # at least one tick of time value
+    iv = implied_vol(prices, 24512.0, strikes, t, 0.065, is_call)
+    assert quoted.sum() > 10
+    assert np.max(np.abs(iv[quoted] - sigma)) < 1e-5
+
+def test_implied_vol_rejects_arbitrage_prices():
+    iv = implied_vol([0.0, 5.0, 150.0, 8.0], 100.0, [100.0, 90.0, 100.0, 100.0], 0.1, 0.0, True)
+    # No value, below intrinsic, above the spot, and a normal price
+    assert np.isnan(iv[:3]).all() and np.isfinite(iv[3])
+    assert isinstance(implied_vol(8.0, 100.0, 100.0, 0.1, 0.0, True), float)
+
+def make_chain(now):
+    chain = OptionChain('NIFTY', now + timedelta(days=3), time_step=60)
+    for strike in range(24000, 25001, 50):
+        for kind in ('CE', 'PE'):
+            chain.add(f"NIFTY{strike}{kind}", strike, kind)
+    chain.on_tick('NIFTY', 24512.0)
+    t = chain.years_to_expiry(now)
+    for symbol, row in chain.index.items():
+        chain.on_tick(symbol, float(bs_price(24512.0, chain._strike[row], t, 0.065, 0.13, chain._is_call[row])))
+    return chain
+
+def test_chain_reprices_only_invalidated_rows():
+    now = datetime(2024, 7, 22, 10, 0)
+    chain = make_chain(now)
+    assert chain.refresh(now) == len(chain) == 42
+    assert chain.refresh(now) == 0
+
+    chain.on_tick('NIFTY24500CE', 140.0)
+    chain.on_tick('NIFTY24500CE', 141.0)
+    chain.on_tick('BANKNIFTY', 52000.0)  # not this chain
+    assert chain.refresh(now + timedelta(seconds=5)) == 1
+    chain.on_tick('NIFTY', 24520.0)
+    assert chain.refresh(now + timedelta(seconds=10)) == 42
+    # Time decay reprices everything once the step has passed
+    assert chain.refresh(now + timedelta(seconds=75)) == 42
+
+def test_chain_greeks_selection_and_net_delta():
+    now = datetime(2024, 7, 22, 10, 0)
+    chain = make_chain(now)
+    atm = chain.greeks('NIFTY24500CE', now)
+    assert atm['iv'] == pytest.approx(0.13, abs=1e-6)
+    assert 0.5 < atm['delta'] < 0.6
+    calls = [row for row in chain.rows(now=now) if row['type'] == 'CE']
+    closest = min(calls, key=lambda row: abs(row['delta'] - 0.5))['symbol']
+    assert chain.select_by_delta(0.5, 'CE', now) == closest
+    assert closest in {'NIFTY24500CE', 'NIFTY24550CE'}
+    assert chain.select_by_delta(-0.25, 'PE', now).endswith('PE')
+    net = chain.net_greeks({'NIFTY24500CE': 50, 'NIFTY24500PE': 50}, now)
+    assert net['delta'] == pytest.approx(50 * (atm['delta'] + chain.greeks('NIFTY24500PE', now)['delta']))
+    assert chain.greeks('UNKNOWN') is None
+
+def test_incremental_reprice_is_cheap():
+    now = datetime(2024, 7, 22, 10, 0)
+    chain = make_chain(now)
+    chain.refresh(now)
+    started = time.perf_counter()
+    for i in range(200):
+        chain.on_tick('NIFTY24500CE', 140.0 + (i % 2))
+        chain.refresh(now)
+    per_tick = (time.perf_counter() - started) / 200
+    assert per_tick < 0.002
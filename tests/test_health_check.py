@@ -0,0 +1,84 @@
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta
+from trading_bot.event import MarketEvent
+from trading_bot.event_queue import EventQueue
+from trading_bot.alerts.notifier import notifier
+from trading_bot.monitor.health_check import SystemHealthMonitor
+from trading_bot.monitor.latency import latency
+
+class FeedStub:
+    """Minimal stand-in for DataHandler's feed state"""
+    def __init__(self, last_tick_time, connected=True):
+        self.symbols = ['NIFTY', 'BANKNIFTY']
+        self.last_tick_time = last_tick_time
+        self.ws_connected = connected
+
+@pytest.fixture
+def alerts(monkeypatch):
+    """Fixture capturing alerts instead of sending them"""
+    sent = []
+    monkeypatch.setattr(notifier, 'alert', lambda message, priority, **kwargs: sent.append((message, priority)))
+    return sent
+
+@pytest.fixture
+def monitor():
+    """Fixture with a monitor using short thresholds"""
+    monitor = SystemHealthMonitor({'feed_stale_seconds': 10, 'queue_lag_seconds': 0.5, 'health_interval': 0.05})
+    yield monitor
+    monitor.stop()
+
+def flush(monitor):
+    if monitor._alert_sender:
+        monitor._alert_sender.submit(lambda: None).result(timeout=5)
+
+def test_feed_staleness(monitor, alerts):
+    now = datetime.now()
+    feed = FeedStub({'NIFTY': now - timedelta(seconds=60), 'BANKNIFTY': now}, connected=False)
+    result = monitor.check_feed(feed)
+    flush(monitor)
+    assert result['stale_symbols'] == ['NIFTY']
+    messages = [message for message, _ in alerts]
+    assert any('NIFTY' in message and 'stale' in message for message in messages)
+    assert any('disconnected' in message for message in messages)
+
+def test_queue_lag_and_loop_stall(monitor, alerts):
+    queue = EventQueue()
+    assert queue.peek() is None
+    queue.put(MarketEvent(symbol='NIFTY', timestamp=datetime.now() - timedelta(seconds=2), price=1.0))
+    result = monitor.check_queues({'event': queue}, last_loop_time=time.monotonic() - 10)
+    flush(monitor)
+    assert queue.qsize() == 1
+    assert result['queue_depth'] == {'event': 1}
+    assert result['queue_lag_seconds']['event'] >= 2
+    assert len(alerts) == 2
+
+def test_ack_latency_uses_interval_mean(monitor, alerts):
+    latency.reset()
+    try:
+        assert monitor.check_ack_latency() == {}
+        latency._record('send', 'ack', 2_000_000_000)
+        assert monitor.check_ack_latency()['ack_latency_ms'] == pytest.approx(2000)
+        assert monitor.check_ack_latency() == {}
+        flush(monitor)
+        assert len(alerts) == 1
+    finally:
+        latency.reset()
+
+def test_alerts_do_not_block_caller(monitor, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(notifier, 'alert', lambda *args, **kwargs: release.wait(5))
+    started = time.perf_counter()
+    monitor.send_alert("slow channel", "WARNING")
+    monitor.send_alert("slow channel", "WARNING")  # rate limited
+    assert time.perf_counter() - started < 0.5
+    release.set()
+
+def test_background_thread_runs_checks(monitor, alerts):
+    queue = EventQueue()
+    monitor.start(queues={'event': queue}, last_loop_time=time.monotonic)
+    deadline = time.time() + 5
+    while not monitor.latest and time.time() < deadline:
+        time.sleep(0.01)
+    assert monitor.latest['queue_depth'] == {'event': 0}
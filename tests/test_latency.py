@@ -0,0 +1,81 @@
+import pytest
+from trading_bot.event_queue import EventQueue
+from trading_bot.broker.data_handler import DataHandler
+from trading_bot.strategy.main_strategy import MainStrategy
+from trading_bot.risk.manager import RiskManager
+from trading_bot.execution.paper_gateway import PaperExecutionGateway
+from trading_bot.monitor.latency import LatencyHistogram, LatencyRecorder, latency
+
+@pytest.fixture
+def recorder():
+    """Fixture resetting the shared recorder around each test"""
+    latency.reset()
+    latency.enabled = True
+    yield latency
+    latency.reset()
+
+def test_histogram_percentiles_within_precision():
+    hist = LatencyHistogram()
+    for value in range(1, 100001):
+        hist.record(value * 1000)
+    assert hist.count == 100000
+    for q in (50, 90, 99):
+        expected = q * 1000 * 1000
+        assert abs(hist.percentile(q) - expected) / expected < 0.02
+    assert hist.percentile(100) == hist.max == 100000 * 1000
+    assert hist.min == 1000
+
+def test_histogram_small_values_exact_and_huge_values_clamped():
+    hist = LatencyHistogram()
+    for value in (0, 5, 127):
+        hist.record(value)
+    hist.record(1 << 60)
+    assert hist.percentile(25) == 0
+    assert hist.percentile(50) == 5
+    assert hist.percentile(75) == 127
+    assert hist.percentile(100) == 1 << 60
+
+def test_histogram_merge():
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(1000)
+    b.record(3000)
+    a.merge(b)
+    assert a.count == 2 and a.min == 1000 and a.max == 3000
+
+def test_recorder_disabled_is_noop():
+    rec = LatencyRecorder(enabled=False)
+    stamps = rec.start()
+    rec.stamp(stamps, 'enqueue')
+    assert stamps is None and rec.hops == {}
+
+def test_pipeline_records_each_hop(recorder, tmp_path):
+    event_queue, signal_queue, order_queue, execution_queue = (EventQueue() for _ in range(4))
+    handler = DataHandler(None, event_queue, ['NIFTY'])
+    strategy = MainStrategy(event_queue, signal_queue)
+    risk = RiskManager(signal_queue, order_queue, db_path=str(tmp_path / 'test.db'))
+    gateway = PaperExecutionGateway(order_queue, execution_queue)
+
+    handler.on_tick({'tsym': 'NIFTY', 'lp': '25000'})
+    event = event_queue.get(block=False)
+    strategy.process_event(event)
+    strategy._generate_signal(event, 'CE', 'TEST')
+    risk.process_signal(signal_queue.get(block=False))
+    gateway.process_order(order_queue.get(block=False))
+    fill = execution_queue.get(block=False)
+
+    assert list(fill.latency) == ['recv', 'enqueue', 'strategy', 'signal', 'risk', 'order', 'send', 'fill']
+    summary = recorder.summary()
+    assert list(summary) == [
+        'recv->enqueue', 'enqueue->strategy', 'strategy->signal', 'signal->risk',
+        'risk->order', 'order->send', 'send->fill', 'recv=>fill'
+    ]
+    assert all(hop['count'] == 1 for hop in summary.values())
+    # The market event's own trail is not extended by the signal branch
+    assert list(event.latency) == ['recv', 'enqueue', 'strategy']
+
+def test_dump_writes_summary(recorder, tmp_path):
+    assert recorder.dump(str(tmp_path)) is None
+    stamps = recorder.start()
+    recorder.finish(stamps, 'fill')
+    path = recorder.dump(str(tmp_path))
+    assert path and 'recv=>fill' in open(path).read()
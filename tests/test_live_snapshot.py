@@ -0,0 +1,40 @@
+import os
+import pytest
+from trading_bot.monitor.snapshot import SnapshotPublisher, SnapshotReader
+
+@pytest.fixture
+def publisher():
+    """Fixture with a publisher on a per-test segment"""
+    publisher = SnapshotPublisher(name=f"tb_test_{os.getpid()}", size=4096, interval=60.0)
+    yield publisher
+    publisher.close()
+
+def test_reader_sees_nothing_before_first_publish(publisher):
+    reader = SnapshotReader(publisher.name)
+    assert reader.read() is None
+    reader.close()
+
+def test_publish_and_read(publisher):
+    reader = SnapshotReader(publisher.name)
+    assert publisher.publish({'daily_pnl': 12.5, 'queues': {'event': 3}})
+    state = reader.read()
+    assert state['daily_pnl'] == 12.5
+    assert state['queues'] == {'event': 3}
+    assert state['published_at'] > 0
+    assert publisher.publish({'daily_pnl': -1.0})
+    assert reader.read()['daily_pnl'] == -1.0
+    reader.close()
+
+def test_maybe_publish_is_rate_limited(publisher):
+    calls = []
+    collect = lambda: calls.append(1) or {'n': len(calls)}
+    assert publisher.maybe_publish(collect)
+    assert not publisher.maybe_publish(collect)
+    assert len(calls) == 1
+
+def test_oversized_snapshot_is_skipped(publisher):
+    assert not publisher.publish({'blob': 'x' * 8192})
+
+def test_reader_requires_running_session():
+    with pytest.raises(FileNotFoundError):
+        SnapshotReader("tb_test_missing_segment")
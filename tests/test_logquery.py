@@ -0,0 +1,90 @@
+import json
+from datetime import datetime
+import pytest
+from trading_bot.utils.logquery import build_index, query, extract_order_ids, index_path, main, LEVEL_NUMBERS
+
+DAY = datetime(2025, 8, 1)
+
+def log_line(hh_mm_ss, level, name, message):
+    ts = datetime.combine(DAY.date(), datetime.strptime(hh_mm_ss, '%H:%M:%S').time()).timestamp()
+    record = {
+        'level': {'name': level, 'no': LEVEL_NUMBERS[level]},
+        'message': message, 'name': name, 'module': name.rsplit('.', 1)[-1], 'extra': {},
+        'time': {'repr': hh_mm_ss, 'timestamp': ts}
+    }
+    return json.dumps({'text': f"{hh_mm_ss} | {level} | {message}\n", 'record': record}) + "\n"
+
+@pytest.fixture
+def log_file(tmp_path):
+    """Fixture with a small serialized log covering one order's lifecycle"""
+    path = tmp_path / 'trading_bot_20250801.log'
+    path.write_text(''.join([
+        log_line('10:00:00', 'INFO', 'trading_bot.strategy.main_strategy', "Generated CE signal: UPPER_ZONE_CROSS at price 25002.5"),
+        log_line('10:01:00', 'INFO', 'trading_bot.execution.gateway', "Order placed successfully: 25080100001 at 101.5"),
+        log_line('10:02:30', 'ERROR', 'trading_bot.execution.gateway', "Order placement failed: {'stat': 'Not_Ok'}"),
+        log_line('10:02:29', 'WARNING', 'trading_bot.risk.manager', "Max trades per day reached"),
+        log_line('10:03:00', 'INFO', 'trading_bot.broker.data_handler', "Order update: {'norenordno': '25080100001', 'status': 'COMPLETE'}"),
+        log_line('10:06:00', 'ERROR', 'trading_bot.position.manager', "Error closing position"),
+    ]))
+    return str(path)
+
+def messages(entries):
+    return [entry['record']['message'] for entry in entries]
+
+def test_extract_order_ids():
+    assert extract_order_ids({'message': "ExecutionEvent(order_uuid='3f2a9c4e-1b2d-4e5f-8a9b-0c1d2e3f4a5b', broker_order_id='PAPER_ORDER')"}) == [
+        '3f2a9c4e-1b2d-4e5f-8a9b-0c1d2e3f4a5b', 'PAPER_ORDER'
+    ]
+    assert extract_order_ids({'message': "OrderEvent(order_uuid=None)"}) == []
+    assert extract_order_ids({'message': "x", 'extra': {'order_uuid': 'abc123'}}) == ['abc123']
+
+def test_query_by_order(log_file):
+    found = messages(query(log_file, order_id='25080100001'))
+    assert found == [
+        "Order placed successfully: 25080100001 at 101.5",
+        "Order update: {'norenordno': '25080100001', 'status': 'COMPLETE'}"
+    ]
+
+def test_query_by_time_and_level(log_file):
+    start = datetime(2025, 8, 1, 10, 2).timestamp()
+    end = datetime(2025, 8, 1, 10, 5).timestamp()
+    assert messages(query(log_file, start=start, end=end, min_level=LEVEL_NUMBERS['WARNING'])) == [
+        "Order placement failed: {'stat': 'Not_Ok'}", "Max trades per day reached"
+    ]
+    # The out-of-order 10:02:29 record is still found when the window starts between the two
+    start = datetime(2025, 8, 1, 10, 2, 29).timestamp()
+    end = datetime(2025, 8, 1, 10, 2, 29).timestamp()
+    assert messages(query(log_file, start=start, end=end)) == ["Max trades per day reached"]
+
+def test_query_by_module_and_text(log_file):
+    assert len(list(query(log_file, module='trading_bot.execution'))) == 2
+    assert messages(query(log_file, module='trading_bot.execution', text='failed')) == ["Order placement failed: {'stat': 'Not_Ok'}"]
+    assert list(query(log_file, module='trading_bot.exec')) == []
+
+def test_index_extends_incrementally(log_file):
+    index = build_index(log_file)
+    assert len(index) == 6
+    with open(log_file, 'a') as f:
+        f.write(log_line('10:07:00', 'INFO', 'trading_bot.execution.gateway', "Order placed successfully: 25080100002 at 99.0"))
+        f.write('{"text": "partial')
+    index = build_index(log_file)
+    assert len(index) == 7
+    assert messages(query(log_file, order_id='25080100002')) == ["Order placed successfully: 25080100002 at 99.0"]
+    with open(log_file, 'a') as f:
+        f.write('"}\n')
+    assert len(build_index(log_file)) == 7  # completed garbage line is skipped, not indexed
+
+def test_rebuilds_when_log_shrinks(log_file):
+    build_index(log_file)
+    with open(log_file, 'w') as f:
+        f.write(log_line('09:15:00', 'INFO', 'trading_bot.utils.logger', "Structured logger initialized."))
+    assert len(build_index(log_file)) == 1
+
+def test_cli(log_file, capsys):
+    main([log_file, '--level', 'error', '--from', '10:02', '--to', '10:05'])
+    out = capsys.readouterr().out
+    assert out == "10:02:30 | ERROR | Order placement failed: {'stat': 'Not_Ok'}\n"
+    main([log_file, '--stats'])
+    stats = json.loads(capsys.readouterr().out)
+    assert stats['records'] == 6 and stats['levels']['ERROR'] == 2
+    assert index_path(log_file).endswith('.idx.npz')
@@ -0,0 +1,65 @@
+import math
+import urllib.request
+import pytest
+from trading_bot.monitor.metrics import MetricsRegistry, MetricsServer, RateGauge, CONTENT_TYPE
+
+@pytest.fixture
+def metrics():
+    """Fixture with a fresh registry"""
+    return MetricsRegistry()
+
+def test_counter_and_labels(metrics):
+    rejects = metrics.counter('rejects', "Rejected orders")
+    fills = metrics.counter('fills', "Fills by status", ['status'])
+    rejects.inc()
+    rejects.inc(2)
+    fills.labels('FILLED').inc()
+    assert fills.labels('FILLED') is fills.labels('FILLED')
+    text = metrics.render()
+    assert '# TYPE rejects counter' in text
+    assert 'rejects_total 3\n' in text
+    assert 'fills_total{status="FILLED"} 1\n' in text
+    assert text.endswith('# EOF\n')
+
+def test_register_returns_existing_family(metrics):
+    assert metrics.counter('x', "X") is metrics.counter('x', "X")
+    with pytest.raises(ValueError):
+        metrics.gauge('x', "X")
+
+def test_gauge_callback_and_failure(metrics):
+    depth = metrics.gauge('depth', "Queue depth")
+    depth.set_function(lambda: 7)
+    broken = metrics.gauge('broken', "Raises")
+    broken.set_function(lambda: 1 / 0)
+    assert depth.get() == 7
+    assert math.isnan(broken.get())
+    assert 'depth 7\n' in metrics.render()
+
+def test_histogram_buckets_are_cumulative(metrics):
+    hist = metrics.histogram('latency_seconds', "Latency", buckets=(0.001, 0.01))
+    for value in (0.0005, 0.005, 0.005, 1.0):
+        hist.observe(value)
+    text = metrics.render()
+    assert 'latency_seconds_bucket{le="0.001"} 1\n' in text
+    assert 'latency_seconds_bucket{le="0.01"} 3\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4\n' in text
+    assert 'latency_seconds_count 4\n' in text
+    assert hist.count == 4
+
+def test_rate_gauge(metrics):
+    ticks = metrics.counter('ticks', "Ticks")
+    rate = RateGauge(ticks)
+    rate._last_time -= 2.0
+    ticks.inc(10)
+    assert rate() == pytest.approx(5.0, rel=0.05)
+
+def test_http_endpoint(metrics):
+    metrics.counter('ticks', "Ticks").inc(5)
+    server = MetricsServer(metrics, port=0)
+    server.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'] == CONTENT_TYPE
+            assert 'ticks_total 5' in response.read().decode()
+    finally:
+        server.stop()
@@ -0,0 +1,166 @@
+import queue
+from datetime import datetime
+import pytest
+from trading_bot.event import ExecutionEvent, SignalEvent
+from trading_bot.persistence.database import Database
+from trading_bot.position.manager import PositionManager
+from trading_bot.position.mtm import MarkToMarket
+from trading_bot.risk.manager import RiskManager
+
+CE = 'NIFTY28OCT25C24500'
+PE = 'NIFTY28OCT25P24500'
+
+def recompute(mtm):
+    """Unrealized P&L summed from scratch over the book arrays"""
+    return sum(float(mtm._quantity[row] * (mtm._last[row] - mtm._avg[row])) for row in mtm._index.values())
+
+def test_incremental_equity_matches_a_full_recompute():
+    mtm = MarkToMarket(capital=100000.0)
+    mtm.on_fill(CE, 'BUY', 75, 100.0)
+    mtm.on_fill(PE, 'SELL', 150, 80.0)
+    mtm.on_tick(CE, 110.0)
+    mtm.on_tick(PE, 70.0)
+    mtm.on_fill(CE, 'BUY', 75, 120.0)      # average up to 110
+    assert mtm.on_fill(PE, 'BUY', 50, 75.0) == pytest.approx(250.0)
+    mtm.on_tick(CE, 105.0)
+    assert mtm.unrealized == pytest.approx(recompute(mtm))
+    assert mtm.equity == pytest.approx(100000.0 + 250.0 + recompute(mtm))
+    assert mtm.on_fill(CE, 'SELL', 150, 105.0) == pytest.approx(-750.0)
+    assert CE not in mtm._index
+    assert mtm.snapshot().open_symbols == 1
+
+def test_high_water_mark_and_drawdown_follow_equity():
+    mtm = MarkToMarket(capital=1000.0)
+    mtm.on_fill(CE, 'BUY', 10, 100.0)
+    mtm.on_tick(CE, 110.0)
+    mtm.on_tick(CE, 104.0)
+    assert mtm.high_water == pytest.approx(1100.0)
+    assert mtm.drawdown == pytest.approx(60.0)
+    mtm.on_tick(CE, 108.0)
+    assert mtm.drawdown == pytest.approx(20.0)
+    assert mtm.max_drawdown == pytest.approx(60.0)
+
+def test_ticks_publish_at_most_once_per_interval_but_fills_publish_at_once():
+    mtm = MarkToMarket(publish_interval=60.0)
+    published = []
+    mtm.subscribe(published.append)
+    mtm.on_fill(CE, 'BUY', 75, 100.0)
+    for price in (101.0, 102.0, 103.0):
+        assert mtm.on_tick(CE, price) is None
+    assert mtm.on_tick('NIFTY', 24500.0) is None  # not held
+    mtm.on_fill(PE, 'BUY', 75, 50.0)
+    assert len(published) == 2
+    assert published[-1].unrealized == pytest.approx(75 * 3.0)
+
+def test_kill_switch_fires_once_on_the_tick_that_trips_it():
+    kills = []
+    mtm = MarkToMarket(capital=10000.0, max_drawdown=500.0, publish_interval=60.0, on_kill=kills.append)
+    mtm.on_fill(CE, 'BUY', 100, 100.0)
+    assert mtm.on_tick(CE, 96.0) is None
+    snapshot = mtm.on_tick(CE, 95.0)
+    assert snapshot is not None and snapshot.killed
+    assert kills == [snapshot]
+    mtm.on_tick(CE, 90.0)
+    assert len(kills) == 1
+    mtm.reset_day()
+    assert not mtm.killed and mtm.drawdown == 0.0
+
+def test_state_round_trips_through_the_journal_snapshot():
+    mtm = MarkToMarket(capital=5000.0, max_drawdown=100.0)
+    mtm.on_fill(CE, 'BUY', 10, 100.0)
+    mtm.on_tick(CE, 120.0)
+    mtm.on_fill(PE, 'SELL', 20, 50.0)
+    mtm.on_fill(CE, 'SELL', 5, 115.0)
+    mtm.on_tick(CE, 90.0)
+    restored = MarkToMarket(capital=0.0, max_drawdown=100.0)
+    restored.restore_state(mtm.snapshot_state())
+    assert restored.equity == pytest.approx(mtm.equity)
+    assert restored.high_water == pytest.approx(mtm.high_water)
+    assert restored.killed == mtm.killed is True
+    restored.on_tick(PE, 40.0)
+    assert restored.unrealized == pytest.approx(recompute(restored))
+
+def test_paper_exit_without_a_side_closes_the_holding():
+    mtm = MarkToMarket()
+    mtm.on_fill(PE, 'SELL', 75, 80.0)
+    exit_fill = ExecutionEvent(symbol=PE, timestamp=datetime.now(), order_uuid='1', status='FILLED',
+                               filled_quantity=75, avg_fill_price=70.0)
+    assert mtm.on_execution(exit_fill) == pytest.approx(750.0)
+    assert not mtm._index
+
+def test_kill_halts_the_risk_manager_until_the_next_day(tmp_path):
+    signals, orders = queue.Queue(), queue.Queue()
+    risk = RiskManager(signals, orders, max_trades_per_day=10, max_daily_loss=1e9, db_path=str(tmp_path / 't.db'))
+    mtm = MarkToMarket(capital=10000.0, max_drawdown=100.0)
+    mtm.subscribe(risk.on_pnl)
+    mtm.on_fill(CE, 'BUY', 10, 100.0)
+    mtm.on_tick(CE, 89.0)
+    assert risk.halted == 'DRAWDOWN'
+    risk.process_signal(SignalEvent(symbol=CE, timestamp=datetime.now(), signal_type='LONG', strength=1.0,
+                                    info={'option_symbol': CE, 'premium': 89.0}))
+    assert orders.empty()
+    restored = RiskManager(queue.Queue(), queue.Queue(), db_path=str(tmp_path / 't.db'))
+    restored.restore_state(risk.snapshot_state())
+    assert restored.halted == 'DRAWDOWN'
+
+class FakeBroker:
+    def __init__(self):
+        self.placed = []
+
+    def place_order(self, order_details):
+        self.placed.append(order_details)
+        return {'stat': 'Ok', 'norenordno': f"B{len(self.placed)}"}
+
+    def cancel_order(self, order_id):
+        return {'stat': 'Ok'}
+
+def test_kill_on_a_fill_flattens_through_the_broker_and_books_the_exit(tmp_path, monkeypatch):
+    from trading_bot.__main__ import TradingBotOrchestrator
+    alerts = []
+    monkeypatch.setattr('trading_bot.__main__.send_alert', lambda message, priority='INFO': alerts.append(priority))
+    broker = FakeBroker()
+    bot = TradingBotOrchestrator.__new__(TradingBotOrchestrator)
+    bot._kill = None
+    bot.database = Database(str(tmp_path / 't.db'))
+    bot.position_manager = PositionManager(bot.database, broker, load_state=False)
+    bot.risk_manager = RiskManager(None, queue.Queue(), db_path=str(tmp_path / 'r.db'))
+    bot.mtm = MarkToMarket(capital=10000.0, max_drawdown=100.0, on_kill=bot._on_drawdown_kill)
+    bot.mtm.subscribe(bot.risk_manager.on_pnl)
+    fill = ExecutionEvent(symbol=CE, timestamp=datetime.now(), order_uuid='P1', status='FILLED',
+                          filled_quantity=75, avg_fill_price=100.0, info={'side': 'BUY'})
+    bot.risk_manager.on_execution(fill)
+    bot.mtm.on_execution(fill)
+    bot.position_manager.add_position(fill)
+    bot.position_manager.update_trailing_sl(CE, 98.0)
+    bot.mtm.on_tick(CE, 98.0)                   # -150 from the high trips the kill
+    assert bot._kill is not None and bot.risk_manager.halted == 'DRAWDOWN'
+    bot._flatten_on_kill()
+    assert not bot.position_manager.open_positions
+    exit_order = broker.placed[-1]
+    assert (exit_order['symbol'], exit_order['side'], exit_order['order_type'], exit_order['exchange']) == \
+        (CE, 'SELL', 'MKT', 'NFO')
+    assert bot.mtm.snapshot().open_symbols == 0
+    assert bot.mtm.realized == pytest.approx(-150.0)
+    assert bot.risk_manager.engine.total_pnl == pytest.approx(-150.0)
+    assert bot.database.get_system_state('SYSTEM_HALTED') == 'TRUE'
+    assert alerts == ['CRITICAL']
+
+def test_paper_kill_books_the_exit_without_a_broker_order(tmp_path, monkeypatch):
+    from trading_bot.__main__ import TradingBotOrchestrator
+    monkeypatch.setattr('trading_bot.__main__.send_alert', lambda message, priority='INFO': None)
+    broker = FakeBroker()
+    bot = TradingBotOrchestrator.__new__(TradingBotOrchestrator)
+    bot._kill = None
+    bot.database = Database(str(tmp_path / 't.db'))
+    bot.position_manager = PositionManager(bot.database, broker, load_state=False, paper=True)
+    bot.risk_manager = RiskManager(None, queue.Queue(), db_path=str(tmp_path / 'r.db'))
+    bot.mtm = MarkToMarket(capital=10000.0, max_drawdown=100.0, on_kill=bot._on_drawdown_kill)
+    fill = ExecutionEvent(symbol=CE, timestamp=datetime.now(), order_uuid='P1', status='FILLED',
+                          filled_quantity=75, avg_fill_price=100.0, info={'side': 'BUY'})
+    bot.mtm.on_execution(fill)
+    bot.position_manager.add_position(fill)
+    bot.position_manager.update_trailing_sl(CE, 98.0)
+    bot.mtm.on_tick(CE, 98.0)
+    bot._flatten_on_kill()
+    assert broker.placed == [] and not bot.position_manager.open_positions
+    assert bot.position_manager.daily_pnl == pytest.approx(-150.0) and bot.mtm.realized == pytest.approx(-150.0)
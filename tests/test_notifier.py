@@ -0,0 +1,150 @@
+import json
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from trading_bot.alerts.notifier import AlertNotifier
+
+class TelegramStubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests.append(payload)
+        time.sleep(self.server.delay)
+        status = 500 if self.server.failures_left > 0 else 200
+        self.server.failures_left -= 1
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, format, *args):
+        pass
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.connections += 1
+        self.wfile.write(b"220 stub\r\n")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            command = line.decode().strip().upper()
+            if command.startswith('DATA'):
+                self.wfile.write(b"354 go ahead\r\n")
+                body = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    body.append(data.decode())
+                self.server.messages.append(''.join(body))
+                self.wfile.write(b"250 queued\r\n")
+            elif command.startswith('QUIT'):
+                self.wfile.write(b"221 bye\r\n")
+                break
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+@pytest.fixture
+def telegram_stub():
+    """Fixture with a local stand-in for the Telegram Bot API"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TelegramStubHandler)
+    server.requests, server.delay, server.failures_left = [], 0.0, 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def smtp_stub():
+    """Fixture with a local plain SMTP server"""
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStubHandler)
+    server.daemon_threads = True
+    server.connections, server.messages = 0, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def make_notifier(monkeypatch, telegram_stub, smtp_stub, tmp_path):
+    """Factory for notifiers pointed at the stub servers"""
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'token')
+    monkeypatch.setenv('TELEGRAM_CHAT_ID', 'chat')
+    monkeypatch.setenv('TELEGRAM_API_URL', f"http://127.0.0.1:{telegram_stub.server_address[1]}")
+    monkeypatch.setenv('SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setenv('SMTP_PORT', str(smtp_stub.server_address[1]))
+    monkeypatch.setenv('SMTP_STARTTLS', 'false')
+    monkeypatch.setenv('EMAIL_USERNAME', 'bot@example.com')
+    monkeypatch.delenv('EMAIL_PASSWORD', raising=False)
+    monkeypatch.setenv('ALERT_EMAIL', 'ops@example.com')
+    created = []
+    def factory(**kwargs):
+        kwargs.setdefault('spill_path', str(tmp_path / 'spill.jsonl'))
+        kwargs.setdefault('retry_backoff', 0.01)
+        notifier = AlertNotifier(**kwargs)
+        created.append(notifier)
+        return notifier
+    yield factory
+    for notifier in created:
+        notifier.close(timeout=5)
+
+def test_alert_returns_before_slow_delivery(make_notifier, telegram_stub):
+    telegram_stub.delay = 0.5
+    notifier = make_notifier(batch_window=0.0)
+    started = time.perf_counter()
+    assert notifier.alert("square-off started", "CRITICAL")
+    assert time.perf_counter() - started < 0.1
+    assert notifier.flush(timeout=5)
+    assert 'square-off started' in telegram_stub.requests[0]['text']
+    assert telegram_stub.requests[0]['chat_id'] == 'chat'
+
+def test_batches_and_collapses_repeats(make_notifier, telegram_stub):
+    notifier = make_notifier(batch_window=0.3)
+    for _ in range(3):
+        notifier.alert("feed stale", "WARNING")
+    notifier.alert("queue backed up", "WARNING")
+    assert notifier.flush(timeout=5)
+    assert len(telegram_stub.requests) == 1
+    text = telegram_stub.requests[0]['text']
+    assert 'feed stale (x3)' in text and 'queue backed up' in text
+
+def test_repeats_within_dedup_window_are_suppressed(make_notifier, telegram_stub):
+    notifier = make_notifier(batch_window=0.0, dedup_seconds=60)
+    notifier.alert("feed stale", "WARNING")
+    assert notifier.flush(timeout=5)
+    notifier.alert("feed stale", "WARNING")
+    assert notifier.flush(timeout=5)
+    assert len(telegram_stub.requests) == 1
+
+def test_retries_then_delivers(make_notifier, telegram_stub, tmp_path):
+    telegram_stub.failures_left = 2
+    notifier = make_notifier(batch_window=0.0, max_retries=3)
+    notifier.alert("order rejected", "ERROR")
+    assert notifier.flush(timeout=5)
+    assert len(telegram_stub.requests) == 3
+    assert not (tmp_path / 'spill.jsonl').exists()
+
+def test_spills_after_retries_exhausted(make_notifier, telegram_stub, tmp_path):
+    telegram_stub.failures_left = 10
+    notifier = make_notifier(batch_window=0.0, max_retries=2)
+    notifier.alert("order rejected", "ERROR")
+    assert notifier.flush(timeout=5)
+    assert len(telegram_stub.requests) == 2
+    spilled = [json.loads(line) for line in open(tmp_path / 'spill.jsonl')]
+    assert spilled[0]['message'] == 'order rejected'
+    assert spilled[0]['spill_reason'] == 'telegram'
+
+def test_smtp_connection_is_reused(make_notifier, smtp_stub):
+    notifier = make_notifier(batch_window=0.0)
+    notifier.alert("first", "CRITICAL", telegram=False, email=True)
+    assert notifier.flush(timeout=5)
+    notifier.alert("second", "CRITICAL", telegram=False, email=True)
+    assert notifier.flush(timeout=5)
+    assert len(smtp_stub.messages) == 2
+    assert smtp_stub.connections == 1
+    assert 'second' in smtp_stub.messages[1]
+
+def test_close_delivers_queued_alerts(make_notifier, telegram_stub):
+    notifier = make_notifier(batch_window=5.0)
+    notifier.alert("shutting down", "WARNING")
+    notifier.close(timeout=5)
+    assert len(telegram_stub.requests) == 1
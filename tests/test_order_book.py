@@ -0,0 +1,190 @@
+import queue
+from datetime import datetime
+import pytest
+from trading_bot.event import OrderEvent
+from trading_bot.execution.gateway import ExecutionGateway
+from trading_bot.execution.order_book import (
+    ACK, CANCELLED, FILLED, NEW, PARTIAL, REJECTED, SENT, OrderBook
+)
+
+CE = 'NIFTY28OCT25C24500'
+
+def order(uuid='u1', quantity=150, info=None):
+    return OrderEvent(symbol=CE, timestamp=datetime.now(), order_type='LIMIT', side='BUY', quantity=quantity,
+                      price=100.0, order_uuid=uuid, info=info)
+
+def update(norenordno, status, **fields):
+    return dict(norenordno=norenordno, status=status, **fields)
+
+def test_lifecycle_through_partial_fills_with_lookups_by_uuid_and_broker_id():
+    book = OrderBook()
+    record = book.create(order())
+    assert record.state == NEW and record.is_open
+    book.sent('u1', 100.5)
+    book.acknowledged('u1', 'B1')
+    assert book.by_broker_id('B1') is record and record.state == ACK
+    book.filled('u1', 75, 100.4)
+    assert record.state == PARTIAL and record.filled_quantity == 75
+    assert book.filled('u1', 75, 100.4) is None   # not a new fill
+    book.filled('u1', 150, 100.45)
+    assert record.state == FILLED and not record.is_open
+    assert book.open_orders() == []
+    assert [e['state'] for e in book.history('u1')] == [NEW, SENT, ACK, PARTIAL, FILLED]
+
+def test_illegal_and_stale_transitions_are_ignored():
+    book = OrderBook()
+    book.create(order())
+    assert book.acknowledged('u1', 'B1') is None  # NEW cannot be acknowledged before it is sent
+    book.sent('u1')
+    book.rejected('u1', 'margin')
+    assert book.filled('u1', 150, 100.0) is None
+    assert book.cancelled('u1') is None
+    assert book.get('u1').state == REJECTED
+    assert book.get('u1').reason == 'margin'
+    assert book.sent('missing') is None
+
+def test_websocket_updates_drive_the_state_machine():
+    book = OrderBook()
+    book.create(order())
+    book.sent('u1')
+    # The update can beat the REST response; it is matched by the order tag
+    book.on_order_update(update('B1', 'OPEN', remarks='u1'))
+    assert book.get('u1').state == ACK and book.get('u1').broker_order_id == 'B1'
+    book.on_order_update(update('B1', 'OPEN', fillshares='50', avgprc='100.2'))
+    assert book.get('u1').state == PARTIAL
+    book.on_order_update(update('B1', 'COMPLETE', fillshares='150', avgprc='100.3'))
+    assert book.get('u1').state == FILLED and book.get('u1').avg_fill_price == 100.3
+    assert book.on_order_update(update('B1', 'OPEN')) is None
+
+def test_replaced_attempt_updates_do_not_touch_the_live_attempt():
+    book = OrderBook()
+    book.create(order())
+    book.sent('u1')
+    book.acknowledged('u1', 'B1')
+    book.sent('u1', 101.5)                  # cancel-and-replace re-send
+    book.acknowledged('u1', 'B2')
+    assert book.on_order_update(update('B1', 'CANCELED')) is None
+    assert book.get('u1').state == ACK
+    assert book.by_broker_id('B1') is book.by_broker_id('B2')
+
+def test_cancel_of_a_replaced_attempt_cannot_close_the_order_its_retry_fills():
+    book = OrderBook()
+    book.create(order())
+    book.sent('u1', 101.0)
+    book.acknowledged('u1', 'B1')
+    book.replacing('u1')                    # the gateway retires B1, then cancels it
+    assert book.on_order_update(update('B1', 'CANCELED', remarks='u1')) is None
+    assert book.get('u1').state == SENT
+    book.sent('u1', 102.0)
+    book.on_order_update(update('B2', 'OPEN', remarks='u1'))
+    book.acknowledged('u1', 'B2')
+    book.on_order_update(update('B2', 'COMPLETE', fillshares='150', avgprc='102.0'))
+    book.on_order_update(update('B1', 'CANCELED'))
+    record = book.get('u1')
+    assert (record.state, record.broker_order_id, record.price) == (FILLED, 'B2', 102.0)
+
+def test_orders_placed_outside_the_bot_are_tracked():
+    book = OrderBook()
+    book.on_order_update(update('X9', 'OPEN', tsym=CE, trantype='S', qty='75', prc='90.0'))
+    record = book.by_broker_id('X9')
+    assert record.side == 'SELL' and record.quantity == 75 and record.state == ACK
+    assert record.external
+    assert book.open_orders(external=False) == []
+
+def test_cancelling_pending_entries_leaves_stop_orders_alone(tmp_path):
+    from trading_bot.position.manager import PositionManager
+    api = FakeAPI()
+    book = OrderBook()
+    book.create(order('entry'))
+    book.sent('entry')
+    book.acknowledged('entry', 'B1')
+    book.on_order_update(update('SL1', 'TRIGGER_PENDING', tsym=CE, trantype='S', qty='75', prc='97.5'))
+    positions = PositionManager(database=None, api_wrapper=api, load_state=False, order_book=book)
+    assert list(positions.pending_orders) == ['entry']
+    assert positions.cancel_all_pending_orders() == 1
+    assert api.cancelled == ['B1']
+    assert not positions.cancel_pending_order('SL1')
+    assert book.by_broker_id('SL1').is_open
+
+def test_event_log_replays_to_the_same_book(tmp_path):
+    path = str(tmp_path / 'orders.jsonl')
+    book = OrderBook(log_path=path)
+    book.create(order('u1'))
+    book.sent('u1')
+    book.acknowledged('u1', 'B1')
+    book.create(order('u2'))
+    book.sent('u2')
+    book.acknowledged('u2', 'B2')
+    book.filled('u2', 150, 99.0)
+    book.close()
+    with open(path, 'a') as f:
+        f.write('{"uuid": "u1", "sta')          # torn write from a crash
+    restarted = OrderBook(log_path=path)
+    assert [o.order_uuid for o in restarted.open_orders()] == ['u1']
+    assert restarted.by_broker_id('B2').state == FILLED
+    restarted.cancelled('u1', 'USER')
+    restarted.close()
+    audit = OrderBook.replay(path)
+    assert [e['state'] for e in audit.history('u1')] == [NEW, SENT, ACK, CANCELLED]
+    assert [e['seq'] for e in OrderBook.read_events(path)] == list(range(1, 9))
+
+class FakeAPI:
+    def __init__(self):
+        self.cancelled = []
+        self.placed = 0
+
+    def get_quotes(self, exchange, token):
+        return {'stat': 'Ok', 'lp': '100.0'}
+
+    def place_prepared(self, payload):
+        self.placed += 1
+        return {'stat': 'Ok', 'norenordno': f"B{self.placed}"}
+
+    def get_order_status(self, order_id):
+        return {'status': 'COMPLETE'}
+
+    def cancel_order(self, order_id):
+        self.cancelled.append(order_id)
+        return {'stat': 'Ok'}
+
+def test_gateway_retry_ignores_the_cancelled_attempt(monkeypatch):
+    monkeypatch.setattr('trading_bot.execution.gateway.time.sleep', lambda s: None)
+    api = FakeAPI()
+    book = OrderBook()
+    statuses = iter([{'status': 'OPEN'}, {'status': 'COMPLETE', 'avgprc': '102.00'}])
+    api.get_order_status = lambda order_id: next(statuses)
+    cancel = api.cancel_order
+
+    def cancel_and_report(order_id):
+        book.on_order_update(update(order_id, 'CANCELED', remarks='u1'))  # websocket beats the retry
+        return cancel(order_id)
+    api.cancel_order = cancel_and_report
+    gateway = ExecutionGateway(queue.Queue(), queue.Queue(), api, order_book=book)
+    gateway.process_order(order('u1'))
+    record = book.get('u1')
+    assert (record.state, record.broker_order_id) == (FILLED, 'B2')
+
+def test_gateway_takes_the_fill_price_from_the_order_status(monkeypatch):
+    monkeypatch.setattr('trading_bot.execution.gateway.time.sleep', lambda s: None)
+    api, fills = FakeAPI(), queue.Queue()
+    api.get_order_status = lambda order_id: {'norenordno': order_id, 'status': 'COMPLETE', 'avgprc': '101.35'}
+    book = OrderBook()
+    ExecutionGateway(queue.Queue(), fills, api, order_book=book).process_order(order('u1'))
+    fill = fills.get_nowait()
+    assert (fill.status, fill.avg_fill_price, fill.broker_order_id) == ('FILLED', 101.35, 'B1')
+    assert book.get('u1').avg_fill_price == 101.35
+
+def test_gateway_cancels_the_pending_entry_only_while_it_is_open(monkeypatch):
+    monkeypatch.setattr('trading_bot.execution.gateway.time.sleep', lambda s: None)
+    api = FakeAPI()
+    book = OrderBook()
+    book.create(order('old'))
+    book.sent('old')
+    book.acknowledged('old', 'B0')
+    gateway = ExecutionGateway(queue.Queue(), queue.Queue(), api, order_book=book)
+    gateway.process_order(order('new', info={'cancel_pending': True, 'pending_order_id': 'old'}))
+    assert api.cancelled == ['B0']
+    assert book.get('old').state == CANCELLED
+    assert book.get('new').state == FILLED and book.get('new').broker_order_id == 'B1'
+    gateway.process_order(order('newer', info={'cancel_pending': True, 'pending_order_id': 'new'}))
+    assert api.cancelled == ['B0']  # 'new' already filled
@@ -0,0 +1,92 @@
+import queue
+from datetime import datetime, timedelta
+from trading_bot.event import MarketEvent, OrderEvent, SignalEvent
+from trading_bot.execution import gateway as gateway_module
+from trading_bot.execution.gateway import ExecutionGateway
+from trading_bot.execution.order_templates import OrderTemplates
+from trading_bot.risk.manager import RiskManager
+from trading_bot.strategy.main_strategy import MainStrategy
+
+def test_fire_patches_price_and_tag_only():
+    templates = OrderTemplates(quantity=75)
+    template = templates.arm('NIFTY28OCT25C24500')
+    payload = template.fire(101.23, 'uuid-1')
+    assert payload is template.payload
+    assert payload == {'buy_or_sell': 'B', 'product_type': 'M', 'exchange': 'NFO', 'tradingsymbol': 'NIFTY28OCT25C24500',
+                       'quantity': '75', 'discloseqty': '0', 'price_type': 'LMT', 'price': '101.25',
+                       'trigger_price': None, 'retention': 'DAY', 'remarks': 'uuid-1'}
+    assert template.fire(99.0)['price'] == '99.00' and payload['remarks'] == 'algo_trade'
+
+def test_get_reuses_armed_templates():
+    templates = OrderTemplates(quantity=75)
+    armed = templates.arm('NIFTY28OCT25P24500')
+    assert templates.get('NIFTY28OCT25P24500', 'BUY', 75) is armed
+    assert templates.get('NIFTY28OCT25P24500', 'BUY', 150) is not armed  # quantity changed: rebuilt
+    templates.get('NIFTY28OCT25P24500', 'SELL', 75)
+    assert (templates.hits, templates.misses, len(templates)) == (1, 2, 2)
+
+def test_strategy_arms_entries_at_zone_time():
+    templates = OrderTemplates()
+    strategy = MainStrategy(None, queue.Queue(), symbol='NIFTY', order_templates=templates)
+    open_ = datetime.now().replace(hour=9, minute=16, second=0, microsecond=0)
+    strategy.process_event(MarketEvent(symbol='NIFTY', timestamp=open_, price=24512.0))
+    ce, pe = strategy._armed['CE'], strategy._armed['PE']
+    assert ce.endswith('C24500') and pe.endswith('P24500') and len(templates) == 2
+
+    signals = queue.Queue()
+    strategy.signal_queue = signals
+    strategy.process_event(MarketEvent(symbol='NIFTY', timestamp=open_ + timedelta(seconds=1), price=24515.0))
+    signal = signals.get_nowait()
+    assert signal.info['option_symbol'] == ce
+    assert templates.get(ce, 'BUY', 1) is not None and templates.hits == 1
+
+class FakeBroker:
+    def __init__(self):
+        self.sent = []
+
+    def get_quotes(self, exchange, token):
+        return {'stat': 'Ok', 'lp': '100.0'}
+
+    def place_prepared(self, payload):
+        self.sent.append(dict(payload))
+        return {'stat': 'Ok', 'norenordno': '250001'}
+
+    def get_order_status(self, order_id):
+        return {'status': 'COMPLETE'}
+
+def test_gateway_fires_the_armed_template(monkeypatch):
+    monkeypatch.setattr(gateway_module.time, 'sleep', lambda seconds: None)
+    templates = OrderTemplates()
+    templates.arm('NIFTY28OCT25C24500')
+    broker, fills = FakeBroker(), queue.Queue()
+    gateway = ExecutionGateway(None, fills, broker, templates=templates)
+    gateway.process_order(OrderEvent(symbol='NIFTY28OCT25C24500', timestamp=datetime.now(), order_type='MARKET',
+                                     side='BUY', quantity=1, order_uuid='uuid-7'))
+    assert broker.sent[0]['price'] == '101.00' and broker.sent[0]['remarks'] == 'uuid-7'
+    assert templates.hits == 1 and fills.get_nowait().status == 'FILLED'
+
+def test_gateway_keeps_templates_armed_after_it_is_built(monkeypatch):
+    monkeypatch.setattr(gateway_module.time, 'sleep', lambda seconds: None)
+    templates, broker = OrderTemplates(), FakeBroker()
+    gateway = ExecutionGateway(None, queue.Queue(), broker, templates=templates)
+    templates.arm('NIFTY28OCT25C24500')
+    gateway.process_order(OrderEvent(symbol='NIFTY28OCT25C24500', timestamp=datetime.now(), order_type='MARKET',
+                                     side='BUY', quantity=1, order_uuid='uuid-8'))
+    assert gateway.templates is templates and templates.hits == 1
+
+def test_risk_manager_buys_the_signalled_option(tmp_path):
+    strategy_signals, orders = queue.Queue(), queue.Queue()
+    strategy = MainStrategy(None, strategy_signals, symbol='NIFTY')
+    open_ = datetime.now().replace(hour=9, minute=16, second=0, microsecond=0)
+    strategy.process_event(MarketEvent(symbol='NIFTY', timestamp=open_, price=24512.0))
+    strategy.process_event(MarketEvent(symbol='NIFTY', timestamp=open_ + timedelta(seconds=1), price=24509.0))
+    signal = strategy_signals.get_nowait()
+    RiskManager(None, orders, db_path=str(tmp_path / 'bot.db')).process_signal(signal)
+    order = orders.get_nowait()
+    assert (order.symbol, order.side) == (signal.info['option_symbol'], 'BUY')
+
+def test_risk_manager_blocks_an_option_signal_without_a_contract(tmp_path):
+    orders = queue.Queue()
+    signal = SignalEvent(symbol='NIFTY', timestamp=datetime.now(), signal_type='CE', info={'option_symbol': None})
+    RiskManager(None, orders, db_path=str(tmp_path / 'bot.db')).process_signal(signal)
+    assert orders.empty()
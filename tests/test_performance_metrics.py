@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from backtesting.performance_metrics import (
+    drawdown_series, excursions, lttb, pair_round_trips, pnl_by_hour, pnl_by_weekday,
+    sharpe_ratio, streaks, summarize
+)
+
+@pytest.fixture
+def fills():
+    """Fixture with two long round trips, one short, and a stray exit"""
+    timestamp = np.array([
+        '2024-07-01T09:20', '2024-07-01T09:30',   # long +5
+        '2024-07-01T10:05',                        # exit with no entry
+        '2024-07-02T11:00', '2024-07-02T11:10',   # short -2
+        '2024-07-03T14:00', '2024-07-03T14:30',   # long -1
+    ], dtype='datetime64[us]')
+    price = np.array([100.0, 105.0, 99.0, 50.0, 52.0, 80.0, 79.0])
+    quantity = np.ones(7)
+    is_entry = np.array([True, False, False, True, False, True, False])
+    direction = np.array([1, 1, 1, -1, -1, 1, 1])
+    return pair_round_trips(timestamp, price, quantity, is_entry, direction)
+
+def test_pair_round_trips(fills):
+    assert fills['entry_idx'].tolist() == [0, 3, 5]
+    assert fills['exit_idx'].tolist() == [1, 4, 6]
+    assert fills['pnl'].tolist() == [5.0, -2.0, -1.0]
+
+def test_drawdown_series():
+    drawdown, max_dd, longest = drawdown_series(np.array([0.0, 5.0, 3.0, 4.0, 6.0, 1.0]))
+    assert drawdown.tolist() == [0.0, 0.0, -2.0, -1.0, 0.0, -5.0]
+    assert max_dd == 5.0
+    assert longest == 2
+
+def test_streaks():
+    assert streaks(np.array([1.0, 2.0, -1.0, -1.0, -3.0, 4.0])) == (2, 3)
+    assert streaks(np.array([])) == (0, 0)
+
+def test_time_buckets(fills):
+    hourly = pnl_by_hour(fills['exit_time'], fills['pnl'])
+    assert hourly[9] == 5.0 and hourly[11] == -2.0 and hourly[14] == -1.0
+    weekday = pnl_by_weekday(fills['exit_time'], fills['pnl'])
+    assert weekday[:3].tolist() == [5.0, -2.0, -1.0]  # 2024-07-01 was a Monday
+
+def test_excursions():
+    path = np.array([100.0, 98.0, 104.0, 101.0, 97.0])
+    mae, mfe = excursions(path, np.array([0, 2]), np.array([3, 4]),
+                          np.array([100.0, 104.0]), np.array([1, -1]))
+    assert mae.tolist() == [-2.0, 0.0]
+    assert mfe.tolist() == [4.0, 7.0]
+
+def test_sharpe_ratio_undefined_for_flat_returns():
+    assert sharpe_ratio(np.array([1.0, 1.0, 1.0])) == 0.0
+
+def test_summarize(fills):
+    metrics = summarize(fills)
+    assert metrics['total_trades'] == 3
+    assert metrics['total_pnl'] == pytest.approx(2.0)
+    assert metrics['win_rate'] == pytest.approx(100 / 3)
+    assert metrics['max_drawdown'] == pytest.approx(3.0)
+    assert metrics['profit_factor'] == pytest.approx(5 / 3)
+    assert metrics['longest_loss_streak'] == 2
+    assert 'avg_mae' not in metrics
+
+def test_summarize_large_sweep():
+    rng = np.random.default_rng(7)
+    n = 400_000
+    timestamp = np.datetime64('2024-01-01T09:15') + np.arange(n).astype('timedelta64[m]')
+    is_entry = np.arange(n) % 2 == 0
+    round_trips = pair_round_trips(timestamp, rng.normal(100, 5, n), np.ones(n), is_entry)
+    metrics = summarize(round_trips, path_price=rng.normal(100, 5, n))
+    assert metrics['total_trades'] == n // 2
+    assert metrics['worst_mae'] <= 0 <= metrics['best_mfe']
+
+def test_lttb_keeps_endpoints_and_threshold_points():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 25.0) + np.random.default_rng(3).normal(0, 0.1, x.size)
+    kept = lttb(x, y, 50)
+    assert kept.size == 50
+    assert kept[0] == 0 and kept[-1] == x.size - 1
+    assert np.all(np.diff(kept) > 0)
+
+def test_lttb_keeps_the_spike():
+    y = np.zeros(500)
+    y[237] = 10.0
+    assert 237 in lttb(np.arange(500), y, 20)
+
+def test_lttb_passes_short_series_through():
+    x = np.arange(10)
+    assert lttb(x, x * 2.0, 10).tolist() == list(range(10))
+    assert lttb(x, x * 2.0, 50).tolist() == list(range(10))
@@ -0,0 +1,70 @@
+import pytest
+from datetime import datetime
+from trading_bot.event import MarketEvent, OrderEvent
+from trading_bot.event_queue import EventQueue
+from trading_bot.execution.paper_gateway import PaperExecutionGateway
+from trading_bot.position.book import PositionBook
+
+@pytest.fixture
+def book():
+    """Fixture with long and short positions on two symbols"""
+    book = PositionBook()
+    book['long_a'] = {'symbol': 'NIFTY', 'side': 'BUY', 'sl_price': 95.0, 'tp_price': 110.0}
+    book['long_b'] = {'symbol': 'NIFTY', 'side': 'BUY', 'sl_price': 90.0, 'tp_price': 120.0}
+    book['short_a'] = {'symbol': 'NIFTY', 'side': 'SELL', 'sl_price': 105.0, 'tp_price': 80.0}
+    book['other'] = {'symbol': 'BANKNIFTY', 'side': 'BUY', 'sl_price': 200.0, 'tp_price': 300.0}
+    return book
+
+def test_behaves_like_dict(book):
+    assert len(book) == 4
+    assert 'long_a' in book
+    assert book['other']['symbol'] == 'BANKNIFTY'
+    assert set(book.for_symbol('NIFTY')) == {'long_a', 'long_b', 'short_a'}
+
+def test_no_crossing_inside_levels(book):
+    assert book.crossed('NIFTY', 100.0) == []
+
+def test_stop_crossings(book):
+    assert book.crossed_stops('NIFTY', 95.0) == ['long_a']
+    assert sorted(book.crossed_stops('NIFTY', 89.0)) == ['long_a', 'long_b']
+    assert book.crossed_stops('NIFTY', 105.0) == ['short_a']
+    assert book.crossed_stops('BANKNIFTY', 95.0) == ['other']
+
+def test_target_crossings(book):
+    assert book.crossed_targets('NIFTY', 110.0) == ['long_a']
+    assert book.crossed_targets('NIFTY', 80.0) == ['short_a']
+
+def test_stop_wins_over_target(book):
+    book.set_target('short_a', 106.0)
+    assert book.crossed('NIFTY', 106.0) == [('short_a', 'SL')]
+
+def test_set_stop_reindexes(book):
+    book.set_stop('long_a', 99.0)
+    assert book['long_a']['sl_price'] == 99.0
+    assert book.crossed_stops('NIFTY', 98.0) == ['long_a']
+    book.set_stop('long_a', None)
+    assert book.crossed_stops('NIFTY', 10.0) == ['long_b']
+
+def test_delete_evicts(book):
+    del book['long_a']
+    del book['other']
+    assert 'long_a' not in book
+    assert book.crossed_stops('NIFTY', 95.0) == []
+    assert book.symbols() == ['NIFTY']
+
+def test_paper_gateway_evicts_closed_positions():
+    execution_queue = EventQueue()
+    gateway = PaperExecutionGateway(EventQueue(), execution_queue)
+    gateway.process_order(OrderEvent(
+        symbol='NIFTY', timestamp=datetime.now(), order_type='MARKET', side='BUY',
+        quantity=1, price=100.0, order_uuid='o1', info={'sl': 97.5, 'tp': 105.0}
+    ))
+    execution_queue.get(block=False)
+
+    gateway.on_market_event(MarketEvent(symbol='BANKNIFTY', timestamp=datetime.now(), price=50.0))
+    assert execution_queue.empty()
+
+    gateway.on_market_event(MarketEvent(symbol='NIFTY', timestamp=datetime.now(), price=105.0))
+    exit_event = execution_queue.get(block=False)
+    assert exit_event.info['exit_reason'] == 'TP'
+    assert 'o1' not in gateway.open_positions
@@ -0,0 +1,39 @@
+import time
+from trading_bot.monitor.profiler import SamplingProfiler, HandlerStats
+
+def busy_handler(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def test_profiler_writes_collapsed_stacks(tmp_path):
+    profiler = SamplingProfiler(log_dir=str(tmp_path), interval=0.001)
+    assert profiler.toggle()
+    assert not profiler.start()
+    busy_handler(0.2)
+    assert not profiler.toggle()
+    profiler.join(timeout=5)
+
+    assert profiler.last_output and profiler.last_output.endswith('.folded')
+    lines = open(profiler.last_output).read().splitlines()
+    stack, count = lines[0].rsplit(' ', 1)
+    assert int(count) > 0
+    assert stack.startswith('MainThread;')
+    assert any('test_profiler.py:busy_handler' in line for line in lines)
+    assert not any('SamplingProfiler' in line for line in lines)
+
+def test_stop_when_idle_is_noop(tmp_path):
+    profiler = SamplingProfiler(log_dir=str(tmp_path))
+    assert not profiler.stop()
+    assert profiler.last_output is None
+
+def test_handler_stats_summary():
+    stats = HandlerStats()
+    stats.record('risk.process_signal', 2000)
+    stats.record('strategy.process_event', 5000)
+    stats.record('strategy.process_event', 1000)
+    summary = stats.summary()
+    assert list(summary) == ['strategy.process_event', 'risk.process_signal']
+    assert summary['strategy.process_event'] == {'calls': 2, 'total_ms': 0.006, 'mean_us': 3.0, 'max_us': 5.0}
+    stats.reset()
+    assert stats.summary() == {}
@@ -0,0 +1,192 @@
+import time
+from datetime import datetime, timedelta
+import pytest
+from trading_bot.broker.reconciliation import (
+    Reconciler, diff_orders, aggregate_fills,
+    STATUS_CHANGED, UNLINKED, NEVER_SENT, REOPENED_AT_BROKER, UNTRACKED_AT_BROKER,
+    MISSING_AT_BROKER, FILL_MISMATCH, SET_STATUS, LINK_BROKER_ID, CLOSE_LOCAL
+)
+from trading_bot.persistence.database import Database
+from trading_bot.event import OrderEvent
+from trading_bot.execution.order_book import OrderBook
+
+class FakeBroker:
+    """Broker books served from lists, with an optional per-call delay"""
+    def __init__(self, orders=(), trades=(), positions=(), delay=0.0, fail=()):
+        self.orders, self.trades, self.positions = list(orders), list(trades), list(positions)
+        self.delay = delay
+        self.fail = fail
+
+    def _serve(self, name, rows):
+        time.sleep(self.delay)
+        if name in self.fail:
+            raise RuntimeError(f"{name} unavailable")
+        return rows
+
+    def get_order_book(self):
+        return self._serve('orders', self.orders)
+
+    def get_trade_book(self):
+        return self._serve('trades', self.trades)
+
+    def get_positions(self):
+        return self._serve('positions', self.positions)
+
+@pytest.fixture
+def db(tmp_path):
+    return Database(str(tmp_path / 'bot.db'))
+
+def order(uuid, status, broker_id=None, symbol='NIFTY24JUL24500CE', qty=50):
+    return {'order_uuid': uuid, 'broker_order_id': broker_id, 'symbol': symbol, 'status': status,
+            'quantity': qty, 'side': 'BUY', 'order_type': 'LMT', 'price': 100.0,
+            'timestamp': datetime.now().isoformat()}
+
+def broker_order(order_id, status, remarks='algo_trade', symbol='NIFTY24JUL24500CE', qty=50):
+    return {'norenordno': order_id, 'status': status, 'tsym': symbol, 'qty': str(qty), 'remarks': remarks}
+
+def test_safe_repairs_are_applied(db):
+    db.save_order(order('U1', 'SENT_TO_BROKER', broker_id='B1'))
+    db.save_order(order('U2', 'PENDING'))
+    db.save_order(order('U3', 'PENDING'))
+    db.save_trade({'trade_uuid': 'T1', 'symbol': 'NIFTY24JUL24500PE', 'quantity': 50, 'status': 'OPEN'})
+    broker = FakeBroker(
+        orders=[broker_order('B1', 'COMPLETE'), broker_order('B2', 'OPEN', remarks='U2')],
+        trades=[{'norenordno': 'B1', 'flqty': '25', 'flprc': '101.0'},
+                {'norenordno': 'B1', 'flqty': '25', 'flprc': '102.0'}],
+        positions=[{'tsym': 'NIFTY24JUL24500PE', 'netqty': '0'}]
+    )
+
+    report = Reconciler(broker, db).run()
+
+    kinds = {d.order_uuid: (d.kind, d.repair) for d in report.order_diffs}
+    assert kinds == {'U1': (STATUS_CHANGED, SET_STATUS), 'U2': (UNLINKED, LINK_BROKER_ID), 'U3': (NEVER_SENT, SET_STATUS)}
+    assert report.flat_symbols == ['NIFTY24JUL24500PE']
+    assert report.unresolved == []
+    assert len(report.repaired) == 4
+
+    rows = {o['order_uuid']: o for o in db.get_reconciliation_orders(['B1', 'B2'], [])}
+    assert rows['U1']['status'] == 'FILLED' and rows['U1']['price'] == pytest.approx(101.5)
+    assert rows['U2']['broker_order_id'] == 'B2' and rows['U2']['status'] == 'OPEN'
+    assert 'U3' not in rows  # now CANCELLED, and matched by no broker id
+    assert db.get_open_position_quantities() == {}
+
+    # A second pass finds nothing left to do
+    assert Reconciler(broker, db).run().order_diffs == []
+
+def test_dangerous_differences_are_left_for_a_human(db):
+    db.save_order(order('U1', 'FILLED', broker_id='B1'))
+    db.save_order(order('U2', 'CANCELLED', broker_id='B2'))
+    db.save_order(order('U3', 'FILLED', broker_id='B3', qty=50))
+    db.save_order(order('U4', 'SENT_TO_BROKER', broker_id='B4'))
+    broker = FakeBroker(
+        orders=[broker_order('B1', 'OPEN'), broker_order('B2', 'COMPLETE'), broker_order('B3', 'COMPLETE'),
+                broker_order('B9', 'COMPLETE')],
+        trades=[{'norenordno': 'B3', 'flqty': '25', 'flprc': '100'}],
+        positions=[{'tsym': 'BANKNIFTY24JUL52000CE', 'netqty': '15'}]
+    )
+
+    report = Reconciler(broker, db).run(local_positions={})
+
+    kinds = sorted(d.kind for d in report.order_diffs)
+    assert kinds == sorted([REOPENED_AT_BROKER, STATUS_CHANGED, FILL_MISMATCH, UNTRACKED_AT_BROKER, MISSING_AT_BROKER])
+    assert all(d.repair is None for d in report.order_diffs)
+    assert [(d.symbol, d.local_quantity, d.broker_quantity, d.repair) for d in report.position_diffs] == [
+        ('BANKNIFTY24JUL52000CE', 0, 15, None)
+    ]
+    assert report.repaired == []
+    assert not report.clean
+
+def test_fetches_run_concurrently(db):
+    broker = FakeBroker(delay=0.2)
+    started = time.perf_counter()
+    report = Reconciler(broker, db).run()
+    assert time.perf_counter() - started < 0.5
+    assert report.clean
+
+def test_failed_fetch_skips_that_diff(db):
+    db.save_order(order('U1', 'SENT_TO_BROKER', broker_id='B1'))
+    report = Reconciler(FakeBroker(fail=('orders',)), db).run()
+    assert report.order_diffs == []
+    assert report.errors and report.errors[0].startswith('get_order_book')
+    assert not report.clean
+    assert db.get_reconciliation_orders([], [])[0]['status'] == 'SENT_TO_BROKER'
+
+def test_open_orders_from_earlier_days_are_not_reported_missing(db):
+    stale = order('U1', 'SENT_TO_BROKER', broker_id='B1')
+    stale['timestamp'] = (datetime.now() - timedelta(days=1)).isoformat()
+    db.save_order(stale)
+    db.save_order(order('U2', 'SENT_TO_BROKER', broker_id='B2'))
+
+    report = Reconciler(FakeBroker(), db).run(repair=False)
+
+    assert [(d.order_uuid, d.kind) for d in report.order_diffs] == [('U2', MISSING_AT_BROKER)]
+
+def test_aggregate_fills_weights_price():
+    fills = aggregate_fills([
+        {'norenordno': 'A', 'flqty': '10', 'flprc': '100'},
+        {'norenordno': 'A', 'flqty': '30', 'flprc': '104'},
+        {'norenordno': 'B', 'qty': '5', 'avgprc': '50'},
+    ])
+    assert fills['A'] == [40, pytest.approx(103.0)]
+    assert fills['B'] == [5, 50.0]
+
+def test_full_day_order_book_reconciles_quickly(db):
+    n = 20000
+    with db._get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO orders (order_uuid, broker_order_id, symbol, status, quantity) VALUES (?, ?, ?, ?, ?)",
+            [(f"U{i}", f"B{i}", 'NIFTY24JUL24500CE', 'FILLED' if i % 2 else 'SENT_TO_BROKER', 50) for i in range(n)]
+        )
+        conn.commit()
+    broker = FakeBroker(
+        orders=[broker_order(f"B{i}", 'COMPLETE') for i in range(n)],
+        trades=[{'norenordno': f"B{i}", 'flqty': '50', 'flprc': '100'} for i in range(n)]
+    )
+
+    started = time.perf_counter()
+    report = Reconciler(broker, db).run(local_positions={})
+    elapsed = time.perf_counter() - started
+
+    assert len(report.order_diffs) == n // 2
+    assert all(d.kind == STATUS_CHANGED for d in report.order_diffs)
+    assert elapsed < 1.0
+
+def test_diff_orders_is_pure():
+    diffs = diff_orders([broker_order('B1', 'REJECTED')], [], [order('U1', 'OPEN', broker_id='B1')])
+    assert [(d.kind, d.broker_status, d.repair) for d in diffs] == [(STATUS_CHANGED, 'REJECTED', SET_STATUS)]
+
+def test_orchestrator_drops_positions_broker_shows_flat(db):
+    from trading_bot.__main__ import TradingBotOrchestrator
+    from trading_bot.position.manager import PositionManager
+    bot = TradingBotOrchestrator.__new__(TradingBotOrchestrator)
+    bot.position_manager = PositionManager(db, api_wrapper=None, load_state=False)
+    bot.position_manager.open_positions['p1'] = {'symbol': 'NIFTY24JUL24500PE', 'side': 'BUY', 'quantity': 50,
+                                                 'sl_price': 90.0, 'peak_price': 100.0}
+    bot.position_manager.open_positions['p2'] = {'symbol': 'NIFTY24JUL24500CE', 'side': 'BUY', 'quantity': 50,
+                                                 'sl_price': 90.0, 'peak_price': 100.0}
+    broker = FakeBroker(positions=[{'tsym': 'NIFTY24JUL24500CE', 'netqty': '50'}])
+
+    report = Reconciler(broker, db).run(local_positions=bot._local_positions())
+    assert [(d.symbol, d.repair) for d in report.position_diffs] == [('NIFTY24JUL24500PE', CLOSE_LOCAL)]
+    bot._apply_reconciliation(report)
+    assert list(bot.position_manager.open_positions) == ['p2']
+
+def test_orders_saved_by_the_order_book_reconcile_clean(db):
+    book = OrderBook(database=db)
+    for uuid in ('u1', 'u2'):
+        book.create(OrderEvent(symbol='NIFTY24JUL24500CE', timestamp=datetime.now(), order_type='LMT',
+                               side='BUY', quantity=50, order_uuid=uuid))
+        book.sent(uuid, 100.0)
+    book.acknowledged('u1', 'B1')
+    book.replacing('u1')
+    book.sent('u1', 101.0)
+    book.acknowledged('u1', 'B2')
+    book.filled('u1', 50, 101.0)
+    book.acknowledged('u2', 'B3')
+    book.close()
+
+    broker = FakeBroker(orders=[broker_order('B1', 'CANCELED', remarks='u1'), broker_order('B2', 'COMPLETE', remarks='u1'),
+                                broker_order('B3', 'OPEN', remarks='u2')],
+                        trades=[{'norenordno': 'B2', 'flqty': '50', 'flprc': '101.0'}])
+    report = Reconciler(broker, db).run(local_positions={})
+    assert report.local_orders == 2 and report.order_diffs == []
@@ -0,0 +1,87 @@
+import json
+import numpy as np
+import pytest
+from backtesting.results_store import ResultStore, RunCatalog, decode_column, encode_column
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture with three runs from a parameter sweep"""
+    store = ResultStore(str(tmp_path / "results.db"))
+    for i, offset in enumerate([2.5, 5.0, 7.5]):
+        columns = {
+            'timestamp': np.array(['2024-07-01T09:20', '2024-07-01T09:30'], dtype='datetime64[us]'),
+            'symbol': np.array(['NIFTY', 'NIFTY']),
+            'avg_fill_price': np.array([100.0, 100.0 + i]),
+        }
+        metrics = {'total_trades': 1, 'total_pnl': float(i), 'sharpe_ratio': 0.5 * i, 'expectancy': float(i)}
+        store.append_run(columns, metrics, params={'zone_offset': offset}, run_id=f"run{i}")
+    return store
+
+def test_column_roundtrip():
+    values = np.array(['a', 'bcd'])
+    assert decode_column(encode_column(values)).tolist() == ['a', 'bcd']
+
+def test_list_runs_newest_first(store):
+    assert [r['run_id'] for r in store.list_runs()] == ['run2', 'run1', 'run0']
+    assert store.latest_seq() == 3
+
+def test_query_by_params_and_metrics(store):
+    assert [r['run_id'] for r in store.list_runs(params={'zone_offset': 5.0})] == ['run1']
+    assert [r['run_id'] for r in store.list_runs(metric_ranges={'total_pnl': (1.0, None)},
+                                                 order_by='total_pnl', descending=False)] == ['run1', 'run2']
+    # Metrics without a catalog column are filtered through the JSON
+    assert [r['run_id'] for r in store.list_runs(metric_ranges={'expectancy': (None, 0.5)})] == ['run0']
+
+def test_incremental_listing(store):
+    assert [r['run_id'] for r in store.list_runs(after_seq=2)] == ['run2']
+
+def test_load_single_run(store):
+    trades = store.load_trades('run1')
+    assert trades['avg_fill_price'].tolist() == [100.0, 101.0]
+    assert trades['timestamp'].dtype == np.dtype('datetime64[us]')
+    assert list(store.load_trades('run1', columns=['symbol'])) == ['symbol']
+    assert store.load_metrics('run1')['total_pnl'] == 1.0
+
+def test_delete_run(store):
+    store.delete_run('run0')
+    assert store.load_trades('run0') == {}
+    assert store.load_metrics('run0') is None
+
+def test_import_legacy(tmp_path):
+    (tmp_path / "metrics_20250101_000000.json").write_text(json.dumps({'total_trades': 2, 'total_pnl': 0}))
+    (tmp_path / "trades_20250101_000000.csv").write_text(
+        "timestamp,symbol,status,filled_quantity,avg_fill_price,broker_order_id\n"
+        "2025-01-01 09:20:00,NIFTY,FILLED,1,100.0,PAPER_ORDER\n"
+    )
+    store = ResultStore(str(tmp_path / "results.db"))
+    assert store.import_legacy(tmp_path) == 1
+    assert store.import_legacy(tmp_path) == 0
+    assert store.load_trades('20250101_000000')['broker_order_id'].tolist() == ['PAPER_ORDER']
+
+def test_run_catalog_refresh_is_incremental(store):
+    catalog = RunCatalog(store)
+    assert catalog.refresh() == 3
+    assert catalog.refresh() == 0
+    store.append_run({'avg_fill_price': np.array([1.0])}, {'total_pnl': 9.0}, run_id='run3')
+    assert catalog.refresh() == 1
+    assert [r['run_id'] for r in catalog.runs] == ['run3', 'run2', 'run1', 'run0']
+    assert catalog.get('run3')['metrics']['total_pnl'] == 9.0
+
+def test_back_to_back_backtests_get_their_own_runs(tmp_path):
+    from backtesting.backtest_runner import save_results
+    store = ResultStore(str(tmp_path / "results.db"))
+    first = save_results([], '2024-07-01', '2024-07-31', store=store)
+    second = save_results([], '2024-07-01', '2024-07-31', store=store)
+    assert first != second and len(store.list_runs()) == 2
+
+def test_connections_are_closed(store, monkeypatch):
+    import sqlite3
+    opened = []
+    connect = sqlite3.connect
+    monkeypatch.setattr(sqlite3, 'connect', lambda *args, **kwargs: opened.append(connect(*args, **kwargs)) or opened[-1])
+    store.list_runs()
+    store.load_trades('run1')
+    assert opened
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
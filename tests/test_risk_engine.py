@@ -0,0 +1,104 @@
+import queue
+from datetime import datetime
+import pytest
+from trading_bot.event import ExecutionEvent, MarketEvent, OrderEvent, SignalEvent
+from trading_bot.risk.engine import MAX_DAILY_LOSS, MAX_DELTA, MAX_EXPOSURE, MAX_MARGIN, RiskEngine
+from trading_bot.risk.manager import RiskManager
+
+CE = 'NIFTY28OCT25C24500'
+PE = 'NIFTY28OCT25P24500'
+
+def tick(symbol, price):
+    return MarketEvent(symbol=symbol, timestamp=datetime.now(), price=price)
+
+def order(symbol, side='BUY', quantity=75, price=None):
+    return OrderEvent(symbol=symbol, timestamp=datetime.now(), order_type='LIMIT', side=side, quantity=quantity,
+                      price=price)
+
+def recompute(engine):
+    """Aggregates summed from scratch over the book"""
+    positions = engine.positions.values()
+    return {
+        'unrealized': sum(p.quantity * (p.last_price - p.avg_price) for p in positions),
+        'gross': sum(abs(p.quantity) * p.last_price for p in positions),
+        'net': sum(p.quantity * p.last_price for p in positions),
+    }
+
+def test_incremental_aggregates_match_a_full_recompute():
+    engine = RiskEngine()
+    engine.on_trade(CE, 'BUY', 75, 100.0)
+    engine.on_trade(PE, 'SELL', 150, 80.0)
+    engine.on_tick(tick(CE, 110.0))
+    engine.on_tick(tick(PE, 70.0))
+    engine.on_trade(CE, 'BUY', 75, 120.0)      # average up to 110
+    engine.on_trade(PE, 'BUY', 50, 75.0)       # partial cover: +5 x 50
+    engine.on_tick(tick(CE, 105.0))
+    expected = recompute(engine)
+    assert engine.unrealized_pnl == pytest.approx(expected['unrealized'])
+    assert engine.gross_exposure == pytest.approx(expected['gross'])
+    assert engine.net_exposure == pytest.approx(expected['net'])
+    assert engine.realized_pnl == pytest.approx(250.0)
+    assert engine.positions[CE].avg_price == pytest.approx(110.0)
+    # 150 long calls and 100 short puts at the ATM fallback delta
+    assert engine.delta['NIFTY'] == pytest.approx(150 * 0.5 + 100 * 0.5)
+
+    engine.on_trade(CE, 'SELL', 150, 115.0)
+    assert CE not in engine.positions
+    assert engine.realized_pnl == pytest.approx(250.0 + 150 * 5.0)
+
+def test_fills_and_delta_source():
+    deltas = {CE: 0.62}
+    engine = RiskEngine(delta_source=deltas.get)
+    engine.on_fill(ExecutionEvent(symbol=CE, timestamp=datetime.now(), order_uuid='1', status='FILLED',
+                                  filled_quantity=75, avg_fill_price=100.0, info={'side': 'BUY'}))
+    assert engine.delta['NIFTY'] == pytest.approx(75 * 0.62)
+    deltas[CE] = 0.70
+    engine.on_tick(tick(CE, 112.0))
+    assert engine.delta['NIFTY'] == pytest.approx(75 * 0.70)
+    # A paper exit carries no side and closes the holding
+    engine.on_fill(ExecutionEvent(symbol=CE, timestamp=datetime.now(), order_uuid='1', status='FILLED',
+                                  filled_quantity=75, avg_fill_price=90.0))
+    assert engine.realized_pnl == pytest.approx(-750.0) and not engine.positions
+
+def test_pre_trade_limits_emit_violations():
+    violations = queue.Queue()
+    engine = RiskEngine(max_exposure=10000, max_delta=60, max_margin=200000, violation_queue=violations)
+    assert engine.check(order(CE, price=100.0)) is None
+    assert engine.check(order(CE, quantity=150, price=100.0)).reason == MAX_EXPOSURE
+    engine.on_trade(CE, 'BUY', 75, 100.0)
+    assert engine.check(order(CE, quantity=50, price=1.0)).reason == MAX_DELTA  # 37.5 + 25 > 60
+    assert engine.check(order(PE, quantity=50, price=1.0)) is None  # puts offset the calls
+
+    engine.max_delta = None
+    engine.on_tick(tick('NIFTY', 24500.0))
+    assert engine.check(order(PE, 'SELL', 75, 1.0)).reason == MAX_MARGIN  # 0.12 x 24500 x 75
+    assert violations.qsize() == 3 and not engine.positions.get(PE)
+
+def test_daily_loss_is_reported_once_and_blocks_signals(tmp_path):
+    violations = queue.Queue()
+    engine = RiskEngine(max_daily_loss=500, violation_queue=violations)
+    risk, orders = RiskManager(None, queue.Queue(), db_path=str(tmp_path / 'risk.db'), engine=engine), queue.Queue()
+    risk.order_queue = orders
+    risk.on_execution(ExecutionEvent(symbol=CE, timestamp=datetime.now(), order_uuid='1', status='FILLED',
+                                     filled_quantity=75, avg_fill_price=100.0, info={'side': 'BUY'}))
+    risk.on_market_event(tick(CE, 95.0))
+    risk.on_market_event(tick(CE, 92.0))
+    risk.on_market_event(tick(CE, 90.0))
+    assert risk.daily_loss == pytest.approx(-750.0)
+    assert violations.qsize() == 1 and violations.get_nowait().reason == MAX_DAILY_LOSS
+
+    signal = SignalEvent(symbol='NIFTY', timestamp=datetime.now(), signal_type='PE', info={'option_symbol': PE})
+    risk.process_signal(signal)
+    assert orders.empty() and violations.get_nowait().signal_event is signal
+
+def test_snapshot_restores_every_aggregate():
+    engine = RiskEngine()
+    engine.on_trade(CE, 'BUY', 75, 100.0)
+    engine.on_trade(PE, 'SELL', 75, 80.0)
+    engine.on_tick(tick(CE, 104.0))
+    engine.on_trade(PE, 'BUY', 25, 70.0)
+    restored = RiskEngine()
+    restored.restore_state(engine.snapshot_state())
+    for name in ('realized_pnl', 'unrealized_pnl', 'gross_exposure', 'net_exposure', 'long_premium'):
+        assert getattr(restored, name) == pytest.approx(getattr(engine, name))
+    assert restored.delta == pytest.approx(engine.delta) and restored.short_quantity == engine.short_quantity
@@ -0,0 +1,59 @@
+import os
+import re
+import time
+import pytest
+from datetime import time as dt_time
+from trading_bot.sharding.deployment import ShardedDeployment, plan_shards
+
+INSTANCES = [
+    {'name': 'nifty', 'symbol': 'NIFTY'},
+    {'name': 'nifty_wide', 'symbol': 'NSE|NIFTY', 'zone_offset': 5.0},
+    {'name': 'banknifty', 'symbol': 'BANKNIFTY', 'zone_offset': 10.0},
+    {'name': 'finnifty', 'symbol': 'FINNIFTY'},
+    {'name': 'midcap', 'symbol': 'MIDCPNIFTY'},
+]
+
+def test_plan_keeps_instances_with_their_symbol():
+    shards = plan_shards(INSTANCES, workers=2)
+    assert [s.symbols for s in shards] == [['NIFTY', 'FINNIFTY'], ['BANKNIFTY', 'MIDCPNIFTY']]
+    assert [i['name'] for i in shards[0].instances] == ['nifty', 'nifty_wide', 'finnifty']
+    assert len(plan_shards(INSTANCES, workers=10)) == 4
+
+def test_simulated_sharded_session(tmp_path):
+    ticks = 2000
+    deployment = ShardedDeployment(
+        INSTANCES, workers=2,
+        simulate={'rate': 5000.0, 'limit': ticks},
+        capacity=4096,
+        bus_name=f"tb_test_shard_{os.getpid()}",
+        zone_time=dt_time(0, 0),  # zones from the first tick, whatever the time of day
+        risk={'db_path': str(tmp_path / 'bot.db'), 'max_trades_per_day': 3},
+        log_level='ERROR'
+    )
+    deployment.start()
+    try:
+        deployment.processes['feed'].join(timeout=30)
+        fills = []
+        deadline = time.monotonic() + 10
+        while len(fills) < 6 and time.monotonic() < deadline:
+            fills.extend(deployment.fills(timeout=0.2))
+        time.sleep(0.3)
+    finally:
+        stats = deployment.stop()
+    fills.extend(deployment.fills())
+
+    # Every tick reached exactly the shard owning its symbol
+    assert stats['shard0']['ticks'] == stats['shard1']['ticks'] == ticks // 2
+    assert stats['shard0']['dropped'] == stats['shard1']['dropped'] == 0
+    assert stats['shard0']['errors'] == stats['shard1']['errors'] == 0
+    # Each shard hits its own trade limit; all orders go through the one execution process
+    assert stats['shard0']['orders'] == stats['shard1']['orders'] == 3
+    assert stats['execution']['orders'] == 6
+    assert len(fills) == 6 and all(f.status == 'FILLED' for f in fills)
+    # Orders are for the ATM option of each underlying's nearest expiry
+    assert all(re.fullmatch(r'(NIFTY|BANKNIFTY|FINNIFTY|MIDCPNIFTY)\d{2}[A-Z]{3}\d{2}[CP]\d+', f.symbol) for f in fills)
+
+def test_live_mode_is_refused():
+    config = {'mode': 'live'}
+    with pytest.raises(ValueError):
+        ShardedDeployment.from_config(lambda key, default=None: config.get(key, default))
@@ -0,0 +1,165 @@
+from concurrent.futures import Future
+from datetime import datetime
+import pytest
+from trading_bot.event import ExecutionEvent
+from trading_bot.position.manager import PositionManager
+from trading_bot.position.sl_manager import StopLossManager
+
+CE = 'NIFTY28OCT25C24500'
+
+class FakeAPI:
+    def __init__(self):
+        self.modified = []
+        self.placed = []
+        self.cancelled = []
+        self.reject = False
+
+    def modify_order(self, order_id, **kwargs):
+        self.modified.append((order_id, kwargs['trigger_price']))
+        return {'stat': 'Not_Ok', 'emsg': 'rejected'} if self.reject else {'stat': 'Ok', 'result': order_id}
+
+    def place_order(self, order_details):
+        self.placed.append(order_details)
+        return {'stat': 'Ok', 'norenordno': f"SL-{len(self.placed)}"}
+
+    def cancel_order(self, order_id):
+        self.cancelled.append(order_id)
+        return {'stat': 'Ok'}
+
+class ManualExecutor:
+    """Runs a submitted call only when the test acks it, so a modify stays in flight"""
+    def __init__(self):
+        self.queued = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.queued.append((future, fn, args, kwargs))
+        return future
+
+    def ack(self):
+        future, fn, args, kwargs = self.queued.pop(0)
+        future.set_result(fn(*args, **kwargs))
+
+    def shutdown(self, wait=True):
+        pass
+
+def manager(api, **kwargs):
+    executor = ManualExecutor()
+    return StopLossManager(api, executor=executor, **kwargs), executor
+
+def request(sl, trigger, now):
+    return sl.request('P1', 'SL-1', CE, 'SELL', 75, trigger, now=now)
+
+def test_at_most_one_modify_in_flight_and_the_latest_target_goes_out_on_ack():
+    api = FakeAPI()
+    sl, executor = manager(api, min_interval=0.0, min_step=0.0)
+    assert request(sl, 101.0, now=0.0)
+    assert not request(sl, 102.0, now=0.1)
+    assert not request(sl, 103.0, now=0.2)
+    assert len(executor.queued) == 1
+    executor.ack()
+    assert api.modified == [('SL-1', 101.0)]
+    assert len(executor.queued) == 1      # latest target sent on the ack, 102 skipped
+    executor.ack()
+    assert api.modified == [('SL-1', 101.0), ('SL-1', 103.0)]
+    assert sl.pending('P1') is None
+    assert not executor.queued
+
+def test_small_ratchets_are_coalesced_until_the_interval_or_step():
+    api = FakeAPI()
+    sl, executor = manager(api, min_interval=1.0, min_step=1.0)
+    request(sl, 100.0, now=0.0)
+    executor.ack()
+    assert not request(sl, 100.25, now=0.1)
+    assert not request(sl, 100.5, now=0.2)
+    assert sl.flush(now=0.5) == 0
+    assert sl.pending('P1') == 100.5
+    assert sl.flush(now=1.0) == 1
+    executor.ack()
+    assert request(sl, 101.5, now=1.1)    # a full step goes out without waiting
+    executor.ack()
+    assert api.modified == [('SL-1', 100.0), ('SL-1', 100.5), ('SL-1', 101.5)]
+    assert sl.requested == 4 and sl.sent == 3
+
+def test_rejected_modify_is_not_retried_with_the_same_trigger():
+    api = FakeAPI()
+    api.reject = True
+    sl, executor = manager(api, min_interval=0.0, min_step=0.0)
+    request(sl, 101.0, now=0.0)
+    executor.ack()
+    assert sl.failed == 1
+    assert sl.flush(now=10.0) == 0
+    assert sl.pending('P1') == 101.0
+
+def test_triggers_are_rounded_to_the_tick():
+    api = FakeAPI()
+    sl, executor = manager(api)
+    request(sl, 100.12, now=0.0)
+    executor.ack()
+    assert api.modified == [('SL-1', 100.1)]
+
+def test_trailing_sl_modifies_the_live_order_instead_of_replacing_it():
+    api = FakeAPI()
+    sl, executor = manager(api, min_interval=0.0, min_step=0.0)
+    positions = PositionManager(database=None, api_wrapper=api, load_state=False, sl_manager=sl)
+    positions.add_position(ExecutionEvent(symbol=CE, timestamp=datetime.now(), order_uuid='P1', status='FILLED',
+                                          filled_quantity=75, avg_fill_price=100.0, info={'side': 'BUY'}))
+    assert positions.open_positions['P1']['sl_order_id'] == 'SL-1'
+    assert api.placed[0]['order_type'] == 'SL-LMT'
+    for price in (121.0, 122.0, 123.0, 124.0):
+        positions.update_trailing_sl(CE, price)
+    assert len(api.placed) == 1 and not api.cancelled
+    while executor.queued:
+        executor.ack()
+    assert api.modified[0] == ('SL-1', 115.0)
+    assert api.modified[-1] == ('SL-1', pytest.approx(119.0))
+    assert len(api.modified) < 4
+    assert positions.open_positions['P1']['sl_price'] == pytest.approx(119.0)
+
+def test_paper_fills_send_nothing_to_the_broker():
+    api = FakeAPI()
+    sl, executor = manager(api, min_interval=0.0, min_step=0.0)
+    positions = PositionManager(database=None, api_wrapper=api, load_state=False, sl_manager=sl, paper=True)
+    positions.add_position(ExecutionEvent(symbol=CE, timestamp=datetime.now(), order_uuid='P1', status='FILLED',
+                                          filled_quantity=75, avg_fill_price=100.0, info={'side': 'BUY'}))
+    for price in (121.0, 124.0):
+        positions.update_trailing_sl(CE, price)
+    assert api.placed == [] and api.modified == [] and executor.queued == []
+    assert 'sl_order_id' not in positions.open_positions['P1']
+    assert positions.open_positions['P1']['sl_price'] == pytest.approx(119.0)  # the stop still trails locally
+
+def live_position(api):
+    sl, _ = manager(api)
+    positions = PositionManager(database=None, api_wrapper=api, load_state=False, sl_manager=sl)
+    positions.add_position(ExecutionEvent(symbol=CE, timestamp=datetime.now(), order_uuid='P1', status='FILLED',
+                                          filled_quantity=75, avg_fill_price=100.0, info={'side': 'BUY'}))
+    return positions
+
+def test_a_filled_broker_stop_is_the_exit():
+    api = FakeAPI()
+    positions = live_position(api)
+    positions.order_book.on_order_update({'norenordno': 'SL-1', 'status': 'COMPLETE', 'tsym': CE, 'trantype': 'S',
+                                          'qty': '75', 'fillshares': '75', 'avgprc': '97.40'})
+    exits = positions.check_exit_conditions(CE, 99.0)  # price back above the stop
+    assert exits == [('P1', 'SL_HIT', 99.0)]
+    assert positions.close_position('P1', 'SL_HIT', 99.0) == pytest.approx(97.40)
+    assert len(api.placed) == 1 and not api.cancelled and not positions.open_positions
+
+def test_exit_waits_until_the_stop_is_confirmed_cancelled():
+    api = FakeAPI()
+    positions = live_position(api)
+    api.cancel_order = lambda order_id: {'stat': 'Not_Ok', 'emsg': 'order in process'}
+    statuses = {'status': 'TRIGGER_PENDING'}
+    api.get_order_status = lambda order_id: statuses
+    assert positions.close_position('P1', 'SL_HIT', 97.0) is None
+    assert len(api.placed) == 1 and 'P1' in positions.open_positions  # no market sell alongside the stop
+
+    statuses = {'status': 'COMPLETE', 'avgprc': '97.10'}
+    assert positions.close_position('P1', 'SL_HIT', 97.0) == pytest.approx(97.10)
+    assert len(api.placed) == 1 and not positions.open_positions
+
+def test_market_exit_only_after_the_stop_is_cancelled():
+    api = FakeAPI()
+    positions = live_position(api)
+    assert positions.close_position('P1', 'DRAWDOWN_KILL', 98.0) == 98.0
+    assert api.cancelled == ['SL-1'] and [o['order_type'] for o in api.placed] == ['SL-LMT', 'MKT']
@@ -0,0 +1,193 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+import pytest
+from trading_bot.broker.data_handler import DataHandler
+from trading_bot.broker.expiry_calendar import ExpiryCalendar, OptionContract
+from trading_bot.event_queue import EventQueue
+
+def test_entry_point_imports_without_optional_subsystems():
+    # Fresh interpreter so modules imported by other tests don't count
+    code = (
+        "import sys, json; import trading_bot.__main__; "
+        "print(json.dumps([m for m in ('requests', 'smtplib', 'NorenRestApiPy', 'pyotp', "
+        "'multiprocessing.shared_memory') if m in sys.modules]))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+class FakeFeedAPI:
+    """Websocket API stand-in that opens the socket immediately"""
+    def __init__(self):
+        self.subscribed = []
+
+    def start_websocket(self, subscribe_callback, order_update_callback, socket_open_callback, socket_close_callback):
+        socket_open_callback()
+
+    def subscribe_symbols(self, symbols):
+        self.subscribed.extend(symbols)
+
+def test_data_handler_ready_event(monkeypatch):
+    handler = DataHandler(FakeFeedAPI(), EventQueue(), ['NIFTY'])
+    monkeypatch.setattr(handler, 'is_market_hours', lambda: True)
+    monkeypatch.setattr(handler, 'start_heartbeat_monitor', lambda: None)
+    assert not handler.ready.is_set()
+
+    thread = threading.Thread(target=handler.start_with_reconnection, daemon=True)
+    thread.start()
+    assert handler.ready.wait(timeout=5)
+    assert handler.api_wrapper.subscribed == ['NSE|NIFTY']
+
+    handler.on_ws_close()
+    assert not handler.ready.is_set()
+    handler.stop()
+    thread.join(timeout=5)
+
+class SlowBroker:
+    def __init__(self, delay):
+        self.delay = delay
+        self.is_connected = False
+
+    def connect(self):
+        time.sleep(self.delay)
+        self.is_connected = True
+        return True
+
+    def get_positions(self):
+        assert self.is_connected
+        return []
+
+    def get_order_book(self):
+        return []
+
+    def get_trade_book(self):
+        return []
+
+class SlowPositions:
+    def __init__(self, delay):
+        self.delay = delay
+        self.loaded = False
+        self.open_positions = {}
+
+    def load_positions_from_db(self):
+        time.sleep(self.delay)
+        self.loaded = True
+
+class StateDB:
+    def __init__(self, halted):
+        self.halted = halted
+
+    def get_reconciliation_orders(self, broker_order_ids, order_uuids):
+        return []
+
+    def get_open_position_quantities(self):
+        return {}
+
+    def get_system_state(self, key):
+        return 'TRUE' if self.halted and key == 'SYSTEM_HALTED' else None
+
+    def reset_system_halt(self):
+        self.halted = False
+
+class ModeConfig:
+    def __init__(self, mode, scrip_master=False):
+        self.values = {'mode': mode, 'expiry.scrip_master_enabled': scrip_master}
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+@pytest.fixture
+def orchestrator():
+    from trading_bot.__main__ import TradingBotOrchestrator
+    # Skip __init__: no config, logger setup, signal handlers or metrics port
+    bot = TradingBotOrchestrator.__new__(TradingBotOrchestrator)
+    bot.api_wrapper = SlowBroker(0.3)
+    bot.position_manager = SlowPositions(0.3)
+    bot.database = StateDB(halted=True)
+    bot.config_manager = ModeConfig('live')
+    bot.state_journal = None
+    bot._reconciliation = None
+    bot._reconciliation_failed = False
+    return bot
+
+def test_startup_connects_and_loads_state_concurrently(orchestrator):
+    started = time.perf_counter()
+    assert orchestrator.startup()
+    elapsed = time.perf_counter() - started
+    assert elapsed < 0.55  # sequential would be >= 0.6
+    assert orchestrator.api_wrapper.is_connected
+    assert orchestrator.position_manager.loaded
+    assert orchestrator.database.halted is False
+
+def test_startup_fails_without_broker(orchestrator, monkeypatch):
+    import trading_bot.__main__ as entry
+    alerts = []
+    monkeypatch.setattr(entry, 'send_alert', lambda message, priority="INFO": alerts.append(priority))
+    monkeypatch.setattr(orchestrator, 'connect_to_broker', lambda: False)
+    assert orchestrator.startup() is False
+    assert orchestrator.position_manager.loaded
+    assert alerts == ['CRITICAL']
+
+def test_paper_startup_keeps_journal_positions_and_skips_reconciliation(orchestrator, monkeypatch):
+    import trading_bot.__main__ as entry
+    reconciled = []
+    monkeypatch.setattr(entry, 'reconcile_state', lambda *args: reconciled.append(args))
+    orchestrator.config_manager = ModeConfig('papertrading')
+    orchestrator.position_manager.open_positions['p1'] = {'symbol': 'NIFTY24JUL24500CE', 'side': 'BUY', 'quantity': 50}
+    assert orchestrator.startup()
+    assert reconciled == [] and list(orchestrator.position_manager.open_positions) == ['p1']
+
+def test_live_startup_reconciles(orchestrator, monkeypatch):
+    import trading_bot.__main__ as entry
+    reconciled = []
+    monkeypatch.setattr(entry, 'reconcile_state', lambda api, db, positions: reconciled.append(positions) or 'report')
+    monkeypatch.setattr(orchestrator, '_apply_reconciliation', lambda report: None)
+    orchestrator.position_manager.open_positions['p1'] = {'symbol': 'NIFTY24JUL24500CE', 'side': 'BUY', 'quantity': 50}
+    assert orchestrator.startup()
+    assert reconciled == [{'NIFTY24JUL24500CE': 50}]
+
+class RestoringJournal:
+    def restore(self):
+        return ['positions']
+
+class HaltRecorder:
+    def __init__(self):
+        self.halted = None
+
+    def halt(self, reason):
+        self.halted = reason
+
+def test_failed_background_reconciliation_halts_entries(orchestrator, monkeypatch):
+    import trading_bot.__main__ as entry
+    monkeypatch.setattr(entry, 'reconcile_state', lambda api, db, positions: None)
+    orchestrator.state_journal = RestoringJournal()
+    orchestrator.risk_manager = HaltRecorder()
+    assert orchestrator.startup()  # journal positions: the broker check runs alongside the feed
+    deadline = time.monotonic() + 2
+    while not orchestrator._reconciliation_failed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    orchestrator._check_reconciliation()
+    assert orchestrator.risk_manager.halted == 'RECONCILIATION_FAILED'
+    orchestrator._check_reconciliation()  # reported once
+    assert orchestrator._reconciliation_failed is False
+
+def test_scrip_master_downloads_alongside_the_login(orchestrator, monkeypatch):
+    import trading_bot.__main__ as entry
+    expiry = date.today() + timedelta(days=2)
+    contract = OptionContract('NIFTY', expiry, 24500.0, 'CE', 'NIFTY-LISTED-CE', token='35003')
+
+    def download(path, url, underlyings):
+        time.sleep(0.3)
+        return [contract]
+    monkeypatch.setattr(entry, 'load_scrip_master', download)
+    orchestrator.config_manager = ModeConfig('papertrading', scrip_master=True)
+    orchestrator.calendar = ExpiryCalendar()
+    assert orchestrator.calendar.tsym('NIFTY', 24500, 'CE') != 'NIFTY-LISTED-CE'
+    started = time.perf_counter()
+    assert orchestrator.startup()
+    assert time.perf_counter() - started < 0.85  # login alongside download then state, not after both
+    assert orchestrator.calendar.tsym('NIFTY', 24500, 'CE') == 'NIFTY-LISTED-CE'
@@ -0,0 +1,183 @@
+import os
+import time
+from datetime import datetime, timedelta
+import pytest
+from trading_bot.persistence.database import Database
+from trading_bot.persistence.journal import StateJournal, MAGIC
+from trading_bot.position.manager import PositionManager
+from trading_bot.risk.manager import RiskManager
+from trading_bot.strategy.main_strategy import MainStrategy
+
+class Counter:
+    """Minimal journaled component"""
+    def __init__(self):
+        self.value = 0
+
+    def snapshot_state(self):
+        return {'value': self.value}
+
+    def restore_state(self, state):
+        self.value = state['value']
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'state.journal')
+
+def test_checkpoint_writes_only_changes(journal_path):
+    journal = StateJournal(journal_path)
+    counter = Counter()
+    journal.register('counter', counter)
+
+    assert journal.checkpoint() == 1
+    assert journal.checkpoint() == 0
+    counter.value = 5
+    assert journal.checkpoint() == 1
+    journal.close()
+
+    restored = Counter()
+    fresh = StateJournal(journal_path)
+    fresh.register('counter', restored)
+    assert fresh.restore() == ['counter']
+    assert restored.value == 5
+
+def test_torn_tail_is_dropped(journal_path):
+    journal = StateJournal(journal_path)
+    counter = Counter()
+    journal.register('counter', counter)
+    counter.value = 1
+    journal.checkpoint()
+    counter.value = 2
+    journal.checkpoint()
+    journal.close()
+
+    # Simulate a crash halfway through writing the last frame
+    size = os.path.getsize(journal_path)
+    with open(journal_path, 'r+b') as f:
+        f.truncate(size - 3)
+
+    fresh = StateJournal(journal_path)
+    restored = Counter()
+    fresh.register('counter', restored)
+    assert fresh.restore() == ['counter']
+    assert restored.value == 1
+
+    # Appends continue from the last good frame
+    restored.value = 3
+    assert fresh.checkpoint() == 1
+    fresh.close()
+    assert StateJournal(journal_path).load()['counter'][1] == {'value': 3}
+
+def test_corrupt_frame_stops_replay(journal_path):
+    journal = StateJournal(journal_path)
+    counter = Counter()
+    journal.register('counter', counter)
+    counter.value = 1
+    journal.checkpoint()
+    journal.close()
+    with open(journal_path, 'r+b') as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+    assert StateJournal(journal_path).load() == {}
+
+def test_non_journal_file_is_set_aside(journal_path):
+    with open(journal_path, 'wb') as f:
+        f.write(b'not a journal')
+    journal = StateJournal(journal_path)
+    assert journal.load() == {}
+    assert os.path.exists(journal_path + '.corrupt')
+
+def test_compaction_keeps_latest_state(journal_path):
+    journal = StateJournal(journal_path, compact_bytes=4096)
+    counter, other = Counter(), Counter()
+    journal.register('counter', counter)
+    journal.register('other', other)
+    other.value = 'constant'
+    for i in range(2000):
+        counter.value = i
+        journal.checkpoint()
+    journal.close()
+
+    assert os.path.getsize(journal_path) < 8192
+    with open(journal_path, 'rb') as f:
+        assert f.read(len(MAGIC)) == MAGIC
+    state = StateJournal(journal_path).load()
+    assert state['counter'][1] == {'value': 1999}
+    assert state['other'][1] == {'value': 'constant'}
+    assert not os.path.exists(journal_path + '.tmp')
+
+@pytest.fixture
+def database(tmp_path):
+    return Database(str(tmp_path / 'bot.db'))
+
+def make_position(entry, sl, side='BUY'):
+    return {
+        'symbol': 'NIFTY', 'entry_price': entry, 'quantity': 50, 'entry_time': datetime.now(),
+        'sl_price': sl, 'side': side, 'trailing_sl': True, 'highest_profit': 22.0,
+        'peak_price': entry + 22.0, 'current_price': entry + 22.0, 'sl_order_id': 'SL-1',
+        'profit_milestones': [5.0, 10.0, 15.0, 20.0]
+    }
+
+def test_positions_survive_restart(journal_path, database):
+    manager = PositionManager(database, api_wrapper=None, load_state=False)
+    manager.open_positions['p1'] = make_position(100.0, 115.0)
+    manager.open_positions.last_price['NIFTY'] = 122.0
+    manager.daily_pnl = -40.0
+    journal = StateJournal(journal_path)
+    journal.register('positions', manager)
+    journal.checkpoint()
+    journal.close()
+
+    restarted = PositionManager(database, api_wrapper=None, load_state=False)
+    fresh = StateJournal(journal_path)
+    fresh.register('positions', restarted)
+    assert fresh.restore() == ['positions']
+
+    position = restarted.open_positions['p1']
+    assert position['sl_order_id'] == 'SL-1'
+    assert position['trailing_sl'] is True
+    assert position['highest_profit'] == 22.0
+    assert restarted.daily_pnl == -40.0
+    # Stop index is rebuilt, so the first tick can trigger the stop
+    assert restarted.check_exit_conditions('NIFTY', 114.0) == [('p1', 'SL_HIT', 114.0)]
+    assert restarted.check_exit_conditions('NIFTY', 116.0) == []
+
+def test_strategy_and_risk_restore_same_session_only(journal_path, tmp_path):
+    strategy = MainStrategy(None, None)
+    strategy.zones = {'upper_zone': 102.5, 'middle_zone': 100.0, 'lower_zone': 97.5}
+    strategy.gates_status = {'ce_gate': True, 'pe_gate': False}
+    risk = RiskManager(None, None, db_path=str(tmp_path / 'risk.db'))
+    risk.trades_today = 3
+
+    restored = MainStrategy(None, None)
+    restored.restore_state(strategy.snapshot_state())
+    assert restored.zones == strategy.zones
+    assert restored.gates_status == {'ce_gate': True, 'pe_gate': False}
+
+    stale = strategy.snapshot_state()
+    stale['session_date'] = (datetime.now().date() - timedelta(days=1)).isoformat()
+    fresh = MainStrategy(None, None)
+    fresh.restore_state(stale)
+    assert fresh.zones is None
+
+    restored_risk = RiskManager(None, None, db_path=str(tmp_path / 'risk.db'))
+    restored_risk.restore_state(risk.snapshot_state())
+    assert restored_risk.trades_today == 3
+
+def test_restore_is_fast(journal_path, database):
+    manager = PositionManager(database, api_wrapper=None, load_state=False)
+    journal = StateJournal(journal_path)
+    journal.register('positions', manager)
+    for i in range(200):
+        manager.open_positions[f"p{i}"] = make_position(100.0 + i, 90.0 + i)
+        journal.checkpoint()
+    journal.close()
+
+    restarted = PositionManager(database, api_wrapper=None, load_state=False)
+    fresh = StateJournal(journal_path)
+    fresh.register('positions', restarted)
+    started = time.perf_counter()
+    fresh.restore()
+    assert time.perf_counter() - started < 0.25
+    assert len(restarted.open_positions) == 200
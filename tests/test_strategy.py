@@ -0,0 +1,55 @@
+import queue
+from datetime import datetime, timedelta
+from trading_bot.event import MarketEvent
+from trading_bot.strategy.main_strategy import MainStrategy
+from trading_bot.strategy.zone_calculator import ZoneCalculator
+
+OPEN = datetime(2024, 7, 18, 9, 16)
+
+def tick(price, at=OPEN, symbol='NIFTY'):
+    return MarketEvent(symbol=symbol, timestamp=at, price=price)
+
+def test_zones_from_first_tick_at_zone_time():
+    calculator = ZoneCalculator(buffer=2.5)
+    assert not calculator.should_calculate_zones(OPEN.time().replace(minute=15))
+    assert calculator.should_calculate_zones(OPEN.time())
+    zones = calculator.calculate_zones_at_916(24512.0)
+    assert zones == {'upper_zone': 24514.5, 'middle_zone': 24512.0, 'lower_zone': 24509.5}
+    assert calculator.atm_strike == 24500
+    assert not calculator.should_calculate_zones(OPEN.time())
+
+def test_crossing_signals_and_gates():
+    signals = queue.Queue()
+    strategy = MainStrategy(None, signals, zone_offset=2.5, symbol='NIFTY')
+    strategy.process_event(tick(100.0))
+    strategy.process_event(tick(103.0, OPEN + timedelta(seconds=1)))
+    signal = signals.get_nowait()
+    assert (signal.signal_type, signal.info['strategy']) == ('CE', 'nifty')
+    assert strategy.gates_status == {'ce_gate': True, 'pe_gate': False}
+
+    # Lower zone is ignored while the PE gate is closed, the middle zone reopens it
+    strategy.process_event(tick(97.0, OPEN + timedelta(seconds=2)))
+    assert signals.empty()
+    strategy.process_event(tick(100.2, OPEN + timedelta(seconds=3)))
+    assert strategy.gates_status == {'ce_gate': True, 'pe_gate': True}
+
+def test_other_symbols_are_ignored():
+    strategy = MainStrategy(None, queue.Queue(), symbol='BANKNIFTY')
+    strategy.process_event(tick(100.0))
+    assert strategy.zones is None and strategy.session_date is None
+
+def test_new_session_recalculates_zones():
+    strategy = MainStrategy(None, queue.Queue(), symbol='NIFTY')
+    strategy.process_event(tick(100.0))
+    strategy.gates_status['pe_gate'] = False
+    strategy.process_event(tick(200.0, OPEN + timedelta(days=1, minutes=-1)))
+    assert strategy.zones is None
+    assert strategy.gates_status == {'ce_gate': True, 'pe_gate': True}
+    strategy.process_event(tick(200.0, OPEN + timedelta(days=1)))
+    assert strategy.zones['middle_zone'] == 200.0
+
+def test_restored_zones_use_the_underlyings_strike_step():
+    strategy = MainStrategy(None, queue.Queue(), symbol='BANKNIFTY')
+    zones = {'upper_zone': 55062.5, 'middle_zone': 55060.0, 'lower_zone': 55057.5}
+    strategy.restore_state({'session_date': datetime.now().date().isoformat(), 'zones': zones})
+    assert strategy.zone_calculator.atm_strike == 55100
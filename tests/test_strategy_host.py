@@ -0,0 +1,87 @@
+import queue
+from datetime import datetime
+import pytest
+from trading_bot.event import MarketEvent
+from trading_bot.strategy.host import StrategyHost
+from trading_bot.strategy.main_strategy import MainStrategy
+
+class Recorder:
+    """Strategy stub that records the symbols it was handed"""
+    def __init__(self, fail=False):
+        self.seen = []
+        self.fail = fail
+
+    def process_event(self, event):
+        self.seen.append(event.symbol)
+        if self.fail:
+            raise RuntimeError("boom")
+
+def tick(symbol, price=100.0, at=None):
+    return MarketEvent(symbol=symbol, timestamp=at or datetime.now().replace(hour=9, minute=16), price=price)
+
+def test_ticks_reach_only_interested_instances():
+    host = StrategyHost()
+    nifty, nifty_wide, bank, everything = Recorder(), Recorder(), Recorder(), Recorder()
+    host.add('nifty', nifty, ['NIFTY'])
+    host.add('nifty_wide', nifty_wide, ['NIFTY'])
+    host.add('banknifty', bank, ['BANKNIFTY'])
+    host.add('all', everything)
+
+    for symbol in ('NIFTY', 'BANKNIFTY', 'FINNIFTY'):
+        host.process_event(tick(symbol))
+
+    assert nifty.seen == nifty_wide.seen == ['NIFTY']
+    assert bank.seen == ['BANKNIFTY']
+    assert everything.seen == ['NIFTY', 'BANKNIFTY', 'FINNIFTY']
+    assert host.symbols() == ['NIFTY', 'BANKNIFTY']
+
+def test_remove_and_duplicate_names():
+    host = StrategyHost()
+    nifty = Recorder()
+    host.add('nifty', nifty, ['NIFTY'])
+    with pytest.raises(ValueError):
+        host.add('nifty', Recorder(), ['NIFTY'])
+    assert host.remove('nifty') is nifty
+    host.process_event(tick('NIFTY'))
+    assert nifty.seen == [] and host.symbols() == []
+
+def test_failing_instance_does_not_starve_others():
+    host = StrategyHost()
+    healthy = Recorder()
+    host.add('broken', Recorder(fail=True), ['NIFTY'])
+    host.add('healthy', healthy, ['NIFTY'])
+    host.process_event(tick('NIFTY'))
+    assert healthy.seen == ['NIFTY']
+    assert host.errors == 1
+
+def build_host(signals):
+    host = StrategyHost()
+    for name, symbol, offset in (('nifty', 'NIFTY', 2.5), ('nifty_wide', 'NIFTY', 5.0), ('banknifty', 'BANKNIFTY', 10.0)):
+        host.add(name, MainStrategy(None, signals, zone_offset=offset, symbol=symbol, name=name), [symbol])
+    return host
+
+def test_instances_keep_independent_zones_and_survive_restore():
+    signals = queue.Queue()
+    host = build_host(signals)
+    host.process_event(tick('NIFTY', 24500.0))
+    host.process_event(tick('BANKNIFTY', 52000.0))
+    host.process_event(tick('NIFTY', 24503.0))
+
+    zones = {name: s.zones['upper_zone'] for name, s in host.instances.items()}
+    assert zones == {'nifty': 24502.5, 'nifty_wide': 24505.0, 'banknifty': 52010.0}
+    fired = signals.get_nowait()
+    assert fired.info['strategy'] == 'nifty' and signals.empty()
+
+    restored = build_host(queue.Queue())
+    restored.restore_state(host.snapshot_state())
+    assert restored.instances['nifty'].gates_status == {'ce_gate': True, 'pe_gate': False}
+    # Restored zones are kept rather than recalculated from the next tick
+    restored.process_event(tick('NIFTY', 24490.0))
+    assert restored.instances['nifty'].zones['middle_zone'] == 24500.0
+
+def test_old_single_strategy_journal_state_is_ignored():
+    host = build_host(queue.Queue())
+    legacy = MainStrategy(None, None)
+    legacy.zones = {'upper_zone': 1.0, 'middle_zone': 0.0, 'lower_zone': -1.0}
+    host.restore_state(legacy.snapshot_state())
+    assert all(s.zones is None for s in host.instances.values())
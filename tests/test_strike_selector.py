@@ -0,0 +1,79 @@
+import queue
+from datetime import datetime, timedelta
+import pytest
+from trading_bot.broker.data_handler import DataHandler
+from trading_bot.event import MarketEvent
+from trading_bot.pricing.chain import OptionChain
+from trading_bot.pricing.greeks import bs_price
+from trading_bot.strategy.main_strategy import MainStrategy
+from trading_bot.strategy.strike_selector import StrikeSelector
+
+NOW = datetime(2024, 7, 22, 10, 0)
+
+def make_chain(spot=24512.0, half_spread=0.5, now=NOW):
+    chain = OptionChain('NIFTY', now + timedelta(days=3))
+    for strike in range(24000, 25001, 50):
+        for kind in ('CE', 'PE'):
+            chain.add(f"NIFTY{strike}{kind}", strike, kind)
+    chain.on_tick('NIFTY', spot)
+    t = chain.years_to_expiry(now)
+    for symbol, row in chain.index.items():
+        premium = round(float(bs_price(spot, chain._strike[row], t, 0.065, 0.13, chain._is_call[row])), 2)
+        chain.on_tick(symbol, premium, premium - half_spread, premium + half_spread)
+    return chain
+
+def test_picks_closest_delta_per_side():
+    chain = make_chain()
+    selector = StrikeSelector(chain, target_delta=0.3)
+    assert selector.select('CE') is None
+    assert selector.update(NOW)
+    for kind in ('CE', 'PE'):
+        pick = selector.select(kind)
+        deltas = [abs(row['delta']) for row in chain.rows(now=NOW) if row['type'] == kind]
+        assert abs(abs(pick.delta) - 0.3) == pytest.approx(min(abs(d - 0.3) for d in deltas))
+        assert pick.option_type == kind and pick.spread == pytest.approx(1.0)
+    assert selector.select('CE').strike > 24512 > selector.select('PE').strike
+    # Nothing changed, so the next update is skipped
+    assert not selector.update(NOW)
+
+def test_premium_band_and_spread_filters():
+    chain = make_chain()
+    selector = StrikeSelector(chain, target_delta=0.5, premium_band=(20.0, 60.0))
+    selector.update(NOW)
+    assert 20.0 <= selector.select('CE').premium <= 60.0
+    assert abs(selector.select('CE').delta) < 0.5
+
+    selector = StrikeSelector(chain, target_delta=0.5, max_spread=2.0)
+    selector.update(NOW)
+    atm = selector.select('CE').symbol
+    chain.on_tick(atm, chain.greeks(atm, NOW)['premium'], 100.0, 110.0)  # spread widens to 10
+    selector.update(NOW)
+    assert selector.select('CE').symbol != atm
+
+    # No quotes at all: nothing qualifies under a spread limit
+    selector = StrikeSelector(make_chain(half_spread=float('nan')), max_spread=2.0)
+    selector.update(NOW)
+    assert selector.select('CE') is None and selector.select('PE') is None
+
+def test_signal_carries_the_precomputed_strike():
+    # Ticks drive reselection on the wall clock here
+    now = datetime.now()
+    selector = StrikeSelector(make_chain(now=now), target_delta=0.5)
+    selector.update(now)
+    signals = queue.Queue()
+    strategy = MainStrategy(None, signals, symbol='NIFTY', strike_selector=selector)
+    open_ = now.replace(hour=9, minute=16, second=0, microsecond=0)
+    strategy.process_event(MarketEvent(symbol='NIFTY', timestamp=open_, price=24512.0))
+    strategy.process_event(MarketEvent(symbol='NIFTY', timestamp=open_ + timedelta(seconds=1), price=24505.0))
+    signal = signals.get_nowait()
+    assert signal.signal_type == 'PE'
+    pick = selector.select('PE')
+    assert signal.info['option_symbol'] == pick.symbol and signal.info['strike'] == pick.strike
+    assert signal.info['delta'] < 0
+
+def test_data_handler_parses_best_bid_ask():
+    events = queue.Queue()
+    handler = DataHandler(None, events, ['NIFTY24500CE'])
+    handler.on_tick({'tsym': 'NIFTY24500CE', 'lp': '120.5', 'bp1': '120.30', 'sp1': '0.00'})
+    event = events.get_nowait()
+    assert (event.bid, event.ask) == (120.3, None)
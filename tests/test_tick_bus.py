@@ -0,0 +1,70 @@
+import os
+import numpy as np
+import pytest
+from trading_bot.sharding.tick_bus import TickBus, TickSubscriber
+
+SYMBOLS = ['NIFTY', 'BANKNIFTY', 'FINNIFTY']
+
+@pytest.fixture
+def bus(request):
+    bus = TickBus(SYMBOLS, capacity=16, name=f"tb_test_{os.getpid()}_{request.node.name}"[:30])
+    yield bus
+    bus.close()
+
+def test_subscriber_gets_only_its_symbols_in_order(bus):
+    nifty = TickSubscriber(SYMBOLS, ['NIFTY', 'FINNIFTY'], name=bus.name)
+    everything = TickSubscriber(SYMBOLS, name=bus.name)
+    for i in range(6):
+        assert bus.publish(SYMBOLS[i % 3], 100.0 + i, 1.0, i)
+
+    batch = nifty.poll()
+    assert [SYMBOLS[s] for s in batch['symbol']] == ['NIFTY', 'FINNIFTY', 'NIFTY', 'FINNIFTY']
+    assert batch['price'].tolist() == [100.0, 102.0, 103.0, 105.0]
+    assert len(everything.poll()) == 6
+    assert len(nifty.poll()) == 0 and nifty.lag == 0
+    nifty.close()
+    everything.close()
+
+def test_unknown_symbol_is_dropped(bus):
+    assert not bus.publish('SENSEX', 1.0, 1.0, 0)
+    assert bus.unknown_symbols == 1 and bus.head == 0
+
+def test_ring_wraps_and_lapped_reader_skips_ahead(bus):
+    reader = TickSubscriber(SYMBOLS, name=bus.name)
+    for i in range(10):
+        bus.publish('NIFTY', float(i), 0.0, i)
+    assert reader.poll()['seq'].tolist() == list(range(10))
+
+    # 40 more ticks lap the 16-slot ring; the reader resumes past the slot the writer reuses next
+    for i in range(10, 50):
+        bus.publish('NIFTY', float(i), 0.0, i)
+    seen = []
+    while True:
+        batch = reader.poll()
+        if not len(batch):
+            break
+        seen.extend(batch['seq'].tolist())
+    assert seen == list(range(35, 50))
+    assert reader.dropped == 25
+    reader.close()
+
+def test_publish_many_matches_publish(bus):
+    reader = TickSubscriber(SYMBOLS, ['BANKNIFTY'], name=bus.name)
+    for i in range(10):
+        bus.publish('NIFTY', 1.0, 0.0, i)
+    assert len(reader.poll()) == 0
+    # The feed process attaches as the writer and continues the sequence, wrapping the ring
+    writer = TickBus(SYMBOLS, name=bus.name, create=False)
+    ids = np.array([1, 0, 1, 2] * 3, dtype=np.uint32)
+    writer.publish_many(ids, np.arange(12, dtype=float), np.ones(12), np.arange(12, dtype=np.int64))
+    batch = np.concatenate([reader.poll(), reader.poll()])
+    assert batch['seq'].tolist() == [i + 10 for i in range(12) if ids[i] == 1]
+    assert batch['price'].tolist() == [float(i) for i in range(12) if ids[i] == 1]
+    writer.close()
+    reader.close()
+    # Only the creator removes the segment
+    TickSubscriber(SYMBOLS, name=bus.name).close()
+
+def test_attaching_to_missing_bus_fails():
+    with pytest.raises(FileNotFoundError):
+        TickSubscriber(SYMBOLS, name='tb_test_missing_bus')